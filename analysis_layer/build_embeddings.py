@@ -2,10 +2,15 @@
 Kuntalaki embedding-indeksin rakentaminen ChromaDB:llä.
 
 Käyttää BAAI/bge-m3 -mallia, joka on optimoitu monikieliselle tekstille.
+
+Inkrementaalinen: vain uudet tai muuttuneet momentit enkoodataan (vektorit
+sisältöosoitteisesta välimuistista) ja upsertataan node_id:n mukaan;
+poistuneet node_id:t poistetaan. --rebuild tyhjentää kokoelman ensin.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 import time
@@ -14,9 +19,9 @@ from pathlib import Path
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sentence_transformers import SentenceTransformer
-
 from analysis_layer.vector_store.chroma_store import ChromaVectorStore
+from shared.retrieval.corpus_cache import corpus_encoder, format_sync_stats
+from shared.retrieval.embedding_cache import load_query_encoder
 
 
 def load_records(jsonl_path: Path) -> list[dict]:
@@ -39,6 +44,10 @@ def build_document_text(record: dict) -> str:
 
 def main() -> None:
     """Build ChromaDB index with BGE-M3 embeddings."""
+    parser = argparse.ArgumentParser(description="Build Kuntalaki embeddings")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and recreate the collection")
+    args = parser.parse_args()
+
     base_path = Path(__file__).parent.parent
     jsonl_path = base_path / "analysis_layer" / "json" / "kuntalaki_410-2015.jsonl"
 
@@ -52,11 +61,8 @@ def main() -> None:
     records = load_records(jsonl_path)
     print(f"Loaded {len(records)} records")
 
-    # Initialize embedding model
-    print("\nLoading BAAI/bge-m3 model (this may take a moment on first run)...")
-    start_time = time.time()
-    model = SentenceTransformer("BAAI/bge-m3")
-    print(f"Model loaded in {time.time() - start_time:.1f}s")
+    # BAAI/bge-m3 is loaded on the first corpus-cache miss only
+    encoder = corpus_encoder("BAAI/bge-m3")
 
     # Prepare documents for embedding
     print("\nPreparing documents...")
@@ -93,16 +99,6 @@ def main() -> None:
             "in_force": record["in_force"],
         })
 
-    # Generate embeddings
-    print(f"\nGenerating embeddings for {len(documents)} documents...")
-    start_time = time.time()
-    embeddings = model.encode(
-        documents,
-        normalize_embeddings=True,
-        show_progress_bar=True,
-    )
-    print(f"Embeddings generated in {time.time() - start_time:.1f}s")
-
     # Initialize ChromaDB
     chroma_path = base_path / "analysis_layer" / "embeddings" / "chroma_db"
     print(f"\nInitializing ChromaDB at {chroma_path}...")
@@ -112,25 +108,18 @@ def main() -> None:
         collection_name="kuntalaki",
     )
 
-    # Clear existing data and add new
-    try:
+    if args.rebuild:
         store.delete_collection()
         store = ChromaVectorStore(
             persist_directory=chroma_path,
             collection_name="kuntalaki",
         )
-    except Exception:
-        pass  # Collection might not exist yet
 
-    print("Adding documents to ChromaDB...")
+    # Encode only new/changed texts and upsert by node_id
+    print(f"\nSyncing {len(documents)} documents...")
     start_time = time.time()
-    store.add_documents(
-        ids=ids,
-        documents=documents,
-        embeddings=embeddings.tolist(),
-        metadatas=metadatas,
-    )
-    print(f"Documents added in {time.time() - start_time:.1f}s")
+    stats = store.sync_documents(ids, documents, metadatas, encoder)
+    print(f"Synced in {time.time() - start_time:.1f}s: {format_sync_stats(stats)}")
 
     # Verify
     count = store.count()
@@ -143,6 +132,7 @@ def main() -> None:
     test_query = "kunnan talousarvion alijäämä"
     print(f"Query: '{test_query}'")
 
+    model = load_query_encoder("BAAI/bge-m3")
     query_embedding = model.encode([test_query], normalize_embeddings=True)[0]
     results = store.query(query_embedding.tolist(), n_results=3)
 
@@ -4,6 +4,10 @@ Interaktiivinen hakutyökalu Kuntalaki-indeksiin.
 Käyttö:
     python analysis_layer/query.py "kunnan talousarvion alijäämä"
     python analysis_layer/query.py --interactive
+    python analysis_layer/query.py --server "kunnan talousarvion alijäämä"
+
+--server kysyy käynnissä olevalta scripts/query_server.py:ltä, jolloin
+mallia ja ChromaDB:tä ei ladata tähän prosessiin.
 """
 
 from __future__ import annotations
@@ -15,9 +19,9 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sentence_transformers import SentenceTransformer
+from scripts.query_client import DEFAULT_SERVER_URL, QueryClient, QueryServerError
 
-from analysis_layer.vector_store.chroma_store import ChromaVectorStore
+LAW_KEY = "kuntalaki_410_2015"
 
 
 def format_result(idx: int, doc: str, meta: dict, score: float) -> str:
@@ -36,6 +40,17 @@ def format_result(idx: int, doc: str, meta: dict, score: float) -> str:
     return "\n".join(lines)
 
 
+def print_results(documents: list[str], metadatas: list[dict], distances: list[float]) -> None:
+    """Print one result list."""
+    if not documents:
+        print("Ei tuloksia.")
+        return
+
+    for i, (doc, meta, dist) in enumerate(zip(documents, metadatas, distances), 1):
+        score = 1 - dist
+        print(format_result(i, doc, meta, score))
+
+
 def search(model, store, query: str, n_results: int = 5) -> None:
     """Execute search and print results."""
     print(f"\nQuery: '{query}'")
@@ -43,24 +58,22 @@ def search(model, store, query: str, n_results: int = 5) -> None:
 
     embedding = model.encode([query], normalize_embeddings=True)[0]
     results = store.query(embedding.tolist(), n_results=n_results)
+    print_results(results["documents"][0], results["metadatas"][0], results["distances"][0])
 
-    if not results["documents"][0]:
-        print("Ei tuloksia.")
-        return
 
-    for i, (doc, meta, dist) in enumerate(
-        zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
-        ),
-        1,
-    ):
-        score = 1 - dist
-        print(format_result(i, doc, meta, score))
+def search_via_server(client: QueryClient, query: str, n_results: int = 5) -> None:
+    """Execute search on the resident query server and print results."""
+    print(f"\nQuery: '{query}'")
+    print("-" * 60)
+
+    results = client.law_results(query, {LAW_KEY: n_results}).get(LAW_KEY)
+    if results is None:
+        print(f"Server has no {LAW_KEY} index.")
+        return
+    print_results(results["documents"], results["metadatas"], results["distances"])
 
 
-def interactive_mode(model, store) -> None:
+def interactive_mode(search_fn) -> None:
     """Run interactive search loop."""
     print("\n=== Kuntalaki Semantic Search ===")
     print("Kirjoita kysely ja paina Enter. Tyhjä rivi lopettaa.\n")
@@ -71,7 +84,7 @@ def interactive_mode(model, store) -> None:
             if not query:
                 print("Lopetetaan.")
                 break
-            search(model, store, query)
+            search_fn(query)
         except KeyboardInterrupt:
             print("\nLopetetaan.")
             break
@@ -85,11 +98,34 @@ def main() -> None:
     parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("-n", "--num", type=int, default=5, help="Number of results")
     parser.add_argument("-i", "--interactive", action="store_true", help="Interactive mode")
+    parser.add_argument(
+        "--server", action="store_true",
+        help="Use a running query server instead of loading the model locally",
+    )
+    parser.add_argument("--server-url", default=DEFAULT_SERVER_URL, help="Query server URL")
     args = parser.parse_args()
 
+    if args.server:
+        client = QueryClient(args.server_url)
+        try:
+            if args.interactive:
+                interactive_mode(lambda query: search_via_server(client, query, args.num))
+            elif args.query:
+                search_via_server(client, args.query, args.num)
+            else:
+                parser.print_help()
+        except QueryServerError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        return
+
+    # Only the local path needs the model and Chroma
+    from analysis_layer.vector_store.chroma_store import ChromaVectorStore
+    from shared.retrieval.embedding_cache import load_query_encoder
+
     # Initialize
     print("Loading model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
 
     base_path = Path(__file__).parent.parent
     chroma_path = base_path / "analysis_layer" / "embeddings" / "chroma_db"
@@ -103,7 +139,7 @@ def main() -> None:
     print(f"Connected. Documents: {store.count()}")
 
     if args.interactive:
-        interactive_mode(model, store)
+        interactive_mode(lambda query: search(model, store, query, args.num))
     elif args.query:
         search(model, store, args.query, args.num)
     else:
@@ -5,12 +5,24 @@ Applies lightweight post-score boosts based on query terms.
 Boost MUST NOT exceed 5% of total score.
 
 v4: Added anchor-overlap rerank for moment disambiguation.
+
+The boost/penalty tables and anchor activation terms are compiled once into
+a single term automaton (CompiledBoostRules). One scan of the query selects
+the active rules, which become a per-section (section, moment) -> delta
+map, so each hit costs a dict lookup regardless of how many rules exist.
+Anchor lists are preprocessed once per distinct node anchor set.
+apply_query_boost_naive is the original per-hit loop, kept as the scoring
+reference for parity tests and benchmarks.
 """
 
 from __future__ import annotations
 
 import re
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+from shared.query_rules.query_context import QueryContext
+from shared.query_rules.term_automaton import TermAutomaton
 
 # v4: Activation terms for anchor overlap calculation
 ANCHOR_ACTIVATION_TERMS = [
@@ -172,6 +184,28 @@ def normalize_query_terms(query: str) -> set[str]:
     return terms
 
 
+@lru_cache(maxsize=8192)
+def compile_anchors(anchors: tuple[str, ...]) -> tuple[tuple[str, frozenset[str]], ...]:
+    """Lowercased anchors with their word sets, computed once per node anchor list."""
+    compiled = []
+    for anchor in anchors:
+        anchor_lower = anchor.lower()
+        compiled.append((anchor_lower, frozenset(anchor_lower.split())))
+    return tuple(compiled)
+
+
+def calculate_compiled_anchor_overlap(
+    query_terms: set[str] | frozenset[str],
+    compiled: Sequence[tuple[str, frozenset[str]]],
+) -> int:
+    """calculate_anchor_overlap over compile_anchors() output."""
+    count = 0
+    for anchor_lower, anchor_words in compiled:
+        if anchor_lower in query_terms or (anchor_words and anchor_words <= query_terms):
+            count += 1
+    return count
+
+
 def calculate_anchor_overlap(query_terms: set[str], anchors: list[str]) -> int:
     """Calculate number of anchor terms that appear in query."""
     count = 0
@@ -194,21 +228,177 @@ def should_use_anchor_overlap(query: str) -> bool:
     return any(term in query_lower for term in ANCHOR_ACTIVATION_TERMS)
 
 
+class QueryBoostPlan:
+    """Rules active for one query, as a lazily filled (section, moment) -> delta map."""
+
+    def __init__(
+        self,
+        by_section: dict[str, list[tuple[Optional[str], float]]],
+        use_anchor_overlap: bool,
+    ) -> None:
+        # section_id -> active (target_moment, value) in rule order (boosts, then penalties)
+        self.by_section = by_section
+        self.use_anchor_overlap = use_anchor_overlap
+        self._deltas: dict[tuple[str, str], float] = {}
+
+    def delta(self, section_id: str, moment: str) -> float:
+        """Summed boost/penalty for a hit (same summation order as the rule tables)."""
+        key = (section_id, moment)
+        cached = self._deltas.get(key)
+        if cached is not None:
+            return cached
+        boost = 0.0
+        for target_moment, value in self.by_section.get(section_id, ()):
+            if target_moment is None or moment == target_moment:
+                boost += value
+        self._deltas[key] = boost
+        return boost
+
+
+class CompiledBoostRules:
+    """BOOST_RULES, PENALTY_RULES and ANCHOR_ACTIVATION_TERMS behind one automaton."""
+
+    _ACTIVATION = -1
+
+    def __init__(
+        self,
+        boost_rules: Sequence[tuple[list[str], str, str | None, float]] = BOOST_RULES,
+        penalty_rules: Sequence[tuple[list[str], str, float]] = PENALTY_RULES,
+        activation_terms: Sequence[str] = ANCHOR_ACTIVATION_TERMS,
+    ) -> None:
+        # Rule targets in table order; penalties apply to every moment
+        self._targets: list[tuple[str, Optional[str], float]] = [
+            (section.lower(), moment, value) for _, section, moment, value in boost_rules
+        ] + [
+            (section.lower(), None, value) for _, section, value in penalty_rules
+        ]
+
+        term_rules: dict[str, list[int]] = {}
+        rule_terms = [terms for terms, *_ in boost_rules] + [terms for terms, *_ in penalty_rules]
+        # An empty term matches every query
+        self._always: set[int] = set()
+        for rule_id, terms in enumerate(rule_terms):
+            for term in terms:
+                if not term:
+                    self._always.add(rule_id)
+                    continue
+                ids = term_rules.setdefault(term, [])
+                if rule_id not in ids:
+                    ids.append(rule_id)
+        for term in activation_terms:
+            if not term:
+                self._always.add(self._ACTIVATION)
+                continue
+            term_rules.setdefault(term, []).append(self._ACTIVATION)
+
+        self._automaton = TermAutomaton(term_rules)
+        self._term_rules = list(term_rules.values())
+
+    def plan(self, query: str | QueryContext) -> QueryBoostPlan:
+        """Active rules for a query, computed once per QueryContext."""
+        context = QueryContext.of(query)
+        return context.memo(("boost_plan", id(self)), lambda: self._plan(context.normalized))
+
+    def _plan(self, query_lower: str) -> QueryBoostPlan:
+        active = set(self._always)
+        for term_id in self._automaton.find(query_lower):
+            active.update(self._term_rules[term_id])
+
+        use_anchor_overlap = self._ACTIVATION in active
+        active.discard(self._ACTIVATION)
+
+        by_section: dict[str, list[tuple[Optional[str], float]]] = {}
+        for rule_id in sorted(active):
+            section, moment, value = self._targets[rule_id]
+            by_section.setdefault(section, []).append((moment, value))
+        return QueryBoostPlan(by_section, use_anchor_overlap)
+
+
+_COMPILED: Optional[tuple[tuple[int, int, int, int, int, int], CompiledBoostRules]] = None
+
+
+def get_compiled_rules() -> CompiledBoostRules:
+    """Compiled module tables; recompiled if a table list was replaced or resized."""
+    global _COMPILED
+    key = (
+        id(BOOST_RULES), len(BOOST_RULES),
+        id(PENALTY_RULES), len(PENALTY_RULES),
+        id(ANCHOR_ACTIVATION_TERMS), len(ANCHOR_ACTIVATION_TERMS),
+    )
+    if _COMPILED is None or _COMPILED[0] != key:
+        _COMPILED = (key, CompiledBoostRules(BOOST_RULES, PENALTY_RULES, ANCHOR_ACTIVATION_TERMS))
+    return _COMPILED[1]
+
+
 def apply_query_boost(
-    query: str,
+    query: str | QueryContext,
     hits: list[dict],
     max_boost_pct: float = 0.05,
+    rules: CompiledBoostRules | None = None,
 ) -> list[dict]:
     """Apply query-time boosting to search results.
     
     Args:
-        query: The search query
+        query: The search query (or its QueryContext)
         hits: List of hit dicts with 'section_num', 'moment', 'score', optional 'anchors'
         max_boost_pct: Maximum boost as fraction of score (default 5%)
+        rules: Compiled rule tables (default: module BOOST_RULES / PENALTY_RULES)
     
     Returns:
         Updated hits list with adjusted scores, re-sorted
     """
+    context = QueryContext.of(query)
+    plan = (rules or get_compiled_rules()).plan(context)
+    
+    # v4: Query tokens + bigrams for anchor overlap
+    use_anchor_overlap = plan.use_anchor_overlap
+    query_terms = context.terms
+    
+    for hit in hits:
+        section_id = str(hit.get("section_num", "")).replace(" ", "").lower()
+        moment = str(hit.get("moment", "")).strip()
+        original_score = float(hit.get("score", 0.0))
+        
+        boost = plan.delta(section_id, moment)
+        
+        # v4: Apply anchor overlap boost
+        if use_anchor_overlap and section_id in ANCHOR_SECTIONS:
+            anchors = hit.get("anchors", [])
+            if anchors:
+                overlap_count = calculate_compiled_anchor_overlap(
+                    query_terms, compile_anchors(tuple(anchors))
+                )
+                anchor_boost = min(0.01 * overlap_count, 0.05)  # Cap at +0.05
+                boost += anchor_boost
+                hit["anchor_overlap"] = overlap_count
+        
+        # Cap boost at max_boost_pct of original score
+        max_allowed = original_score * max_boost_pct
+        if abs(boost) > max_allowed:
+            boost = max_allowed if boost > 0 else -max_allowed
+        
+        # Apply boost
+        new_score = original_score + boost
+        # v4: Clamp to 0 if penalty drops below 0
+        if new_score < 0:
+            new_score = 0.0
+        hit["score"] = round(new_score, 4)
+        hit["boost_applied"] = round(boost, 4)
+    
+    # Re-sort by score descending
+    hits.sort(key=lambda x: x.get("score", 0.0), reverse=True)
+    
+    return hits
+
+
+def apply_query_boost_naive(
+    query: str,
+    hits: list[dict],
+    max_boost_pct: float = 0.05,
+    boost_rules: Sequence[tuple[list[str], str, str | None, float]] = BOOST_RULES,
+    penalty_rules: Sequence[tuple[list[str], str, float]] = PENALTY_RULES,
+) -> list[dict]:
+    """Reference implementation of apply_query_boost (every hit x every rule x every term)."""
     query_lower = query.lower()
     
     # v4: Prepare query terms for anchor overlap
@@ -223,7 +413,7 @@ def apply_query_boost(
         boost = 0.0
         
         # Apply boost rules
-        for terms, target_section, target_moment, boost_value in BOOST_RULES:
+        for terms, target_section, target_moment, boost_value in boost_rules:
             # Check if any term is in the query
             term_match = any(term in query_lower for term in terms)
             if not term_match:
@@ -239,7 +429,7 @@ def apply_query_boost(
                 boost += boost_value
         
         # Apply penalty rules
-        for terms, target_section, penalty_value in PENALTY_RULES:
+        for terms, target_section, penalty_value in penalty_rules:
             term_match = any(term in query_lower for term in terms)
             if not term_match:
                 continue
@@ -0,0 +1,87 @@
+"""
+Parity tests: compiled query boost vs the per-hit reference implementation.
+"""
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from analysis_layer.query_boost import (
+    BOOST_RULES,
+    PENALTY_RULES,
+    CompiledBoostRules,
+    apply_query_boost,
+    apply_query_boost_naive,
+)
+
+
+QUESTIONS_PATH = Path(__file__).parent.parent.parent / "eval" / "v3" / "questions_kuntalaki_v3.json"
+
+
+@pytest.fixture
+def hits() -> list[dict]:
+    """One hit per moment of every section any rule targets, with anchors."""
+    jsonl_path = Path(__file__).parent.parent / "json" / "kuntalaki_410-2015.jsonl"
+    if not jsonl_path.exists():
+        pytest.skip("JSONL file not found - run build_kuntalaki_json.py first")
+
+    targets = {r[1] for r in BOOST_RULES} | {r[1] for r in PENALTY_RULES} | {"1", "14"}
+    result = []
+    for i, line in enumerate(jsonl_path.read_text(encoding="utf-8").strip().split("\n")):
+        record = json.loads(line)
+        if record["section_id"] not in targets:
+            continue
+        result.append({
+            "section_num": record["section_id"],
+            "moment": record["moment"],
+            "node_id": record["node_id"],
+            "score": round(0.5 + (i % 37) / 100, 4),
+            "anchors": record.get("anchors", []),
+        })
+    return result
+
+
+def _queries() -> list[str]:
+    queries = [term for rule in BOOST_RULES + PENALTY_RULES for term in rule[0]]
+    queries += ["KORONA ja kuntakonserni", "perussopimus ei yhdistyminen", "", "sisäinen valvonta ja riskit"]
+    if QUESTIONS_PATH.exists():
+        queries += [q["query"] for q in json.loads(QUESTIONS_PATH.read_text(encoding="utf-8"))]
+    return queries
+
+
+def test_compiled_boost_matches_reference(hits: list[dict]) -> None:
+    for query in _queries():
+        expected = apply_query_boost_naive(query, copy.deepcopy(hits))
+        actual = apply_query_boost(query, copy.deepcopy(hits))
+        assert actual == expected, query
+
+
+def test_boost_is_capped_at_five_percent() -> None:
+    hits = [{"section_num": "62", "moment": "1", "score": 0.6}]
+
+    boosted = apply_query_boost("kuntayhtymän eroaminen", hits)
+
+    assert boosted[0]["boost_applied"] == 0.03
+    assert boosted[0]["score"] == 0.63
+
+
+def test_custom_rule_tables() -> None:
+    boost_rules = [(["testitermi"], "999", "2", 0.02)]
+    penalty_rules = [(["testitermi"], "998", -0.01)]
+    rules = CompiledBoostRules(boost_rules, penalty_rules, [])
+    hits = [
+        {"section_num": "999", "moment": "2", "score": 0.9},
+        {"section_num": "999", "moment": "1", "score": 0.9},
+        {"section_num": "998", "moment": "1", "score": 0.9},
+    ]
+
+    expected = apply_query_boost_naive("testitermi", copy.deepcopy(hits), 0.05, boost_rules, penalty_rules)
+    actual = apply_query_boost("testitermi", copy.deepcopy(hits), rules=rules)
+
+    assert actual == expected
+    assert [h["boost_applied"] for h in actual] == [0.02, 0.0, -0.01]
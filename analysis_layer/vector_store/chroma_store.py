@@ -56,6 +56,50 @@ class ChromaVectorStore:
             embeddings: Pre-computed embeddings
             metadatas: Metadata for each document
         """
+        self.collection.add(
+            ids=ids,
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=self._clean_metadatas(metadatas),
+        )
+
+    def sync_documents(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        encoder: Any,
+        batch_size: int = 32,
+    ) -> dict[str, int]:
+        """Incrementally bring the collection in line with the given records.
+
+        Only new or changed documents are encoded (via the corpus embedding
+        cache) and upserted; ids that are no longer present are deleted.
+
+        Args:
+            ids: Unique identifiers for each document
+            documents: Text content of each document
+            metadatas: Metadata for each document
+            encoder: Corpus encoder (shared.retrieval.corpus_cache.corpus_encoder)
+            batch_size: Encode batch size for cache misses
+
+        Returns:
+            Counts of added / updated / deleted / unchanged / encoded documents
+        """
+        from shared.retrieval.corpus_cache import sync_collection
+
+        return sync_collection(
+            self.collection,
+            ids,
+            documents,
+            self._clean_metadatas(metadatas),
+            encoder,
+            batch_size=batch_size,
+        )
+
+    @staticmethod
+    def _clean_metadatas(metadatas: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Coerce metadata values to types ChromaDB accepts."""
         # ChromaDB requires metadata values to be str, int, float, or bool
         clean_metadatas = []
         for meta in metadatas:
@@ -68,13 +112,7 @@ class ChromaVectorStore:
                 else:
                     clean_meta[k] = str(v)
             clean_metadatas.append(clean_meta)
-
-        self.collection.add(
-            ids=ids,
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=clean_metadatas,
-        )
+        return clean_metadatas
 
     def query(
         self,
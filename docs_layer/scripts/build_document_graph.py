@@ -319,7 +319,7 @@ def _process_sections(
     return nodes, edges
 
 
-def write_graph(nodes: list[DocNode], edges: list[DocEdge], output_dir: Path) -> None:
+def write_graph(nodes: list[DocNode], edges: list[DocEdge], output_dir: Path, verbose: bool = True) -> None:
     """Write graph to JSONL files."""
     output_dir.mkdir(parents=True, exist_ok=True)
     
@@ -334,8 +334,9 @@ def write_graph(nodes: list[DocNode], edges: list[DocEdge], output_dir: Path) ->
         for edge in edges:
             f.write(json.dumps(edge, ensure_ascii=False) + "\n")
     
-    print(f"Wrote {len(nodes)} nodes to {nodes_path}")
-    print(f"Wrote {len(edges)} edges to {edges_path}")
+    if verbose:
+        print(f"Wrote {len(nodes)} nodes to {nodes_path}")
+        print(f"Wrote {len(edges)} edges to {edges_path}")
     
     # Write summary
     summary = {
@@ -357,7 +358,8 @@ def write_graph(nodes: list[DocNode], edges: list[DocEdge], output_dir: Path) ->
     with open(summary_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
     
-    print(f"Summary: {summary_path}")
+    if verbose:
+        print(f"Summary: {summary_path}")
 
 
 def main() -> None:
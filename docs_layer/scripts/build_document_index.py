@@ -3,23 +3,36 @@
 v9.1: Build Document Index for financial statements.
 
 Indexes document graph nodes (PARA, TABLE, SECTION) into ChromaDB for
-hybrid retrieval.
+hybrid retrieval. Rebuilds are incremental: only new or changed node texts
+are encoded (vectors come from the content-addressed corpus cache) and
+upserted by node_id; nodes that disappeared are deleted. The collection
+is also exported to a dense snapshot (dense_index.npz next to the Chroma
+files) that DocumentIndexRegistry loads instead of opening a client.
 
 Usage:
     python docs_layer/scripts/build_document_index.py --graph <graph_dir> --output <chroma_dir>
+    python docs_layer/scripts/build_document_index.py --graph <graph_dir> --output <chroma_dir> --rebuild
 """
 
 import argparse
 import json
+import sys
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
 try:
     import chromadb
-    from sentence_transformers import SentenceTransformer
+    import sentence_transformers  # noqa: F401  (loaded lazily on cache misses)
 except ImportError:
     print("Install: pip install chromadb sentence-transformers")
     exit(1)
 
+from shared.documents.registry import SNAPSHOT_NAME, write_snapshot
+from shared.retrieval.corpus_cache import SyncStats, corpus_encoder, format_sync_stats, sync_collection
+from shared.retrieval.embedding_cache import CachedQueryEncoder
+
 
 # Indexable node types (skip DOC, PAGE which are structural only)
 INDEXABLE_TYPES = {"SECTION", "PARA", "TABLE", "ROW", "METRIC"}
@@ -100,32 +113,8 @@ def build_metadata(node: dict) -> dict:
     }
 
 
-def build_index(
-    nodes: list[dict],
-    output_dir: Path,
-    collection_name: str,
-    model: SentenceTransformer,
-) -> None:
-    """Build ChromaDB index from document nodes."""
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Initialize ChromaDB
-    client = chromadb.PersistentClient(path=str(output_dir))
-    
-    # Delete existing collection if exists
-    try:
-        client.delete_collection(collection_name)
-    except Exception:
-        pass
-    
-    collection = client.create_collection(
-        name=collection_name,
-        metadata={"hnsw:space": "cosine"},
-    )
-    
-    print(f"Building index for {len(nodes)} nodes...")
-    
-    # Prepare data
+def build_records(nodes: list[dict]) -> tuple[list[str], list[str], list[dict]]:
+    """ids, texts to embed and Chroma metadata of the nodes with enough text."""
     ids: list[str] = []
     documents: list[str] = []
     metadatas: list[dict] = []
@@ -139,26 +128,55 @@ def build_index(
         documents.append(doc_text)
         metadatas.append(build_metadata(node))
     
-    print(f"Generating embeddings for {len(documents)} documents...")
+    return ids, documents, metadatas
+
+
+def build_index(
+    nodes: list[dict],
+    output_dir: Path,
+    collection_name: str,
+    encoder: CachedQueryEncoder,
+    rebuild: bool = False,
+) -> None:
+    """Build or incrementally update the ChromaDB index from document nodes."""
+    print(f"Building index for {len(nodes)} nodes...")
+    ids, documents, metadatas = build_records(nodes)
+    
+    print(f"Syncing {len(documents)} documents...")
+    write_index(ids, documents, metadatas, output_dir, collection_name, encoder, rebuild)
+
+
+def write_index(
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[dict],
+    output_dir: Path,
+    collection_name: str,
+    encoder: CachedQueryEncoder,
+    rebuild: bool = False,
+    verbose: bool = True,
+) -> SyncStats:
+    """Sync the records into the collection and write the summary and dense snapshot."""
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Generate embeddings in batches
-    batch_size = 64
-    all_embeddings: list[list[float]] = []
+    # Initialize ChromaDB
+    client = chromadb.PersistentClient(path=str(output_dir))
     
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i : i + batch_size]
-        embeddings = model.encode(batch, normalize_embeddings=True)
-        all_embeddings.extend(embeddings.tolist())
+    if rebuild:
+        try:
+            client.delete_collection(collection_name)
+        except Exception:
+            pass
     
-    # Add to collection
-    collection.add(
-        ids=ids,
-        embeddings=all_embeddings,
-        documents=documents,
-        metadatas=metadatas,
+    collection = client.get_or_create_collection(
+        name=collection_name,
+        metadata={"hnsw:space": "cosine"},
     )
     
-    print(f"Indexed {len(ids)} documents to {output_dir}")
+    stats = sync_collection(collection, ids, documents, metadatas, encoder, batch_size=64)
+    
+    if verbose:
+        print(f"Indexed {len(ids)} documents to {output_dir}: {format_sync_stats(stats)}")
     
     # Write summary
     summary = {
@@ -174,7 +192,18 @@ def build_index(
     with open(summary_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
     
-    print(f"Summary: {summary_path}")
+    if verbose:
+        print(f"Summary: {summary_path}")
+    
+    snapshot_path = output_dir / SNAPSHOT_NAME
+    if ids:
+        count = write_snapshot(collection, snapshot_path)
+        if verbose:
+            print(f"Snapshot: {snapshot_path} ({count} vectors)")
+    elif snapshot_path.exists():
+        snapshot_path.unlink()
+    
+    return stats
 
 
 def main() -> None:
@@ -182,6 +211,7 @@ def main() -> None:
     parser.add_argument("--graph", "-g", required=True, help="Path to graph directory")
     parser.add_argument("--output", "-o", required=True, help="Output directory for ChromaDB")
     parser.add_argument("--collection", "-c", default="documents", help="Collection name")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and recreate the collection")
     args = parser.parse_args()
     
     graph_dir = Path(args.graph)
@@ -198,10 +228,10 @@ def main() -> None:
     indexable = filter_indexable_nodes(nodes)
     print(f"Indexable nodes: {len(indexable)}")
     
-    print("\nLoading embedding model (BAAI/bge-m3)...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    # BAAI/bge-m3 is loaded on the first corpus-cache miss only
+    encoder = corpus_encoder("BAAI/bge-m3")
     
-    build_index(indexable, output_dir, args.collection, model)
+    build_index(indexable, output_dir, args.collection, encoder, rebuild=args.rebuild)
     
     print("\nDone!")
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+v11.1: Build the columnar table store of parsed financial statements.
+
+Flattens the tables of every docs_layer/data/<city>/<year>/parsed/*.json
+into one TableStore (shared/documents/table_store.py): NumPy columns for
+city, year, page, section, table title, row name and the parsed current /
+previous year values, plus an inverted token index on row names and table
+titles. run_v11_finance_eval.py searches the store instead of walking the
+JSON on every run.
+
+Usage:
+    python docs_layer/scripts/build_table_store.py
+    python docs_layer/scripts/build_table_store.py --data docs_layer/data --output docs_layer/data/table_store.npz
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from shared.documents.table_store import TableStore
+
+
+DATA_DIR = PROJECT_ROOT / "docs_layer" / "data"
+TABLE_STORE_PATH = DATA_DIR / "table_store.npz"
+
+
+def find_parsed_documents(data_dir: Path) -> list[Path]:
+    """Parsed statement JSON files of every <city>/<year> bundle, sorted."""
+    return sorted(data_dir.glob("*/*/parsed/*.json"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the financial table store")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="Root of the <city>/<year> bundles")
+    parser.add_argument("--output", "-o", type=Path, default=TABLE_STORE_PATH, help="Output .npz file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("v11.1: Build Table Store")
+    print("=" * 60)
+
+    paths = find_parsed_documents(args.data)
+    if not paths:
+        print(f"Error: no parsed documents under {args.data}/<city>/<year>/parsed/")
+        return
+
+    start = time.perf_counter()
+    store = TableStore.from_parsed_files(paths)
+    store.save(args.output)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\nDocuments: {len(paths)}")
+    for path in paths:
+        print(f"  - {path.relative_to(args.data)}")
+    print(f"Cities: {len(store.cities)}")
+    print(f"Tables: {store.n_tables}")
+    print(f"Rows: {len(store)}")
+    print(f"Store: {args.output} ({elapsed_ms:.1f} ms)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+v11.2: Bulk ingest of parsed financial statements into city/year bundles.
+
+build_document_graph.py and build_document_index.py handle one statement
+per invocation. This command ingests a whole directory tree of
+tilinpaatos_*.json files (one city and year each) into
+docs_layer/data/<city>/<year>/:
+
+1. Every input is hashed (sha256 of the file, INGEST_VERSION and the
+   model). Inputs whose hash matches ingest_manifest.json and whose bundle
+   still has an index are skipped, so an interrupted or repeated run only
+   does the remaining work.
+2. A process pool reads the city and year of every input first; inputs
+   that share a city/year bundle are reported and none of them is
+   ingested, so no two workers ever write the same bundle. An input for a
+   bundle that was ingested earlier from another path replaces that input
+   (manifest entry and parsed/ copy) when the old one is no longer among
+   the inputs, and is rejected when it still is. The pool then
+   validates each remaining input, builds its document graph
+   (graph/*.jsonl + graph_summary.json), copies it to parsed/ and returns
+   the indexable node records.
+3. The main process streams the records of finished bundles into one
+   BucketedCorpusEncoder: misses of many bundles are encoded together in
+   length-sorted batches (shared/retrieval/bucket_encoder.py) while the
+   pool keeps parsing.
+4. Each bundle whose texts are encoded is synced into its Chroma
+   collection "<city>_<year>" (embeddings/, no re-encoding), with
+   index_summary.json and the dense snapshot, and recorded in the manifest.
+5. The table store (build_table_store.py) is rebuilt if any parsed file
+   changed.
+
+The report gives documents/sec (statements) and records/sec overall and
+the time spent per stage.
+
+Usage:
+    python docs_layer/scripts/ingest_documents.py --input <dir>
+    python docs_layer/scripts/ingest_documents.py --input <dir> --data docs_layer/data --workers 4
+    python docs_layer/scripts/ingest_documents.py --input <dir> --force   # ignore the manifest
+"""
+
+import argparse
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    import chromadb  # noqa: F401  (used by build_document_index.write_index)
+    import sentence_transformers  # noqa: F401  (loaded lazily on cache misses)
+except ImportError:
+    print("Install: pip install chromadb sentence-transformers")
+    exit(1)
+
+from docs_layer.scripts.build_document_graph import build_graph, parse_structured_json, write_graph
+from docs_layer.scripts.build_document_index import build_records, filter_indexable_nodes, write_index
+from docs_layer.scripts.build_table_store import TABLE_STORE_PATH, find_parsed_documents
+from shared.documents.registry import DOC_DATA_DIR, DocumentBundle
+from shared.documents.table_store import TableStore
+from shared.retrieval.bucket_encoder import (
+    DEFAULT_FLUSH_TEXTS,
+    DEFAULT_MAX_BATCH,
+    DEFAULT_MAX_BATCH_CHARS,
+    BucketedCorpusEncoder,
+)
+from shared.retrieval.corpus_cache import corpus_encoder, format_sync_stats
+
+
+# Bump when graph building or indexing changes, so every bundle is ingested again
+INGEST_VERSION = 1
+
+MODEL_NAME = "BAAI/bge-m3"
+INPUT_PATTERN = "tilinpaatos_*.json"
+MANIFEST_NAME = "ingest_manifest.json"
+
+
+def find_inputs(input_dir: Path) -> list[Path]:
+    """tilinpaatos_*.json files anywhere under input_dir, sorted."""
+    return sorted(input_dir.rglob(INPUT_PATTERN))
+
+
+def input_hash(path: Path, model_name: str = MODEL_NAME) -> str:
+    """sha256 of the file contents, INGEST_VERSION and the embedding model."""
+    digest = hashlib.sha256(f"{INGEST_VERSION}\x00{model_name}\x00".encode("utf-8"))
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    """Ingested inputs by resolved path ({} when there is no manifest)."""
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path: Path, manifest: dict[str, dict]) -> None:
+    """Write the manifest atomically; a partial file is never left behind."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def current_digests(manifest: dict[str, dict], data_dir: Path) -> set[str]:
+    """
+    Input hashes already ingested into a bundle that still has an index.
+
+    Matching by hash rather than path also skips the copies in parsed/ and
+    input trees that were moved.
+    """
+    return {
+        entry["sha256"] for entry in manifest.values()
+        if DocumentBundle(entry["city"], entry["year"], data_dir / entry["city"] / str(entry["year"])).has_index
+    }
+
+
+def earlier_inputs(manifest: dict[str, dict], city: str, year: int, key: str) -> list[str]:
+    """Manifest keys of other inputs already ingested into the city/year bundle."""
+    return sorted(
+        other for other, entry in manifest.items()
+        if other != key and entry["city"] == city and entry["year"] == year
+    )
+
+
+def read_bundle_key(input_path: str) -> tuple[str, int]:
+    """(city, year) bundle of one statement (runs in a worker process)."""
+    data = parse_structured_json(Path(input_path))
+    return str(data["city"]), int(data["year"])
+
+
+def build_bundle(input_path: str, data_dir: str) -> dict:
+    """
+    Graph and index records of one statement (runs in a worker process).
+
+    Writes <data_dir>/<city>/<year>/graph/ and parsed/<name>; returns the
+    bundle location, graph counts and the (ids, documents, metadatas)
+    records to index.
+    """
+    start = time.perf_counter()
+    source = Path(input_path)
+    data = parse_structured_json(source)
+    city, year = str(data["city"]), int(data["year"])
+    root = Path(data_dir) / city / str(year)
+
+    nodes, edges = build_graph(data)
+    write_graph(nodes, edges, root / "graph", verbose=False)
+
+    parsed_path = root / "parsed" / source.name
+    # An identical copy is left alone so the table store still covers it
+    if not (parsed_path.exists() and filecmp.cmp(source, parsed_path, shallow=False)):
+        parsed_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, parsed_path)
+
+    ids, documents, metadatas = build_records(filter_indexable_nodes(nodes))
+    return {
+        "input": input_path,
+        "city": city,
+        "year": year,
+        "root": str(root),
+        "nodes": len(nodes),
+        "edges": len(edges),
+        "records": (ids, documents, metadatas),
+        "graph_s": time.perf_counter() - start,
+    }
+
+
+def update_table_store(data_dir: Path, store_path: Path) -> str:
+    """Rebuild the table store unless it already covers every parsed file."""
+    paths = find_parsed_documents(data_dir)
+    if store_path.exists() and TableStore.load(store_path).covers(paths):
+        return "up to date"
+    store = TableStore.from_parsed_files(paths)
+    store.save(store_path)
+    return f"{len(store)} rows from {len(paths)} documents"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk ingest of financial statements")
+    parser.add_argument("--input", "-i", type=Path, required=True, help=f"Directory tree of {INPUT_PATTERN} files")
+    parser.add_argument("--data", type=Path, default=DOC_DATA_DIR, help="Root of the <city>/<year> bundles")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for parsing and graph building")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MAX_BATCH, help="Texts per encode call at most")
+    parser.add_argument("--batch-chars", type=int, default=DEFAULT_MAX_BATCH_CHARS,
+                        help="Padded characters per encode call at most")
+    parser.add_argument("--flush-texts", type=int, default=DEFAULT_FLUSH_TEXTS,
+                        help="Buffered texts (over all bundles) that trigger encoding")
+    parser.add_argument("--force", action="store_true", help="Ingest every input, ignoring the manifest")
+    parser.add_argument("--no-table-store", action="store_true", help="Do not update the table store")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("v11.2: Bulk Document Ingest")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    inputs = find_inputs(args.input)
+    if not inputs:
+        print(f"Error: no {INPUT_PATTERN} files under {args.input}")
+        return
+
+    manifest_path = args.data / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    ingested = set() if args.force else current_digests(manifest, args.data)
+    digests: dict[str, str] = {}
+    todo: list[str] = []
+    for path in inputs:
+        key = str(path.resolve())
+        digests[key] = input_hash(path)
+        if digests[key] not in ingested:
+            todo.append(key)
+    print(f"\nInputs: {len(inputs)} ({len(inputs) - len(todo)} unchanged, {len(todo)} to ingest)")
+
+    encoder = BucketedCorpusEncoder(
+        corpus_encoder(MODEL_NAME),
+        max_batch=args.batch_size,
+        max_batch_chars=args.batch_chars,
+        flush_texts=args.flush_texts,
+    )
+    waiting: dict[str, dict] = {}
+    replaces: dict[str, list[str]] = {}
+    failed: list[str] = []
+    totals = {"bundles": 0, "nodes": 0, "records": 0, "graph_s": 0.0, "index_s": 0.0}
+
+    def write_bundles(keys: list[str]) -> None:
+        """Index the bundles whose texts are encoded and record them in the manifest."""
+        for key in keys:
+            result = waiting.pop(key)
+            index_start = time.perf_counter()
+            ids, documents, metadatas = result["records"]
+            stats = write_index(
+                ids, documents, metadatas,
+                Path(result["root"]) / "embeddings",
+                f"{result['city']}_{result['year']}",
+                encoder.encoder,
+                verbose=False,
+            )
+            totals["index_s"] += time.perf_counter() - index_start
+            totals["bundles"] += 1
+            totals["records"] += len(ids)
+            manifest[key] = {
+                "sha256": digests[key],
+                "city": result["city"],
+                "year": result["year"],
+                "nodes": result["nodes"],
+                "edges": result["edges"],
+                "indexed": len(ids),
+            }
+            # The replaced input's copy would keep its rows in the table store
+            for old in replaces.get(key, []):
+                manifest.pop(old, None)
+                if Path(old).name != Path(key).name:
+                    (Path(result["root"]) / "parsed" / Path(old).name).unlink(missing_ok=True)
+                print(f"  {result['city']}:{result['year']}: replaces {old}")
+            save_manifest(manifest_path, manifest)
+            print(f"  {result['city']}:{result['year']}: {result['nodes']} nodes, {format_sync_stats(stats)}")
+
+    if todo:
+        print(f"\nIngesting with {args.workers} workers...")
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            # Bundle of every input before any is built, so duplicates never race
+            inputs_of: dict[tuple[str, int], list[str]] = {}
+            key_futures = {pool.submit(read_bundle_key, key): key for key in todo}
+            for future in as_completed(key_futures):
+                key = key_futures[future]
+                try:
+                    inputs_of.setdefault(future.result(), []).append(key)
+                except Exception as e:
+                    print(f"  Warning: {key}: {e}")
+                    failed.append(key)
+            # An earlier input stays while it (or a copy, e.g. in parsed/) is still an input
+            pending = set(todo)
+            unchanged = {digest for path, digest in digests.items() if path not in pending}
+            for (city, year), keys in sorted(inputs_of.items()):
+                if len(keys) > 1:
+                    # Neither is trusted until the input tree is fixed
+                    print(f"  Warning: {city}:{year} is in {len(keys)} inputs, none ingested: {', '.join(sorted(keys))}")
+                    failed.extend(keys)
+                    continue
+                key = keys[0]
+                earlier = earlier_inputs(manifest, city, year, key)
+                kept = [old for old in earlier if manifest[old]["sha256"] in unchanged]
+                if kept:
+                    print(f"  Warning: {key}: {city}:{year} was already ingested from {kept[0]}, "
+                          "which is still an input; remove one of them")
+                    failed.append(key)
+                    continue
+                replaces[key] = earlier
+            skipped = set(failed)
+            buildable = [key for key in todo if key not in skipped]
+
+            futures = {pool.submit(build_bundle, key, str(args.data)): key for key in buildable}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"  Warning: {key}: {e}")
+                    failed.append(key)
+                    continue
+                totals["nodes"] += result["nodes"]
+                totals["graph_s"] += result["graph_s"]
+                waiting[key] = result
+                write_bundles(encoder.submit(key, result["records"][1]))
+        write_bundles(encoder.flush())
+
+    table_store = "skipped"
+    if not args.no_table_store:
+        table_store = update_table_store(args.data, args.data / TABLE_STORE_PATH.name)
+
+    elapsed = time.perf_counter() - start
+    encode = encoder.stats()
+    print("\n" + "=" * 60)
+    print("Throughput")
+    print("=" * 60)
+    print(f"  Documents:      {totals['bundles']} ingested, {len(inputs) - len(todo)} skipped, {len(failed)} failed")
+    print(f"  Wall time:      {elapsed:.1f} s ({totals['bundles'] / elapsed:.2f} documents/sec, "
+          f"{totals['records'] / elapsed:.0f} records/sec)")
+    print(f"  Graph (pool):   {totals['nodes']} nodes, {totals['graph_s']:.1f} s of worker time")
+    print(f"  Encode:         {encode['encoded']}/{encode['texts']} texts encoded in {encode['batches']} batches, "
+          f"{encode['encode_s']:.1f} s")
+    print(f"  Index write:    {totals['records']} records, {totals['index_s']:.1f} s")
+    print(f"  Table store:    {table_store}")
+    print(f"  Manifest:       {manifest_path}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,25 +5,57 @@ v9.2: Law↔Document Mapping Engine
 Maps legal nodes (from v8 legal graph) to document nodes (from v9 doc graph).
 Creates mapping edges: REQUIRES_DISCLOSURE, GOVERNS, EVIDENCED_BY, RISK_FLAG.
 
+map_laws_to_documents encodes the mapping queries of all law hits in one
+batched encode and searches the document index once for all of them.
+With the legal graph snapshot it also attaches each hit's precomputed
+SIMILAR_TO neighbours (no extra embedding work) and applies their mapping
+rules when the hit itself has none.
+
+The document index is any set of docs_layer/data/<city>/<year> bundles
+(--scope, default: all), opened lazily through DocumentIndexRegistry, or
+a single index directory given with --doc-index.
+
 Usage:
+    python docs_layer/scripts/map_law_to_doc.py --law-hits <hits_json> --scope lapua:2023 --output <output_json>
     python docs_layer/scripts/map_law_to_doc.py --law-hits <hits_json> --doc-index <chroma_dir> --output <output_json>
     
     # Interactive mode:
-    python docs_layer/scripts/map_law_to_doc.py --interactive --doc-index <chroma_dir>
+    python docs_layer/scripts/map_law_to_doc.py --interactive --scope lapua
 """
 
 import argparse
 import json
+import sys
 from pathlib import Path
 from typing import TypedDict
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
 try:
-    import chromadb
+    import chromadb  # noqa: F401  (opened by the registry for bundles without a snapshot)
     from sentence_transformers import SentenceTransformer
 except ImportError:
     print("Install: pip install chromadb sentence-transformers")
     exit(1)
 
+from shared.documents.registry import (
+    DOC_DATA_DIR,
+    DocumentBundle,
+    DocumentIndexRegistry,
+    Scope,
+    ScopedCollection,
+    discover_bundles,
+    parse_scope,
+)
+from shared.graph.csr import CsrGraph
+from shared.graph.snapshot import load_graph
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.pipeline import RetrievalPipeline
+
+GRAPH_DIR = PROJECT_ROOT / "graph"
+
 
 class MappingEdge(TypedDict):
     """Edge connecting law node to document node."""
@@ -41,8 +73,12 @@ class EvidenceBundle(TypedDict):
     law_section: str
     doc_nodes: list[dict]
     mapping_edges: list[MappingEdge]
+    similar_law_nodes: list[dict]  # SIMILAR_TO neighbours of the law node
 
 
+MIN_EVIDENCE_SCORE = 0.30
+SIMILAR_LAW_NODES = 3
+
 # Mapping rules: law section patterns to document section patterns
 # These are deterministic rules for known mappings
 MAPPING_RULES = {
@@ -84,33 +120,30 @@ MAPPING_RULES = {
 }
 
 
-def load_document_index(chroma_dir: Path, collection_name: str = "lapua_2023"):
-    """Load ChromaDB document index."""
-    client = chromadb.PersistentClient(path=str(chroma_dir))
-    collection = client.get_collection(collection_name)
-    return client, collection
+def load_document_index(
+    chroma_dir: Path | None = None,
+    scopes: list[Scope] | None = None,
+) -> tuple[DocumentIndexRegistry, ScopedCollection]:
+    """
+    Document index over chroma_dir, or over the docs_layer/data bundles of scopes.
+    
+    Args:
+        chroma_dir: A single index directory (.../<city>/<year>/embeddings)
+        scopes: (city, year) scopes of discovered bundles (None: all)
+    """
+    bundles = [DocumentBundle.from_index_dir(chroma_dir)] if chroma_dir else discover_bundles()
+    registry = DocumentIndexRegistry(bundles)
+    if not registry.bundles:
+        raise FileNotFoundError(f"No document index in {chroma_dir or DOC_DATA_DIR}")
+    return registry, registry.collection(scopes)
 
 
-def find_document_evidence(
-    query: str,
-    collection,
-    model: SentenceTransformer,
-    k: int = 5,
-    min_score: float = 0.30,
-) -> list[dict]:
-    """Find document nodes matching a query."""
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
-    
-    results = collection.query(
-        query_embeddings=[embedding],
-        n_results=k,
-        include=["documents", "metadatas", "distances"],
-    )
-    
+def _evidence_hits(results: dict, row: int, min_score: float) -> list[dict]:
+    """Document hits of one query row of a Chroma result."""
     hits = []
-    for i, doc_id in enumerate(results["ids"][0]):
+    for i, doc_id in enumerate(results["ids"][row]):
         # ChromaDB returns distance, convert to similarity
-        distance = results["distances"][0][i]
+        distance = results["distances"][row][i]
         score = 1 - distance  # Cosine similarity
         
         if score < min_score:
@@ -119,13 +152,34 @@ def find_document_evidence(
         hits.append({
             "doc_node_id": doc_id,
             "score": score,
-            "text": results["documents"][0][i],
-            "metadata": results["metadatas"][0][i],
+            "text": results["documents"][row][i],
+            "metadata": results["metadatas"][row][i],
         })
     
     return hits
 
 
+def find_document_evidence(
+    query: str,
+    collection,
+    model: SentenceTransformer,
+    k: int = 5,
+    min_score: float = MIN_EVIDENCE_SCORE,
+    embedding: list[float] | None = None,
+) -> list[dict]:
+    """Find document nodes matching a query (or its precomputed embedding)."""
+    if embedding is None:
+        embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    
+    results = collection.query(
+        query_embeddings=[embedding],
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+    )
+    
+    return _evidence_hits(results, 0, min_score)
+
+
 def apply_mapping_rules(
     law_node_id: str,
     doc_hits: list[dict],
@@ -156,6 +210,39 @@ def apply_mapping_rules(
     return edges
 
 
+def similar_law_nodes(law_node_id: str, graph: CsrGraph | None, k: int = SIMILAR_LAW_NODES) -> list[dict]:
+    """Precomputed SIMILAR_TO neighbours of a law node ([] without graph or table)."""
+    if graph is None:
+        return []
+    vertex = graph.index.get(law_node_id)
+    if vertex is None:
+        return []
+    return [
+        {"node_id": graph.ids[v], "law_key": graph.law_key[v], "score": score}
+        for v, score in graph.similar_to(vertex)[:k]
+    ]
+
+
+def load_law_graph() -> CsrGraph | None:
+    """Legal graph for SIMILAR_TO lookups, or None when it has not been built."""
+    try:
+        return load_graph(GRAPH_DIR)
+    except FileNotFoundError:
+        print("Warning: legal graph not built, mapping without SIMILAR_TO neighbours")
+        return None
+
+
+def law_hit_query(law_hit: dict) -> str:
+    """Document search text derived from a law hit (title + start of text)."""
+    query_parts = []
+    if law_hit.get("section_title"):
+        query_parts.append(law_hit["section_title"])
+    if law_hit.get("text"):
+        query_parts.append(law_hit["text"][:200])
+    
+    return " ".join(query_parts)
+
+
 def map_law_to_document(
     law_hit: dict,
     collection,
@@ -174,22 +261,60 @@ def map_law_to_document(
     Returns:
         EvidenceBundle with document nodes and mapping edges
     """
-    # Build query from law hit
-    query_parts = []
-    if law_hit.get("section_title"):
-        query_parts.append(law_hit["section_title"])
-    if law_hit.get("text"):
-        query_parts.append(law_hit["text"][:200])
+    return map_laws_to_documents([law_hit], collection, RetrievalPipeline(model), k)[0]
+
+
+def map_laws_to_documents(
+    law_hits: list[dict],
+    collection,
+    pipeline: RetrievalPipeline,
+    k: int = 5,
+    graph: CsrGraph | None = None,
+) -> list[EvidenceBundle]:
+    """
+    Map all law hits of a question to document evidence.
     
-    query = " ".join(query_parts)
+    The derived queries are encoded in one batched call and sent to the
+    document index as one multi-row query. With graph, semantic neighbours
+    come from its SIMILAR_TO table.
+    """
+    if not law_hits:
+        return []
     
-    # Find document evidence
-    doc_hits = find_document_evidence(query, collection, model, k)
+    embeddings = pipeline.encode_batch([law_hit_query(h) for h in law_hits])
+    results = collection.query(
+        query_embeddings=embeddings,
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+    )
+    
+    return [
+        _build_bundle(
+            law_hit,
+            _evidence_hits(results, row, MIN_EVIDENCE_SCORE),
+            similar_law_nodes(law_hit.get("node_id", ""), graph),
+        )
+        for row, law_hit in enumerate(law_hits)
+    ]
+
+
+def _build_bundle(law_hit: dict, doc_hits: list[dict], similar: list[dict] | None = None) -> EvidenceBundle:
+    """Mapping edges for one law hit and its document hits."""
+    similar = similar or []
     
     # Apply mapping rules
     law_node_id = law_hit.get("node_id", "")
     mapping_edges = apply_mapping_rules(law_node_id, doc_hits)
     
+    # Rules of the closest semantic neighbour that has any
+    for neighbor in similar:
+        if mapping_edges:
+            break
+        mapping_edges = apply_mapping_rules(neighbor["node_id"], doc_hits)
+        for edge in mapping_edges:
+            edge["law_node_id"] = law_node_id
+            edge["context"] += f" (via SIMILAR_TO {neighbor['node_id']})"
+    
     # If no rule matches, create generic mappings based on score
     if not mapping_edges and doc_hits:
         for hit in doc_hits[:3]:
@@ -207,20 +332,22 @@ def map_law_to_document(
         "law_section": law_hit.get("section_title", ""),
         "doc_nodes": doc_hits,
         "mapping_edges": mapping_edges,
+        "similar_law_nodes": similar,
     }
 
 
-def interactive_mode(chroma_dir: Path) -> None:
+def interactive_mode(chroma_dir: Path | None, scopes: list[Scope] | None = None) -> None:
     """Interactive mapping mode."""
     print("=" * 60)
     print("v9.2: Law↔Document Mapping (Interactive)")
     print("=" * 60)
     
     print("\nLoading document index...")
-    client, collection = load_document_index(chroma_dir)
+    _, collection = load_document_index(chroma_dir, scopes)
+    print(f"  Bundles: {', '.join(f'{city}:{year}' for city, year in collection.keys)}")
     
     print("Loading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     print("\nEnter queries to find document evidence.")
     print("Format: <law_section> | <query text>")
@@ -274,21 +401,48 @@ def interactive_mode(chroma_dir: Path) -> None:
         print()
 
 
+def batch_mode(
+    law_hits_path: Path,
+    chroma_dir: Path | None,
+    output_path: Path,
+    scopes: list[Scope] | None = None,
+) -> None:
+    """Map a saved list of law hits (or a multi_law_query response) to documents."""
+    with open(law_hits_path, encoding="utf-8") as f:
+        data = json.load(f)
+    law_hits = data["hits"] if isinstance(data, dict) else data
+    
+    print(f"Mapping {len(law_hits)} law hits...")
+    _, collection = load_document_index(chroma_dir, scopes)
+    pipeline = RetrievalPipeline(load_query_encoder("BAAI/bge-m3"))
+    bundles = map_laws_to_documents(law_hits, collection, pipeline, graph=load_law_graph())
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(bundles, f, indent=2, ensure_ascii=False)
+    
+    edges = sum(len(b["mapping_edges"]) for b in bundles)
+    print(f"Wrote {len(bundles)} evidence bundles ({edges} mapping edges) to {output_path}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Law↔Document Mapping Engine")
     parser.add_argument("--interactive", "-i", action="store_true", help="Interactive mode")
-    parser.add_argument("--doc-index", "-d", required=True, help="Path to document ChromaDB")
+    parser.add_argument("--doc-index", "-d", help="Path to a single document ChromaDB (default: registry)")
+    parser.add_argument(
+        "--scope", "-s", action="append", type=parse_scope,
+        help="Bundle scope city:year, city or *:year (repeatable; default: every bundle)",
+    )
     parser.add_argument("--law-hits", "-l", help="Path to law hits JSON (batch mode)")
     parser.add_argument("--output", "-o", help="Output path for mappings (batch mode)")
     args = parser.parse_args()
     
-    doc_index_path = Path(args.doc_index)
+    doc_index_path = Path(args.doc_index) if args.doc_index else None
     
     if args.interactive:
-        interactive_mode(doc_index_path)
+        interactive_mode(doc_index_path, args.scope)
     elif args.law_hits and args.output:
-        # Batch mode
-        print("Batch mode not yet implemented. Use --interactive for now.")
+        batch_mode(Path(args.law_hits), doc_index_path, Path(args.output), args.scope)
     else:
         parser.print_help()
 
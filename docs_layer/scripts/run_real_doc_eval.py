@@ -4,8 +4,13 @@ v9.3: Real-doc Eval Runner
 
 Evaluates the combined Law↔Document retrieval system.
 Tests both legal retrieval accuracy AND document evidence finding.
+Each question is encoded once; the law and document searches share the
+vector and run concurrently (RetrievalPipeline). Document evidence comes
+from the docs_layer/data bundles of --scope (DocumentIndexRegistry) or
+from a single index directory given with --doc-index.
 
 Usage:
+    python docs_layer/scripts/run_real_doc_eval.py --questions <questions.json> --scope lapua:2023 --output <output_dir>
     python docs_layer/scripts/run_real_doc_eval.py --questions <questions.json> --doc-index <chroma_dir> --output <output_dir>
 """
 
@@ -27,6 +32,17 @@ except ImportError:
     print("Install: pip install chromadb sentence-transformers")
     exit(1)
 
+from shared.documents.registry import (
+    DOC_DATA_DIR,
+    DocumentBundle,
+    DocumentIndexRegistry,
+    Scope,
+    discover_bundles,
+    parse_scope,
+)
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.pipeline import RetrievalPipeline
+
 
 # Law index configuration (same as scripts/run_graph_eval.py)
 LAW_INDICES = {
@@ -72,11 +88,13 @@ def load_law_indices(model: SentenceTransformer) -> dict:
     return indices
 
 
-def load_doc_index(doc_index_path: Path, collection_name: str = "lapua_2023"):
-    """Load document ChromaDB index."""
-    client = chromadb.PersistentClient(path=str(doc_index_path))
-    collection = client.get_collection(collection_name)
-    return {"client": client, "collection": collection}
+def load_doc_index(doc_index_path: Path | None = None, scopes: list[Scope] | None = None):
+    """Document index over doc_index_path, or over the docs_layer/data bundles of scopes (None: all)."""
+    bundles = [DocumentBundle.from_index_dir(doc_index_path)] if doc_index_path else discover_bundles()
+    registry = DocumentIndexRegistry(bundles)
+    if not registry.bundles:
+        raise FileNotFoundError(f"No document index in {doc_index_path or DOC_DATA_DIR}")
+    return {"registry": registry, "collection": registry.collection(scopes)}
 
 
 def query_law_index(
@@ -85,13 +103,15 @@ def query_law_index(
     indices: dict,
     model: SentenceTransformer,
     k: int = K_LAW,
+    embedding: list[float] | None = None,
 ) -> list[dict]:
     """Query specific law index."""
     if expected_law_key not in indices:
         return []
     
     collection = indices[expected_law_key]["collection"]
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    if embedding is None:
+        embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
     
     results = collection.query(
         query_embeddings=[embedding],
@@ -125,10 +145,12 @@ def query_doc_index(
     doc_index: dict,
     model: SentenceTransformer,
     k: int = K_DOC,
+    embedding: list[float] | None = None,
 ) -> list[dict]:
     """Query document index."""
     collection = doc_index["collection"]
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    if embedding is None:
+        embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
     
     results = collection.query(
         query_embeddings=[embedding],
@@ -253,8 +275,10 @@ def evaluate_question(
     law_indices: dict,
     doc_index: dict,
     model: SentenceTransformer,
+    pipeline: RetrievalPipeline | None = None,
 ) -> dict:
     """Evaluate a single question."""
+    pipeline = pipeline or RetrievalPipeline(model)
     query = question["query"]
     expected_law = question.get("expected_law", {})
     expected_doc = question.get("expected_doc", {})
@@ -262,12 +286,15 @@ def evaluate_question(
     
     start_time = time.time()
     
-    # Query law index
+    # Query law and document index with one shared query vector
     law_key = expected_law.get("law_key", "")
-    law_hits = query_law_index(query, law_key, law_indices, model)
-    
-    # Query document index
-    doc_hits = query_doc_index(query, doc_index, model)
+    run = pipeline.run(query, {
+        "law": lambda embedding: query_law_index(query, law_key, law_indices, model, embedding=embedding),
+        "doc": lambda embedding: query_doc_index(query, doc_index, model, embedding=embedding),
+    })
+    run.raise_failed()
+    law_hits = run.results["law"]
+    doc_hits = run.results["doc"]
     
     latency_ms = (time.time() - start_time) * 1000
     
@@ -363,12 +390,16 @@ def generate_report(results: list[dict], output_path: Path) -> None:
 def main() -> None:
     parser = argparse.ArgumentParser(description="v9 Real-doc Eval")
     parser.add_argument("--questions", "-q", required=True, help="Path to questions JSON")
-    parser.add_argument("--doc-index", "-d", required=True, help="Path to document ChromaDB")
+    parser.add_argument("--doc-index", "-d", help="Path to a single document ChromaDB (default: registry)")
+    parser.add_argument(
+        "--scope", "-s", action="append", type=parse_scope,
+        help="Bundle scope city:year, city or *:year (repeatable; default: every bundle)",
+    )
     parser.add_argument("--output", "-o", required=True, help="Output directory")
     args = parser.parse_args()
     
     questions_path = Path(args.questions)
-    doc_index_path = Path(args.doc_index)
+    doc_index_path = Path(args.doc_index) if args.doc_index else None
     output_dir = Path(args.output)
     output_dir.mkdir(parents=True, exist_ok=True)
     
@@ -380,19 +411,21 @@ def main() -> None:
     print(f"\nLoaded {len(questions)} questions")
     
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     print("\nLoading law indices...")
     law_indices = load_law_indices(model)
     print(f"  Loaded: {len(law_indices)} law indices")
     
     print("\nLoading document index...")
-    doc_index = load_doc_index(doc_index_path)
+    doc_index = load_doc_index(doc_index_path, args.scope)
+    print(f"  Bundles: {', '.join(f'{city}:{year}' for city, year in doc_index['collection'].keys)}")
     
     print("\nRunning evaluation...")
+    pipeline = RetrievalPipeline(model)
     results = []
     for i, q in enumerate(questions):
-        result = evaluate_question(q, law_indices, doc_index, model)
+        result = evaluate_question(q, law_indices, doc_index, model, pipeline)
         status = "PASS" if result["law_pass"] and result["doc_pass"] else "FAIL"
         print(f"  [{i+1}/{len(questions)}] {q['id']}: {status}")
         results.append(result)
@@ -18,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from sentence_transformers import SentenceTransformer
 
 from analysis_layer.vector_store.chroma_store import ChromaVectorStore
+from shared.retrieval.embedding_cache import load_query_encoder
 
 
 def query_kuntalaki(
@@ -136,7 +137,7 @@ def main() -> None:
 
     # Initialize search
     print("Loading model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
 
     chroma_path = root / "analysis_layer" / "embeddings" / "chroma_db"
     if not chroma_path.exists():
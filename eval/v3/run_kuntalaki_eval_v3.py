@@ -27,6 +27,8 @@ from sentence_transformers import SentenceTransformer
 
 from analysis_layer.vector_store.chroma_store import ChromaVectorStore
 from analysis_layer.query_boost import apply_query_boost
+from shared.retrieval.batch_query import encode_queries, fetch_law_results_batch
+from shared.retrieval.embedding_cache import load_query_encoder
 
 
 class Question(TypedDict, total=False):
@@ -83,22 +85,13 @@ class MetricsResult:
     by_test_type: dict[str, float]
 
 
-def query_kuntalaki(
-    model: SentenceTransformer,
-    store: ChromaVectorStore,
-    query: str,
-    k: int = 5,
-    apply_boost: bool = True,
-) -> list[dict]:
-    """Query the Kuntalaki index and return results."""
-    embedding = model.encode([query], normalize_embeddings=True)[0]
-    results = store.query(embedding.tolist(), n_results=k)
-
+def _hits_from_results(query: str, results: dict, apply_boost: bool) -> list[dict]:
+    """Convert one row of query results to hit dicts (+ query boost)."""
     hits = []
     for doc, meta, dist in zip(
-        results["documents"][0],
-        results["metadatas"][0],
-        results["distances"][0],
+        results["documents"],
+        results["metadatas"],
+        results["distances"],
     ):
         tags = meta.get("tags", [])
         if isinstance(tags, str):
@@ -132,6 +125,39 @@ def query_kuntalaki(
     return hits
 
 
+def query_kuntalaki(
+    model: SentenceTransformer,
+    store: ChromaVectorStore,
+    query: str,
+    k: int = 5,
+    apply_boost: bool = True,
+) -> list[dict]:
+    """Query the Kuntalaki index and return results."""
+    embedding = model.encode([query], normalize_embeddings=True)[0]
+    results = store.query(embedding.tolist(), n_results=k)
+    row = {key: results[key][0] for key in ("documents", "metadatas", "distances")}
+    return _hits_from_results(query, row, apply_boost)
+
+
+def query_kuntalaki_batch(
+    store: ChromaVectorStore,
+    queries: list[str],
+    embeddings: list[list[float]],
+    ks: list[int],
+    apply_boost: bool = True,
+) -> list[list[dict]]:
+    """Query the Kuntalaki index once for all questions (per-row k)."""
+    rows = fetch_law_results_batch(
+        {"kuntalaki": store.collection},
+        embeddings,
+        [{"kuntalaki": k} for k in ks],
+    )
+    return [
+        _hits_from_results(query, row["kuntalaki"], apply_boost)
+        for query, row in zip(queries, rows)
+    ]
+
+
 def hit_matches_expected(hit: dict, expected: dict) -> bool:
     """Check if a hit matches an expected result."""
     sec = str(hit.get("section_num", "")).replace(" ", "").lower()
@@ -158,15 +184,23 @@ def eval_one(
     store: ChromaVectorStore,
     k_override: int | None = None,
     min_score_override: float | None = None,
+    hits: list[dict] | None = None,
+    latency_ms: float | None = None,
 ) -> EvalResult:
-    """Evaluate a single question."""
+    """Evaluate a single question.
+
+    hits/latency_ms may be precomputed by query_kuntalaki_batch.
+    """
     k = k_override if k_override is not None else int(q.get("k", 5))
     min_score = min_score_override if min_score_override is not None else float(q.get("min_score", 0.55))
     expected_none = q.get("expected_none", []) or []
 
-    t0 = time.time()
-    hits = query_kuntalaki(model, store, q["query"], k=k)
-    dt = time.time() - t0
+    if hits is None:
+        t0 = time.time()
+        hits = query_kuntalaki(model, store, q["query"], k=k)
+        dt = time.time() - t0
+    else:
+        dt = (latency_ms or 0.0) / 1000
 
     # Find first matching hit
     first_rank = None
@@ -331,12 +365,28 @@ def run_evaluation(
     k_override: int | None = None,
     min_score_override: float | None = None,
     verbose: bool = True,
+    embeddings: list[list[float]] | None = None,
 ) -> tuple[list[EvalResult], MetricsResult]:
-    """Run evaluation on all questions."""
+    """Run evaluation on all questions.
+
+    All questions are encoded in one batched pass (or `embeddings` is reused,
+    e.g. across matrix configs) and the index is queried once.
+    """
     results: list[EvalResult] = []
 
+    t0 = time.time()
+    queries = [q["query"] for q in questions]
+    if embeddings is None:
+        embeddings = encode_queries(model, queries)
+    ks = [k_override if k_override is not None else int(q.get("k", 5)) for q in questions]
+    batch_hits = query_kuntalaki_batch(store, queries, embeddings, ks)
+    latency_ms = (time.time() - t0) * 1000 / max(len(questions), 1)
+
     for i, q in enumerate(questions, 1):
-        result = eval_one(q, model, store, k_override, min_score_override)
+        result = eval_one(
+            q, model, store, k_override, min_score_override,
+            hits=batch_hits[i - 1], latency_ms=latency_ms,
+        )
         results.append(result)
         if verbose:
             status = "PASS" if result.passed else "FAIL"
@@ -357,6 +407,8 @@ def run_matrix_evaluation(
 ) -> dict[str, MetricsResult]:
     """Run matrix evaluation with multiple k and min_score values."""
     matrix_results: dict[str, MetricsResult] = {}
+    # Queries do not change between configs; encode them once
+    embeddings = encode_queries(model, [q["query"] for q in questions])
 
     for k in k_values:
         for min_score in min_score_values:
@@ -367,6 +419,7 @@ def run_matrix_evaluation(
                 k_override=k,
                 min_score_override=min_score,
                 verbose=False,
+                embeddings=embeddings,
             )
             matrix_results[config_name] = metrics
 
@@ -554,7 +607,7 @@ def main() -> None:
 
     # Initialize search
     print("Loading model...", file=sys.stderr)
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
 
     chroma_path = root / "analysis_layer" / "embeddings" / "chroma_db"
     if not chroma_path.exists():
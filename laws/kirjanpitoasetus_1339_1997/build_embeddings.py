@@ -1,8 +1,13 @@
 """
 Build ChromaDB vector embeddings for Kirjanpitoasetus.
+
+Incremental: only new or changed moments are encoded and upserted by
+node_id; removed node_ids are deleted. Use --rebuild to start from an
+empty collection.
 """
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from pathlib import Path
@@ -13,15 +18,20 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 try:
     import chromadb
-    from sentence_transformers import SentenceTransformer
+    import sentence_transformers  # noqa: F401  (corpus_encoder loads the model lazily)
 except ImportError as e:
     print(f"Missing dependency: {e}")
     print("Install with: pip install chromadb sentence-transformers")
     sys.exit(1)
 
+from shared.retrieval.corpus_cache import corpus_encoder, format_sync_stats, sync_collection
+
 
 def main() -> None:
     """Build embeddings for Kirjanpitoasetus."""
+    parser = argparse.ArgumentParser(description="Build Kirjanpitoasetus embeddings")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and recreate the collection")
+    args = parser.parse_args()
     
     # Paths
     base_dir = Path(__file__).parent
@@ -41,24 +51,23 @@ def main() -> None:
             records.append(json.loads(line))
     print(f"  Loaded {len(records)} records")
     
-    # Initialize embedding model
-    print("\nLoading embedding model: BAAI/bge-m3")
-    model = SentenceTransformer("BAAI/bge-m3")
+    # Embedding model is loaded on the first corpus-cache miss only
+    encoder = corpus_encoder("BAAI/bge-m3")
     
-    # Create ChromaDB
-    print(f"\nCreating ChromaDB at {chroma_path}")
+    # Open ChromaDB
+    print(f"\nOpening ChromaDB at {chroma_path}")
     chroma_path.mkdir(parents=True, exist_ok=True)
     
     client = chromadb.PersistentClient(path=str(chroma_path))
     
-    # Delete existing collection if exists
-    try:
-        client.delete_collection("kirjanpitoasetus")
-        print("  Deleted existing collection")
-    except (ValueError, chromadb.errors.NotFoundError):
-        pass
+    if args.rebuild:
+        try:
+            client.delete_collection("kirjanpitoasetus")
+            print("  Deleted existing collection")
+        except (ValueError, chromadb.errors.NotFoundError):
+            pass
     
-    collection = client.create_collection(
+    collection = client.get_or_create_collection(
         name="kirjanpitoasetus",
         metadata={"hnsw:space": "cosine"},
     )
@@ -95,27 +104,11 @@ def main() -> None:
         
         ids.append(record["node_id"])
     
-    # Generate embeddings in batches
-    print("\nGenerating embeddings...")
-    batch_size = 32
-    all_embeddings: list[list[float]] = []
-    
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
-        embeddings = model.encode(batch, normalize_embeddings=True)
-        all_embeddings.extend(embeddings.tolist())
-        print(f"  Processed {min(i + batch_size, len(documents))}/{len(documents)}")
-    
-    # Add to ChromaDB
-    print("\nAdding to ChromaDB...")
-    collection.add(
-        documents=documents,
-        embeddings=all_embeddings,
-        metadatas=metadatas,
-        ids=ids,
-    )
+    # Encode only new/changed texts and upsert by node_id
+    print("\nSyncing collection...")
+    stats = sync_collection(collection, ids, documents, metadatas, encoder, batch_size=32)
     
-    print(f"\nDone! Added {len(records)} documents to ChromaDB")
+    print(f"\nDone! {format_sync_stats(stats)}")
     print(f"Collection: kirjanpitoasetus")
     print(f"Path: {chroma_path}")
 
@@ -22,6 +22,8 @@ except ImportError as e:
     print(f"Missing dependency: {e}")
     sys.exit(1)
 
+from shared.retrieval.embedding_cache import load_query_encoder
+
 
 # Configuration
 EVAL_HARNESS_DIR = PROJECT_ROOT / "shared" / "eval_harness"
@@ -223,7 +225,7 @@ def main() -> None:
     
     # Load embedding model
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     # Cache for loaded indices
     indices_cache: dict[str, chromadb.Collection] = {}
@@ -23,6 +23,10 @@ except ImportError as e:
     sys.exit(1)
 
 from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.query_rules.query_context import QueryContext, register_signal_family
+from shared.retrieval.batch_query import fetch_law_results
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import merge_ranked
 
 
 # Configuration
@@ -47,6 +51,7 @@ PAIR_GUARDS: list[tuple[str, str, float]] = [
     ("liitetietokaava", "kirjanpitoasetus_1339_1997", +0.02),
     ("erittelyt", "kirjanpitoasetus_1339_1997", +0.02),
 ]
+register_signal_family("autofill_v72_pair_guards", [term for term, _, _ in PAIR_GUARDS])
 
 # Law index configurations
 LAW_INDICES = {
@@ -105,7 +110,8 @@ def multi_law_query_v72(
     """
     # Route query
     available_laws = list(indices.keys())
-    weights = route_query(query, available_laws)
+    context = QueryContext(query)
+    weights = route_query(context, available_laws)
     
     # Get top law from router
     sorted_weights = sorted(weights.items(), key=lambda x: x[1], reverse=True)
@@ -117,28 +123,20 @@ def multi_law_query_v72(
     # Generate embedding
     embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
     
-    # Query each law index
-    all_results: list[dict] = []
+    # Query all law indices concurrently
+    law_results = fetch_law_results(indices, embedding, k_per_law)
+    ranked: dict[str, list[dict]] = {}
     
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-            
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
-        for i, (doc, meta, dist) in enumerate(zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
-        )):
+    for law_key, results in law_results.items():
+        ranked[law_key] = []
+        for doc, meta, dist in zip(
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
+        ):
             score = 1 - dist
             if score >= MIN_SCORE:
-                all_results.append({
+                ranked[law_key].append({
                     "law_key": law_key,
                     "score": score,
                     "section_num": meta.get("section_num", 0),
@@ -147,6 +145,7 @@ def multi_law_query_v72(
                     "section_title": meta.get("section_title", ""),
                     "node_id": meta.get("node_id", ""),
                 })
+    all_results = [r for law_hits in ranked.values() for r in law_hits]
     
     # Apply router bonus
     if top1_law:
@@ -155,17 +154,15 @@ def multi_law_query_v72(
                 r["score"] += ROUTER_BONUS
     
     # Apply pair-guards
-    query_lower = query.lower()
+    matched = context.signals("autofill_v72_pair_guards")
     for term, law_key, adjustment in PAIR_GUARDS:
-        if term in query_lower:
+        if term in matched:
             for r in all_results:
                 if r["law_key"] == law_key:
                     r["score"] += adjustment
     
-    # Sort by score
-    all_results.sort(key=lambda x: x["score"], reverse=True)
-    
-    return all_results[:K_TOTAL]
+    # Adjustments are per law, so each law's hits stay sorted: k-way merge
+    return merge_ranked(ranked.values(), K_TOTAL)
 
 
 def autofill_question_v72(
@@ -237,7 +234,7 @@ def main() -> None:
     
     # Load embedding model
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     # Find all cross-law question files (original, not autofill)
     question_files = list(EVAL_HARNESS_DIR.glob("questions_cross_*.json"))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DenseLawIndex vs per-law Chroma collections.
+
+Builds (or loads) the single-matrix dense index from the Chroma collections
+in LAW_INDICES, then runs the cross-law eval questions through both
+backends with the same router weights and k per law. Reports retrieval
+latency and recall parity (overlap of returned ids per law).
+
+Usage:
+    python scripts/bench_dense_index.py
+    python scripts/bench_dense_index.py --rebuild
+    python scripts/bench_dense_index.py --limit 50 --total-k 10
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    import chromadb  # noqa: F401 (load_indices needs it)
+    import sentence_transformers  # noqa: F401  (query encoders load the model lazily)
+except ImportError as e:
+    print(f"Missing dependency: {e}")
+    sys.exit(1)
+
+from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.retrieval import DenseLawIndex
+from shared.retrieval.embedding_cache import load_query_encoder
+from scripts.graph_guided_query import load_indices
+
+
+DENSE_INDEX_PATH = PROJECT_ROOT / "analysis_layer" / "embeddings" / "dense_law_index.npz"
+EVAL_HARNESS_DIR = PROJECT_ROOT / "shared" / "eval_harness"
+RESULTS_PATH = EVAL_HARNESS_DIR / "bench_dense_index.json"
+
+
+def load_queries(limit: int | None) -> list[str]:
+    """Collect queries from the cross-law question files."""
+    queries: list[str] = []
+    for qf in sorted(EVAL_HARNESS_DIR.glob("questions_cross_*.json")):
+        if ".autofill." in qf.name:
+            continue
+        data = json.loads(qf.read_text(encoding="utf-8"))
+        queries.extend(q["query"] for q in data.get("questions", []))
+    return queries[:limit] if limit else queries
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_backend(
+    indices: dict,
+    embeddings: list[list[float]],
+    plans: list[dict[str, int]],
+) -> tuple[list[dict[str, list[str]]], list[float]]:
+    """Run every (embedding, k_per_law) plan; return ids per law and latency per query."""
+    all_ids: list[dict[str, list[str]]] = []
+    latencies: list[float] = []
+    for embedding, k_per_law in zip(embeddings, plans):
+        start = time.perf_counter()
+        ids: dict[str, list[str]] = {}
+        for law_key, k in k_per_law.items():
+            if law_key not in indices:
+                continue
+            results = indices[law_key].query(
+                query_embeddings=[embedding],
+                n_results=k,
+                include=["documents", "metadatas", "distances"],
+            )
+            ids[law_key] = results["ids"][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        all_ids.append(ids)
+    return all_ids, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dense index vs Chroma benchmark")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the dense index from Chroma")
+    parser.add_argument("--limit", type=int, default=None, help="Max number of queries")
+    parser.add_argument("--total-k", type=int, default=10, help="Total k passed to calculate_k_per_law")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Dense Index Benchmark")
+    print("=" * 60)
+
+    print("\nLoading Chroma indices...")
+    chroma_indices = load_indices()
+    print(f"  Loaded: {len(chroma_indices)} indices")
+    if not chroma_indices:
+        print("ERROR: No indices available!")
+        sys.exit(1)
+
+    if args.rebuild or not DENSE_INDEX_PATH.exists():
+        print("\nBuilding dense index from Chroma...")
+        start = time.perf_counter()
+        dense = DenseLawIndex.from_collections(chroma_indices)
+        dense.save(DENSE_INDEX_PATH)
+        print(f"  Built {len(dense)} x {dense.dim} in {time.perf_counter() - start:.2f}s -> {DENSE_INDEX_PATH}")
+    else:
+        start = time.perf_counter()
+        dense = DenseLawIndex.load(DENSE_INDEX_PATH)
+        print(f"\nLoaded dense index {len(dense)} x {dense.dim} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    dense_indices = dense.as_indices()
+
+    queries = load_queries(args.limit)
+    print(f"\nQueries: {len(queries)}")
+
+    print("Loading embedding model...")
+    model = load_query_encoder("BAAI/bge-m3")
+    embeddings = model.encode(queries, normalize_embeddings=True, batch_size=32).tolist()
+
+    available_laws = list(chroma_indices.keys())
+    plans = [
+        calculate_k_per_law(route_query(q, available_laws), args.total_k, min_k=2)
+        for q in queries
+    ]
+
+    # Warm both paths once so first-call allocation is not measured
+    run_backend(chroma_indices, embeddings[:1], plans[:1])
+    run_backend(dense_indices, embeddings[:1], plans[:1])
+
+    chroma_ids, chroma_lat = run_backend(chroma_indices, embeddings, plans)
+    dense_ids, dense_lat = run_backend(dense_indices, embeddings, plans)
+
+    # Recall parity: exact search is the reference; Chroma (HNSW) is approximate
+    overlaps: list[float] = []
+    exact_match = 0
+    for c_row, d_row in zip(chroma_ids, dense_ids):
+        row_same = True
+        for law_key, d_list in d_row.items():
+            c_list = c_row.get(law_key, [])
+            if d_list:
+                overlaps.append(len(set(c_list) & set(d_list)) / len(d_list))
+            if c_list != d_list:
+                row_same = False
+        exact_match += row_same
+
+    summary = {
+        "queries": len(queries),
+        "moments": len(dense),
+        "dim": dense.dim,
+        "chroma_ms": {
+            "mean": statistics.mean(chroma_lat),
+            "p50": percentile(chroma_lat, 50),
+            "p95": percentile(chroma_lat, 95),
+        },
+        "dense_ms": {
+            "mean": statistics.mean(dense_lat),
+            "p50": percentile(dense_lat, 50),
+            "p95": percentile(dense_lat, 95),
+        },
+        "recall_parity": statistics.mean(overlaps) if overlaps else 1.0,
+        "identical_rankings": exact_match,
+    }
+
+    print("\n" + "=" * 60)
+    print("RESULTS")
+    print("=" * 60)
+    print(f"{'Backend':<10} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for name in ("chroma", "dense"):
+        s = summary[f"{name}_ms"]
+        print(f"{name:<10} {s['mean']:>10.2f} {s['p50']:>10.2f} {s['p95']:>10.2f}")
+    speedup = summary["chroma_ms"]["mean"] / max(summary["dense_ms"]["mean"], 1e-9)
+    print(f"\nSpeedup (mean): {speedup:.1f}x")
+    print(f"Recall parity (Chroma ∩ exact / k): {summary['recall_parity']:.4f}")
+    print(f"Identical per-law rankings: {exact_match}/{len(queries)}")
+
+    RESULTS_PATH.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    print(f"\nSaved: {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-query routing cost, uncompiled vs compiled law router.
+
+"Before" replays what route_query used to do for every query: parse
+cross_refs.json, merge it with the default keywords, then run separate
+``kw in query_lower`` scans for law keywords, explicit references and
+municipal anchors. "After" is CompiledLawRouter.scan (one automaton pass)
+and the full route_query on top of it. Both scans are checked for identical
+results on every query.
+
+Usage:
+    python scripts/bench_law_router.py
+    python scripts/bench_law_router.py --repeat 50
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from shared.query_rules import law_router
+from shared.query_rules.law_router import RouteScan, get_router, route_query
+
+
+EVAL_HARNESS_DIR = PROJECT_ROOT / "shared" / "eval_harness"
+
+
+def load_queries() -> list[str]:
+    """Collect queries from the cross-law question files."""
+    queries: list[str] = []
+    for qf in sorted(EVAL_HARNESS_DIR.glob("questions_cross_*.json")):
+        if ".autofill." in qf.name:
+            continue
+        data = json.loads(qf.read_text(encoding="utf-8"))
+        queries.extend(q["query"] for q in data.get("questions", []))
+    return queries
+
+
+def uncompiled_scan(query: str) -> RouteScan:
+    """The pre-compilation routing work for one query."""
+    loaded = law_router._load_router_keywords()
+    keywords = law_router._DEFAULT_KEYWORDS.copy()
+    keywords.update(loaded)
+
+    query_lower = query.lower()
+    explicit: Optional[str] = None
+    for terms, law_key in law_router._EXPLICIT_LAW_TERMS:
+        if any(term in query_lower for term in terms):
+            explicit = law_key
+            break
+    if explicit is None:
+        for pattern, law_key in law_router._FINLEX_IDS.items():
+            if re.search(pattern, query):
+                explicit = law_key
+                break
+
+    has_municipal = any(anchor in query_lower for anchor in law_router._MUNICIPAL_STRONG_ANCHORS)
+
+    law_hits: dict[str, int] = {}
+    for law_key, kw_list in keywords.items():
+        score = sum(1 for kw in kw_list if kw in query_lower)
+        if score:
+            law_hits[law_key] = score
+
+    return RouteScan(law_hits=law_hits, explicit_law=explicit, has_municipal=has_municipal)
+
+
+def time_per_query(fn: Callable[[str], object], queries: list[str], repeat: int) -> list[float]:
+    """Mean microseconds per query for each of `repeat` passes over all queries."""
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for q in queries:
+            fn(q)
+        samples.append((time.perf_counter() - start) / len(queries) * 1e6)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Law router microbenchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the query set")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Law Router Benchmark")
+    print("=" * 60)
+
+    queries = load_queries()
+    print(f"\nQueries: {len(queries)}")
+
+    router = get_router()
+    mismatches = [q for q in queries if uncompiled_scan(q) != router.scan(q)]
+    print(f"Scan parity: {len(queries) - len(mismatches)}/{len(queries)} identical")
+    for q in mismatches[:5]:
+        print(f"  MISMATCH: {q}")
+
+    rows = [
+        ("uncompiled scan", time_per_query(uncompiled_scan, queries, args.repeat)),
+        ("compiled scan", time_per_query(router.scan, queries, args.repeat)),
+        ("route_query", time_per_query(route_query, queries, args.repeat)),
+    ]
+
+    print(f"\n{'Path':<18} {'median us':>10} {'min us':>10}")
+    for name, samples in rows:
+        print(f"{name:<18} {statistics.median(samples):>10.2f} {min(samples):>10.2f}")
+    speedup = statistics.median(rows[0][1]) / max(statistics.median(rows[1][1]), 1e-9)
+    print(f"\nScan speedup (median): {speedup:.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
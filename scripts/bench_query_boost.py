@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled query boost vs the per-hit reference loop.
+
+Runs the Kuntalaki v3 eval questions against k hits sampled from the
+Kuntalaki JSONL (sections targeted by the rules first) with the rule tables
+at 1x, 10x and 100x their size. Extra rules are copies of the real ones with
+distinct terms and target sections, so the active rule set per query stays
+realistic while the tables grow. Checks that both paths score identically.
+
+Usage:
+    python scripts/bench_query_boost.py
+    python scripts/bench_query_boost.py --k 20 --repeat 5
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from analysis_layer.query_boost import (
+    BOOST_RULES,
+    PENALTY_RULES,
+    CompiledBoostRules,
+    apply_query_boost,
+    apply_query_boost_naive,
+)
+
+
+JSONL_PATH = PROJECT_ROOT / "analysis_layer" / "json" / "kuntalaki_410-2015.jsonl"
+QUESTIONS_PATH = PROJECT_ROOT / "eval" / "v3" / "questions_kuntalaki_v3.json"
+SCALES = (1, 10, 100)
+
+
+def load_hits(k: int) -> list[dict]:
+    """k hits, rule-targeted sections first, shaped like eval v3 hits."""
+    targets = {r[1] for r in BOOST_RULES} | {r[1] for r in PENALTY_RULES}
+    records = [json.loads(line) for line in JSONL_PATH.read_text(encoding="utf-8").splitlines() if line]
+    records.sort(key=lambda r: r["section_id"] not in targets)
+    return [
+        {
+            "section_num": r["section_id"],
+            "moment": r["moment"],
+            "node_id": r["node_id"],
+            "score": round(0.5 + (i % 37) / 100, 4),
+            "anchors": r.get("anchors", []),
+        }
+        for i, r in enumerate(records[:k])
+    ]
+
+
+def scaled_rules(scale: int) -> tuple[list, list]:
+    """Rule tables grown `scale` times with non-overlapping copies."""
+    boost_rules = list(BOOST_RULES)
+    penalty_rules = list(PENALTY_RULES)
+    for n in range(1, scale):
+        boost_rules += [
+            ([f"{t} x{n}" for t in terms], f"{section}x{n}", moment, value)
+            for terms, section, moment, value in BOOST_RULES
+        ]
+        penalty_rules += [
+            ([f"{t} x{n}" for t in terms], f"{section}x{n}", value)
+            for terms, section, value in PENALTY_RULES
+        ]
+    return boost_rules, penalty_rules
+
+
+def time_per_query(run: Callable[[str, list[dict]], list[dict]], queries: list[str], hits: list[dict], repeat: int) -> float:
+    """Median over passes of mean microseconds per query (hit copying excluded)."""
+    batches = [[copy.deepcopy(hits) for _ in queries] for _ in range(repeat)]
+    samples = []
+    for batch in batches:
+        start = time.perf_counter()
+        for query, query_hits in zip(queries, batch):
+            run(query, query_hits)
+        samples.append((time.perf_counter() - start) / len(queries) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query boost benchmark")
+    parser.add_argument("--k", type=int, default=10, help="Hits per query")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the question set")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Query Boost Benchmark")
+    print("=" * 60)
+
+    queries = [q["query"] for q in json.loads(QUESTIONS_PATH.read_text(encoding="utf-8"))]
+    hits = load_hits(args.k)
+    print(f"\nQueries: {len(queries)}, hits per query: {len(hits)}")
+
+    print(f"\n{'Rules':>7} {'naive us':>10} {'compiled us':>12} {'speedup':>8} {'parity':>8}")
+    failed = False
+    for scale in SCALES:
+        boost_rules, penalty_rules = scaled_rules(scale)
+        compiled = CompiledBoostRules(boost_rules, penalty_rules)
+
+        def naive(query: str, query_hits: list[dict]) -> list[dict]:
+            return apply_query_boost_naive(query, query_hits, 0.05, boost_rules, penalty_rules)
+
+        def fast(query: str, query_hits: list[dict]) -> list[dict]:
+            return apply_query_boost(query, query_hits, rules=compiled)
+
+        parity = all(naive(q, copy.deepcopy(hits)) == fast(q, copy.deepcopy(hits)) for q in queries)
+        failed |= not parity
+
+        naive_us = time_per_query(naive, queries, hits, args.repeat)
+        fast_us = time_per_query(fast, queries, hits, args.repeat)
+        n_rules = len(boost_rules) + len(penalty_rules)
+        print(f"{n_rules:>7} {naive_us:>10.1f} {fast_us:>12.1f} {naive_us / fast_us:>7.1f}x {'OK' if parity else 'FAIL':>8}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
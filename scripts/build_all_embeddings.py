@@ -1,8 +1,17 @@
 """
 Build ChromaDB vector embeddings for all laws.
+
+Incremental: only new or changed moments are encoded (vectors come from the
+content-addressed corpus cache) and upserted by node_id; removed node_ids are
+deleted.
+
+Usage:
+    python scripts/build_all_embeddings.py
+    python scripts/build_all_embeddings.py --rebuild   # drop collections first
 """
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from pathlib import Path
@@ -12,11 +21,14 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 try:
     import chromadb
-    from sentence_transformers import SentenceTransformer
+    import sentence_transformers  # noqa: F401  (corpus_encoder loads the model lazily)
 except ImportError as e:
     print(f"Missing dependency: {e}")
     sys.exit(1)
 
+from shared.retrieval.corpus_cache import corpus_encoder, format_sync_stats, sync_collection
+from shared.retrieval.embedding_cache import CachedQueryEncoder
+
 
 # Law configurations
 LAWS = [
@@ -43,7 +55,8 @@ LAWS = [
 
 def build_embeddings_for_law(
     config: dict,
-    model: SentenceTransformer,
+    encoder: CachedQueryEncoder,
+    rebuild: bool = False,
 ) -> int:
     """Build embeddings for a single law."""
     jsonl_path = config["jsonl_path"]
@@ -66,20 +79,20 @@ def build_embeddings_for_law(
             records.append(json.loads(line))
     print(f"  Loaded {len(records)} records")
     
-    # Create ChromaDB
-    print(f"  Creating ChromaDB at {chroma_path}")
+    # Open ChromaDB
+    print(f"  Opening ChromaDB at {chroma_path}")
     chroma_path.mkdir(parents=True, exist_ok=True)
     
     client = chromadb.PersistentClient(path=str(chroma_path))
     
-    # Delete existing collection if exists
-    try:
-        client.delete_collection(collection_name)
-        print(f"  Deleted existing collection")
-    except Exception:
-        pass
+    if rebuild:
+        try:
+            client.delete_collection(collection_name)
+            print(f"  Deleted existing collection")
+        except Exception:
+            pass
     
-    collection = client.create_collection(
+    collection = client.get_or_create_collection(
         name=collection_name,
         metadata={"hnsw:space": "cosine"},
     )
@@ -114,44 +127,30 @@ def build_embeddings_for_law(
         
         ids.append(record["node_id"])
     
-    # Generate embeddings in batches
-    print(f"  Generating embeddings...")
-    batch_size = 32
-    all_embeddings: list[list[float]] = []
-    
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
-        embeddings = model.encode(batch, normalize_embeddings=True)
-        all_embeddings.extend(embeddings.tolist())
-        if (i + batch_size) % 128 == 0 or i + batch_size >= len(documents):
-            print(f"    Processed {min(i + batch_size, len(documents))}/{len(documents)}")
+    # Encode only new/changed texts and upsert by node_id
+    print(f"  Syncing collection...")
+    stats = sync_collection(collection, ids, documents, metadatas, encoder, batch_size=32)
     
-    # Add to ChromaDB
-    print(f"  Adding to ChromaDB...")
-    collection.add(
-        documents=documents,
-        embeddings=all_embeddings,
-        metadatas=metadatas,
-        ids=ids,
-    )
-    
-    print(f"  Done! Added {len(records)} documents")
+    print(f"  Done! {format_sync_stats(stats)}")
     return len(records)
 
 
 def main() -> None:
     """Build embeddings for all laws."""
+    parser = argparse.ArgumentParser(description="Build embeddings for all laws")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and recreate the collections")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Building embeddings for all laws")
     print("=" * 60)
     
-    # Load model once
-    print("\nLoading embedding model: BAAI/bge-m3")
-    model = SentenceTransformer("BAAI/bge-m3")
+    # One encoder for all laws; BAAI/bge-m3 is loaded on the first cache miss only
+    encoder = corpus_encoder("BAAI/bge-m3")
     
     total_docs = 0
     for config in LAWS:
-        count = build_embeddings_for_law(config, model)
+        count = build_embeddings_for_law(config, encoder, rebuild=args.rebuild)
         total_docs += count
     
     print("\n" + "=" * 60)
@@ -4,18 +4,37 @@ v8: Build Structural Legal Graph
 
 Builds nodes.jsonl and edges.jsonl from law JSONL files.
 Parses references (REFERS_TO) and exceptions (EXCEPTS) from legal text.
+Also writes the binary snapshot (graph/snapshot/) the graph consumers load,
+including the exact top-k SIMILAR_TO neighbours of every moment when the
+dense law index (scripts/bench_dense_index.py) has been built.
+
+Parse results are cached per moment text (.cache/graph_references.jsonl),
+so a rebuild after adding a law or a new Finlex version only parses the
+changed moments; those are parsed in a process pool.
 
 Usage:
     python scripts/build_structural_legal_graph.py
+    python scripts/build_structural_legal_graph.py --workers 1 --no-cache
 """
 
+import argparse
+import hashlib
 import json
+import os
 import re
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import TypedDict
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from shared.graph.csr import CsrGraph
+from shared.graph.similarity import SIMILAR_K, SimilarityTable
+from shared.graph.snapshot import write_snapshot
+from shared.retrieval.dense_index import DenseLawIndex
 
 
 class Node(TypedDict):
@@ -37,27 +56,55 @@ class Edge(TypedDict):
     context: str  # The text snippet containing the reference
 
 
-# v8.1: Improved regex patterns for parsing references with Finnish declensions
-# Handles: §, §:n, §:ssä, §:ssa, §:ään, §:stä, etc.
+class SectionReference(TypedDict):
+    """A § reference parsed from moment text, before resolution."""
+    section_num: int
+    moment_num: int | None
+    chapter: str | None  # chapter key of "N luvun M §"
+    law_name: str | None  # law named right before ("kirjanpitolain 5 §")
+    law_id: str | None  # its explicit ID, if given
+    exception: bool
+    context: str
+
+
+class LawMention(TypedDict):
+    """A mention of a law by ID or known name."""
+    mention: str
+    law_id: str
+    chapter: str | None  # chapter key named right after the mention
+
+
+class ParsedText(TypedDict):
+    """Parse result of one moment text (cached by reference_cache_key)."""
+    references: list[SectionReference]
+    law_mentions: list[LawMention]
+    definition: bool
+
+
+# Bump when parsing changes; cached parse results of other versions are ignored
+PARSER_VERSION = 3
+REFERENCE_CACHE_PATH = PROJECT_ROOT / ".cache" / "graph_references.jsonl"
+DENSE_INDEX_PATH = PROJECT_ROOT / "analysis_layer" / "embeddings" / "dense_law_index.npz"
+
+# Below this many texts to parse, process pool start-up costs more than it saves
+PARALLEL_MIN_TEXTS = 2000
 
-# Pattern: "X §:n Y momentissa/momentti/mom." 
-SECTION_MOMENT_PATTERN = re.compile(
-    r"(\d+)\s*§:?(?:n|ssä|ssa|ään|stä|sta|lta|lle|lla)?\s+(\d+)\s*(?:momentti|mom\.?|momentissa|momentti(?:in|a|ssa))",
-    re.IGNORECASE
-)
 
-# Pattern: "X §:ssä" or "X §:n" with declension
-SECTION_DECL_PATTERN = re.compile(
-    r"(\d+)\s*§:?(?:n|ssä|ssa|ään|stä|sta|lta|lle|lla)",
+# Single-pass reference grammar, one match per reference (v8.1 declensions:
+# §, §:n, §:ssä, §:ssa, §:ään, §:stä, ...):
+#   [N [a] luvun|luku] M § [:n|:ssä|...] [K momentti|momentissa|mom.]
+REFERENCE_PATTERN = re.compile(
+    r"(?=\d)(?:(?P<chapter>\d+)\s*(?P<chapter_letter>[a-z])?\s+(?:luvun|luku)\s+)?"
+    r"(?P<section>\d+)\s*§(?P<decl>:?(?:n|ssä|ssa|ään|stä|sta|lta|lle|lla))?"
+    r"(?:\s+(?P<moment>\d+)\s*(?:momentti|mom\.?|momentissa|momentti(?:in|a|ssa)))?",
     re.IGNORECASE
 )
 
-# Pattern: simple "X §" reference (basic)
-SIMPLE_SECTION_PATTERN = re.compile(r"(\d+)\s*§")
-
-# Pattern: "N luvun M §" or "N luku M §"
-CHAPTER_SECTION_PATTERN = re.compile(
-    r"(\d+)\s*(?:luvun|luku)\s+(\d+)\s*§",
+# Law named right before a section reference: "vaalilain 93 §", "kirjanpitolain
+# (1336/1997) 1 luvun 5 §"; such a reference points into that law, not this one.
+# Compound names are taken whole ("asunto-osakeyhtiölain", not osakeyhtiölaki).
+LAW_QUALIFIER_PATTERN = re.compile(
+    r"(?<![\w-])((?:\w+-)*\w+(?:lain|lakia|asetuksen|asetusta))\s*(?:\((\d+/\d+)\))?\s*$",
     re.IGNORECASE
 )
 
@@ -69,9 +116,15 @@ EXTERNAL_LAW_PATTERN = re.compile(
 
 # v8.1: Known law names to IDs mapping (for references without explicit ID)
 KNOWN_LAWS = {
+    "kuntalaki": "410/2015",
+    "kuntalakia": "410/2015",
+    "kuntalain": "410/2015",
     "kirjanpitolaki": "1336/1997",
     "kirjanpitolakia": "1336/1997",
     "kirjanpitolain": "1336/1997",
+    "kirjanpitoasetus": "1339/1997",
+    "kirjanpitoasetusta": "1339/1997",
+    "kirjanpitoasetuksen": "1339/1997",
     "tilintarkastuslaki": "1141/2015",
     "tilintarkastuslakia": "1141/2015",
     "tilintarkastuslain": "1141/2015",
@@ -83,9 +136,18 @@ KNOWN_LAWS = {
     "hankintalain": "1397/2016",
 }
 
-# Pattern for named law references without ID (e.g., "kirjanpitolakia")
+# Pattern for named law references without ID (e.g., "kirjanpitolakia");
+# not inside compounds such as "asunto-osakeyhtiölain". The first-letter
+# lookahead lets most words fail before the alternation is tried.
 NAMED_LAW_PATTERN = re.compile(
-    r"\b(" + "|".join(KNOWN_LAWS.keys()) + r")\b",
+    r"(?<!-)\b(?=[" + "".join(sorted({name[0] for name in KNOWN_LAWS})) + r"])"
+    r"(" + "|".join(KNOWN_LAWS.keys()) + r")\b",
+    re.IGNORECASE
+)
+
+# Chapter right after a law mention: "kirjanpitolain (1336/1997) 3 luvun"
+CHAPTER_SUFFIX_PATTERN = re.compile(
+    r"\s*(\d+)\s*([a-z])?\s+(?:luvun|luku)\b",
     re.IGNORECASE
 )
 
@@ -112,46 +174,62 @@ DEFINITION_KEYWORDS = [
 ]
 
 
-def parse_section_references(text: str) -> list[tuple[int, int | None, str]]:
+def parse_section_references(text: str) -> list[SectionReference]:
     """
-    Parse section references from legal text (v8.1 improved).
+    Parse section references from legal text in one REFERENCE_PATTERN scan.
     
-    Returns list of tuples: (section_num, moment_num_or_None, matched_text)
+    References are returned in v8.1 priority order: section + moment first,
+    then declined ("6 §:ssä"), chapter-qualified and plain sections. A
+    section (of a given law and chapter) referenced with a moment anywhere
+    in the text is not repeated as a plain section reference, and each
+    section / moment pair is returned once.
     """
-    references: list[tuple[int, int | None, str]] = []
-    found_sections: set[int] = set()
-    found_section_moments: set[tuple[int, int]] = set()
-    
-    # 1. Find section + moment patterns first (most specific)
-    for match in SECTION_MOMENT_PATTERN.finditer(text):
-        section_num = int(match.group(1))
-        moment_num = int(match.group(2))
-        key = (section_num, moment_num)
-        if key not in found_section_moments:
-            references.append((section_num, moment_num, match.group(0)))
-            found_section_moments.add(key)
-            found_sections.add(section_num)
-    
-    # 2. Find section with declension (e.g., "6 §:n 2 momentissa" without moment)
-    for match in SECTION_DECL_PATTERN.finditer(text):
-        section_num = int(match.group(1))
-        if section_num not in found_sections:
-            references.append((section_num, None, match.group(0)))
-            found_sections.add(section_num)
-    
-    # 3. Find chapter + section patterns
-    for match in CHAPTER_SECTION_PATTERN.finditer(text):
-        section_num = int(match.group(2))  # section is group 2
-        if section_num not in found_sections:
-            references.append((section_num, None, match.group(0)))
-            found_sections.add(section_num)
-    
-    # 4. Find simple section references (avoid duplicates)
-    for match in SIMPLE_SECTION_PATTERN.finditer(text):
-        section_num = int(match.group(1))
-        if section_num not in found_sections:
-            references.append((section_num, None, match.group(0)))
-            found_sections.add(section_num)
+    if "§" not in text:
+        return []
+    
+    tokens: list[tuple[int, int, re.Match[str]]] = []
+    for match in REFERENCE_PATTERN.finditer(text):
+        if match.group("moment"):
+            rank = 0
+        elif match.group("decl"):
+            rank = 1
+        elif match.group("chapter"):
+            rank = 2
+        else:
+            rank = 3
+        tokens.append((rank, match.start(), match))
+    tokens.sort(key=lambda token: token[:2])
+    
+    references: list[SectionReference] = []
+    found_sections: set[tuple[str | None, str | None, int]] = set()
+    found_section_moments: set[tuple[str | None, str | None, int, int]] = set()
+    for rank, token_pos, match in tokens:
+        section_num = int(match.group("section"))
+        moment_num = int(match.group("moment")) if rank == 0 else None
+        chapter = None
+        if match.group("chapter"):
+            chapter = match.group("chapter") + (match.group("chapter_letter") or "").lower()
+        law = reference_law(text, token_pos)
+        
+        # "16 luvun 10 §" and "17 luvun 10 §" are different sections
+        section_key = (law[0] if law else None, chapter, section_num)
+        if moment_num is not None:
+            if (*section_key, moment_num) in found_section_moments:
+                continue
+            found_section_moments.add((*section_key, moment_num))
+        elif section_key in found_sections:
+            continue
+        found_sections.add(section_key)
+        
+        references.append({
+            "section_num": section_num,
+            "moment_num": moment_num,
+            "chapter": chapter,
+            "law_name": law[0] if law else None,
+            "law_id": law[1] if law else None,
+            "exception": is_exception_context(text, match.start("section")),
+            "context": match.group(0),
+        })
     
     return references
 
@@ -177,30 +255,115 @@ def is_definition_context(text: str) -> bool:
     return False
 
 
-def parse_external_law_references(text: str) -> list[tuple[str, str]]:
+def parse_law_mentions(text: str) -> list[LawMention]:
     """
-    Parse external law references like "kirjanpitolain (1336/1997)".
-    
-    Returns list of tuples: (law_name, law_id)
+    Parse mentions of other laws: "kirjanpitolain (1336/1997)" or a known
+    law name without ID ("kirjanpitolakia"), one per law_id, with the
+    chapter named right after the mention ("kirjanpitolain 5 luvun").
     """
-    references: list[tuple[str, str]] = []
-    for match in EXTERNAL_LAW_PATTERN.finditer(text):
+    mentions: list[LawMention] = []
+    found_law_ids: set[str] = set()
+    
+    def add(mention: str, law_id: str, end: int) -> None:
+        if law_id in found_law_ids:
+            return
+        found_law_ids.add(law_id)
+        chapter = CHAPTER_SUFFIX_PATTERN.match(text, end)
+        mentions.append({
+            "mention": mention,
+            "law_id": law_id,
+            "chapter": chapter.group(1) + (chapter.group(2) or "").lower() if chapter else None,
+        })
+    
+    # Explicit IDs ("(1336/1997)") are rare; skip the scan when there is none
+    for match in EXTERNAL_LAW_PATTERN.finditer(text) if "/" in text else ():
+        add(f"{match.group(1).lower()} ({match.group(2)})", match.group(2), match.end())
+    
+    # v8.1: Named law references (without explicit ID)
+    for match in NAMED_LAW_PATTERN.finditer(text):
         law_name = match.group(1).lower()
-        law_id = match.group(2)
-        references.append((law_name, law_id))
-    return references
+        add(law_name, KNOWN_LAWS[law_name], match.end())
+    return mentions
 
 
-def build_target_node_id(
-    source_law_id: str,
-    source_finlex_version: str,
-    target_section: int,
-    target_moment: int | None,
-) -> str:
-    """Build a target node_id for internal references."""
-    if target_moment is not None:
-        return f"{source_law_id}:{source_finlex_version}:{target_section}:{target_moment}"
-    return f"{source_law_id}:{source_finlex_version}:{target_section}:*"
+def parse_moment_text(text: str) -> ParsedText:
+    """
+    Everything the graph takes from one moment's text, before resolution.
+    
+    Depends on the text and PARSER_VERSION only, so results are cached
+    by reference_cache_key and can be computed in worker processes.
+    """
+    return {
+        "references": parse_section_references(text),
+        "law_mentions": parse_law_mentions(text),
+        "definition": is_definition_context(text),
+    }
+
+
+def reference_cache_key(text: str) -> str:
+    """Stable cache key for one moment text under the current parser."""
+    raw = f"{PARSER_VERSION}\x00{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_reference_cache(path: Path) -> dict[str, ParsedText]:
+    """Cached parse results by reference_cache_key ({} when there is no cache)."""
+    cache: dict[str, ParsedText] = {}
+    if not path.exists():
+        return cache
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                cache[entry["key"]] = entry["parsed"]
+    return cache
+
+
+def save_reference_cache(path: Path, cache: dict[str, ParsedText]) -> None:
+    """Write the cache atomically; a partial file is never left behind."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for key, parsed in cache.items():
+            f.write(json.dumps({"key": key, "parsed": parsed}, ensure_ascii=False) + "\n")
+    tmp_path.replace(path)
+
+
+def parse_texts(texts: list[str], workers: int) -> list[ParsedText]:
+    """parse_moment_text for every text, in a process pool when it pays off."""
+    if workers <= 1 or len(texts) < PARALLEL_MIN_TEXTS:
+        return [parse_moment_text(text) for text in texts]
+    chunksize = max(1, len(texts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_moment_text, texts, chunksize=chunksize))
+
+
+def parse_moments(
+    moments: list[dict],
+    workers: int,
+    cache_path: Path | None = REFERENCE_CACHE_PATH,
+) -> tuple[list[ParsedText], int]:
+    """
+    Parsed text of every moment, reusing cached results.
+    
+    Only texts not in the cache (new laws, amended moments, or all of them
+    after a PARSER_VERSION bump) are parsed. The cache is rewritten with
+    the current corpus' entries only.
+    
+    Returns (parsed per moment, number of texts parsed)
+    """
+    cache = load_reference_cache(cache_path) if cache_path is not None else {}
+    keys = [reference_cache_key(m.get("text", "")) for m in moments]
+    
+    missing: dict[str, str] = {}
+    for key, moment in zip(keys, moments):
+        if key not in cache:
+            missing.setdefault(key, moment.get("text", ""))
+    cache.update(zip(missing, parse_texts(list(missing.values()), workers)))
+    
+    if cache_path is not None:
+        save_reference_cache(cache_path, {key: cache[key] for key in dict.fromkeys(keys)})
+    return [cache[key] for key in keys], len(missing)
 
 
 def load_all_moments() -> list[dict]:
@@ -218,11 +381,11 @@ def load_all_moments() -> list[dict]:
     # Other laws in laws/ directory
     laws_dir = PROJECT_ROOT / "laws"
     if laws_dir.exists():
-        for law_dir in laws_dir.iterdir():
+        for law_dir in sorted(laws_dir.iterdir()):
             if law_dir.is_dir():
                 json_dir = law_dir / "analysis_layer" / "json"
                 if json_dir.exists():
-                    for jsonl_file in json_dir.glob("*.jsonl"):
+                    for jsonl_file in sorted(json_dir.glob("*.jsonl")):
                         with open(jsonl_file, "r", encoding="utf-8") as f:
                             for line in f:
                                 if line.strip():
@@ -236,27 +399,115 @@ def build_node_index(moments: list[dict]) -> dict[str, dict]:
     return {m["node_id"]: m for m in moments}
 
 
-def build_section_index(moments: list[dict]) -> dict[tuple[str, int], list[str]]:
+def chapter_key(chapter: str) -> str:
+    """Normalize a chapter label: "7 a luku" -> "7a" ("" when there is none)."""
+    match = re.match(r"(\d+)\s*([a-z])?\b", (chapter or "").strip().lower())
+    if not match:
+        return ""
+    return match.group(1) + (match.group(2) or "")
+
+
+def build_law_index(moments: list[dict]) -> dict[str, dict]:
     """
-    Build an index of (law_id, section_num) -> list of node_ids.
+    Build an index of the indexed laws: law_id -> {"law_key", "chapters"},
+    where chapters maps a chapter key to the chapter's first moment node_id.
+    
+    Used for resolving mentions of another indexed law that carry no section.
+    """
+    index: dict[str, dict] = {}
+    for m in moments:
+        law = index.setdefault(m["law_id"], {"law_key": m.get("law_key", m["law_id"]), "chapters": {}})
+        law["chapters"].setdefault(chapter_key(m.get("chapter", "")), m["node_id"])
+    return index
+
+
+def build_section_index(moments: list[dict]) -> dict[tuple[str, str], dict[str, list[str]]]:
+    """
+    Build an index of (law_id, section_id) -> chapter key -> list of node_ids.
     Used for resolving references to sections without specific moments.
+    
+    Chapter-aware: in laws whose section numbering restarts per chapter
+    (e.g. osakeyhtiölaki) the same section_id occurs under several chapters.
     """
-    index: dict[tuple[str, int], list[str]] = {}
+    index: dict[tuple[str, str], dict[str, list[str]]] = {}
     for m in moments:
-        key = (m["law_id"], m["section_num"])
-        if key not in index:
-            index[key] = []
-        index[key].append(m["node_id"])
+        key = (m["law_id"], str(m.get("section_id") or m["section_num"]))
+        chapters = index.setdefault(key, {})
+        chapters.setdefault(chapter_key(m.get("chapter", "")), []).append(m["node_id"])
     return index
 
 
+def reference_law(text: str, ref_pos: int) -> tuple[str, str | None] | None:
+    """(law name, law id or None) when another law is named right before ref_pos."""
+    match = LAW_QUALIFIER_PATTERN.search(text[max(0, ref_pos - 80):ref_pos])
+    if match:
+        return match.group(1).lower(), match.group(2)
+    return None
+
+
+def resolve_section_reference(
+    law_id: str,
+    section_num: int,
+    moment_num: int | None,
+    chapter: str | None,
+    default_chapter: str | None,
+    node_index: dict[str, dict],
+    section_index: dict[tuple[str, str], dict[str, list[str]]],
+) -> tuple[list[str], str | None]:
+    """
+    Resolve a section reference into law_id to concrete moment node_ids.
+    
+    A section reference without a moment resolves to every moment of the
+    section. Without an explicit chapter, a section that exists in several
+    chapters resolves within default_chapter (the referring moment's own
+    chapter for internal references).
+    
+    Returns (node_ids, None), or ([], reason) when the reference cannot be
+    resolved (section_missing, chapter_missing, ambiguous_chapter,
+    moment_missing).
+    """
+    chapters = section_index.get((law_id, str(section_num)))
+    if not chapters:
+        return [], "section_missing"
+    
+    if chapter is not None:
+        node_ids = chapters.get(chapter)
+        if node_ids is None:
+            return [], "chapter_missing"
+    elif len(chapters) == 1:
+        node_ids = next(iter(chapters.values()))
+    else:
+        node_ids = chapters.get(default_chapter) if default_chapter is not None else None
+        if node_ids is None:
+            return [], "ambiguous_chapter"
+    
+    if moment_num is None:
+        return list(node_ids), None
+    targets = [nid for nid in node_ids if str(node_index[nid].get("moment")) == str(moment_num)]
+    if not targets:
+        return [], "moment_missing"
+    return targets, None
+
+
 def process_moment(
     moment: dict,
     node_index: dict[str, dict],
-    section_index: dict[tuple[str, int], list[str]],
+    section_index: dict[tuple[str, str], dict[str, list[str]]],
+    law_index: dict[str, dict],
+    unresolved: Counter[str] | None = None,
+    parsed: ParsedText | None = None,
 ) -> tuple[Node, list[Edge]]:
     """
     Process a single moment and extract its node and edges.
+    
+    Section references are resolved to concrete moment node_ids, also when
+    they point into another indexed law ("kirjanpitolain 3 luvun 2 §"); those
+    that cannot be resolved are left out and counted in unresolved by reason.
+    Other mentions of an indexed law point to the named chapter's first
+    moment, or to the law root (law:<law_key>) without a chapter. Only laws
+    outside the graph remain external:<law_id> placeholders.
+    
+    parsed: parse_moment_text result for the moment's text (parsed here if None)
     """
     node: Node = {
         "node_id": moment["node_id"],
@@ -267,73 +518,76 @@ def process_moment(
         "section_title": moment.get("section_title", ""),
         "text": moment.get("text", ""),
     }
+    if parsed is None:
+        parsed = parse_moment_text(moment.get("text", ""))
     
     edges: list[Edge] = []
-    text = moment.get("text", "")
-    law_id = moment["law_id"]
-    finlex_version = moment.get("finlex_version", "")
     source_node_id = moment["node_id"]
-    
-    # Parse internal section references
-    references = parse_section_references(text)
-    for section_num, moment_num, matched_text in references:
+    own_law_id = moment["law_id"]
+    own_chapter = chapter_key(moment.get("chapter", ""))
+    
+    # Section references (own law, or another law named right before)
+    seen_targets: set[tuple[str, str]] = set()
+    linked_law_ids: set[str] = set()
+    for ref in parsed["references"]:
+        section_num, moment_num = ref["section_num"], ref["moment_num"]
+        target_law_id = own_law_id
+        if ref["law_name"] is not None:
+            target_law_id = ref["law_id"] or KNOWN_LAWS.get(ref["law_name"])
+            # "vaalilain 93 §": a law outside the graph
+            if target_law_id not in law_index:
+                if unresolved is not None:
+                    unresolved["other_law"] += 1
+                continue
+        internal = target_law_id == own_law_id
+        
         # Skip self-references
-        if section_num == moment.get("section_num"):
+        if internal and section_num == moment.get("section_num"):
             if moment_num is None or str(moment_num) == str(moment.get("moment")):
                 continue
         
-        # Determine edge type based on context
-        ref_pos = text.find(matched_text)
-        if is_exception_context(text, ref_pos):
-            edge_type = "EXCEPTS"
-        else:
-            edge_type = "REFERS_TO"
+        edge_type = "EXCEPTS" if ref["exception"] else "REFERS_TO"
         
-        # Build target node_id
-        target_node_id = build_target_node_id(
-            law_id, finlex_version, section_num, moment_num
+        # Resolve to concrete moment node_ids
+        target_node_ids, reason = resolve_section_reference(
+            target_law_id, section_num, moment_num, ref["chapter"],
+            own_chapter if internal else None, node_index, section_index,
         )
+        if reason is not None and unresolved is not None:
+            unresolved[reason] += 1
+        if target_node_ids and not internal:
+            linked_law_ids.add(target_law_id)
         
-        # Check if target exists (for moment-specific references)
-        if moment_num is not None:
-            if target_node_id not in node_index:
-                # Try without finlex version (might be different version)
-                target_node_id = f"{law_id}:*:{section_num}:{moment_num}"
-        
-        edges.append({
-            "source": source_node_id,
-            "target": target_node_id,
-            "edge_type": edge_type,
-            "context": matched_text,
-        })
+        for target_node_id in target_node_ids:
+            if target_node_id == source_node_id or (target_node_id, edge_type) in seen_targets:
+                continue
+            seen_targets.add((target_node_id, edge_type))
+            edges.append({
+                "source": source_node_id,
+                "target": target_node_id,
+                "edge_type": edge_type,
+                "context": ref["context"],
+            })
     
-    # Parse external law references (with explicit ID)
-    external_refs = parse_external_law_references(text)
-    found_ext_law_ids: set[str] = set()
-    for law_name, ext_law_id in external_refs:
+    # Law mentions; laws already linked by section are not repeated
+    for mention in parsed["law_mentions"]:
+        ext_law_id = mention["law_id"]
+        if ext_law_id == own_law_id or ext_law_id in linked_law_ids:
+            continue
+        law = law_index.get(ext_law_id)
+        if law is None:
+            target = f"external:{ext_law_id}"
+        else:
+            target = law["chapters"].get(mention["chapter"], f"law:{law['law_key']}")
         edges.append({
             "source": source_node_id,
-            "target": f"external:{ext_law_id}",
+            "target": target,
             "edge_type": "REFERS_TO",
-            "context": f"{law_name} ({ext_law_id})",
+            "context": mention["mention"],
         })
-        found_ext_law_ids.add(ext_law_id)
-    
-    # v8.1: Parse named law references (without explicit ID)
-    for match in NAMED_LAW_PATTERN.finditer(text):
-        law_name_found = match.group(1).lower()
-        ext_law_id = KNOWN_LAWS.get(law_name_found)
-        if ext_law_id and ext_law_id not in found_ext_law_ids:
-            edges.append({
-                "source": source_node_id,
-                "target": f"external:{ext_law_id}",
-                "edge_type": "REFERS_TO",
-                "context": f"{law_name_found}",
-            })
-            found_ext_law_ids.add(ext_law_id)
     
     # Check if this is a definition
-    if is_definition_context(text):
+    if parsed["definition"]:
         # This moment defines something
         edges.append({
             "source": source_node_id,
@@ -387,6 +641,17 @@ def build_hierarchical_edges(moments: list[dict]) -> list[Edge]:
 
 def main() -> None:
     """Main function to build the structural legal graph."""
+    parser = argparse.ArgumentParser(description="Build the structural legal graph")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for parsing moment texts (1: serial)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse every moment, ignoring and keeping the reference cache")
+    parser.add_argument("--dense-index", type=Path, default=DENSE_INDEX_PATH,
+                        help="Dense law index (.npz) for SIMILAR_TO neighbours")
+    parser.add_argument("--similar-k", type=int, default=SIMILAR_K,
+                        help="SIMILAR_TO neighbours per moment (0: none)")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("v8: Building Structural Legal Graph")
     print("=" * 60)
@@ -404,8 +669,16 @@ def main() -> None:
     print("\nBuilding indices...")
     node_index = build_node_index(moments)
     section_index = build_section_index(moments)
+    law_index = build_law_index(moments)
     print(f"  Unique nodes: {len(node_index)}")
-    print(f"  Unique sections: {len(section_index)}")
+    print(f"  Unique sections: {sum(len(chapters) for chapters in section_index.values())}")
+    print(f"  Indexed laws: {len(law_index)}")
+    
+    # Parse moment texts (cached per text)
+    print("\nParsing references...")
+    cache_path = None if args.no_cache else REFERENCE_CACHE_PATH
+    parsed_texts, parsed_count = parse_moments(moments, args.workers, cache_path)
+    print(f"  Parsed: {parsed_count} texts, reused cached results for the other moments")
     
     # Process all moments
     print("\nProcessing moments and extracting references...")
@@ -413,19 +686,24 @@ def main() -> None:
     all_edges: list[Edge] = []
     
     reference_count = 0
+    cross_law_count = 0
     exception_count = 0
     definition_count = 0
     external_count = 0
+    unresolved: Counter[str] = Counter()
     
-    for moment in moments:
-        node, edges = process_moment(moment, node_index, section_index)
+    for moment, parsed in zip(moments, parsed_texts):
+        node, edges = process_moment(moment, node_index, section_index, law_index, unresolved, parsed)
         all_nodes.append(node)
         
         for edge in edges:
             all_edges.append(edge)
             if edge["edge_type"] == "REFERS_TO":
+                target = node_index.get(edge["target"])
                 if edge["target"].startswith("external:"):
                     external_count += 1
+                elif target is None or target["law_id"] != moment["law_id"]:
+                    cross_law_count += 1
                 else:
                     reference_count += 1
             elif edge["edge_type"] == "EXCEPTS":
@@ -440,12 +718,16 @@ def main() -> None:
     
     print(f"\nEdge statistics:")
     print(f"  REFERS_TO (internal): {reference_count}")
+    print(f"  REFERS_TO (cross-law): {cross_law_count}")
     print(f"  REFERS_TO (external): {external_count}")
     print(f"  EXCEPTS: {exception_count}")
     print(f"  DEFINES: {definition_count}")
     print(f"  HAS_SECTION: {len([e for e in hierarchical_edges if e['edge_type'] == 'HAS_SECTION'])}")
     print(f"  HAS_MOMENT: {len([e for e in hierarchical_edges if e['edge_type'] == 'HAS_MOMENT'])}")
     print(f"  TOTAL edges: {len(all_edges)}")
+    print(f"  Unresolved references (dropped): {sum(unresolved.values())}")
+    for reason, count in sorted(unresolved.items()):
+        print(f"    {reason}: {count}")
     
     # Write output files
     graph_dir = PROJECT_ROOT / "graph"
@@ -470,23 +752,39 @@ def main() -> None:
         "total_edges": len(all_edges),
         "edge_types": {
             "REFERS_TO_internal": reference_count,
+            "REFERS_TO_cross_law": cross_law_count,
             "REFERS_TO_external": external_count,
             "EXCEPTS": exception_count,
             "DEFINES": definition_count,
             "HAS_SECTION": len([e for e in hierarchical_edges if e["edge_type"] == "HAS_SECTION"]),
             "HAS_MOMENT": len([e for e in hierarchical_edges if e["edge_type"] == "HAS_MOMENT"]),
         },
-        "laws": list(set(m.get("law_key", m["law_id"]) for m in moments)),
+        "unresolved_references": dict(sorted(unresolved.items())),
+        "laws": sorted(set(m.get("law_key", m["law_id"]) for m in moments)),
     }
     
     summary_path = graph_dir / "graph_summary.json"
     with open(summary_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
     
+    graph = CsrGraph(all_nodes, all_edges)
+    if args.similar_k > 0 and args.dense_index.exists():
+        print(f"\nComputing top-{args.similar_k} SIMILAR_TO neighbours from {args.dense_index}...")
+        dense = DenseLawIndex.load(args.dense_index)
+        graph.similar = SimilarityTable.build(graph, dense.ids, dense.embeddings, args.similar_k)
+        print(f"  Embeddings: {len(dense)} x {dense.dim}")
+    elif args.similar_k > 0:
+        print(f"\nWarning: no dense index at {args.dense_index}, SIMILAR_TO neighbours skipped "
+              f"(build it with scripts/bench_dense_index.py --rebuild)")
+    
+    print("Writing binary snapshot (with materialized k-hop expansion lists and global PageRank)...")
+    snapshot_path = write_snapshot(graph, graph_dir)
+    
     print(f"\nGraph built successfully!")
     print(f"  Nodes: {nodes_path}")
     print(f"  Edges: {edges_path}")
     print(f"  Summary: {summary_path}")
+    print(f"  Snapshot: {snapshot_path}")
     print("=" * 60)
 
 
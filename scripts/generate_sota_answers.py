@@ -2,26 +2,41 @@
 Generate SOTA answers report with full text.
 
 Shows each question with the retrieved legal text as the answer.
+
+Usage:
+    python scripts/generate_sota_answers.py
+    python scripts/generate_sota_answers.py --server   # use a running scripts/query_server.py
+
+With --server the per-law hits come from the query server (POST
+/law_results); routing, reranking and the report stay in this process, so
+the model and Chroma are not loaded here.
 """
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-try:
+from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.query_rules.query_context import QueryContext, register_signal_family
+from shared.retrieval.batch_query import fetch_law_results
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import merge_ranked
+from scripts.query_client import DEFAULT_SERVER_URL, QueryClient, QueryServerError
+
+if TYPE_CHECKING:
     import chromadb
     from sentence_transformers import SentenceTransformer
-except ImportError as e:
-    print(f"Missing dependency: {e}")
-    sys.exit(1)
 
-from shared.query_rules.law_router import route_query, calculate_k_per_law
+# (query, k_per_law) -> law_key -> single-row Chroma-shaped result (see fetch_law_results)
+LawFetcher = Callable[[str, dict[str, int]], dict[str, dict[str, list]]]
 
 
 # Configuration
@@ -42,6 +57,7 @@ PAIR_GUARDS: list[tuple[str, str, float]] = [
     ("tasekaava", "kirjanpitoasetus_1339_1997", +0.03),
     ("tuloslaskelmakaava", "kirjanpitoasetus_1339_1997", +0.03),
 ]
+register_signal_family("sota_answers_pair_guards", [term for term, _, _ in PAIR_GUARDS])
 
 LAW_INDICES = {
     "kuntalaki_410_2015": {
@@ -96,6 +112,8 @@ SOTA_QUESTIONS = [
 
 def load_indices() -> dict[str, chromadb.Collection]:
     """Load all law indices."""
+    import chromadb
+
     indices: dict[str, chromadb.Collection] = {}
     for law_key, config in LAW_INDICES.items():
         chroma_path = config["chroma_path"]
@@ -109,41 +127,43 @@ def load_indices() -> dict[str, chromadb.Collection]:
     return indices
 
 
-def multi_law_query(
-    query: str,
+def local_fetcher(
     indices: dict[str, chromadb.Collection],
     model: SentenceTransformer,
+) -> LawFetcher:
+    """Fetch per-law hits from in-process indices; all routed laws are searched concurrently."""
+    def fetch(query: str, k_per_law: dict[str, int]) -> dict[str, dict[str, list]]:
+        embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+        return fetch_law_results(indices, embedding, k_per_law)
+    return fetch
+
+
+def multi_law_query(
+    query: str,
+    available_laws: list[str],
+    fetch: LawFetcher,
 ) -> list[dict]:
     """Run multi-law query with full text."""
-    available_laws = list(indices.keys())
-    weights = route_query(query, available_laws)
+    context = QueryContext(query)
+    weights = route_query(context, available_laws)
     
     sorted_weights = sorted(weights.items(), key=lambda x: x[1], reverse=True)
     top1_law = sorted_weights[0][0] if sorted_weights else None
     
     k_per_law = calculate_k_per_law(weights, K_TOTAL, min_k=2)
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    law_results = fetch(query, k_per_law)
+    ranked: dict[str, list[dict]] = {}
     
-    all_results: list[dict] = []
-    
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
+    for law_key, results in law_results.items():
+        ranked[law_key] = []
         for doc, meta, dist in zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
         ):
             score = 1 - dist
             if score >= MIN_SCORE:
-                all_results.append({
+                ranked[law_key].append({
                     "law_key": law_key,
                     "law_name": meta.get("law", ""),
                     "score": score,
@@ -153,6 +173,7 @@ def multi_law_query(
                     "chapter_title": meta.get("chapter_title", ""),
                     "text": doc,  # Full text!
                 })
+    all_results = [r for law_hits in ranked.values() for r in law_hits]
     
     # Apply reranking
     if top1_law:
@@ -160,15 +181,15 @@ def multi_law_query(
             if r["law_key"] == top1_law:
                 r["score"] += ROUTER_BONUS
     
-    query_lower = query.lower()
+    matched = context.signals("sota_answers_pair_guards")
     for term, law_key, adjustment in PAIR_GUARDS:
-        if term in query_lower:
+        if term in matched:
             for r in all_results:
                 if r["law_key"] == law_key:
                     r["score"] += adjustment
     
-    all_results.sort(key=lambda x: x["score"], reverse=True)
-    return all_results[:5]
+    # Adjustments are per law, so each law's hits stay sorted: k-way merge
+    return merge_ranked(ranked.values(), 5)
 
 
 def format_law_name(law_key: str) -> str:
@@ -186,12 +207,39 @@ def format_law_name(law_key: str) -> str:
 
 def main() -> None:
     """Generate SOTA answers report."""
-    print("Loading indices...")
-    indices = load_indices()
-    print(f"  Loaded: {len(indices)} indices")
+    parser = argparse.ArgumentParser(description="Generate SOTA answers report")
+    parser.add_argument(
+        "--server", action="store_true",
+        help="Use a running query server instead of loading the model locally",
+    )
+    parser.add_argument("--server-url", default=DEFAULT_SERVER_URL, help="Query server URL")
+    args = parser.parse_args()
     
-    print("Loading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    if args.server:
+        client = QueryClient(args.server_url)
+        try:
+            available_laws = client.laws()
+        except QueryServerError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"Query server: {len(available_laws)} indices")
+        fetch = client.law_results
+    else:
+        try:
+            import chromadb  # noqa: F401
+            import sentence_transformers  # noqa: F401
+        except ImportError as e:
+            print(f"Missing dependency: {e}")
+            sys.exit(1)
+        
+        print("Loading indices...")
+        indices = load_indices()
+        print(f"  Loaded: {len(indices)} indices")
+        
+        print("Loading embedding model...")
+        model = load_query_encoder("BAAI/bge-m3")
+        available_laws = list(indices.keys())
+        fetch = local_fetcher(indices, model)
     
     # Generate answers
     answers: list[dict] = []
@@ -199,7 +247,11 @@ def main() -> None:
     print("\nGenerating answers for 20 questions...\n")
     
     for q in SOTA_QUESTIONS:
-        results = multi_law_query(q["query"], indices, model)
+        try:
+            results = multi_law_query(q["query"], available_laws, fetch)
+        except QueryServerError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
         answers.append({
             "id": q["id"],
             "query": q["query"],
@@ -3,7 +3,11 @@
 v8: Graph-guided Context Builder
 
 Expands retrieval results using the structural legal graph.
-Adds references, exceptions, and definitions to the context.
+Adds references, exceptions, and definitions to the context, and the
+precomputed semantic neighbours (SIMILAR_TO) of each hit when the graph
+snapshot has them. Supporting nodes are scored with personalized PageRank
+seeded by the primary hits, weighted by their retrieval scores
+(shared.graph.pagerank).
 
 Usage:
     from scripts.graph_context_builder import GraphContextBuilder
@@ -12,12 +16,20 @@ Usage:
     expanded = builder.expand_context(primary_hits, query)
 """
 
-import json
+import sys
 from pathlib import Path
 from typing import TypedDict
 
+import numpy as np
+
 PROJECT_ROOT = Path(__file__).parent.parent
 GRAPH_DIR = PROJECT_ROOT / "graph"
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from shared.graph.csr import VERTEX_EXTERNAL, VERTEX_LAW, VERTEX_NODE, CsrGraph
+from shared.graph.pagerank import PAGERANK_DAMPING, PPR_ITERATIONS, TransitionMatrix, global_pagerank
+from shared.graph.snapshot import load_graph
+from shared.query_rules.query_context import QueryContext, register_signal_family
 
 
 class Node(TypedDict):
@@ -46,7 +58,7 @@ class SupportingNode(TypedDict):
     moment: int | str | None
     section_title: str
     text: str
-    relation: str  # REFERS_TO, EXCEPTS, DEFINES
+    relation: str  # REFERS_TO, EXCEPTS, DEFINES, SIMILAR_TO
     hop_distance: int
     score: float
     path: list[str]  # Path from primary to this node
@@ -67,63 +79,79 @@ class GraphContextBuilder:
         "EXCEPTS": 3,      # Exceptions are highest priority
         "REFERS_TO": 2,    # References are important
         "DEFINES": 1,      # Definitions are useful context
+        "SIMILAR_TO": 0,   # Semantic neighbours only fill the remaining budget
     }
     
-    # Score decay per hop
+    # Score decay per hop (hop-based scoring, use_ppr=False)
     DECAY_PER_HOP = 0.05
     
+    # Share of the global PageRank prior in the PPR relevance
+    PPR_PRIOR_WEIGHT = 0.1
+    
     # Limits
     MAX_HOPS = 2
     MAX_NODES_ADDED = 5  # v8.1: reduced for better focus
+    MAX_NODES_ADDED_TOTAL = 8  # expand_multiple: shared by all primary hits
+    MAX_SIMILAR_PER_HIT = 2  # SIMILAR_TO candidates per primary hit
+    SIMILAR_MIN_SCORE = 0.6  # Minimum cosine of a SIMILAR_TO candidate
     
     # v8.1: Definition/Exception trigger keywords
     DEFINITION_TRIGGERS = ["määritelmä", "tarkoitetaan", "tässä laissa", "käsitteellä"]
     EXCEPTION_TRIGGERS = ["poiketen", "poikkeuksena", "jollei", "ellei", "siitä huolimatta"]
     
-    def __init__(self) -> None:
-        """Initialize the graph context builder."""
-        self.nodes: dict[str, Node] = {}
-        self.edges: list[Edge] = []
-        self.adj: dict[str, list[Edge]] = {}
-        self.rev_adj: dict[str, list[Edge]] = {}
+    def __init__(
+        self,
+        use_khop_cache: bool = True,
+        use_similar: bool = True,
+        use_ppr: bool = True,
+    ) -> None:
+        """
+        Initialize the graph context builder.
+        
+        Args:
+            use_khop_cache: Look expansion candidates up from the snapshot's
+                materialized k-hop lists instead of running the BFS per hit
+            use_similar: Add the snapshot's SIMILAR_TO neighbours of each hit
+                as low-priority candidates
+            use_ppr: Score supporting nodes with personalized PageRank
+                instead of the per-neighbour hop decay
+        """
+        self.graph: CsrGraph | None = None
+        self.use_khop_cache = use_khop_cache
+        self.use_similar = use_similar
+        self.use_ppr = use_ppr
+        self._transition: TransitionMatrix | None = None
+        self._prior: np.ndarray | None = None
         self._loaded = False
     
-    def _load_graph(self) -> None:
-        """Load the graph from disk."""
-        if self._loaded:
-            return
-        
-        nodes_path = GRAPH_DIR / "nodes.jsonl"
-        edges_path = GRAPH_DIR / "edges.jsonl"
-        
-        if not nodes_path.exists() or not edges_path.exists():
-            raise FileNotFoundError(
-                "Graph files not found. Run build_structural_legal_graph.py first."
-            )
-        
-        with open(nodes_path, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    node = json.loads(line)
-                    self.nodes[node["node_id"]] = node
-        
-        with open(edges_path, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    edge = json.loads(line)
-                    self.edges.append(edge)
-                    
-                    # Build adjacency
-                    if edge["source"] not in self.adj:
-                        self.adj[edge["source"]] = []
-                    self.adj[edge["source"]].append(edge)
-                    
-                    # Build reverse adjacency
-                    if edge["target"] not in self.rev_adj:
-                        self.rev_adj[edge["target"]] = []
-                    self.rev_adj[edge["target"]].append(edge)
+    def load(self) -> CsrGraph:
+        """
+        Load the graph from disk (once) and return it.
         
+        Expansion loads it on first use; servers call this up front to pay
+        the load at startup and to share the graph with other lookups.
+        """
+        if self._loaded:
+            return self.graph
+        
+        # Binary snapshot when current, JSONL otherwise
+        self.graph = load_graph(GRAPH_DIR)
+        if self.use_ppr:
+            weights = {t: float(p) for t, p in self.EDGE_PRIORITY.items()}
+            self._transition = TransitionMatrix.build(self.graph, weights)
+            # Stored in the snapshot; computed here for a JSONL-loaded graph
+            prior = self.graph.pagerank
+            self._prior = global_pagerank(self.graph, weights) if prior is None else np.asarray(prior, dtype=np.float64)
         self._loaded = True
+        return self.graph
+    
+    def get_node(self, node_id: str) -> Node | None:
+        """Look up a graph node by id."""
+        self.load()
+        vertex = self.graph.index.get(node_id)
+        if vertex is None or not self.graph.is_node(vertex):
+            return None
+        return self.graph.node(vertex)
     
     def _get_section_sibling_ids(self, node_id: str) -> list[str]:
         """
@@ -132,21 +160,11 @@ class GraphContextBuilder:
         If node_id is 410/2015:fin@20230780:8:3, this returns all
         410/2015:fin@20230780:8:* node_ids (8:1, 8:2, 8:3, etc.)
         """
-        if node_id not in self.nodes:
+        self.load()
+        vertex = self.graph.index.get(node_id)
+        if vertex is None:
             return []
-        
-        node = self.nodes[node_id]
-        law_key = node.get("law_key", "")
-        section_num = node.get("section_num")
-        
-        if section_num is None:
-            return []
-        
-        siblings = []
-        for nid, n in self.nodes.items():
-            if n.get("law_key") == law_key and n.get("section_num") == section_num:
-                siblings.append(nid)
-        return siblings
+        return [self.graph.ids[v] for v in self.graph.section_siblings(vertex)]
     
     def _get_neighbors(
         self,
@@ -162,52 +180,105 @@ class GraphContextBuilder:
         
         Returns list of (neighbor_id, edge, hop_distance, path)
         """
-        self._load_graph()
-        
-        neighbors: list[tuple[str, Edge, int, list[str]]] = []
+        return self._get_neighbors_multi([node_id], max_hops)[0]
+    
+    def _get_neighbors_multi(
+        self,
+        node_ids: list[str],
+        max_hops: int = MAX_HOPS,
+    ) -> list[list[tuple[str, Edge, int, list[str]]]]:
+        """_get_neighbors for several nodes with one shared traversal."""
+        self.load()
+        
+        ids = self.graph.ids
+        vertices = [self.graph.index.get(node_id) for node_id in node_ids]
+        known = [v for v in vertices if v is not None]
+        found = iter(self.graph.neighbors_multi(known, max_hops, self.use_khop_cache))
+        
+        edges: dict[int, Edge] = {}
+        results: list[list[tuple[str, Edge, int, list[str]]]] = []
+        for vertex in vertices:
+            if vertex is None:
+                results.append([])
+                continue
+            neighbors = []
+            for neighbor, edge_id, hop, path in next(found):
+                edge = edges.get(edge_id)
+                if edge is None:
+                    edge = edges[edge_id] = self.graph.edge(edge_id)
+                neighbors.append((ids[neighbor], edge, hop, [ids[v] for v in path]))
+            results.append(neighbors)
+        return results
+    
+    def _get_similar(
+        self,
+        node_id: str,
+        neighbors: list[tuple[str, Edge, int, list[str]]],
+    ) -> list[tuple[str, Edge, int, list[str]]]:
+        """
+        Semantic neighbours of node_id as hop-1 SIMILAR_TO candidates.
         
-        # v8.1: Start with current node AND its section siblings
-        sibling_ids = self._get_section_sibling_ids(node_id)
-        if not sibling_ids:
-            sibling_ids = [node_id]
+        Read from the precomputed table, so no embedding work is done. Nodes
+        already reached by graph edges and moments of the same section are
+        left out.
+        """
+        self.load()
+        vertex = self.graph.index.get(node_id)
+        if not self.use_similar or vertex is None:
+            return []
         
-        visited: set[str] = set(sibling_ids)
+        ids = self.graph.ids
+        skip = {vertex, *self.graph.section_siblings(vertex)}
+        reached = {neighbor_id for neighbor_id, _, _, _ in neighbors}
+        similar = []
+        for neighbor, score in self.graph.similar_to(vertex, self.SIMILAR_MIN_SCORE):
+            if neighbor in skip or ids[neighbor] in reached:
+                continue
+            edge: Edge = {
+                "source": node_id,
+                "target": ids[neighbor],
+                "edge_type": "SIMILAR_TO",
+                "context": f"cosine {score:.3f}",
+            }
+            similar.append((ids[neighbor], edge, 1, [node_id, ids[neighbor]]))
+            if len(similar) == self.MAX_SIMILAR_PER_HIT:
+                break
+        return similar
+    
+    def _ppr_relevance(self, node_ids: list[str], scores: list[float]) -> np.ndarray | None:
+        """
+        Personalized PageRank relevance of every vertex for the primary hits.
         
-        # BFS with path tracking - start from all siblings
-        queue: list[tuple[str, int, list[str]]] = [
-            (sid, 0, [node_id]) for sid in sibling_ids
-        ]
+        One walk restarts at all hits at once: each hit's section moments
+        (the seeds of its expansion) share a restart mass proportional to
+        the hit's retrieval score, so a node reached from several strong
+        hits outranks one reached from a single hit. The global PageRank
+        prior is blended in with PPR_PRIOR_WEIGHT.
         
-        while queue:
-            current, hop, path = queue.pop(0)
-            
-            if hop >= max_hops:
+        Returns None when PPR scoring is off.
+        """
+        self.load()
+        if not self.use_ppr or not node_ids:
+            return None
+        
+        # Equal weights when no hit has a positive score
+        weights = [max(score, 0.0) for score in scores]
+        if not any(weights):
+            weights = [1.0] * len(node_ids)
+        
+        restart = np.zeros(self.graph.n_vertices)
+        for node_id, weight in zip(node_ids, weights):
+            vertex = self.graph.index.get(node_id)
+            if vertex is None:
                 continue
-            
-            # Outgoing edges (we follow references from this node)
-            for edge in self.adj.get(current, []):
-                # Skip hierarchical edges for expansion
-                if edge["edge_type"] in ["HAS_SECTION", "HAS_MOMENT"]:
-                    continue
-                
-                target = edge["target"]
-                if target not in visited:
-                    visited.add(target)
-                    new_path = path + [target]
-                    neighbors.append((target, edge, hop + 1, new_path))
-                    queue.append((target, hop + 1, new_path))
-            
-            # Incoming EXCEPTS edges (we want to know what exceptions apply)
-            for edge in self.rev_adj.get(current, []):
-                if edge["edge_type"] == "EXCEPTS":
-                    source = edge["source"]
-                    if source not in visited:
-                        visited.add(source)
-                        new_path = path + [source]
-                        neighbors.append((source, edge, hop + 1, new_path))
-                        queue.append((source, hop + 1, new_path))
-        
-        return neighbors
+            seeds = self.graph.section_siblings(vertex) or [vertex]
+            restart[seeds] += weight / len(seeds)
+        total = restart.sum()
+        if total == 0:
+            return None
+        
+        ppr = self._transition.pagerank(restart / total, PAGERANK_DAMPING, PPR_ITERATIONS)
+        return (1.0 - self.PPR_PRIOR_WEIGHT) * ppr + self.PPR_PRIOR_WEIGHT * self._prior
     
     def _score_neighbor(
         self,
@@ -226,36 +297,38 @@ class GraphContextBuilder:
         
         return max(0.0, score)
     
-    def expand_context(
+    def _collect_support(
         self,
-        primary_hit: dict,
-        query: str | None = None,
-    ) -> ExpandedContext:
+        primary_score: float,
+        neighbors: list[tuple[str, Edge, int, list[str]]],
+        node_cache: dict[str, Node | None] | None = None,
+        relevance: np.ndarray | None = None,
+    ) -> tuple[list[SupportingNode], list[dict]]:
         """
-        Expand context for a primary retrieval hit using the graph.
-        
-        Args:
-            primary_hit: The primary retrieval result (must have 'node_id' and 'score')
-            query: Optional query for relevance filtering
-            
-        Returns:
-            ExpandedContext with primary hit and supporting nodes
+        Scored supporting nodes and normipolku edges from a hit's neighbors.
+        
+        With relevance (the PPR of all primary hits), node scores are the primary
+        score scaled by each node's relevance relative to the best supporting
+        node. The relevances are one NumPy gather, but building the records
+        and writing the scores back is still a Python loop over the
+        neighbours. Without relevance (or when no candidate has any),
+        _score_neighbor scores each node by hop and edge type.
         """
-        self._load_graph()
-        
-        node_id = primary_hit.get("node_id", "")
-        primary_score = primary_hit.get("score", 0.5)
-        
-        # Find neighbors
-        neighbors = self._get_neighbors(node_id, self.MAX_HOPS)
-        
-        # Build supporting nodes
         supporting: list[SupportingNode] = []
         normipolku: list[dict] = []
         
+        if node_cache is None:
+            node_cache = {}
+        
+        vertex_kind = self.graph.vertex_kind
+        vertices: list[int] = []
+        support_edges: list[Edge] = []
         for neighbor_id, edge, hop_distance, path in neighbors:
-            # Skip external references for now
-            if neighbor_id.startswith("external:"):
+            vertex = self.graph.index[neighbor_id]
+            kind = vertex_kind[vertex]
+            
+            # Law roots and laws outside the graph only enter the normipolku
+            if kind == VERTEX_EXTERNAL or kind == VERTEX_LAW:
                 normipolku.append({
                     "from": edge["source"],
                     "to": neighbor_id,
@@ -265,20 +338,16 @@ class GraphContextBuilder:
                 })
                 continue
             
-            # Skip definition placeholders
-            if neighbor_id.startswith("definition:"):
+            # Skip definition placeholders and section ids (wildcards are
+            # resolved at build time)
+            if kind != VERTEX_NODE:
                 continue
             
-            # Get node data
-            node = self.nodes.get(neighbor_id)
-            if node is None:
-                # Try to resolve wildcard references
-                if ":*:" in neighbor_id:
-                    continue  # Skip unresolved wildcards
-                continue
+            node = self._cached_node(neighbor_id, node_cache)
             
-            # Calculate score
-            score = self._score_neighbor(primary_score, edge, hop_distance)
+            # Cross-law edges are resolved at build time into the other law's nodes
+            source = self._cached_node(edge["source"], node_cache)
+            cross_law = source is not None and source["law_key"] != node["law_key"]
             
             supporting.append({
                 "node_id": neighbor_id,
@@ -290,27 +359,56 @@ class GraphContextBuilder:
                 "text": node["text"],
                 "relation": edge["edge_type"],
                 "hop_distance": hop_distance,
-                "score": score,
+                "score": 0.0,  # set below
                 "path": path,
             })
+            vertices.append(vertex)
+            support_edges.append(edge)
             
             normipolku.append({
                 "from": edge["source"],
                 "to": neighbor_id,
                 "edge_type": edge["edge_type"],
                 "context": edge["context"],
-                "external": False,
+                "external": cross_law,
             })
         
-        # v8.1: 2-phase support budget
+        scores: list[float] | None = None
+        if relevance is not None and supporting:
+            node_relevance = relevance[vertices]
+            best = node_relevance.max()
+            if best > 0:
+                scores = (primary_score * node_relevance / best).tolist()
+        if scores is None:
+            scores = [
+                self._score_neighbor(primary_score, edge, sn["hop_distance"])
+                for sn, edge in zip(supporting, support_edges)
+            ]
+        for sn, score in zip(supporting, scores):
+            sn["score"] = score
+        
+        return supporting, normipolku
+    
+    def _cached_node(self, node_id: str, node_cache: dict[str, Node | None]) -> Node | None:
+        if node_id not in node_cache:
+            node_cache[node_id] = self.get_node(node_id)
+        return node_cache[node_id]
+    
+    def _split_support(
+        self,
+        supporting: list[SupportingNode],
+        needs_definition: bool,
+    ) -> tuple[list[SupportingNode], list[SupportingNode]]:
+        """
+        v8.1 2-phase support budget for one hit.
+        
+        Returns (mandatory, optional): at most one EXCEPTS and one DEFINES
+        (if triggered) node, then the other nodes by priority and score.
+        """
         # Phase 1: Mandatory categories (EXCEPTS, DEFINES if triggered)
         mandatory: list[SupportingNode] = []
         optional: list[SupportingNode] = []
         
-        # Check if query triggers definition lookup
-        query_lower = (query or "").lower()
-        needs_definition = any(t in query_lower for t in self.DEFINITION_TRIGGERS)
-        
         for sn in supporting:
             if sn["relation"] == "EXCEPTS":
                 mandatory.append(sn)
@@ -320,12 +418,7 @@ class GraphContextBuilder:
                 optional.append(sn)
         
         # Phase 2: Fill remaining budget with optional by priority
-        optional.sort(
-            key=lambda x: (
-                -self.EDGE_PRIORITY.get(x["relation"], 0),
-                -x["score"],
-            )
-        )
+        optional.sort(key=self._support_rank)
         
         # Take best from each category for mandatory (max 1 EXCEPTS, max 1 DEFINES)
         final_mandatory: list[SupportingNode] = []
@@ -339,8 +432,46 @@ class GraphContextBuilder:
                 final_mandatory.append(sn)
                 has_defines = True
         
+        return final_mandatory, optional
+    
+    def _support_rank(self, sn: SupportingNode) -> tuple[int, float]:
+        return (-self.EDGE_PRIORITY.get(sn["relation"], 0), -sn["score"])
+    
+    def expand_context(
+        self,
+        primary_hit: dict,
+        query: str | QueryContext | None = None,
+    ) -> ExpandedContext:
+        """
+        Expand context for a primary retrieval hit using the graph.
+        
+        Args:
+            primary_hit: The primary retrieval result (must have 'node_id' and 'score')
+            query: Optional query (or its QueryContext) for relevance filtering
+            
+        Returns:
+            ExpandedContext with primary hit and supporting nodes
+        """
+        self.load()
+        
+        node_id = primary_hit.get("node_id", "")
+        primary_score = primary_hit.get("score", 0.5)
+        
+        # Find neighbors
+        neighbors = self._get_neighbors(node_id, self.MAX_HOPS)
+        neighbors += self._get_similar(node_id, neighbors)
+        supporting, normipolku = self._collect_support(
+            primary_score,
+            neighbors,
+            relevance=self._ppr_relevance([node_id], [primary_score]),
+        )
+        
+        # Check if query triggers definition lookup
+        needs_definition = query is not None and QueryContext.of(query).has_signal("graph_definition_triggers")
+        mandatory, optional = self._split_support(supporting, needs_definition)
+        
         # Combine and limit
-        final_supporting = final_mandatory + optional
+        final_supporting = mandatory + optional
         final_supporting = final_supporting[:self.MAX_NODES_ADDED]
         
         return {
@@ -352,28 +483,107 @@ class GraphContextBuilder:
     def expand_multiple(
         self,
         hits: list[dict],
-        query: str | None = None,
+        query: str | QueryContext | None = None,
         top_k: int = 3,
+        support_budget: int | None = None,
     ) -> list[ExpandedContext]:
         """
-        Expand context for multiple retrieval hits.
+        Expand context for multiple retrieval hits in one multi-source pass.
+        
+        All primary hits seed one traversal, so shared sections and
+        neighbours are visited once. A supporting node reached from several
+        hits is kept once, under the hit that gives it the best score, and
+        nodes that are themselves primary hits are not repeated. Each hit
+        keeps its mandatory EXCEPTS/DEFINES node; the rest of one shared
+        support budget goes to the best optional nodes across all hits.
         
         Args:
             hits: List of retrieval results
             query: Optional query for relevance filtering
             top_k: Number of primary hits to expand (default: 3)
+            support_budget: Supporting nodes across all hits
+                (default: MAX_NODES_ADDED_TOTAL)
             
         Returns:
             List of ExpandedContext for each primary hit
         """
-        results: list[ExpandedContext] = []
+        self.load()
+        
+        primaries = hits[:top_k]
+        budget = self.MAX_NODES_ADDED_TOTAL if support_budget is None else support_budget
+        needs_definition = query is not None and QueryContext.of(query).has_signal("graph_definition_triggers")
+        
+        node_ids = [hit.get("node_id", "") for hit in primaries]
+        primary_ids = set(node_ids)
+        node_cache: dict[str, Node | None] = {}
+        scores = [hit.get("score", 0.5) for hit in primaries]
+        relevance = self._ppr_relevance(node_ids, scores)
+        collected = [
+            self._collect_support(
+                score,
+                neighbors + self._get_similar(node_id, neighbors),
+                node_cache,
+                relevance,
+            )
+            for score, node_id, neighbors in zip(
+                scores, node_ids, self._get_neighbors_multi(node_ids, self.MAX_HOPS)
+            )
+        ]
         
-        for hit in hits[:top_k]:
-            expanded = self.expand_context(hit, query)
-            results.append(expanded)
+        # Best-scoring hit owns each supporting node (earlier hit on ties)
+        owner: dict[str, tuple[float, int]] = {}
+        for i, (supporting, _) in enumerate(collected):
+            for sn in supporting:
+                if sn["node_id"] in primary_ids:
+                    continue
+                best = owner.get(sn["node_id"])
+                if best is None or sn["score"] > best[0]:
+                    owner[sn["node_id"]] = (sn["score"], i)
+        
+        mandatory_per_hit: list[list[SupportingNode]] = []
+        optional_pool: list[tuple[int, SupportingNode]] = []
+        for i, (supporting, _) in enumerate(collected):
+            owned = [sn for sn in supporting if owner.get(sn["node_id"], (0.0, -1))[1] == i]
+            mandatory, optional = self._split_support(owned, needs_definition)
+            mandatory_per_hit.append(mandatory)
+            optional_pool.extend((i, sn) for sn in optional)
+        optional_pool.sort(key=lambda item: self._support_rank(item[1]))
+        
+        # Shared budget: mandatory nodes in hit order, then best optional overall
+        selected: list[list[SupportingNode]] = [[] for _ in primaries]
+        remaining = budget
+        for i, mandatory in enumerate(mandatory_per_hit):
+            taken = mandatory[:max(remaining, 0)]
+            selected[i].extend(taken)
+            remaining -= len(taken)
+        for i, sn in optional_pool[:max(remaining, 0)]:
+            selected[i].append(sn)
+        
+        # Each normipolku edge is reported once, under the first hit reaching it
+        seen_edges: set[tuple[str, str, str]] = set()
+        results: list[ExpandedContext] = []
+        for hit, (_, normipolku), supporting in zip(primaries, collected, selected):
+            path_edges = []
+            for edge in normipolku:
+                key = (edge["from"], edge["to"], edge["edge_type"])
+                if key not in seen_edges:
+                    seen_edges.add(key)
+                    path_edges.append(edge)
+            results.append({
+                "primary": hit,
+                "supporting_nodes": supporting,
+                "normipolku": path_edges,
+            })
         
         return results
     
+    @staticmethod
+    def merge_expanded(expanded: list[ExpandedContext]) -> tuple[list[SupportingNode], list[dict]]:
+        """Supporting nodes and normipolku edges of expand_multiple's results, in hit order."""
+        supporting = [sn for context in expanded for sn in context["supporting_nodes"]]
+        normipolku = [edge for context in expanded for edge in context["normipolku"]]
+        return supporting, normipolku
+    
     def format_normipolku(self, expanded: ExpandedContext) -> str:
         """
         Format the normipolku (norm path) as a readable string.
@@ -403,6 +613,13 @@ class GraphContextBuilder:
         return "\n".join(lines)
 
 
+# v8.1: Municipal context; the graph runners penalize hits from other laws
+MUNICIPAL_ANCHORS = ["kunnan", "kunta", "kuntakonserni", "kuntalaki", "kuntalain"]
+
+register_signal_family("graph_definition_triggers", GraphContextBuilder.DEFINITION_TRIGGERS)
+register_signal_family("graph_municipal_anchors", MUNICIPAL_ANCHORS)
+
+
 def main() -> None:
     """Test the graph context builder."""
     print("=" * 60)
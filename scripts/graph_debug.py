@@ -3,15 +3,21 @@
 v8: Graph Debug CLI
 
 Query the structural legal graph to inspect nodes and their neighbors.
+Lookups go through the indexes of shared.graph.query_engine.
 
 Usage:
     python scripts/graph_debug.py --node <node_id> --hops <1|2>
-    python scripts/graph_debug.py --section <section_num> --law <law_key>
+    python scripts/graph_debug.py --section <section_num> --law <law_key> [--chapter <chapter>]
+    python scripts/graph_debug.py --refs <node_id|external:...>
+    python scripts/graph_debug.py --path <source_id> <target_id> [--hops 4] [--undirected]
+    python scripts/graph_debug.py --external
     python scripts/graph_debug.py --stats
     
 Examples:
     python scripts/graph_debug.py --node "410/2015:fin@20230780:6:1" --hops 2
-    python scripts/graph_debug.py --section 113 --law kuntalaki_410_2015
+    python scripts/graph_debug.py --section 113 --law 410/2015
+    python scripts/graph_debug.py --section 5 --law 1339/1997 --chapter 2
+    python scripts/graph_debug.py --refs "external:1050/2018"
     python scripts/graph_debug.py --stats
 """
 
@@ -23,6 +29,9 @@ from typing import TypedDict
 
 PROJECT_ROOT = Path(__file__).parent.parent
 GRAPH_DIR = PROJECT_ROOT / "graph"
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from shared.graph.query_engine import GraphQueryEngine
 
 
 class Node(TypedDict):
@@ -35,102 +44,28 @@ class Node(TypedDict):
     text: str
 
 
-class Edge(TypedDict):
-    source: str
-    target: str
-    edge_type: str
-    context: str
-
-
-def load_graph() -> tuple[dict[str, Node], list[Edge]]:
-    """Load nodes and edges from JSONL files."""
-    nodes: dict[str, Node] = {}
-    edges: list[Edge] = []
-    
-    nodes_path = GRAPH_DIR / "nodes.jsonl"
-    edges_path = GRAPH_DIR / "edges.jsonl"
-    
-    if not nodes_path.exists() or not edges_path.exists():
+def load_engine() -> GraphQueryEngine:
+    """Load the graph query engine (binary snapshot when current, else JSONL)."""
+    try:
+        return GraphQueryEngine.load(GRAPH_DIR)
+    except FileNotFoundError:
         print("ERROR: Graph files not found. Run build_structural_legal_graph.py first.")
         sys.exit(1)
-    
-    with open(nodes_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                node = json.loads(line)
-                nodes[node["node_id"]] = node
-    
-    with open(edges_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                edges.append(json.loads(line))
-    
-    return nodes, edges
-
-
-def build_adjacency(edges: list[Edge]) -> dict[str, list[Edge]]:
-    """Build adjacency list from edges (source -> edges)."""
-    adj: dict[str, list[Edge]] = {}
-    for edge in edges:
-        if edge["source"] not in adj:
-            adj[edge["source"]] = []
-        adj[edge["source"]].append(edge)
-    return adj
-
-
-def build_reverse_adjacency(edges: list[Edge]) -> dict[str, list[Edge]]:
-    """Build reverse adjacency list (target -> edges)."""
-    adj: dict[str, list[Edge]] = {}
-    for edge in edges:
-        if edge["target"] not in adj:
-            adj[edge["target"]] = []
-        adj[edge["target"]].append(edge)
-    return adj
-
-
-def find_neighbors(
-    node_id: str,
-    adj: dict[str, list[Edge]],
-    rev_adj: dict[str, list[Edge]],
-    hops: int = 1,
-) -> dict[str, list[tuple[Edge, int]]]:
-    """
-    Find neighbors of a node up to N hops.
-    
-    Returns dict of node_id -> list of (edge, hop_distance)
-    """
-    visited: set[str] = {node_id}
-    result: dict[str, list[tuple[Edge, int]]] = {}
-    
-    current_level: set[str] = {node_id}
-    
-    for hop in range(1, hops + 1):
-        next_level: set[str] = set()
-        
-        for current_node in current_level:
-            # Outgoing edges
-            for edge in adj.get(current_node, []):
-                target = edge["target"]
-                if target not in visited:
-                    visited.add(target)
-                    next_level.add(target)
-                    if target not in result:
-                        result[target] = []
-                    result[target].append((edge, hop))
-            
-            # Incoming edges (for reverse traversal)
-            for edge in rev_adj.get(current_node, []):
-                source = edge["source"]
-                if source not in visited:
-                    visited.add(source)
-                    next_level.add(source)
-                    if source not in result:
-                        result[source] = []
-                    result[source].append((edge, hop))
-        
-        current_level = next_level
-    
-    return result
+
+
+def resolve_vertex(engine: GraphQueryEngine, vertex_id: str) -> int | None:
+    """Vertex of vertex_id, or None after printing close matches."""
+    vertex = engine.vertex(vertex_id)
+    if vertex is not None:
+        return vertex
+    matches = engine.find(vertex_id)
+    if matches:
+        print(f"\nNode not found. Did you mean one of these?")
+        for m in matches:
+            print(f"  - {m}")
+    else:
+        print(f"\nNode not found: {vertex_id}")
+    return None
 
 
 def format_node(node: Node | None, node_id: str) -> str:
@@ -147,65 +82,67 @@ def format_node(node: Node | None, node_id: str) -> str:
     )
 
 
+def format_edge(engine: GraphQueryEngine, vertex: int, edge_id: int, hop: int, forward: bool) -> list[str]:
+    """Format a reached vertex and the edge leading to it."""
+    graph = engine.graph
+    direction = "->" if forward else "<-"
+    lines = [f"\n  [Hop {hop}] {direction} {graph.ids[vertex]}",
+             f"    Context: {graph.edge_context[edge_id]}"]
+    if graph.is_node(vertex):
+        text = graph.text[vertex]
+        text_preview = text[:80] + "..." if len(text) > 80 else text
+        lines.append(f"    Text: {text_preview}")
+    return lines
+
+
 def cmd_query_node(args: argparse.Namespace) -> None:
     """Query a specific node and its neighbors."""
-    nodes, edges = load_graph()
-    adj = build_adjacency(edges)
-    rev_adj = build_reverse_adjacency(edges)
+    engine = load_engine()
+    graph = engine.graph
     
     node_id = args.node
-    hops = args.hops
+    hops = args.hops or 1
     
     print(f"\n{'='*60}")
     print(f"Graph Query: {node_id} (hops={hops})")
     print(f"{'='*60}")
     
-    # Find the node
-    if node_id not in nodes:
-        # Try partial match
-        matches = [nid for nid in nodes if node_id in nid]
-        if matches:
-            print(f"\nNode not found. Did you mean one of these?")
-            for m in matches[:10]:
-                print(f"  - {m}")
-            return
-        print(f"\nNode not found: {node_id}")
+    vertex = resolve_vertex(engine, node_id)
+    if vertex is None:
         return
     
-    node = nodes[node_id]
     print(f"\n--- Primary Node ---")
-    print(format_node(node, node_id))
-    
-    # Find neighbors
-    neighbors = find_neighbors(node_id, adj, rev_adj, hops)
+    print(format_node(graph.node(vertex) if graph.is_node(vertex) else None, node_id))
     
-    # Group by edge type and hop
-    by_type: dict[str, list[tuple[str, Edge, int]]] = {}
-    for neighbor_id, edge_list in neighbors.items():
-        for edge, hop in edge_list:
-            edge_type = edge["edge_type"]
-            if edge_type not in by_type:
-                by_type[edge_type] = []
-            by_type[edge_type].append((neighbor_id, edge, hop))
+    # Group by edge type, in hop order
+    by_type: dict[str, list[tuple[int, int, int, bool]]] = {}
+    for reached in engine.neighborhood(vertex, hops):
+        edge_type = graph.edge_types[graph.edge_type[reached[1]]]
+        by_type.setdefault(edge_type, []).append(reached)
     
     # Display by type
     for edge_type in ["REFERS_TO", "EXCEPTS", "DEFINES", "HAS_MOMENT", "HAS_SECTION"]:
         if edge_type in by_type:
             print(f"\n--- {edge_type} ({len(by_type[edge_type])}) ---")
-            for neighbor_id, edge, hop in sorted(by_type[edge_type], key=lambda x: x[2]):
-                direction = "->" if edge["source"] == node_id else "<-"
-                neighbor_node = nodes.get(neighbor_id)
-                
-                print(f"\n  [Hop {hop}] {direction} {neighbor_id}")
-                print(f"    Context: {edge['context']}")
-                if neighbor_node:
-                    text_preview = neighbor_node["text"][:80] + "..." if len(neighbor_node["text"]) > 80 else neighbor_node["text"]
-                    print(f"    Text: {text_preview}")
+            for neighbor, edge_id, hop, forward in by_type[edge_type]:
+                print("\n".join(format_edge(engine, neighbor, edge_id, hop, forward)))
+
+
+def print_referrers(engine: GraphQueryEngine, edge_ids: list[int], limit: int) -> None:
+    """Print referring edges (source, type, context)."""
+    graph = engine.graph
+    print(f"\n--- Incoming References ({len(edge_ids)}) ---")
+    for edge_id in edge_ids[:limit]:
+        source = graph.edge_src[edge_id]
+        source_info = f" ({graph.section_title[source]})" if graph.is_node(source) else ""
+        print(f"  [{graph.edge_types[graph.edge_type[edge_id]]}] {graph.ids[source]}{source_info}")
+        print(f"    Context: {graph.edge_context[edge_id]}")
 
 
 def cmd_query_section(args: argparse.Namespace) -> None:
     """Query all moments in a section."""
-    nodes, edges = load_graph()
+    engine = load_engine()
+    graph = engine.graph
     
     section_num = args.section
     law_key = args.law
@@ -214,66 +151,106 @@ def cmd_query_section(args: argparse.Namespace) -> None:
     print(f"Section Query: {law_key} - {section_num}")
     print(f"{'='*60}")
     
-    # Find all moments in this section
-    matching: list[Node] = []
-    for node in nodes.values():
-        if (
-            node.get("section_num") == section_num
-            and (law_key is None or law_key in node.get("law_key", ""))
-        ):
-            matching.append(node)
-    
-    if not matching:
+    # Moments from the (law_key, chapter, section) index
+    sections = engine.sections(section_num, law_key, args.chapter)
+    if not sections:
         print(f"\nNo moments found for section {section_num}")
         return
     
-    matching.sort(key=lambda n: (n.get("moment", 0)))
+    matching = [vertex for _, members in sections for vertex in members]
+    print(f"\nFound {len(matching)} moments in {len(sections)} sections:")
+    for (section_law, chapter, label), members in sections:
+        chapter_info = f"{chapter} luku " if chapter else ""
+        print(f"\n--- {section_law} {chapter_info}{label} § ---")
+        for vertex in members:
+            print(f"\n{format_node(graph.node(vertex), graph.ids[vertex])}")
+    
+    # References TO this section
+    incoming = engine.referrers(matching)
+    if incoming:
+        print_referrers(engine, incoming, args.limit)
+
+
+def cmd_referrers(args: argparse.Namespace) -> None:
+    """Show who references a node, section id or external target."""
+    engine = load_engine()
+    
+    print(f"\n{'='*60}")
+    print(f"Referrers: {args.refs}")
+    print(f"{'='*60}")
     
-    print(f"\nFound {len(matching)} moments:")
-    for node in matching:
-        print(f"\n{format_node(node, node['node_id'])}")
+    vertex = resolve_vertex(engine, args.refs)
+    if vertex is None:
+        return
+    print_referrers(engine, engine.referrers(vertex), args.limit)
+
+
+def cmd_path(args: argparse.Namespace) -> None:
+    """Show the shortest edge path between two vertices."""
+    engine = load_engine()
+    graph = engine.graph
+    source_id, target_id = args.path
+    hops = args.hops or 4
     
-    # Find references TO this section
-    adj = build_adjacency(edges)
-    rev_adj = build_reverse_adjacency(edges)
+    print(f"\n{'='*60}")
+    print(f"Path: {source_id} -> {target_id} (max {hops} hops)")
+    print(f"{'='*60}")
     
-    incoming: list[tuple[str, Edge]] = []
-    for node in matching:
-        for edge in rev_adj.get(node["node_id"], []):
-            if edge["edge_type"] in ["REFERS_TO", "EXCEPTS"]:
-                incoming.append((edge["source"], edge))
+    source = resolve_vertex(engine, source_id)
+    target = resolve_vertex(engine, target_id)
+    if source is None or target is None:
+        return
     
-    if incoming:
-        print(f"\n--- Incoming References ({len(incoming)}) ---")
-        for source_id, edge in incoming[:20]:  # Limit to 20
-            source_node = nodes.get(source_id)
-            source_info = ""
-            if source_node:
-                source_info = f" ({source_node.get('section_title', '')})"
-            print(f"  [{edge['edge_type']}] {source_id}{source_info}")
-            print(f"    Context: {edge['context']}")
+    steps = engine.path(source, target, hops, directed=not args.undirected)
+    if steps is None:
+        print(f"\nNo path within {hops} hops")
+        return
+    print(f"\n  {source_id}")
+    for vertex, edge_id, hop, forward in steps:
+        arrow = f"--{graph.edge_types[graph.edge_type[edge_id]]}-->" if forward \
+            else f"<--{graph.edge_types[graph.edge_type[edge_id]]}--"
+        print(f"  {arrow} {graph.ids[vertex]}")
+
+
+def cmd_external(args: argparse.Namespace) -> None:
+    """List external: targets by number of referring edges."""
+    engine = load_engine()
+    targets = engine.external_targets()
+    
+    print(f"\n{'='*60}")
+    print(f"External Targets ({len(targets)})")
+    print(f"{'='*60}")
+    for vertex, count in targets[:args.limit]:
+        print(f"  {count:4d}  {engine.graph.ids[vertex]}")
 
 
 def cmd_stats(args: argparse.Namespace) -> None:
     """Show graph statistics."""
+    stats = load_engine().stats()
+    
+    print(f"\n{'='*60}")
+    print("Graph Statistics")
+    print(f"{'='*60}")
+    print(f"\nTotal nodes: {stats['nodes']}")
+    print(f"Total edges: {stats['edges']}")
+    print(f"Sections: {stats['sections']}")
+    print(f"External targets: {stats['external_targets']}")
+    print(f"\nEdge types:")
+    for edge_type, count in stats["edge_types"].items():
+        print(f"  {edge_type}: {count}")
+    print(f"\nLaws (moments):")
+    for law, count in stats["moments_per_law"].items():
+        print(f"  - {law}: {count}")
+    
+    # Unresolved references are only recorded by the build
     summary_path = GRAPH_DIR / "graph_summary.json"
     if summary_path.exists():
         with open(summary_path, "r", encoding="utf-8") as f:
-            summary = json.load(f)
-        
-        print(f"\n{'='*60}")
-        print("Graph Statistics")
-        print(f"{'='*60}")
-        print(f"\nTotal nodes: {summary['total_nodes']}")
-        print(f"Total edges: {summary['total_edges']}")
-        print(f"\nEdge types:")
-        for edge_type, count in summary["edge_types"].items():
-            print(f"  {edge_type}: {count}")
-        print(f"\nLaws:")
-        for law in summary["laws"]:
-            print(f"  - {law}")
-    else:
-        print("ERROR: graph_summary.json not found")
+            unresolved = json.load(f).get("unresolved_references", {})
+        if unresolved:
+            print(f"\nUnresolved references:")
+            for reason, count in unresolved.items():
+                print(f"  {reason}: {count}")
 
 
 def main() -> None:
@@ -282,15 +259,27 @@ def main() -> None:
     
     # If no subcommand, check for direct args
     parser.add_argument("--node", type=str, help="Node ID to query")
-    parser.add_argument("--hops", type=int, default=1, help="Number of hops (default: 1)")
+    parser.add_argument("--hops", type=int, help="Number of hops (default: 1, --path: 4)")
     parser.add_argument("--section", type=int, help="Section number to query")
     parser.add_argument("--law", type=str, help="Law key filter")
+    parser.add_argument("--chapter", type=str, help="--section: chapter filter, e.g. 2")
+    parser.add_argument("--refs", type=str, help="Show who references a node, section or external target")
+    parser.add_argument("--path", nargs=2, metavar=("SOURCE", "TARGET"), help="Shortest path (max --hops)")
+    parser.add_argument("--undirected", action="store_true", help="--path: also follow edges backwards")
+    parser.add_argument("--external", action="store_true", help="List external targets")
+    parser.add_argument("--limit", type=int, default=20, help="Max listed references/targets (default: 20)")
     parser.add_argument("--stats", action="store_true", help="Show statistics")
     
     args = parser.parse_args()
     
     if args.stats:
         cmd_stats(args)
+    elif args.refs:
+        cmd_referrers(args)
+    elif args.path:
+        cmd_path(args)
+    elif args.external:
+        cmd_external(args)
     elif args.node:
         cmd_query_node(args)
     elif args.section:
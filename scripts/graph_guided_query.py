@@ -8,27 +8,39 @@ Returns primary hit + supporting nodes + normipolku.
 Usage:
     python scripts/graph_guided_query.py "kunnan tilinpäätöksen laatimisvelvollisuus"
     python scripts/graph_guided_query.py --interactive
+    python scripts/graph_guided_query.py --server "kunnan tilinpäätöksen laatimisvelvollisuus"
+    python scripts/graph_guided_query.py "kuntalaki 118 § 3 mom"
+
+Exact citations ("KPL 3:1", "410/2015 110 §") are looked up directly in the
+citation index without encoding the query; --no-citation-index disables
+that. With --server the query is sent to a running scripts/query_server.py instead
+of loading the model, indices and graph in this process.
 """
 
+from __future__ import annotations
+
 import argparse
 import json
 import sys
 import time
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-try:
-    import chromadb
-    from sentence_transformers import SentenceTransformer
-except ImportError as e:
-    print(f"Missing dependency: {e}")
-    sys.exit(1)
-
 from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.query_rules.query_context import QueryContext
+from shared.retrieval.citation_index import CitationIndex, get_citation_index, lookup_citation
+from shared.retrieval.batch_query import fetch_law_results
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import merge_ranked
+# Importing the builder registers the graph_municipal_anchors signal family
 from scripts.graph_context_builder import GraphContextBuilder
+from scripts.query_client import DEFAULT_SERVER_URL, QueryClient, QueryServerError
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 # Law indices configuration (same as run_cross_law_eval.py)
@@ -64,13 +76,17 @@ ROUTER_BONUS = 0.02
 MIN_SCORE = 0.50
 K_TOTAL = 10
 
-# v8.1: Law mismatch penalty for municipal context
+# v8.1: Law mismatch penalty for municipal context (graph_municipal_anchors)
 LAW_MISMATCH_PENALTY = 0.03
-_MUNICIPAL_ANCHORS = ["kunnan", "kunta", "kuntakonserni", "kuntalaki", "kuntalain"]
+
+# Top hits expanded through the graph (GraphContextBuilder.expand_multiple)
+GRAPH_EXPAND_TOP_K = 3
 
 
 def load_indices() -> dict[str, Any]:
     """Load all available law indices."""
+    import chromadb
+
     indices: dict[str, Any] = {}
     for law_key, config in LAW_INDICES.items():
         chroma_path = config["chroma_path"]
@@ -85,48 +101,51 @@ def load_indices() -> dict[str, Any]:
 
 
 def multi_law_query(
-    query: str,
+    query: str | QueryContext,
     indices: dict[str, Any],
     model: SentenceTransformer,
     total_k: int = K_TOTAL,
     min_score: float = MIN_SCORE,
+    citation_index: CitationIndex | None = None,
 ) -> tuple[list[dict], float]:
     """
     Query multiple law indices and return merged results.
     
+    With a citation_index, exact section citations skip the embedding and
+    vector search and return the cited moments directly.
+    
     Returns tuple of (results, latency_ms)
     """
     start_time = time.time()
+    context = QueryContext.of(query)
+    
+    if citation_index is not None:
+        hits, _ = lookup_citation(context, citation_index)
+        if hits:
+            return hits[:total_k], (time.time() - start_time) * 1000
     
     available_laws = list(indices.keys())
-    weights = route_query(query, available_laws)
+    weights = route_query(context, available_laws)
     
     k_per_law = calculate_k_per_law(weights, total_k, min_k=2)
     
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    embedding = model.encode([context.text], normalize_embeddings=True)[0].tolist()
     
     # v8.1: Check for municipal context
-    query_lower = query.lower()
-    has_municipal = any(anchor in query_lower for anchor in _MUNICIPAL_ANCHORS)
+    has_municipal = context.has_signal("graph_municipal_anchors")
     
-    all_results: list[dict] = []
     top1_law = max(weights, key=weights.get) if weights else None
     
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-        
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
+    # All routed laws are searched concurrently
+    law_results = fetch_law_results(indices, embedding, k_per_law)
+    
+    ranked: list[list[dict]] = []
+    for law_key, results in law_results.items():
+        law_hits: list[dict] = []
         for doc, meta, dist in zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
         ):
             score = 1 - dist
             
@@ -139,7 +158,7 @@ def multi_law_query(
                 score -= LAW_MISMATCH_PENALTY
             
             if score >= min_score:
-                all_results.append({
+                law_hits.append({
                     "law_key": law_key,
                     "score": score,
                     "section_num": meta.get("section_num", 0),
@@ -150,12 +169,13 @@ def multi_law_query(
                     "text": doc,
                     "anchors": json.loads(meta.get("anchors", "[]")),
                 })
+        ranked.append(law_hits)
     
-    # Sort by score
-    all_results.sort(key=lambda x: -x["score"])
+    # Score adjustments are per law, so each list is still sorted: k-way merge
+    all_results = merge_ranked(ranked, total_k)
     
     latency_ms = (time.time() - start_time) * 1000
-    return all_results[:total_k], latency_ms
+    return all_results, latency_ms
 
 
 def format_graph_answer(result: dict, query: str) -> str:
@@ -186,6 +206,10 @@ def format_graph_answer(result: dict, query: str) -> str:
     lines.append(f"\nText:")
     lines.append(primary.get("text", ""))
     
+    others = result.get("expanded_hits", [])[1:]
+    if others:
+        lines.append(f"\nAlso expanded: {', '.join(others)}")
+    
     # Supporting nodes (exceptions, references)
     if supporting:
         lines.append(f"\n--- SUPPORTING CONTEXT ({len(supporting)} nodes) ---")
@@ -228,6 +252,7 @@ def query_with_graph(
     indices: dict[str, Any],
     model: SentenceTransformer,
     graph_builder: GraphContextBuilder,
+    citation_index: CitationIndex | None = None,
 ) -> dict:
     """
     Perform a graph-guided query.
@@ -235,35 +260,43 @@ def query_with_graph(
     Returns dict with:
         - query
         - primary_hit
-        - supporting_nodes
+        - expanded_hits (node_ids of the top hits expanded through the graph)
+        - supporting_nodes (of all expanded hits)
         - normipolku
         - latency_ms
+        - citation_fast_path (True if resolved from the citation index)
     """
-    # Step 1: Multi-law retrieval
-    hits, retrieval_latency = multi_law_query(query, indices, model)
+    # Step 1: Multi-law retrieval (or direct citation lookup)
+    context = QueryContext(query)
+    hits, retrieval_latency = multi_law_query(context, indices, model, citation_index=citation_index)
     
     if not hits:
         return {
             "query": query,
             "primary_hit": None,
+            "expanded_hits": [],
             "supporting_nodes": [],
             "normipolku": [],
             "latency_ms": retrieval_latency,
+            "citation_fast_path": False,
         }
     
-    # Step 2: Graph expansion on top-1
+    # Step 2: Graph expansion on the top-k hits with one shared support budget
     start_graph = time.time()
-    expanded = graph_builder.expand_context(hits[0], query)
+    expanded = graph_builder.expand_multiple(hits, context, top_k=GRAPH_EXPAND_TOP_K)
+    supporting, normipolku = graph_builder.merge_expanded(expanded)
     graph_latency = (time.time() - start_graph) * 1000
     
     return {
         "query": query,
-        "primary_hit": expanded["primary"],
-        "supporting_nodes": expanded["supporting_nodes"],
-        "normipolku": expanded["normipolku"],
+        "primary_hit": expanded[0]["primary"],
+        "expanded_hits": [e["primary"].get("node_id", "") for e in expanded],
+        "supporting_nodes": supporting,
+        "normipolku": normipolku,
         "latency_ms": retrieval_latency + graph_latency,
         "retrieval_latency_ms": retrieval_latency,
         "graph_latency_ms": graph_latency,
+        "citation_fast_path": bool(hits[0].get("citation")),
     }
 
 
@@ -271,6 +304,7 @@ def interactive_mode(
     indices: dict[str, Any],
     model: SentenceTransformer,
     graph_builder: GraphContextBuilder,
+    citation_index: CitationIndex | None = None,
 ) -> None:
     """Run interactive query mode."""
     print("\n" + "=" * 70)
@@ -287,37 +321,81 @@ def interactive_mode(
         if not query or query.lower() in ["quit", "exit", "q"]:
             break
         
-        result = query_with_graph(query, indices, model, graph_builder)
+        result = query_with_graph(query, indices, model, graph_builder, citation_index)
         
         if result["primary_hit"]:
             print(format_graph_answer(result, query))
             print(f"\nLatency: {result['latency_ms']:.1f} ms")
-            print(f"  - Retrieval: {result['retrieval_latency_ms']:.1f} ms")
+            source = "citation index" if result["citation_fast_path"] else "vector search"
+            print(f"  - Retrieval: {result['retrieval_latency_ms']:.1f} ms ({source})")
             print(f"  - Graph: {result['graph_latency_ms']:.1f} ms")
         else:
             print("\nNo results found.")
 
 
+def run_via_server(query: str | None, server_url: str) -> None:
+    """Answer a single query through the resident query server."""
+    if not query:
+        print("A query string is required with --server")
+        sys.exit(1)
+    
+    client = QueryClient(server_url)
+    try:
+        result = client.query_with_graph(query)
+    except QueryServerError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    
+    if result["primary_hit"]:
+        print(format_graph_answer(result, query))
+        print(f"\nLatency: {result['latency_ms']:.1f} ms (server)")
+    else:
+        print("No results found.")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Graph-guided Legal Query")
     parser.add_argument("query", nargs="?", help="Query string")
     parser.add_argument("--interactive", "-i", action="store_true", help="Interactive mode")
+    parser.add_argument(
+        "--server", action="store_true",
+        help="Use a running query server instead of loading the model locally",
+    )
+    parser.add_argument("--server-url", default=DEFAULT_SERVER_URL, help="Query server URL")
+    parser.add_argument(
+        "--no-citation-index", action="store_true",
+        help="Always use vector search, also for exact section citations",
+    )
     args = parser.parse_args()
     
+    if args.server:
+        run_via_server(args.query, args.server_url)
+        return
+    
+    # Only the local path needs the model and Chroma; --server runs without them
+    try:
+        import chromadb  # noqa: F401
+        import sentence_transformers  # noqa: F401
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        sys.exit(1)
+    
     print("Loading indices...")
     indices = load_indices()
     print(f"  Loaded: {len(indices)} indices")
     
     print("Loading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     print("Initializing graph context builder...")
     graph_builder = GraphContextBuilder()
     
+    citation_index = None if args.no_citation_index else get_citation_index()
+    
     if args.interactive:
-        interactive_mode(indices, model, graph_builder)
+        interactive_mode(indices, model, graph_builder, citation_index)
     elif args.query:
-        result = query_with_graph(args.query, indices, model, graph_builder)
+        result = query_with_graph(args.query, indices, model, graph_builder, citation_index)
         if result["primary_hit"]:
             print(format_graph_answer(result, args.query))
             print(f"\nLatency: {result['latency_ms']:.1f} ms")
@@ -2,25 +2,40 @@
 Multi-law query script.
 
 Routes queries to appropriate law indices and merges results.
+
+Usage:
+    python scripts/multi_law_query.py
+    python scripts/multi_law_query.py --server "kunnan talousarvion alijäämä"
+    python scripts/multi_law_query.py "KPL 3:1"
+
+Exact section citations are answered from the citation index without
+encoding the query (--no-citation-index to always use vector search).
+
+With --server the queries are sent to a running scripts/query_server.py
+instead of loading the model and indices in this process.
 """
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-try:
+from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.retrieval.batch_query import fetch_law_results
+from shared.retrieval.citation_index import CitationIndex, get_citation_index, lookup_citation
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import merge_ranked
+from scripts.query_client import DEFAULT_SERVER_URL, QueryClient, QueryServerError
+
+if TYPE_CHECKING:
     import chromadb
     from sentence_transformers import SentenceTransformer
-except ImportError as e:
-    print(f"Missing dependency: {e}")
-    sys.exit(1)
-
-from shared.query_rules.law_router import route_query, calculate_k_per_law
 
 
 # Law index configurations
@@ -54,6 +69,8 @@ LAW_INDICES = {
 
 def load_indices() -> dict[str, chromadb.Collection]:
     """Load all available law indices."""
+    import chromadb
+    
     indices: dict[str, chromadb.Collection] = {}
     
     for law_key, config in LAW_INDICES.items():
@@ -78,6 +95,7 @@ def multi_law_query(
     model: SentenceTransformer,
     total_k: int = 10,
     min_score: float = 0.50,
+    citation_index: CitationIndex | None = None,
 ) -> list[dict]:
     """
     Query multiple law indices and merge results.
@@ -88,10 +106,18 @@ def multi_law_query(
         model: Sentence transformer model
         total_k: Total number of results to return
         min_score: Minimum score threshold
+        citation_index: If given, exact section citations skip vector search
         
     Returns:
         List of result dicts sorted by score
     """
+    if citation_index is not None:
+        hits, latency_ms = lookup_citation(query, citation_index)
+        if hits:
+            print(f"\nQuery: {query}")
+            print(f"Citation: {len(hits)} moment(s) in {latency_ms * 1000:.0f} us")
+            return hits[:total_k]
+    
     # Route query to determine weights
     available_laws = list(indices.keys())
     weights = route_query(query, available_laws)
@@ -105,29 +131,21 @@ def multi_law_query(
     # Generate embedding
     embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
     
-    # Query each law index
-    all_results: list[dict] = []
-    
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-            
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
+    # Query all law indices concurrently
+    law_results = fetch_law_results(indices, embedding, k_per_law)
+    ranked: list[list[dict]] = []
+    
+    for law_key, results in law_results.items():
         # Convert to result dicts
-        for i, (doc, meta, dist) in enumerate(zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
-        )):
+        law_hits: list[dict] = []
+        for doc, meta, dist in zip(
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
+        ):
             score = 1 - dist  # Convert distance to score
             if score >= min_score:
-                all_results.append({
+                law_hits.append({
                     "law_key": law_key,
                     "score": score,
                     "law": meta.get("law", ""),
@@ -137,18 +155,77 @@ def multi_law_query(
                     "node_id": meta.get("node_id", ""),
                     "text": doc[:200] + "..." if len(doc) > 200 else doc,
                 })
+        ranked.append(law_hits)
     
-    # Sort by score and limit to total_k
-    all_results.sort(key=lambda x: x["score"], reverse=True)
-    return all_results[:total_k]
+    # Per-law lists are score-sorted; k-way merge and limit to total_k
+    return merge_ranked(ranked, total_k)
+
+
+TEST_QUERIES = [
+    "kunnan talousarvion alijäämä",
+    "tilinpäätöksen liitetiedot ja tase",
+    "tuloslaskelmakaava ja tasekaava",  # KPA specific
+    "tilintarkastajan huomautus ja vastuuvapaus",
+    "julkisen hankinnan kynnysarvo",
+    "osakeyhtiön hallituksen vastuu",
+    "konsernitilinpäätös ja tytäryhtiö",
+]
+
+
+def print_results(query: str, results: list[dict]) -> None:
+    """Print the top results for one query."""
+    print(f"\nResults for: '{query}'")
+    print("-" * 40)
+    for i, r in enumerate(results[:3], 1):
+        print(f"  {i}. [{r['law_key']}] § {r['section_id']}.{r['moment']} - {r['section_title']}")
+        print(f"     Score: {r['score']:.4f}")
+    print()
+
+
+def run_via_server(queries: list[str], server_url: str) -> None:
+    """Run queries through the resident query server."""
+    client = QueryClient(server_url)
+    try:
+        for query in queries:
+            print_results(query, client.multi_law_query(query, total_k=5))
+    except QueryServerError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
 
 def main() -> None:
     """Interactive multi-law query."""
+    parser = argparse.ArgumentParser(description="Multi-law query")
+    parser.add_argument("query", nargs="?", help="Query string (default: built-in test queries)")
+    parser.add_argument(
+        "--server", action="store_true",
+        help="Use a running query server instead of loading the model locally",
+    )
+    parser.add_argument("--server-url", default=DEFAULT_SERVER_URL, help="Query server URL")
+    parser.add_argument(
+        "--no-citation-index", action="store_true",
+        help="Always use vector search, also for exact section citations",
+    )
+    args = parser.parse_args()
+    
+    queries = [args.query] if args.query else TEST_QUERIES
+    
     print("=" * 60)
     print("Multi-Law Query System")
     print("=" * 60)
     
+    if args.server:
+        run_via_server(queries, args.server_url)
+        return
+    
+    # Only the local path needs the model and Chroma; --server runs without them
+    try:
+        import chromadb  # noqa: F401
+        import sentence_transformers  # noqa: F401
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        sys.exit(1)
+    
     # Load indices
     print("\nLoading indices...")
     indices = load_indices()
@@ -161,34 +238,20 @@ def main() -> None:
     
     # Load model
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     # Interactive loop
     print("\n" + "=" * 60)
     print("Enter queries (Ctrl+C to exit)")
     print("=" * 60)
     
-    test_queries = [
-        "kunnan talousarvion alijäämä",
-        "tilinpäätöksen liitetiedot ja tase",
-        "tuloslaskelmakaava ja tasekaava",  # KPA specific
-        "tilintarkastajan huomautus ja vastuuvapaus",
-        "julkisen hankinnan kynnysarvo",
-        "osakeyhtiön hallituksen vastuu",
-        "konsernitilinpäätös ja tytäryhtiö",
-    ]
-    
     print("\nRunning test queries:\n")
     
-    for query in test_queries:
-        results = multi_law_query(query, indices, model, total_k=5)
-        
-        print(f"\nResults for: '{query}'")
-        print("-" * 40)
-        for i, r in enumerate(results[:3], 1):
-            print(f"  {i}. [{r['law_key']}] § {r['section_id']}.{r['moment']} - {r['section_title']}")
-            print(f"     Score: {r['score']:.4f}")
-        print()
+    citation_index = None if args.no_citation_index else get_citation_index()
+    
+    for query in queries:
+        results = multi_law_query(query, indices, model, total_k=5, citation_index=citation_index)
+        print_results(query, results)
 
 
 if __name__ == "__main__":
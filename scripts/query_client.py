@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Thin client for the resident query service (scripts/query_server.py).
+
+Standard library only, so it starts instantly and does not need the
+embedding model or ChromaDB installed.
+
+Usage:
+    python scripts/query_client.py "kunnan talousarvion alijäämä"
+    python scripts/query_client.py --graph "tilintarkastajan huomautus"
+    python scripts/query_client.py --doc "toimintakate 2023"
+    python scripts/query_client.py --doc "vuosikate" --scope lapua --scope "*:2023"
+    python scripts/query_client.py --node "410/2015:fin@20230780:113:1"
+    python scripts/query_client.py --health
+    python scripts/query_client.py --stats
+
+The server URL defaults to $KUNTALAKI_QUERY_SERVER or http://127.0.0.1:8765.
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from typing import Any
+
+DEFAULT_SERVER_URL = os.environ.get("KUNTALAKI_QUERY_SERVER", "http://127.0.0.1:8765")
+DEFAULT_TIMEOUT_S = 30.0
+
+
+class QueryServerError(RuntimeError):
+    """Raised when the query service is unreachable or returns an error."""
+
+
+class QueryClient:
+    """HTTP client mirroring the in-process query functions."""
+
+    def __init__(self, base_url: str = DEFAULT_SERVER_URL, timeout: float = DEFAULT_TIMEOUT_S) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: dict | None = None) -> Any:
+        url = f"{self.base_url}{path}"
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json; charset=utf-8"
+
+        request = urllib.request.Request(url, data=data, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            raise QueryServerError(f"{path}: {message}") from e
+        except urllib.error.URLError as e:
+            raise QueryServerError(
+                f"Query server not reachable at {self.base_url} ({e.reason}). "
+                "Start it with: python scripts/query_server.py"
+            ) from e
+
+    def health(self) -> dict:
+        """Return server status."""
+        return self._request("/health")
+
+    def stats(self) -> dict:
+        """Return encoder batching histograms and cache counters."""
+        return self._request("/stats")
+
+    def multi_law_query(self, query: str, total_k: int = 10, min_score: float = 0.50) -> list[dict]:
+        """Return merged multi-law hits (same shape as graph_guided_query.multi_law_query)."""
+        result = self._request(
+            "/multi_law_query",
+            {"query": query, "total_k": total_k, "min_score": min_score},
+        )
+        return result["hits"]
+
+    def law_results(self, query: str, k_per_law: dict[str, int]) -> dict[str, dict[str, list]]:
+        """Return raw per-law hits (same shape as batch_query.fetch_law_results)."""
+        result = self._request("/law_results", {"query": query, "k_per_law": k_per_law})
+        return result["results"]
+
+    def laws(self) -> list[str]:
+        """Return the law keys the server has loaded."""
+        return self.health()["laws"]
+
+    def query_with_graph(self, query: str) -> dict:
+        """Return the graph-guided result dict (same shape as query_with_graph)."""
+        return self._request("/graph_query", {"query": query})
+
+    def graph_node(self, node_id: str, hops: int = 1) -> dict:
+        """Return a graph node with its neighbourhood and referrers."""
+        return self._request("/graph_node", {"query": node_id, "hops": hops})
+
+    def doc_query(self, query: str, k: int = 5, scopes: list[str] | None = None) -> list[dict]:
+        """Return hits from the document indexes of scopes ("lapua:2023", "lapua", "*:2023"; None: all)."""
+        payload: dict = {"query": query, "k": k}
+        if scopes:
+            payload["scope"] = scopes
+        result = self._request("/doc_query", payload)
+        return result["hits"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the resident query service")
+    parser.add_argument("query", nargs="?", help="Query string")
+    parser.add_argument("--server", default=DEFAULT_SERVER_URL, help="Server URL")
+    parser.add_argument("--graph", action="store_true", help="Graph-guided query")
+    parser.add_argument("--doc", action="store_true", help="Document index query")
+    parser.add_argument(
+        "--scope", action="append", help="Document bundle scope for --doc (city:year, city, *:year; repeatable)"
+    )
+    parser.add_argument("--node", action="store_true", help="Graph node lookup (query is a node id)")
+    parser.add_argument("--k", type=int, default=10, help="Number of results")
+    parser.add_argument("--health", action="store_true", help="Show server status")
+    parser.add_argument("--stats", action="store_true", help="Show encoder batching statistics")
+    args = parser.parse_args()
+
+    client = QueryClient(args.server)
+
+    try:
+        if args.health:
+            print(json.dumps(client.health(), ensure_ascii=False, indent=2))
+        elif args.stats:
+            print(json.dumps(client.stats(), ensure_ascii=False, indent=2))
+        elif not args.query:
+            parser.print_help()
+        elif args.graph:
+            print(json.dumps(client.query_with_graph(args.query), ensure_ascii=False, indent=2))
+        elif args.node:
+            print(json.dumps(client.graph_node(args.query), ensure_ascii=False, indent=2))
+        elif args.doc:
+            for i, hit in enumerate(client.doc_query(args.query, k=args.k, scopes=args.scope), 1):
+                print(f"  {i}. [{hit['city']} {hit['year']}] [{hit['node_type']}] {hit['title']} (s. {hit['page_num']})")
+                print(f"     Score: {hit['score']:.4f}")
+        else:
+            for i, hit in enumerate(client.multi_law_query(args.query, total_k=args.k), 1):
+                print(f"  {i}. [{hit['law_key']}] § {hit['section_id']}.{hit['moment']} - {hit['section_title']}")
+                print(f"     Score: {hit['score']:.4f}")
+    except QueryServerError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
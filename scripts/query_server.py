@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Resident multi-law query service.
+
+Loads the bge-m3 model, every law collection in LAW_INDICES and the
+GraphContextBuilder once, and then answers queries
+over a local HTTP socket. Scripts that would otherwise pay the model and
+index cold start on every run can act as thin clients (see query_client.py).
+Exact section citations ("KPL 3:1", "kuntalaki 118 § 3 mom") are answered
+from an in-memory citation index without touching the model. Concurrent
+cache misses are encoded together by a MicroBatchEncoder (--batch-window-ms,
+--max-batch); GET /stats shows its batch-size and queueing-delay histograms.
+Document indexes of every docs_layer/data/<city>/<year> bundle are opened
+on first use by a DocumentIndexRegistry and evicted LRU beyond
+--max-doc-clients open Chroma clients or --max-doc-memory-mb of resident
+snapshots.
+
+Usage:
+    python scripts/query_server.py
+    python scripts/query_server.py --host 127.0.0.1 --port 8765
+    python scripts/query_server.py --dense   # exact search over DenseLawIndex
+    python scripts/query_server.py --batch-window-ms 5 --max-batch 16
+    python scripts/query_server.py --max-doc-clients 4 --max-doc-memory-mb 256
+
+Endpoints (JSON in, JSON out):
+    GET  /health
+    GET  /stats             encoder batching histograms, open document indexes
+    POST /multi_law_query   {"query": "...", "total_k": 10, "min_score": 0.5}
+    POST /law_results       {"query": "...", "k_per_law": {"kuntalaki_410_2015": 5}}
+    POST /graph_query       {"query": "..."}
+    POST /graph_node        {"query": "<node id>", "hops": 1}
+    POST /doc_query         {"query": "...", "k": 5, "scope": ["lapua:2023", "*:2022"]}
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    import chromadb  # noqa: F401  (opened by the registry for bundles without a snapshot)
+    from sentence_transformers import SentenceTransformer
+except ImportError as e:
+    print(f"Missing dependency: {e}")
+    sys.exit(1)
+
+from shared.documents.registry import (
+    DEFAULT_MAX_CLIENTS,
+    DEFAULT_MAX_RESIDENT_BYTES,
+    DOC_DATA_DIR,
+    DocumentIndexRegistry,
+    parse_scope,
+)
+from shared.retrieval import CachedQueryEncoder, DenseLawIndex, QueryEmbeddingCache
+from shared.retrieval.batch_query import fetch_law_results
+from shared.retrieval.citation_index import CitationIndex
+from shared.retrieval.micro_batch import DEFAULT_MAX_BATCH, DEFAULT_WINDOW_MS, MicroBatchEncoder
+from shared.graph.query_engine import GraphQueryEngine
+from scripts.graph_context_builder import GraphContextBuilder
+from scripts.graph_guided_query import (
+    K_TOTAL,
+    MIN_SCORE,
+    load_indices,
+    multi_law_query,
+    query_with_graph,
+)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+EMBEDDING_MODEL = "BAAI/bge-m3"
+DENSE_INDEX_PATH = PROJECT_ROOT / "analysis_layer" / "embeddings" / "dense_law_index.npz"
+K_DOC = 5
+
+
+class QueryService:
+    """Holds the warm model, collections and graph for the lifetime of the server."""
+
+    def __init__(
+        self,
+        doc_data_dir: Path = DOC_DATA_DIR,
+        max_doc_clients: int = DEFAULT_MAX_CLIENTS,
+        max_doc_resident_bytes: int = DEFAULT_MAX_RESIDENT_BYTES,
+        dense_index_path: Path | None = None,
+        batch_window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        dense_index: DenseLawIndex | None = None,
+        model: Any = None,
+        embedding_cache: QueryEmbeddingCache | None = None,
+    ) -> None:
+        """
+        Args:
+            dense_index: Serve law queries from this index (default: dense_index_path, else Chroma)
+            model: SentenceTransformer-compatible encoder (default: load EMBEDDING_MODEL)
+            embedding_cache: Query-embedding cache (default: the shared on-disk cache)
+        """
+        start = time.perf_counter()
+
+        print("Loading law indices...")
+        self.backend = "chroma"
+        if dense_index is None and dense_index_path is not None:
+            dense_index = DenseLawIndex.load(dense_index_path)
+        if dense_index is not None:
+            # Same dict shape as load_indices(), so multi_law_query is unchanged
+            self.indices = dense_index.as_indices()
+            self.backend = "dense"
+        else:
+            self.indices = load_indices()
+        print(f"  Loaded: {len(self.indices)} indices ({self.backend})")
+
+        print("Discovering document indexes...")
+        # Bundles are opened on their first query, not here
+        self.doc_registry = DocumentIndexRegistry.discover(
+            doc_data_dir, max_clients=max_doc_clients, max_resident_bytes=max_doc_resident_bytes
+        )
+        print(f"  Doc bundles: {len(self.doc_registry.bundles)}")
+
+        print(f"Loading embedding model ({EMBEDDING_MODEL})...")
+        # Repeated questions are served from the shared query-embedding cache;
+        # the model itself is loaded up front so misses do not pay cold start.
+        # Misses from concurrent requests are encoded in micro-batches.
+        self.batcher = MicroBatchEncoder(
+            SentenceTransformer(EMBEDDING_MODEL) if model is None else model,
+            window_ms=batch_window_ms, max_batch=max_batch,
+        )
+        self.model = CachedQueryEncoder(EMBEDDING_MODEL, embedding_cache, model=self.batcher)
+        # First encode call allocates buffers; pay it here instead of on the first request
+        self.batcher.model.encode(["kunnan tilinpäätös"], normalize_embeddings=True)
+
+        print("Loading legal graph...")
+        self.graph_builder = GraphContextBuilder()
+        # Indexed lookups over the same graph instance
+        self.graph_engine = GraphQueryEngine(self.graph_builder.load())
+
+        print("Loading citation index...")
+        self.citation_index = CitationIndex.from_jsonl()
+        print(f"  Moments: {len(self.citation_index)}")
+
+        self.started_at = time.time()
+        # Handlers run on ThreadingHTTPServer worker threads
+        self._count_lock = threading.Lock()
+        self.request_count = 0
+        print(f"Service ready in {time.perf_counter() - start:.1f}s")
+
+    def health(self) -> dict:
+        """Return service status."""
+        return {
+            "status": "ok",
+            "laws": sorted(self.indices.keys()),
+            "backend": self.backend,
+            "doc_index": bool(self.doc_registry.bundles),
+            "doc_bundles": [f"{city}:{year}" for city, year in self.doc_registry.keys()],
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.request_count,
+            "embedding_cache": self.model.cache.stats(),
+        }
+
+    def count_request(self) -> None:
+        """Count one answered request."""
+        with self._count_lock:
+            self.request_count += 1
+
+    def stats(self) -> dict:
+        """Encoder batching counters and histograms."""
+        return {
+            "requests": self.request_count,
+            "encoder": self.batcher.stats(),
+            "embedding_cache": self.model.cache.stats(),
+            "doc_indexes": self.doc_registry.stats(),
+        }
+
+    def multi_law_query(
+        self,
+        query: str,
+        total_k: int = K_TOTAL,
+        min_score: float = MIN_SCORE,
+    ) -> dict:
+        """Run the v8.1 multi-law retrieval."""
+        hits, latency_ms = multi_law_query(
+            query, self.indices, self.model, total_k=total_k, min_score=min_score,
+            citation_index=self.citation_index,
+        )
+        return {"query": query, "hits": hits, "latency_ms": latency_ms}
+
+    def law_results(self, query: str, k_per_law: dict[str, int]) -> dict:
+        """
+        Raw per-law hits (fetch_law_results shape) for clients that rank them
+        themselves; unknown laws are left out.
+        """
+        start = time.perf_counter()
+        embedding = self.model.encode([query], normalize_embeddings=True)[0].tolist()
+        results = fetch_law_results(self.indices, embedding, k_per_law)
+        return {"query": query, "results": results, "latency_ms": (time.perf_counter() - start) * 1000}
+
+    def graph_query(self, query: str) -> dict:
+        """Run retrieval + graph expansion on the top hit."""
+        return query_with_graph(
+            query, self.indices, self.model, self.graph_builder, self.citation_index
+        )
+
+    def graph_node(self, node_id: str, hops: int = 1) -> dict:
+        """Look up a graph node, its neighbourhood and who references it."""
+        start = time.perf_counter()
+        engine = self.graph_engine
+        graph = engine.graph
+        vertex = engine.vertex(node_id)
+        if vertex is None:
+            return {"node_id": node_id, "found": False, "did_you_mean": engine.find(node_id)}
+        return {
+            "node_id": node_id,
+            "found": True,
+            "node": graph.node(vertex) if graph.is_node(vertex) else None,
+            "neighbors": [
+                {"vertex_id": graph.ids[v], "hop": hop, "direction": "out" if forward else "in", **graph.edge(e)}
+                for v, e, hop, forward in engine.neighborhood(vertex, hops)
+            ],
+            "referrers": [graph.edge(e) for e in engine.referrers(vertex)],
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def doc_query(self, query: str, k: int = K_DOC, scopes: list[str] | None = None) -> dict:
+        """
+        Query the document indexes of scopes ("city:year", "city", "*:year"; None: all bundles).
+        """
+        start = time.perf_counter()
+        hits: list[dict] = []
+        if self.doc_registry.bundles:
+            collection = self.doc_registry.collection(
+                None if scopes is None else [parse_scope(scope) for scope in scopes]
+            )
+            embedding = self.model.encode([query], normalize_embeddings=True)[0].tolist()
+            results = collection.query(
+                query_embeddings=[embedding],
+                n_results=k,
+                include=["documents", "metadatas", "distances"],
+            )
+            for doc_id, doc, meta, dist in zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0],
+            ):
+                hits.append({
+                    "doc_node_id": doc_id,
+                    "city": meta.get("city"),
+                    "year": meta.get("year"),
+                    "node_type": meta.get("node_type"),
+                    "title": meta.get("title", ""),
+                    "page_num": meta.get("page_num"),
+                    "score": 1 - dist,
+                    "text": doc,
+                })
+        return {
+            "query": query,
+            "hits": hits,
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        }
+
+
+def make_handler(service: QueryService) -> type[BaseHTTPRequestHandler]:
+    """Build a request handler class bound to a warm service."""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length", 0))
+            if not length:
+                return {}
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+
+        def do_GET(self) -> None:  # noqa: N802 (http.server API)
+            if self.path == "/health":
+                self._send_json(200, service.health())
+            elif self.path == "/stats":
+                self._send_json(200, service.stats())
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+        def do_POST(self) -> None:  # noqa: N802 (http.server API)
+            try:
+                payload = self._read_json()
+            except (ValueError, UnicodeDecodeError) as e:
+                self._send_json(400, {"error": f"Invalid JSON: {e}"})
+                return
+
+            query = payload.get("query")
+            if not isinstance(query, str) or not query.strip():
+                self._send_json(400, {"error": "Missing 'query'"})
+                return
+
+            start = time.perf_counter()
+            try:
+                if self.path == "/multi_law_query":
+                    result = service.multi_law_query(
+                        query,
+                        total_k=int(payload.get("total_k", K_TOTAL)),
+                        min_score=float(payload.get("min_score", MIN_SCORE)),
+                    )
+                elif self.path == "/law_results":
+                    k_per_law = payload.get("k_per_law")
+                    if not isinstance(k_per_law, dict) or not k_per_law:
+                        self._send_json(400, {"error": "Missing 'k_per_law'"})
+                        return
+                    result = service.law_results(
+                        query, {str(law_key): int(k) for law_key, k in k_per_law.items()}
+                    )
+                elif self.path == "/graph_query":
+                    result = service.graph_query(query)
+                elif self.path == "/graph_node":
+                    result = service.graph_node(query, hops=int(payload.get("hops", 1)))
+                elif self.path == "/doc_query":
+                    scope = payload.get("scope")
+                    result = service.doc_query(
+                        query,
+                        k=int(payload.get("k", K_DOC)),
+                        scopes=[scope] if isinstance(scope, str) else scope,
+                    )
+                else:
+                    self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+                    return
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+
+            service.count_request()
+            result["server_latency_ms"] = (time.perf_counter() - start) * 1000
+            self._send_json(200, result)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # Keep the console readable; per-request access logs are noise here
+            pass
+
+    return QueryHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resident multi-law query service")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument(
+        "--dense", nargs="?", const=str(DENSE_INDEX_PATH), default=None, metavar="NPZ",
+        help="Serve law queries from a DenseLawIndex file (see scripts/bench_dense_index.py)",
+    )
+    parser.add_argument(
+        "--batch-window-ms", type=float, default=DEFAULT_WINDOW_MS,
+        help=f"How long a query waits for others to encode with (default: {DEFAULT_WINDOW_MS})",
+    )
+    parser.add_argument(
+        "--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+        help=f"Queries per encode call (default: {DEFAULT_MAX_BATCH})",
+    )
+    parser.add_argument(
+        "--max-doc-clients", type=int, default=DEFAULT_MAX_CLIENTS,
+        help=f"Open document Chroma clients kept at most (default: {DEFAULT_MAX_CLIENTS})",
+    )
+    parser.add_argument(
+        "--max-doc-memory-mb", type=int, default=DEFAULT_MAX_RESIDENT_BYTES // (1024 * 1024),
+        help="Resident document snapshots kept at most, in MB (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Multi-law Query Service")
+    print("=" * 60)
+
+    service = QueryService(
+        dense_index_path=Path(args.dense) if args.dense else None,
+        batch_window_ms=args.batch_window_ms,
+        max_batch=args.max_batch,
+        max_doc_clients=args.max_doc_clients,
+        max_doc_resident_bytes=args.max_doc_memory_mb * 1024 * 1024,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+
+    print(f"\nListening on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
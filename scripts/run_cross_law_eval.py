@@ -2,9 +2,15 @@
 Cross-law evaluation script (v6).
 
 Evaluates multi-law retrieval accuracy across different law pairs.
+
+Usage:
+    python scripts/run_cross_law_eval.py             # batched retrieval
+    python scripts/run_cross_law_eval.py --no-batch  # one question at a time
+    python scripts/run_cross_law_eval.py --trace-context
 """
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 import time
@@ -24,6 +30,15 @@ except ImportError as e:
     sys.exit(1)
 
 from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.query_rules.query_context import (
+    QueryContext,
+    format_trace_summary,
+    register_signal_family,
+    set_tracing,
+)
+from shared.retrieval.batch_query import encode_queries, fetch_law_results, fetch_law_results_batch
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import merge_ranked
 
 
 # Configuration
@@ -50,6 +65,7 @@ PAIR_GUARDS: list[tuple[str, str, float]] = [
     # "hankinta" → boost hankintalaki
     ("hankinta", "hankintalaki_1397_2016", +0.02),
 ]
+register_signal_family("cross_law_pair_guards", [term for term, _, _ in PAIR_GUARDS])
 
 # Law index configurations
 LAW_INDICES = {
@@ -136,26 +152,23 @@ def load_questions(use_autofill: bool = True) -> list[dict]:
     return all_questions
 
 
-def multi_law_query(
-    query: str,
-    indices: dict[str, chromadb.Collection],
-    model: SentenceTransformer,
-    total_k: int = K_TOTAL,
-    min_score: float = MIN_SCORE,
-    apply_rerank: bool = True,
-) -> tuple[list[dict], float, dict]:
-    """
-    Query multiple law indices and merge results (v7.1: with router bonus + diversity).
-    
-    Returns:
-        Tuple of (results, latency_ms, debug_info)
-    """
-    start_time = time.perf_counter()
-    debug_info: dict = {"router_bonus_applied": 0, "diversity_swap": False, "pair_guards_applied": 0}
-    
-    # Route query to determine weights
+def _route(query: str | QueryContext, indices: dict[str, chromadb.Collection], total_k: int) -> tuple[dict[str, float], dict[str, int]]:
+    """Router weights and k per law for one query."""
     available_laws = list(indices.keys())
     weights = route_query(query, available_laws)
+    return weights, calculate_k_per_law(weights, total_k, min_k=2)
+
+
+def _rank_hits(
+    query: str | QueryContext,
+    weights: dict[str, float],
+    law_results: dict[str, dict],
+    total_k: int,
+    min_score: float,
+    apply_rerank: bool,
+) -> tuple[list[dict], dict]:
+    """Merge per-law hits and apply router bonus, pair-guards and diversity (v7.1)."""
+    debug_info: dict = {"router_bonus_applied": 0, "diversity_swap": False, "pair_guards_applied": 0}
     
     # Determine top 2 laws from router
     sorted_weights = sorted(weights.items(), key=lambda x: x[1], reverse=True)
@@ -165,35 +178,19 @@ def multi_law_query(
     debug_info["router_top2"] = top2_law
     debug_info["router_weights"] = weights
     
-    # Calculate k per law
-    k_per_law = calculate_k_per_law(weights, total_k, min_k=2)
+    ranked: dict[str, list[dict]] = {}
     
-    # Generate embedding
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
-    
-    # Query each law index
-    all_results: list[dict] = []
-    
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-            
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
+    for law_key, results in law_results.items():
         # Convert to result dicts
-        for i, (doc, meta, dist) in enumerate(zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
-        )):
+        ranked[law_key] = []
+        for doc, meta, dist in zip(
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
+        ):
             score = 1 - dist  # Convert distance to score
             if score >= min_score:
-                all_results.append({
+                ranked[law_key].append({
                     "law_key": law_key,
                     "score": score,
                     "score_original": score,  # Keep original for debugging
@@ -203,6 +200,7 @@ def multi_law_query(
                     "section_title": meta.get("section_title", ""),
                     "node_id": meta.get("node_id", ""),
                 })
+    all_results = [r for law_hits in ranked.values() for r in law_hits]
     
     # v7.1: Apply router bonus (+0.02) to hits from router's top law
     if apply_rerank and top1_law:
@@ -213,16 +211,16 @@ def multi_law_query(
     
     # v7.1: Apply pair-guards based on query terms
     if apply_rerank:
-        query_lower = query.lower()
+        matched = QueryContext.of(query).signals("cross_law_pair_guards")
         for term, law_key, adjustment in PAIR_GUARDS:
-            if term in query_lower:
+            if term in matched:
                 for r in all_results:
                     if r["law_key"] == law_key:
                         r["score"] += adjustment
                         debug_info["pair_guards_applied"] += 1
     
-    # Sort by score (after bonus)
-    all_results.sort(key=lambda x: x["score"], reverse=True)
+    # Sort by score (after bonus); adjustments are per law, so k-way merge
+    all_results = merge_ranked(ranked.values())
     
     # v7.1: Diversity rule - ensure at least 1 hit from top2_law if gap is small
     if apply_rerank and top2_law and len(all_results) >= 2:
@@ -250,9 +248,68 @@ def multi_law_query(
                 all_results = top_k_results + [r for r in all_results[total_k:]]
                 debug_info["diversity_swap"] = True
     
+    return all_results[:total_k], debug_info
+
+
+def multi_law_query(
+    query: str,
+    indices: dict[str, chromadb.Collection],
+    model: SentenceTransformer,
+    total_k: int = K_TOTAL,
+    min_score: float = MIN_SCORE,
+    apply_rerank: bool = True,
+) -> tuple[list[dict], float, dict]:
+    """
+    Query multiple law indices and merge results (v7.1: with router bonus + diversity).
+    
+    Returns:
+        Tuple of (results, latency_ms, debug_info)
+    """
+    start_time = time.perf_counter()
+    
+    context = QueryContext(query)
+    weights, k_per_law = _route(context, indices, total_k)
+    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    law_results = fetch_law_results(indices, embedding, k_per_law)
+    results, debug_info = _rank_hits(context, weights, law_results, total_k, min_score, apply_rerank)
+    
     latency_ms = (time.perf_counter() - start_time) * 1000
     
-    return all_results[:total_k], latency_ms, debug_info
+    return results, latency_ms, debug_info
+
+
+def multi_law_query_batch(
+    queries: list[str],
+    indices: dict[str, chromadb.Collection],
+    model: SentenceTransformer,
+    total_k: int = K_TOTAL,
+    min_score: float = MIN_SCORE,
+    apply_rerank: bool = True,
+) -> list[tuple[list[dict], float, dict]]:
+    """
+    Batched multi_law_query over a whole question set.
+    
+    Encodes all queries in length-bucketed batches and queries each law
+    collection once; routing and rerank are applied per row. Latency is the
+    batch wall time divided evenly over the queries.
+    
+    Returns:
+        One (results, latency_ms, debug_info) tuple per query
+    """
+    start_time = time.perf_counter()
+    
+    contexts = [QueryContext(query) for query in queries]
+    plans = [_route(context, indices, total_k) for context in contexts]
+    embeddings = encode_queries(model, queries)
+    law_results_rows = fetch_law_results_batch(indices, embeddings, [k_per_law for _, k_per_law in plans])
+    ranked = [
+        _rank_hits(context, weights, law_results, total_k, min_score, apply_rerank)
+        for context, (weights, _), law_results in zip(contexts, plans, law_results_rows)
+    ]
+    
+    latency_ms = (time.perf_counter() - start_time) * 1000 / max(len(queries), 1)
+    
+    return [(results, latency_ms, debug_info) for results, debug_info in ranked]
 
 
 def evaluate_question(
@@ -327,19 +384,31 @@ def run_evaluation(
     questions: list[dict],
     indices: dict[str, chromadb.Collection],
     model: SentenceTransformer,
+    batch: bool = True,
 ) -> dict:
-    """Run full evaluation and return results (v7.1: with rerank stats)."""
+    """Run full evaluation and return results (v7.1: with rerank stats).
+    
+    With batch=True all questions go through multi_law_query_batch; the
+    per-question path (batch=False) gives the same hits.
+    """
     results: list[dict] = []
     total_latency = 0.0
     total_router_bonus = 0
     total_diversity_swaps = 0
     total_pair_guards = 0
     
+    queries = [q.get("query", "") for q in questions]
+    if batch:
+        batch_results = multi_law_query_batch(queries, indices, model)
+    
     for i, q in enumerate(questions):
-        query = q.get("query", "")
+        query = queries[i]
         
         # Run query (v7.1: now returns debug_info)
-        hits, latency_ms, debug_info = multi_law_query(query, indices, model)
+        if batch:
+            hits, latency_ms, debug_info = batch_results[i]
+        else:
+            hits, latency_ms, debug_info = multi_law_query(query, indices, model)
         total_latency += latency_ms
         total_router_bonus += debug_info.get("router_bonus_applied", 0)
         total_pair_guards += debug_info.get("pair_guards_applied", 0)
@@ -549,6 +618,12 @@ def generate_report(eval_results: dict) -> str:
 
 def main() -> None:
     """Run cross-law evaluation (v7.1: with router bonus + diversity)."""
+    parser = argparse.ArgumentParser(description="Cross-law evaluation")
+    parser.add_argument("--no-batch", action="store_true", help="Query one question at a time")
+    parser.add_argument("--trace-context", action="store_true", help="Report time spent in QueryContext")
+    args = parser.parse_args()
+    set_tracing(args.trace_context)
+    
     print("=" * 60)
     print("Cross-Law Evaluation (v7.1)")
     print(f"  Router Bonus: +{ROUTER_BONUS}")
@@ -570,11 +645,11 @@ def main() -> None:
     
     # Load model
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     # Run evaluation
     print("\nRunning evaluation...")
-    eval_results = run_evaluation(questions, indices, model)
+    eval_results = run_evaluation(questions, indices, model, batch=not args.no_batch)
     
     # Check gates
     gates = check_gates(eval_results["summary"])
@@ -609,6 +684,8 @@ def main() -> None:
     print(f"  Router Bonus Applied: {summary.get('total_router_bonus_applied', 0)} times")
     print(f"  Pair Guards Applied: {summary.get('total_pair_guards_applied', 0)} times")
     print(f"  Diversity Swaps: {summary.get('total_diversity_swaps', 0)} times")
+    if args.trace_context:
+        print("\n" + format_trace_summary())
     print()
     print("GATES:")
     for gate_name, gate_pass in gates.items():
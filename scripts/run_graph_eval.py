@@ -9,6 +9,9 @@ Metrics:
 - GRAPH_PATH_PASS: Graph expansion finds expected references/exceptions
 - SUPPORT_PASS: Supporting nodes contain expected content
 
+Also compares graph expansion latency with live BFS against the snapshot's
+materialized k-hop lists on the same primary hits.
+
 Usage:
     python scripts/run_graph_eval.py
 """
@@ -30,6 +33,10 @@ except ImportError as e:
     sys.exit(1)
 
 from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.query_rules.query_context import QueryContext
+from shared.retrieval.batch_query import encode_queries, fetch_law_results, fetch_law_results_batch
+from shared.retrieval.embedding_cache import load_query_encoder
+# Importing the builder registers the graph_municipal_anchors signal family
 from scripts.graph_context_builder import GraphContextBuilder
 
 
@@ -65,9 +72,11 @@ ROUTER_BONUS = 0.02
 MIN_SCORE = 0.50
 K_TOTAL = 10
 
-# v8.1: Law mismatch penalty for municipal context
+# v8.1: Law mismatch penalty for municipal context (graph_municipal_anchors)
 LAW_MISMATCH_PENALTY = 0.03
-_MUNICIPAL_ANCHORS = ["kunnan", "kunta", "kuntakonserni", "kuntalaki", "kuntalain"]
+
+# Top hits expanded through the graph (GraphContextBuilder.expand_multiple)
+GRAPH_EXPAND_TOP_K = 3
 
 
 def load_indices() -> dict[str, Any]:
@@ -85,42 +94,32 @@ def load_indices() -> dict[str, Any]:
     return indices
 
 
-def multi_law_query(
-    query: str,
-    indices: dict[str, Any],
-    model: SentenceTransformer,
-    total_k: int = K_TOTAL,
-    min_score: float = MIN_SCORE,
-) -> list[dict]:
-    """Query multiple law indices and return merged results (v8.1)."""
+def _route(query: str | QueryContext, indices: dict[str, Any], total_k: int) -> tuple[dict[str, float], dict[str, int]]:
+    """Router weights and k per law for one query."""
     available_laws = list(indices.keys())
     weights = route_query(query, available_laws)
-    k_per_law = calculate_k_per_law(weights, total_k, min_k=2)
-    
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
-    
+    return weights, calculate_k_per_law(weights, total_k, min_k=2)
+
+
+def _rank_hits(
+    query: str | QueryContext,
+    weights: dict[str, float],
+    law_results: dict[str, dict],
+    total_k: int,
+    min_score: float,
+) -> list[dict]:
+    """Merge per-law hits with router bonus and law-mismatch penalty (v8.1)."""
     # v8.1: Check for municipal context
-    query_lower = query.lower()
-    has_municipal = any(anchor in query_lower for anchor in _MUNICIPAL_ANCHORS)
+    has_municipal = QueryContext.of(query).has_signal("graph_municipal_anchors")
     
     all_results: list[dict] = []
     top1_law = max(weights, key=weights.get) if weights else None
     
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-        
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
+    for law_key, results in law_results.items():
         for doc, meta, dist in zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
         ):
             score = 1 - dist
             if law_key == top1_law:
@@ -146,23 +145,66 @@ def multi_law_query(
     return all_results[:total_k]
 
 
+def multi_law_query(
+    query: str | QueryContext,
+    indices: dict[str, Any],
+    model: SentenceTransformer,
+    total_k: int = K_TOTAL,
+    min_score: float = MIN_SCORE,
+) -> list[dict]:
+    """Query multiple law indices and return merged results (v8.1)."""
+    context = QueryContext.of(query)
+    weights, k_per_law = _route(context, indices, total_k)
+    embedding = model.encode([context.text], normalize_embeddings=True)[0].tolist()
+    law_results = fetch_law_results(indices, embedding, k_per_law)
+    return _rank_hits(context, weights, law_results, total_k, min_score)
+
+
+def multi_law_query_batch(
+    queries: list[str | QueryContext],
+    indices: dict[str, Any],
+    model: SentenceTransformer,
+    total_k: int = K_TOTAL,
+    min_score: float = MIN_SCORE,
+) -> list[list[dict]]:
+    """Batched multi_law_query: one encode pass and one query per law collection."""
+    contexts = [QueryContext.of(query) for query in queries]
+    plans = [_route(context, indices, total_k) for context in contexts]
+    embeddings = encode_queries(model, [context.text for context in contexts])
+    law_results_rows = fetch_law_results_batch(indices, embeddings, [k_per_law for _, k_per_law in plans])
+    return [
+        _rank_hits(context, weights, law_results, total_k, min_score)
+        for context, (weights, _), law_results in zip(contexts, plans, law_results_rows)
+    ]
+
+
 def evaluate_question(
     question: dict,
     indices: dict[str, Any],
     model: SentenceTransformer,
     graph_builder: GraphContextBuilder,
+    hits: list[dict] | None = None,
+    retrieval_latency_ms: float = 0.0,
+    context: QueryContext | None = None,
 ) -> dict:
-    """Evaluate a single graph-needed question."""
+    """Evaluate a single graph-needed question.
+    
+    If hits are given (from multi_law_query_batch), retrieval is skipped and
+    retrieval_latency_ms is added to the measured graph latency. context is
+    the QueryContext the batch was routed with, if any.
+    """
     query = question.get("query", "")
+    context = context or QueryContext(query)
     qid = question.get("id", "")
     expected_primary = question.get("expected_primary", {})
     expected_refs = question.get("expected_references", [])
     expected_exceptions = question.get("expected_exceptions", [])
     
-    start_time = time.time()
+    start_time = time.time() - retrieval_latency_ms / 1000
     
     # Step 1: Retrieval
-    hits = multi_law_query(query, indices, model)
+    if hits is None:
+        hits = multi_law_query(context, indices, model)
     
     if not hits:
         return {
@@ -175,8 +217,9 @@ def evaluate_question(
             "error": "No results",
         }
     
-    # Step 2: Graph expansion
-    expanded = graph_builder.expand_context(hits[0], query)
+    # Step 2: Graph expansion of the top-k hits
+    expanded = graph_builder.expand_multiple(hits, context, top_k=GRAPH_EXPAND_TOP_K)
+    supporting, normipolku = graph_builder.merge_expanded(expanded)
     
     latency_ms = (time.time() - start_time) * 1000
     
@@ -197,7 +240,6 @@ def evaluate_question(
             primary_pass = False
     
     # Evaluate GRAPH_PATH_PASS (do we find expected references in normipolku?)
-    normipolku = expanded.get("normipolku", [])
     graph_path_pass = True
     
     # Check if we have any outgoing references when expected
@@ -210,7 +252,6 @@ def evaluate_question(
             graph_path_pass = False
     
     # Evaluate SUPPORT_PASS (do supporting nodes contain expected content?)
-    supporting = expanded.get("supporting_nodes", [])
     support_pass = True
     
     if expected_refs or expected_exceptions:
@@ -246,7 +287,49 @@ def evaluate_question(
     }
 
 
-def generate_report(results: list[dict], output_path: Path) -> None:
+def compare_expansion_latency(
+    graph_builder: GraphContextBuilder,
+    batch_hits: list[list[dict]],
+    contexts: list[QueryContext],
+    rounds: int = 20,
+) -> dict[str, Any]:
+    """
+    Time expand_multiple on the top hits: live BFS vs k-hop cache lookup.
+    
+    graph_builder is the (cache-enabled) builder of the eval; a second one
+    runs the BFS per hit. Outputs of the two must be identical. Times are
+    per expanded hit (up to GRAPH_EXPAND_TOP_K per query).
+    """
+    live_builder = GraphContextBuilder(use_khop_cache=False)
+    pairs = [(hits, context) for hits, context in zip(batch_hits, contexts) if hits]
+    expanded_hits = sum(min(len(hits), GRAPH_EXPAND_TOP_K) for hits, _ in pairs)
+    
+    timings: dict[str, float] = {}
+    outputs: dict[str, list] = {}
+    for name, builder in (("live_bfs", live_builder), ("khop_cache", graph_builder)):
+        builder.load()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            outputs[name] = [
+                builder.expand_multiple(hits, context, top_k=GRAPH_EXPAND_TOP_K) for hits, context in pairs
+            ]
+        timings[name] = (time.perf_counter() - start) * 1000 / max(rounds * expanded_hits, 1)
+    
+    return {
+        "queries": len(pairs),
+        "hits": expanded_hits,
+        "khop_available": graph_builder.graph.khop is not None,
+        "live_bfs_ms": timings["live_bfs"],
+        "khop_cache_ms": timings["khop_cache"],
+        "mismatches": sum(a != b for a, b in zip(outputs["live_bfs"], outputs["khop_cache"])),
+    }
+
+
+def generate_report(
+    results: list[dict],
+    output_path: Path,
+    expansion_latency: dict[str, Any] | None = None,
+) -> None:
     """Generate a markdown report from evaluation results."""
     total = len(results)
     primary_pass = sum(1 for r in results if r.get("primary_pass"))
@@ -281,6 +364,20 @@ def generate_report(results: list[dict], output_path: Path) -> None:
     lines.append(f"- Latency < 500 ms: {'PASS' if avg_latency < 500 else 'FAIL'}")
     lines.append("")
     
+    if expansion_latency:
+        lines.append("## Graph Expansion Latency")
+        lines.append("")
+        lines.append("| Mode | Avg per hit |")
+        lines.append("|------|-------------|")
+        lines.append(f"| Live BFS | {expansion_latency['live_bfs_ms']:.3f} ms |")
+        lines.append(f"| k-hop cache | {expansion_latency['khop_cache_ms']:.3f} ms |")
+        lines.append("")
+        if not expansion_latency["khop_available"]:
+            lines.append("No k-hop lists in the graph snapshot; both modes ran the BFS.")
+        lines.append(f"{expansion_latency['hits']} hits expanded over {expansion_latency['queries']} queries.")
+        lines.append(f"Output mismatches: {expansion_latency['mismatches']}/{expansion_latency['queries']} queries")
+        lines.append("")
+    
     # Detailed results
     lines.append("## Detailed Results")
     lines.append("")
@@ -325,7 +422,7 @@ def main() -> None:
     
     # Load model
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     # Initialize graph builder
     print("\nInitializing graph context builder...")
@@ -335,13 +432,25 @@ def main() -> None:
     print("\nRunning evaluation...")
     results: list[dict] = []
     
+    batch_start = time.time()
+    contexts = [QueryContext(q.get("query", "")) for q in questions]
+    batch_hits = multi_law_query_batch(contexts, indices, model)
+    retrieval_latency_ms = (time.time() - batch_start) * 1000 / max(len(questions), 1)
+    
     for i, q in enumerate(questions):
-        result = evaluate_question(q, indices, model, graph_builder)
+        result = evaluate_question(
+            q, indices, model, graph_builder,
+            hits=batch_hits[i], retrieval_latency_ms=retrieval_latency_ms,
+            context=contexts[i],
+        )
         results.append(result)
         
         status = "PASS" if result["primary_pass"] else "FAIL"
         print(f"  [{i+1}/{len(questions)}] {q['id']}: {status}")
     
+    print("\nComparing graph expansion latency (live BFS vs k-hop cache)...")
+    expansion_latency = compare_expansion_latency(graph_builder, batch_hits, contexts)
+    
     # Save results
     results_path = PROJECT_ROOT / "graph" / "eval" / "results_graph_needed.json"
     with open(results_path, "w", encoding="utf-8") as f:
@@ -349,7 +458,7 @@ def main() -> None:
     
     # Generate report
     report_path = PROJECT_ROOT / "graph" / "eval" / "report_graph_needed.md"
-    generate_report(results, report_path)
+    generate_report(results, report_path, expansion_latency)
     
     # Print summary
     total = len(results)
@@ -365,6 +474,9 @@ def main() -> None:
     print(f"  GRAPH_PATH_PASS:  {graph_pass}/{total} ({100*graph_pass/total:.1f}%)")
     print(f"  SUPPORT_PASS:     {support_pass}/{total} ({100*support_pass/total:.1f}%)")
     print(f"  Avg Latency:      {avg_latency:.1f} ms")
+    print(f"  Expansion/hit:    {expansion_latency['live_bfs_ms']:.3f} ms live BFS, "
+          f"{expansion_latency['khop_cache_ms']:.3f} ms k-hop cache "
+          f"({expansion_latency['mismatches']} mismatches)")
     print("=" * 60)
     print(f"\nReport: {report_path}")
     print(f"Results: {results_path}")
@@ -24,6 +24,10 @@ except ImportError as e:
     sys.exit(1)
 
 from shared.query_rules.law_router import route_query, calculate_k_per_law
+from shared.query_rules.query_context import QueryContext, register_signal_family
+from shared.retrieval.batch_query import encode_queries, fetch_law_results, fetch_law_results_batch
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import merge_ranked
 
 
 # Configuration
@@ -44,6 +48,7 @@ PAIR_GUARDS: list[tuple[str, str, float]] = [
     ("tasekaava", "kirjanpitoasetus_1339_1997", +0.03),
     ("tuloslaskelmakaava", "kirjanpitoasetus_1339_1997", +0.03),
 ]
+register_signal_family("sota20_pair_guards", [term for term, _, _ in PAIR_GUARDS])
 
 # Law index configurations
 LAW_INDICES = {
@@ -240,41 +245,30 @@ def load_indices() -> dict[str, chromadb.Collection]:
     return indices
 
 
-def multi_law_query(
-    query: str,
-    indices: dict[str, chromadb.Collection],
-    model: SentenceTransformer,
-) -> list[dict]:
-    """Run multi-law query with v7.2 rerank."""
+def _route(query: str | QueryContext, indices: dict[str, chromadb.Collection]) -> tuple[dict[str, float], dict[str, int]]:
+    """Router weights and k per law for one query."""
     available_laws = list(indices.keys())
     weights = route_query(query, available_laws)
-    
+    return weights, calculate_k_per_law(weights, K_TOTAL, min_k=2)
+
+
+def _rank_hits(query: str | QueryContext, weights: dict[str, float], law_results: dict[str, dict]) -> list[dict]:
+    """Merge per-law hits with v7.2 rerank."""
     sorted_weights = sorted(weights.items(), key=lambda x: x[1], reverse=True)
     top1_law = sorted_weights[0][0] if sorted_weights else None
     
-    k_per_law = calculate_k_per_law(weights, K_TOTAL, min_k=2)
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
-    
-    all_results: list[dict] = []
+    ranked: dict[str, list[dict]] = {}
     
-    for law_key, k in k_per_law.items():
-        if law_key not in indices:
-            continue
-        collection = indices[law_key]
-        results = collection.query(
-            query_embeddings=[embedding],
-            n_results=k,
-            include=["documents", "metadatas", "distances"],
-        )
-        
+    for law_key, results in law_results.items():
+        ranked[law_key] = []
         for doc, meta, dist in zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
         ):
             score = 1 - dist
             if score >= MIN_SCORE:
-                all_results.append({
+                ranked[law_key].append({
                     "law_key": law_key,
                     "law_name": meta.get("law", ""),
                     "score": score,
@@ -287,6 +281,7 @@ def multi_law_query(
                     "text": doc[:300] + "..." if len(doc) > 300 else doc,
                     "node_id": meta.get("node_id", ""),
                 })
+    all_results = [r for law_hits in ranked.values() for r in law_hits]
     
     # Apply router bonus
     if top1_law:
@@ -295,15 +290,44 @@ def multi_law_query(
                 r["score"] += ROUTER_BONUS
     
     # Apply pair-guards
-    query_lower = query.lower()
+    matched = QueryContext.of(query).signals("sota20_pair_guards")
     for term, law_key, adjustment in PAIR_GUARDS:
-        if term in query_lower:
+        if term in matched:
             for r in all_results:
                 if r["law_key"] == law_key:
                     r["score"] += adjustment
     
-    all_results.sort(key=lambda x: x["score"], reverse=True)
-    return all_results[:K_TOTAL]
+    # Adjustments are per law, so each law's hits stay sorted: k-way merge
+    return merge_ranked(ranked.values(), K_TOTAL)
+
+
+def multi_law_query(
+    query: str,
+    indices: dict[str, chromadb.Collection],
+    model: SentenceTransformer,
+) -> list[dict]:
+    """Run multi-law query with v7.2 rerank."""
+    context = QueryContext(query)
+    weights, k_per_law = _route(context, indices)
+    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    law_results = fetch_law_results(indices, embedding, k_per_law)
+    return _rank_hits(context, weights, law_results)
+
+
+def multi_law_query_batch(
+    queries: list[str],
+    indices: dict[str, chromadb.Collection],
+    model: SentenceTransformer,
+) -> list[list[dict]]:
+    """Batched multi_law_query: one encode pass and one query per law collection."""
+    contexts = [QueryContext(query) for query in queries]
+    plans = [_route(context, indices) for context in contexts]
+    embeddings = encode_queries(model, queries)
+    law_results_rows = fetch_law_results_batch(indices, embeddings, [k_per_law for _, k_per_law in plans])
+    return [
+        _rank_hits(context, weights, law_results)
+        for context, (weights, _), law_results in zip(contexts, plans, law_results_rows)
+    ]
 
 
 def evaluate_question(question: dict, results: list[dict]) -> dict:
@@ -350,7 +374,7 @@ def main() -> None:
     
     # Load model
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     # Run evaluation
     print("\n" + "=" * 70)
@@ -359,13 +383,14 @@ def main() -> None:
     
     results_all: list[dict] = []
     correct_count = 0
-    total_latency = 0.0
+    
+    start = time.perf_counter()
+    batch_results = multi_law_query_batch([q["query"] for q in SOTA_QUESTIONS], indices, model)
+    total_latency = (time.perf_counter() - start) * 1000
+    latency = total_latency / len(SOTA_QUESTIONS)
     
     for i, q in enumerate(SOTA_QUESTIONS):
-        start = time.perf_counter()
-        results = multi_law_query(q["query"], indices, model)
-        latency = (time.perf_counter() - start) * 1000
-        total_latency += latency
+        results = batch_results[i]
         
         eval_result = evaluate_question(q, results)
         
@@ -12,12 +12,15 @@ Tests system robustness against:
 
 Usage:
     python scripts/run_v10_adversarial_eval.py
+    python scripts/run_v10_adversarial_eval.py --trace-context
 """
 
+import argparse
 import json
 import re
 import sys
 import time
+from functools import partial
 from pathlib import Path
 
 # Add project root to path
@@ -31,6 +34,18 @@ except ImportError:
     print("Install: pip install chromadb sentence-transformers")
     exit(1)
 
+from shared.documents.registry import DocumentIndexRegistry
+from shared.query_rules.query_context import (
+    QueryContext,
+    format_trace_summary,
+    register_signal_family,
+    set_tracing,
+)
+from shared.retrieval.batch_query import encode_queries, fetch_law_results_batch
+from shared.retrieval.embedding_cache import load_query_encoder
+from shared.retrieval.fanout import fan_out
+from shared.retrieval.pipeline import RetrievalPipeline
+
 # Configuration
 QUESTIONS_PATH = PROJECT_ROOT / "eval" / "v10" / "questions_adversarial.json"
 OUTPUT_DIR = PROJECT_ROOT / "reports"
@@ -63,8 +78,9 @@ LAW_INDICES = {
     },
 }
 
-DOC_INDEX_PATH = PROJECT_ROOT / "docs_layer" / "data" / "lapua" / "2023" / "embeddings"
-DOC_COLLECTION = "lapua_2023"
+DOC_SCOPE = ("lapua", 2023)
+# fan_out key of the document search next to the per-law searches
+DOC_TASK = "doc_index"
 
 # Query parameters
 K_TOTAL = 10
@@ -90,6 +106,30 @@ MUNICIPAL_ANCHORS = [
     "kunnanhallitus", "tarkastuslautakunta", "kunnan tilinpäätös"
 ]
 
+# apply_law_boost anchors
+# OYL strong anchors (boost OYL, penalize KUNTA)
+OYL_STRONG_ANCHORS = ["osakeyhtiö", "hallituksen vastuu", "yhtiökokous", "toimitusjohtaja", "osakeyhtiölaki"]
+# Municipal strong anchors (boost KUNTA, penalize others for municipal context)
+MUNICIPAL_STRONG_ANCHORS = ["kunnan", "kuntakonserni", "kuntalaki", "valtuusto", "kunnanhallitus", "tarkastuslautakunta"]
+# Weak municipal (present but not dominant)
+MUNICIPAL_WEAK_ANCHORS = ["kunta", "kunnan tilinpäätös"]
+
+
+def _abstain_match_term(signal: str) -> str:
+    """Substring that triggers a strong abstain signal."""
+    signal_lower = signal.lower()
+    # Remove trailing vowels for root match (helsink-, tänää-, etc.)
+    signal_root = signal_lower.rstrip("aeiouäö")
+    return signal_root if len(signal_root) >= 4 else signal_lower
+
+
+_ABSTAIN_STRONG_TERMS = [(signal, _abstain_match_term(signal)) for signal in ABSTAIN_SIGNALS_STRONG]
+
+register_signal_family("v10_abstain_strong", [term for _, term in _ABSTAIN_STRONG_TERMS])
+register_signal_family("v10_oyl_strong", OYL_STRONG_ANCHORS)
+register_signal_family("v10_municipal_strong", MUNICIPAL_STRONG_ANCHORS)
+register_signal_family("v10_municipal_weak", MUNICIPAL_WEAK_ANCHORS)
+
 
 def load_questions(path: Path) -> list[dict]:
     """Load adversarial questions."""
@@ -113,16 +153,61 @@ def load_law_indices(model: SentenceTransformer) -> dict:
     return indices
 
 
-def load_doc_index(path: Path, collection_name: str):
-    """Load document ChromaDB index."""
-    if not path.exists():
-        return None
+def load_doc_index(scope: tuple[str, int]):
+    """Document index of one (city, year) bundle from the registry, or None."""
+    registry = DocumentIndexRegistry.discover()
     try:
-        client = chromadb.PersistentClient(path=str(path))
-        collection = client.get_collection(collection_name)
-        return {"client": client, "collection": collection}
+        collection = registry.collection([scope])
+        collection.count()  # opens the index now so a broken one is reported here
     except Exception:
         return None
+    return {"registry": registry, "collection": collection}
+
+
+def _collect_law_hits(law_results: dict[str, dict]) -> list[dict]:
+    """Merge per-law results into score-sorted hits above MIN_SCORE."""
+    all_hits = []
+    for law_key, results in law_results.items():
+        for i, doc_id in enumerate(results["ids"]):
+            distance = results["distances"][i]
+            score = 1 - distance
+            
+            if score < MIN_SCORE:
+                continue
+            
+            meta = results["metadatas"][i]
+            all_hits.append({
+                "law_key": law_key,
+                "node_id": meta.get("node_id", doc_id),
+                "section_num": meta.get("section_num"),
+                "moment": meta.get("moment"),
+                "score": score,
+                "text": results["documents"][i][:150],
+            })
+    
+    # Sort by score descending
+    all_hits.sort(key=lambda x: x["score"], reverse=True)
+    return all_hits[:K_TOTAL]
+
+
+def _fetch_one_law(law_key: str, index: dict, k_per_law: int, embeddings: list[list[float]]) -> list[dict]:
+    """Per-row results of one law index."""
+    return fetch_law_results_batch(
+        {law_key: index["collection"]},
+        embeddings,
+        [{law_key: k_per_law}] * len(embeddings),
+    )
+
+
+def _merge_law_rows(stage_results: dict, n_rows: int) -> list[dict[str, dict]]:
+    """Per-row law results from the laws that answered (failed laws are skipped)."""
+    rows: list[dict[str, dict]] = [{} for _ in range(n_rows)]
+    for law_key, law_rows in stage_results.items():
+        if law_key == DOC_TASK:
+            continue
+        for row, law_results in zip(rows, law_rows):
+            row.update(law_results)
+    return rows
 
 
 def query_all_laws(
@@ -130,42 +215,31 @@ def query_all_laws(
     indices: dict,
     model: SentenceTransformer,
     k_per_law: int = 3,
+    embedding: list[float] | None = None,
 ) -> list[dict]:
     """Query all law indices and merge results."""
-    all_hits = []
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
-    
-    for law_key, index in indices.items():
-        collection = index["collection"]
-        try:
-            results = collection.query(
-                query_embeddings=[embedding],
-                n_results=k_per_law,
-                include=["documents", "metadatas", "distances"],
-            )
-            
-            for i, doc_id in enumerate(results["ids"][0]):
-                distance = results["distances"][0][i]
-                score = 1 - distance
-                
-                if score < MIN_SCORE:
-                    continue
-                
-                meta = results["metadatas"][0][i]
-                all_hits.append({
-                    "law_key": law_key,
-                    "node_id": meta.get("node_id", doc_id),
-                    "section_num": meta.get("section_num"),
-                    "moment": meta.get("moment"),
-                    "score": score,
-                    "text": results["documents"][0][i][:150],
-                })
-        except Exception:
-            pass
-    
-    # Sort by score descending
-    all_hits.sort(key=lambda x: x["score"], reverse=True)
-    return all_hits[:K_TOTAL]
+    if embedding is None:
+        embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    return query_all_laws_batch([query], indices, model, k_per_law, embeddings=[embedding])[0]
+
+
+def query_all_laws_batch(
+    queries: list[str],
+    indices: dict,
+    model: SentenceTransformer,
+    k_per_law: int = 3,
+    embeddings: list[list[float]] | None = None,
+) -> list[list[dict]]:
+    """Query all law indices once (concurrently) for a whole question set."""
+    if embeddings is None:
+        embeddings = encode_queries(model, queries)
+    
+    tasks = {
+        law_key: partial(_fetch_one_law, law_key, index, k_per_law, embeddings)
+        for law_key, index in indices.items()
+    }
+    outcome = fan_out(tasks, timeout_s=None)
+    return [_collect_law_hits(row) for row in _merge_law_rows(outcome.results, len(queries))]
 
 
 def query_docs(
@@ -173,12 +247,14 @@ def query_docs(
     doc_index: dict | None,
     model: SentenceTransformer,
     k: int = 5,
+    embedding: list[float] | None = None,
 ) -> list[dict]:
     """Query document index."""
     if doc_index is None:
         return []
     
-    embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
+    if embedding is None:
+        embedding = model.encode([query], normalize_embeddings=True)[0].tolist()
     
     try:
         collection = doc_index["collection"]
@@ -206,30 +282,31 @@ def query_docs(
         return []
 
 
-def should_abstain(query: str, law_hits: list[dict], doc_hits: list[dict]) -> tuple[bool, str]:
+def should_abstain(
+    query: str | QueryContext,
+    law_hits: list[dict],
+    doc_hits: list[dict],
+) -> tuple[bool, str]:
     """Determine if the system should abstain from answering."""
-    query_lower = query.lower()
-    
-    # Strong abstain signals - always abstain (case-insensitive, partial match)
-    for signal in ABSTAIN_SIGNALS_STRONG:
-        # Check if signal root is in query (handles Finnish inflections)
-        signal_lower = signal.lower()
-        # Remove trailing vowels for root match (helsink-, tänää-, etc.)
-        signal_root = signal_lower.rstrip("aeiouäö")
-        if len(signal_root) >= 4 and signal_root in query_lower:
-            return True, f"Strong signal: '{signal}'"
-        elif signal_lower in query_lower:
-            return True, f"Strong signal: '{signal}'"
+    context = QueryContext.of(query)
+    
+    # Strong abstain signals - always abstain (case-insensitive, partial match;
+    # signal roots handle Finnish inflections)
+    matched = context.signals("v10_abstain_strong")
+    if matched:
+        for signal, term in _ABSTAIN_STRONG_TERMS:
+            if term in matched:
+                return True, f"Strong signal: '{signal}'"
     
     # Interpretation-required signals - abstain unless very high score
     for pattern in ABSTAIN_SIGNALS_INTERPRET:
-        if re.search(pattern, query_lower):
+        if re.search(pattern, context.normalized):
             best_score = law_hits[0]["score"] if law_hits else 0
             if best_score < 0.70:  # High threshold for interpretation questions
                 return True, f"Interpretation needed: '{pattern}'"
     
     # Check for future year
-    if re.search(r"\b202[4-9]\b|\b203\d\b", query_lower):
+    if any(2024 <= year <= 2039 for year in context.years):
         return True, "Future/missing year"
     
     # No hits at all
@@ -239,21 +316,13 @@ def should_abstain(query: str, law_hits: list[dict], doc_hits: list[dict]) -> tu
     return False, ""
 
 
-def apply_law_boost(query: str, law_hits: list[dict]) -> list[dict]:
+def apply_law_boost(query: str | QueryContext, law_hits: list[dict]) -> list[dict]:
     """Apply score boost based on query anchors. Returns re-sorted hits."""
-    query_lower = query.lower()
-    
-    # OYL strong anchors (boost OYL, penalize KUNTA)
-    oyl_strong = ["osakeyhtiö", "hallituksen vastuu", "yhtiökokous", "toimitusjohtaja", "osakeyhtiölaki"]
-    oyl_count = sum(1 for a in oyl_strong if a in query_lower)
-    
-    # Municipal strong anchors (boost KUNTA, penalize others for municipal context)
-    municipal_strong = ["kunnan", "kuntakonserni", "kuntalaki", "valtuusto", "kunnanhallitus", "tarkastuslautakunta"]
-    municipal_count = sum(1 for a in municipal_strong if a in query_lower)
+    context = QueryContext.of(query)
     
-    # Weak municipal (present but not dominant)
-    municipal_weak = ["kunta", "kunnan tilinpäätös"]
-    municipal_weak_count = sum(1 for a in municipal_weak if a in query_lower)
+    oyl_count = len(context.signals("v10_oyl_strong"))
+    municipal_count = len(context.signals("v10_municipal_strong"))
+    municipal_weak_count = len(context.signals("v10_municipal_weak"))
     
     # Decision logic
     boost_oyl = oyl_count >= 2  # Strong OYL signal
@@ -295,30 +364,50 @@ def evaluate_question(
     law_indices: dict,
     doc_index: dict | None,
     model: SentenceTransformer,
+    law_hits: list[dict] | None = None,
+    embedding: list[float] | None = None,
+    retrieval_latency_ms: float = 0.0,
+    pipeline: RetrievalPipeline | None = None,
 ) -> dict:
-    """Evaluate a single adversarial question."""
+    """Evaluate a single adversarial question.
+    
+    law_hits and embedding may come from query_all_laws_batch; the amortized
+    batch retrieval time is then passed in as retrieval_latency_ms. Without
+    law_hits the question is encoded once and the law and document searches
+    run on that vector.
+    """
     query = question["query"]
+    context = QueryContext(query)
     expected = question.get("expected", {})
     scoring = question.get("scoring", {})
     category = question.get("category", "")
     
-    start_time = time.time()
+    start_time = time.time() - retrieval_latency_ms / 1000
     
-    # Query laws
-    law_hits = query_all_laws(query, law_indices, model)
+    needs_docs = category == "DOC" or bool(expected.get("expected_doc_path_any"))
+    doc_hits = []
     
-    # Apply law-specific boost/penalty based on query anchors
-    law_hits = apply_law_boost(query, law_hits)
+    # Query laws (and docs for DOC category) concurrently on one query vector
+    if law_hits is None:
+        stages = {
+            law_key: (lambda vector, law_key=law_key, index=index: _fetch_one_law(law_key, index, 3, [vector]))
+            for law_key, index in law_indices.items()
+        }
+        if needs_docs:
+            stages[DOC_TASK] = lambda vector: query_docs(query, doc_index, model, embedding=vector)
+        run = (pipeline or RetrievalPipeline(model)).run(query, stages, embedding=embedding)
+        doc_hits = run.results.get(DOC_TASK, [])
+        law_hits = _collect_law_hits(_merge_law_rows(run.results, 1)[0])
+    elif needs_docs:
+        doc_hits = query_docs(query, doc_index, model, embedding=embedding)
     
-    # Query docs (for DOC category)
-    doc_hits = []
-    if category == "DOC" or expected.get("expected_doc_path_any"):
-        doc_hits = query_docs(query, doc_index, model)
+    # Apply law-specific boost/penalty based on query anchors
+    law_hits = apply_law_boost(context, law_hits)
     
     latency_ms = (time.time() - start_time) * 1000
     
     # Determine if should abstain
-    system_abstains, abstain_reason = should_abstain(query, law_hits, doc_hits)
+    system_abstains, abstain_reason = should_abstain(context, law_hits, doc_hits)
     
     # v10.1 contract: required fields
     must_abstain = expected.get("must_abstain", False)
@@ -398,6 +487,11 @@ def evaluate_question(
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="v10 adversarial eval")
+    parser.add_argument("--trace-context", action="store_true", help="Report time spent in QueryContext")
+    args = parser.parse_args()
+    set_tracing(args.trace_context)
+    
     print("=" * 60)
     print("v10.1: Adversarial Eval Runner")
     print("=" * 60)
@@ -406,20 +500,31 @@ def main() -> None:
     print(f"\nLoaded {len(questions)} adversarial questions")
     
     print("\nLoading embedding model...")
-    model = SentenceTransformer("BAAI/bge-m3")
+    model = load_query_encoder("BAAI/bge-m3")
     
     print("\nLoading law indices...")
     law_indices = load_law_indices(model)
     print(f"  Loaded: {len(law_indices)} indices")
     
     print("\nLoading document index...")
-    doc_index = load_doc_index(DOC_INDEX_PATH, DOC_COLLECTION)
+    doc_index = load_doc_index(DOC_SCOPE)
     print(f"  Doc index: {'loaded' if doc_index else 'not found'}")
     
     print("\nRunning adversarial evaluation...")
     results = []
+    
+    batch_start = time.time()
+    queries = [q["query"] for q in questions]
+    embeddings = encode_queries(model, queries)
+    batch_hits = query_all_laws_batch(queries, law_indices, model, embeddings=embeddings)
+    retrieval_latency_ms = (time.time() - batch_start) * 1000 / max(len(questions), 1)
+    
     for i, q in enumerate(questions):
-        result = evaluate_question(q, law_indices, doc_index, model)
+        result = evaluate_question(
+            q, law_indices, doc_index, model,
+            law_hits=batch_hits[i], embedding=embeddings[i],
+            retrieval_latency_ms=retrieval_latency_ms,
+        )
         status = "PASS" if result.get("pass") else "FAIL"
         print(f"  [{i+1}/{len(questions)}] {q['id']}: {status}")
         results.append(result)
@@ -431,6 +536,8 @@ def main() -> None:
         json.dump(results, f, indent=2, ensure_ascii=False)
     
     print(f"\nResults JSON: {results_path}")
+    if args.trace_context:
+        print("\n" + format_trace_summary())
     print("\nNow run: python scripts/render_v10_report.py")
     print("to generate summary and failures reports from the JSON.")
 
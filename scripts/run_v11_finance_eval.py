@@ -13,7 +13,6 @@ Usage:
 """
 
 import json
-import re
 import sys
 import time
 from pathlib import Path
@@ -23,17 +22,20 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 try:
-    import chromadb
+    import chromadb  # noqa: F401  (opened by the registry for bundles without a snapshot)
     from sentence_transformers import SentenceTransformer
 except ImportError:
     print("Install: pip install chromadb sentence-transformers")
     exit(1)
 
+from shared.documents.registry import DocumentIndexRegistry
+from shared.documents.table_store import TableStore
+from shared.retrieval.embedding_cache import load_query_encoder
+
 # Configuration
 QUESTIONS_PATH = PROJECT_ROOT / "eval" / "v11" / "questions_finance_v11.json"
 DOC_DATA_PATH = PROJECT_ROOT / "docs_layer" / "data" / "lapua" / "2023" / "parsed" / "tilinpaatos_2023.json"
-DOC_INDEX_PATH = PROJECT_ROOT / "docs_layer" / "data" / "lapua" / "2023" / "embeddings"
-DOC_COLLECTION = "lapua_2023"
+TABLE_STORE_PATH = PROJECT_ROOT / "docs_layer" / "data" / "table_store.npz"
 OUTPUT_DIR = PROJECT_ROOT / "reports"
 
 # Abstain signals
@@ -60,62 +62,15 @@ def load_doc_data(path: Path) -> dict:
         return json.load(f)
 
 
-def load_doc_index(path: Path, collection_name: str):
-    """Load document ChromaDB index."""
-    if not path.exists():
-        return None
+def load_doc_index(scope: tuple[str, int]):
+    """Document index of one (city, year) bundle from the registry, or None."""
+    registry = DocumentIndexRegistry.discover()
     try:
-        client = chromadb.PersistentClient(path=str(path))
-        collection = client.get_collection(collection_name)
-        return {"client": client, "collection": collection}
+        collection = registry.collection([scope])
+        collection.count()  # opens the index now so a broken one is reported here
     except Exception:
         return None
-
-
-def extract_tables(doc_data: dict) -> list[dict]:
-    """Extract all tables from document data with metadata."""
-    tables = []
-    for page in doc_data.get("pages", []):
-        page_num = page.get("page_num", 0)
-        for section in page.get("sections", []):
-            section_title = section.get("title", "")
-            for table in section.get("tables", []):
-                table_title = table.get("title", "")
-                for row_idx, row in enumerate(table.get("rows", [])):
-                    cells = row.get("cells", [])
-                    if len(cells) >= 2:
-                        row_name = cells[0]
-                        value_2023 = cells[1] if len(cells) > 1 else ""
-                        value_2022 = cells[2] if len(cells) > 2 else ""
-                        tables.append({
-                            "page": page_num,
-                            "section": section_title,
-                            "table_title": table_title,
-                            "row_name": row_name,
-                            "value_2023": value_2023,
-                            "value_2022": value_2022,
-                            "row_idx": row_idx,
-                        })
-            # Check subsections
-            for sub in section.get("subsections", []):
-                for table in sub.get("tables", []):
-                    table_title = table.get("title", "")
-                    for row_idx, row in enumerate(table.get("rows", [])):
-                        cells = row.get("cells", [])
-                        if len(cells) >= 2:
-                            row_name = cells[0]
-                            value_2023 = cells[1] if len(cells) > 1 else ""
-                            value_2022 = cells[2] if len(cells) > 2 else ""
-                            tables.append({
-                                "page": page_num,
-                                "section": sub.get("title", ""),
-                                "table_title": table_title,
-                                "row_name": row_name,
-                                "value_2023": value_2023,
-                                "value_2022": value_2022,
-                                "row_idx": row_idx,
-                            })
-    return tables
+    return {"registry": registry, "collection": collection}
 
 
 def extract_metrics(doc_data: dict) -> list[dict]:
@@ -123,50 +78,32 @@ def extract_metrics(doc_data: dict) -> list[dict]:
     return doc_data.get("metrics", [])
 
 
-def parse_numeric(value_str: str) -> float | None:
-    """Parse numeric value from string (handles Finnish formatting)."""
-    if not value_str:
-        return None
-    # Remove spaces and replace common Finnish formatting
-    cleaned = value_str.replace(" ", "").replace(",", ".")
-    # Handle negative
-    if cleaned.startswith("-"):
-        sign = -1
-        cleaned = cleaned[1:]
-    else:
-        sign = 1
-    try:
-        return sign * float(cleaned)
-    except ValueError:
-        return None
-
-
-def search_tables(query: str, tables: list[dict]) -> list[dict]:
-    """Simple keyword search in tables."""
-    query_lower = query.lower()
-    results = []
-    
-    # Keywords to match
-    keywords = re.findall(r'\b\w+\b', query_lower)
-    
-    for table in tables:
-        row_name_lower = table["row_name"].lower()
-        table_title_lower = table["table_title"].lower()
-        
-        # Calculate match score
-        score = 0
-        for kw in keywords:
-            if kw in row_name_lower:
-                score += 2
-            if kw in table_title_lower:
-                score += 1
-        
-        if score > 0:
-            results.append({**table, "score": score})
-    
-    # Sort by score
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:5]
+def load_table_store(store_path: Path, doc_path: Path) -> TableStore:
+    """
+    Load the columnar table store (docs_layer/scripts/build_table_store.py).
+    
+    Falls back to flattening doc_path in memory when the store is missing
+    or was not built from the current version of doc_path.
+    """
+    if store_path.exists():
+        store = TableStore.load(store_path)
+        if store.covers([doc_path]):
+            return store
+        print(f"Warning: {store_path} does not cover the current {doc_path.name}, flattening it in memory")
+    return TableStore.from_parsed_files([doc_path])
+
+
+def search_tables(
+    query: str,
+    store: TableStore,
+    city: str | None = None,
+    year: int | None = None,
+) -> list[dict]:
+    """Keyword search in table rows (row name x2, table title x1), top 5."""
+    return [
+        {**store.record(row), "score": score}
+        for row, score in store.search(query, limit=5, city=city, year=year)
+    ]
 
 
 def should_abstain(query: str) -> tuple[bool, str]:
@@ -186,10 +123,12 @@ def should_abstain(query: str) -> tuple[bool, str]:
 
 def evaluate_question(
     question: dict,
-    tables: list[dict],
+    store: TableStore,
     metrics: list[dict],
     doc_index: dict | None,
     model: SentenceTransformer | None,
+    city: str | None = None,
+    year: int | None = None,
 ) -> dict:
     """Evaluate a single v11 question."""
     query = question["query"]
@@ -203,7 +142,7 @@ def evaluate_question(
     abstain_expected = expected.get("abstain_expected", False)
     
     # Search tables
-    table_hits = search_tables(query, tables)
+    table_hits = search_tables(query, store, city, year)
     
     # Extract answer
     numeric_value = None
@@ -220,8 +159,8 @@ def evaluate_question(
             "table": top_hit["table_title"],
             "row": top_hit["row_name"],
         }
-        # Parse numeric value
-        numeric_value = parse_numeric(top_hit["value_2023"])
+        # Parsed when the store was built
+        numeric_value = top_hit["current"]
     
     latency_ms = (time.time() - start_time) * 1000
     
@@ -440,20 +379,20 @@ def main() -> None:
     # Load document data
     print("\nLoading document data...")
     doc_data = load_doc_data(DOC_DATA_PATH)
-    tables = extract_tables(doc_data)
+    store = load_table_store(TABLE_STORE_PATH, DOC_DATA_PATH)
     metrics = extract_metrics(doc_data)
-    print(f"  Tables: {len(tables)} rows")
+    print(f"  Tables: {len(store)} rows")
     print(f"  Metrics: {len(metrics)}")
     
-    # Load doc index (optional)
-    doc_index = load_doc_index(DOC_INDEX_PATH, DOC_COLLECTION)
-    model = SentenceTransformer("BAAI/bge-m3") if doc_index else None
+    # Load the doc index of the same city and year (optional)
+    doc_index = load_doc_index((doc_data.get("city"), doc_data.get("year")))
+    model = load_query_encoder("BAAI/bge-m3") if doc_index else None
     
     # Run evaluation
     print("\nRunning evaluation...")
     results = []
     for i, q in enumerate(questions):
-        result = evaluate_question(q, tables, metrics, doc_index, model)
+        result = evaluate_question(q, store, metrics, doc_index, model, doc_data.get("city"), doc_data.get("year"))
         status = "PASS" if result.get("pass") else "FAIL"
         print(f"  [{i+1}/{len(questions)}] {q['id']}: {status}")
         results.append(result)
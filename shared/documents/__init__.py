@@ -0,0 +1,13 @@
+"""Financial statement (tilinpäätös) document data shared by the document layer."""
+from .registry import DocumentBundle, DocumentIndexRegistry, ScopedCollection, discover_bundles, parse_scope
+from .table_store import TableStore, parse_numeric
+
+__all__ = [
+    "DocumentBundle",
+    "DocumentIndexRegistry",
+    "ScopedCollection",
+    "TableStore",
+    "discover_bundles",
+    "parse_numeric",
+    "parse_scope",
+]
@@ -0,0 +1,356 @@
+"""
+Registry of the per-city, per-year document indexes under docs_layer/data.
+
+Every ``docs_layer/data/<city>/<year>/`` bundle has its own document index
+(build_document_index.py): a Chroma collection in ``embeddings/`` and a
+dense snapshot of the same vectors, ``embeddings/dense_index.npz`` (a
+DenseLawIndex with the collection as its only block). The scripts used to
+open lapua/2023 at start-up. With hundreds of municipalities over several
+years neither opening every index up front nor keeping them all in memory
+works, so DocumentIndexRegistry:
+
+- discovers bundles from the directory layout without opening anything
+- opens an index on first use: the snapshot when there is one (its matrix
+  becomes resident), otherwise a Chroma PersistentClient
+- keeps open indexes in LRU order and closes the least recently used ones
+  when more than ``max_clients`` Chroma clients are open or the resident
+  snapshots exceed ``max_resident_bytes`` (counted by .npz size: vectors,
+  texts and metadata)
+- answers a query scoped to one or many (city, year) pairs bundle by
+  bundle and merges the per-bundle top-k, so a scope larger than the
+  budget still completes: each bundle is opened, queried and may be
+  evicted by the next one. Already open bundles are queried first.
+  A ``where`` metadata filter is passed to every bundle; snapshots and
+  Chroma clients apply it the same way.
+
+A snapshot larger than the whole budget is never loaded; that bundle is
+served from Chroma. Eviction only drops the registry's reference, so a
+query still running on an evicted index finishes normally.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+from ..retrieval.dense_index import DenseLawIndex
+from ..retrieval.embedding_cache import PROJECT_ROOT
+
+
+DOC_DATA_DIR = Path(os.environ.get("KUNTALAKI_DOC_DATA", PROJECT_ROOT / "docs_layer" / "data"))
+
+INDEX_DIR_NAME = "embeddings"
+SNAPSHOT_NAME = "dense_index.npz"
+SUMMARY_NAME = "index_summary.json"
+
+DEFAULT_MAX_CLIENTS = 8
+DEFAULT_MAX_RESIDENT_BYTES = 512 * 1024 * 1024
+
+BundleKey = tuple[str, int]
+
+# (city, year); None matches every city / year
+Scope = tuple[str | None, int | None]
+
+_CHROMA_FIELDS = ("documents", "metadatas", "distances", "embeddings")
+
+
+@dataclass(frozen=True)
+class DocumentBundle:
+    """One docs_layer/data/<city>/<year> directory."""
+
+    city: str
+    year: int
+    root: Path
+
+    @property
+    def key(self) -> BundleKey:
+        return (self.city, self.year)
+
+    @property
+    def index_dir(self) -> Path:
+        return self.root / INDEX_DIR_NAME
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.index_dir / SNAPSHOT_NAME
+
+    @property
+    def has_index(self) -> bool:
+        return self.snapshot_path.exists() or (self.index_dir / "chroma.sqlite3").exists()
+
+    def collection_name(self) -> str:
+        """Collection name from index_summary.json (default "<city>_<year>")."""
+        summary_path = self.index_dir / SUMMARY_NAME
+        if summary_path.exists():
+            with open(summary_path, "r", encoding="utf-8") as f:
+                name = json.load(f).get("collection_name")
+            if name:
+                return name
+        return f"{self.city}_{self.year}"
+
+    @classmethod
+    def from_index_dir(cls, index_dir: Path) -> "DocumentBundle":
+        """Bundle of an index directory given directly (.../<city>/<year>/embeddings)."""
+        root = Path(index_dir).parent
+        year = int(root.name) if root.name.isdigit() else 0
+        return cls(root.parent.name, year, root)
+
+
+def discover_bundles(data_dir: Path = DOC_DATA_DIR) -> list[DocumentBundle]:
+    """Every <city>/<year> directory under data_dir, sorted by (city, year)."""
+    bundles = []
+    if not data_dir.is_dir():
+        return bundles
+    for city_dir in sorted(p for p in data_dir.iterdir() if p.is_dir()):
+        for year_dir in sorted(p for p in city_dir.iterdir() if p.is_dir() and p.name.isdigit()):
+            bundles.append(DocumentBundle(city_dir.name, int(year_dir.name), year_dir))
+    return bundles
+
+
+def parse_scope(text: str) -> Scope:
+    """Parse "lapua:2023", "lapua", "lapua:*" or "*:2023" into a Scope."""
+    city, _, year = text.strip().partition(":")
+    return (
+        None if city in ("", "*") else city,
+        None if year in ("", "*") else int(year),
+    )
+
+
+def write_snapshot(collection: Any, path: Path) -> int:
+    """Export a Chroma collection to a dense snapshot; returns its vector count."""
+    index = DenseLawIndex.from_collections({collection.name: collection})
+    index.save(path)
+    return len(index)
+
+
+class _OpenIndex:
+    """An open bundle index: a resident snapshot or a Chroma client."""
+
+    def __init__(self, collection: Any, client: Any = None, nbytes: int = 0) -> None:
+        self.collection = collection
+        self.client = client
+        self.nbytes = nbytes
+
+
+class DocumentIndexRegistry:
+    """Lazily opened document indexes of many (city, year) bundles with LRU eviction."""
+
+    def __init__(
+        self,
+        bundles: Iterable[DocumentBundle],
+        max_clients: int = DEFAULT_MAX_CLIENTS,
+        max_resident_bytes: int = DEFAULT_MAX_RESIDENT_BYTES,
+        client_factory: Callable[[Path], Any] | None = None,
+    ) -> None:
+        """
+        Args:
+            bundles: Bundles to serve (those without an index are ignored)
+            max_clients: Open Chroma clients kept at most
+            max_resident_bytes: Total size of the resident snapshots kept at most
+            client_factory: index_dir -> Chroma client (default chromadb.PersistentClient)
+        """
+        if max_clients < 1:
+            raise ValueError("max_clients must be at least 1")
+        self.bundles: dict[BundleKey, DocumentBundle] = {
+            bundle.key: bundle for bundle in bundles if bundle.has_index
+        }
+        self.max_clients = max_clients
+        self.max_resident_bytes = max_resident_bytes
+        self._client_factory = client_factory
+        self._open: OrderedDict[BundleKey, _OpenIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.opens = 0
+        self.evictions = 0
+
+    @classmethod
+    def discover(cls, data_dir: Path = DOC_DATA_DIR, **kwargs: Any) -> "DocumentIndexRegistry":
+        """Registry over every indexed bundle under data_dir."""
+        return cls(discover_bundles(data_dir), **kwargs)
+
+    def keys(self) -> list[BundleKey]:
+        return sorted(self.bundles)
+
+    def resolve(self, scopes: Iterable[Scope] | None = None) -> list[BundleKey]:
+        """
+        Bundles matching any of the scopes, sorted (None: every bundle).
+
+        Raises:
+            KeyError: A scope matches no bundle
+        """
+        if scopes is None:
+            return self.keys()
+        matched: set[BundleKey] = set()
+        for city, year in scopes:
+            found = [
+                key for key in self.bundles
+                if (city is None or key[0] == city) and (year is None or key[1] == year)
+            ]
+            if not found:
+                raise KeyError(f"No document index for {city or '*'}:{year or '*'}")
+            matched.update(found)
+        return sorted(matched)
+
+    # --- Opening and eviction ---------------------------------------------
+
+    def get(self, city: str, year: int) -> Any:
+        """The collection of one bundle, opening it on first use."""
+        key = (city, year)
+        if key not in self.bundles:
+            raise KeyError(f"No document index for {city}:{year}")
+        with self._lock:
+            entry = self._open.get(key)
+            if entry is not None:
+                self._open.move_to_end(key)
+                self.hits += 1
+                return entry.collection
+        # Open outside the lock; loading a snapshot or a client can take a while
+        entry = self._load(self.bundles[key])
+        with self._lock:
+            existing = self._open.get(key)
+            if existing is not None:
+                self._open.move_to_end(key)
+                return existing.collection
+            self._open[key] = entry
+            self.opens += 1
+            self._evict(keep=key)
+        return entry.collection
+
+    def _load(self, bundle: DocumentBundle) -> _OpenIndex:
+        path = bundle.snapshot_path
+        if path.exists():
+            # The uncompressed .npz holds the vectors, texts and metadata that become resident
+            nbytes = path.stat().st_size
+            if nbytes <= self.max_resident_bytes:
+                index = DenseLawIndex.load(path)
+                return _OpenIndex(index.collection(index.laws[0]), nbytes=nbytes)
+        client = self._make_client(bundle.index_dir)
+        return _OpenIndex(client.get_collection(bundle.collection_name()), client=client)
+
+    def _make_client(self, index_dir: Path) -> Any:
+        if self._client_factory is not None:
+            return self._client_factory(index_dir)
+        import chromadb
+
+        return chromadb.PersistentClient(path=str(index_dir))
+
+    def _evict(self, keep: BundleKey) -> None:
+        """Drop least recently used indexes until both caps hold (never keep itself)."""
+        for key in list(self._open):
+            if key == keep:
+                continue
+            if self.open_clients <= self.max_clients and self.resident_bytes <= self.max_resident_bytes:
+                break
+            entry = self._open[key]
+            over_clients = entry.client is not None and self.open_clients > self.max_clients
+            over_bytes = entry.nbytes > 0 and self.resident_bytes > self.max_resident_bytes
+            if over_clients or over_bytes:
+                del self._open[key]
+                self.evictions += 1
+
+    def close(self) -> None:
+        """Drop every open index."""
+        with self._lock:
+            self._open.clear()
+
+    @property
+    def open_clients(self) -> int:
+        return sum(1 for entry in self._open.values() if entry.client is not None)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._open.values())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "bundles": len(self.bundles),
+                "open": [f"{city}:{year}" for city, year in self._open],
+                "open_clients": self.open_clients,
+                "resident_bytes": self.resident_bytes,
+                "hits": self.hits,
+                "opens": self.opens,
+                "evictions": self.evictions,
+            }
+
+    # --- Queries ----------------------------------------------------------
+
+    def collection(self, scopes: Iterable[Scope] | None = None) -> "ScopedCollection":
+        """chromadb.Collection-like view over the bundles of scopes (None: all)."""
+        return ScopedCollection(self, self.resolve(scopes))
+
+    def query(
+        self,
+        keys: list[BundleKey],
+        query_embeddings: np.ndarray | list,
+        n_results: int = 10,
+        where: dict[str, Any] | None = None,
+        include: Iterable[str] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        """
+        Top n_results over the bundles keys, in chromadb.Collection.query shape.
+
+        Each bundle returns its own top n_results; the merged rows are
+        ordered by distance, ties by bundle order in keys, then by rank.
+        """
+        include = list(include)
+        fields = ["distances"] + [f for f in include if f != "distances"]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+
+        with self._lock:
+            resident = set(self._open)
+        order = sorted(range(len(keys)), key=lambda i: keys[i] not in resident)
+        per_bundle: list[dict[str, Any] | None] = [None] * len(keys)
+        for i in order:
+            kwargs: dict[str, Any] = {"query_embeddings": queries.tolist(), "n_results": n_results, "include": fields}
+            if where:
+                kwargs["where"] = where
+            per_bundle[i] = self.get(*keys[i]).query(**kwargs)
+
+        merged: dict[str, Any] = {"ids": []}
+        for field in _CHROMA_FIELDS:
+            if field in include:
+                merged[field] = []
+        for row in range(len(queries)):
+            candidates = [
+                (distance, i, rank)
+                for i, result in enumerate(per_bundle)
+                for rank, distance in enumerate(result["distances"][row])
+            ]
+            candidates.sort()
+            top = candidates[:n_results]
+            merged["ids"].append([per_bundle[i]["ids"][row][rank] for _, i, rank in top])
+            for field in _CHROMA_FIELDS:
+                if field in include:
+                    merged[field].append([per_bundle[i][field][row][rank] for _, i, rank in top])
+        return merged
+
+
+class ScopedCollection:
+    """Read-only view of several bundles, duck-typing chromadb.Collection."""
+
+    def __init__(self, registry: DocumentIndexRegistry, keys: list[BundleKey]) -> None:
+        self.registry = registry
+        self.keys = keys
+        self.name = ",".join(f"{city}_{year}" for city, year in keys)
+
+    def count(self) -> int:
+        return sum(self.registry.get(*key).count() for key in self.keys)
+
+    def query(
+        self,
+        query_embeddings: np.ndarray | list,
+        n_results: int = 10,
+        where: dict[str, Any] | None = None,
+        include: Iterable[str] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        return self.registry.query(self.keys, query_embeddings, n_results, where, include)
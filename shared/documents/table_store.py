@@ -0,0 +1,377 @@
+"""
+Columnar store of the financial tables in parsed tilinpäätös documents.
+
+run_v11_finance_eval walked the nested pages / sections / subsections /
+tables JSON on every run, lowercased and substring-scanned every row for
+every query keyword, and parsed Finnish-formatted numbers ("-45 222 212")
+at query time. TableStore flattens the tables of any number of parsed
+documents once (``build_table_store.py``) into NumPy columns:
+
+- per table: ``table_city`` (code into ``cities``), ``table_year``,
+  ``table_page``, ``table_section``, ``table_title`` and ``table_indptr``
+  (table -> row range; rows of a table are contiguous)
+- per row: ``row_table``, ``row_idx``, ``row_name``, the raw cell texts
+  ``current_text`` / ``previous_text`` and their values ``current`` /
+  ``previous`` as float64 (NaN when the cell is not a number). The current
+  column is the statement year, the previous column the year before.
+
+Row names and table titles get an inverted token index (``\\w+`` tokens of
+the lowercased text, CSR postings). A query keyword matches a name when it
+is a substring of one of the name's tokens, the same rule as the
+``kw in name.lower()`` scan it replaces. Matching tokens are found by
+binary search in the sorted token suffixes, so a lookup costs the log of
+the vocabulary size plus the matching rows. Numeric filters are single
+vectorized comparisons over the value columns.
+
+The store is saved as one .npz file (no pickles).
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+
+STORE_FORMAT_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r"\b\w+\b")
+
+# Match weights of a keyword in a row name / table title (v11 search_tables)
+ROW_NAME_WEIGHT = 2
+TABLE_TITLE_WEIGHT = 1
+
+# Value columns: statement year (cells[1]) and the year before (cells[2])
+VALUE_COLUMNS = ("current", "previous")
+
+_TABLE_ARRAYS = ("table_indptr", "table_city", "table_year", "table_page", "table_section", "table_title")
+_ROW_ARRAYS = ("row_table", "row_idx", "row_name", "current", "previous", "current_text", "previous_text")
+_INDEX_ARRAYS = ("name_vocab", "name_indptr", "name_postings", "title_vocab", "title_indptr", "title_postings")
+
+
+def parse_numeric(value_str: str) -> float | None:
+    """Parse a Finnish-formatted number ("-45 222 212", "1,5"); None if it is not one."""
+    if not value_str:
+        return None
+    # Thousands separators may be (narrow) no-break spaces in PDF extracts
+    cleaned = re.sub(r"[ \u00a0\u202f]", "", value_str).replace(",", ".").replace("\u2212", "-")
+    if cleaned.startswith("-"):
+        sign = -1
+        cleaned = cleaned[1:]
+    else:
+        sign = 1
+    try:
+        return sign * float(cleaned)
+    except ValueError:
+        return None
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens (the keyword rule of the v11 table search)."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def iter_document_tables(doc_data: dict) -> Iterable[tuple[int, str, dict]]:
+    """(page_num, section title, table) for section and subsection tables, in document order."""
+    for page in doc_data.get("pages", []):
+        page_num = page.get("page_num", 0)
+        for section in page.get("sections", []):
+            for table in section.get("tables", []):
+                yield page_num, section.get("title", ""), table
+            for sub in section.get("subsections", []):
+                for table in sub.get("tables", []):
+                    yield page_num, sub.get("title", ""), table
+
+
+def _postings(texts: Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sorted vocabulary and CSR postings (ascending ids) of the tokens of texts."""
+    by_token: dict[str, list[int]] = {}
+    for i, text in enumerate(texts):
+        for token in dict.fromkeys(tokenize(text)):
+            by_token.setdefault(token, []).append(i)
+    vocab = sorted(by_token)
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum([len(by_token[t]) for t in vocab], out=indptr[1:])
+    postings = np.array([i for t in vocab for i in by_token[t]], dtype=np.int32)
+    return np.array(vocab, dtype=str), indptr, postings
+
+
+class _TokenIndex:
+    """Inverted index of one text column with substring lookup of keywords."""
+
+    def __init__(self, vocab: np.ndarray, indptr: np.ndarray, postings: np.ndarray) -> None:
+        self.vocab = vocab.tolist()
+        self.indptr = indptr
+        self.postings = postings
+        self._suffixes: list[str] | None = None
+        self._suffix_token: list[int] = []
+
+    def _build_suffixes(self) -> None:
+        pairs = sorted((token[i:], t) for t, token in enumerate(self.vocab) for i in range(len(token)))
+        self._suffixes = [suffix for suffix, _ in pairs]
+        self._suffix_token = [t for _, t in pairs]
+
+    def lookup(self, keyword: str) -> np.ndarray:
+        """Ids whose text has a token containing keyword, ascending."""
+        if self._suffixes is None:
+            self._build_suffixes()
+        # Suffixes starting with keyword form one sorted run
+        lo = bisect.bisect_left(self._suffixes, keyword)
+        hi = bisect.bisect_left(self._suffixes, keyword + "\U0010ffff", lo)
+        tokens = set(self._suffix_token[lo:hi])
+        if not tokens:
+            return np.empty(0, dtype=np.int32)
+        if len(tokens) == 1:
+            (t,) = tokens
+            return self.postings[self.indptr[t]:self.indptr[t + 1]]
+        return np.unique(np.concatenate([self.postings[self.indptr[t]:self.indptr[t + 1]] for t in tokens]))
+
+
+class TableStore:
+    """Flattened table rows of parsed financial statements as NumPy columns."""
+
+    def __init__(self, cities: Sequence[str], sources: dict[str, dict[str, int]] | None = None,
+                 **arrays: np.ndarray) -> None:
+        """
+        Args:
+            cities: City names (table_city codes index this list)
+            sources: Fingerprint (size, mtime_ns) of each parsed JSON file
+            arrays: The table, row and index columns (see module docstring)
+        """
+        missing = [name for name in _TABLE_ARRAYS + _ROW_ARRAYS + _INDEX_ARRAYS if name not in arrays]
+        if missing:
+            raise ValueError(f"Missing table store arrays: {', '.join(missing)}")
+        self.cities: list[str] = list(cities)
+        self.sources: dict[str, dict[str, int]] = dict(sources or {})
+        for name in _TABLE_ARRAYS + _ROW_ARRAYS:
+            setattr(self, name, arrays[name])
+
+        # Row-level city and year for vectorized filters
+        counts = np.diff(self.table_indptr)
+        self.row_city: np.ndarray = np.repeat(self.table_city, counts)
+        self.row_year: np.ndarray = np.repeat(self.table_year, counts)
+        self._arrays = arrays
+        self._names = _TokenIndex(arrays["name_vocab"], arrays["name_indptr"], arrays["name_postings"])
+        self._titles = _TokenIndex(arrays["title_vocab"], arrays["title_indptr"], arrays["title_postings"])
+
+    def __len__(self) -> int:
+        return len(self.row_table)
+
+    @property
+    def n_tables(self) -> int:
+        return len(self.table_title)
+
+    # --- Construction -----------------------------------------------------
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict], sources: dict[str, dict[str, int]] | None = None) -> "TableStore":
+        """
+        Flatten the tables of parsed documents (dicts with city, year, pages).
+
+        Rows with fewer than two cells (headers, empty lines) are skipped,
+        as are tables left without rows.
+        """
+        cities: dict[str, int] = {}
+        tables: dict[str, list[Any]] = {name: [] for name in _TABLE_ARRAYS[1:]}
+        rows: dict[str, list[Any]] = {name: [] for name in _ROW_ARRAYS}
+        indptr = [0]
+        for doc in documents:
+            city = cities.setdefault(doc.get("city", ""), len(cities))
+            for page_num, section_title, table in iter_document_tables(doc):
+                start = len(rows["row_table"])
+                for row_idx, row in enumerate(table.get("rows", [])):
+                    cells = row.get("cells", [])
+                    if len(cells) < 2:
+                        continue
+                    current_text = cells[1]
+                    previous_text = cells[2] if len(cells) > 2 else ""
+                    rows["row_table"].append(len(indptr) - 1)
+                    rows["row_idx"].append(row_idx)
+                    rows["row_name"].append(cells[0])
+                    rows["current_text"].append(current_text)
+                    rows["previous_text"].append(previous_text)
+                    for name, text in (("current", current_text), ("previous", previous_text)):
+                        value = parse_numeric(text)
+                        rows[name].append(np.nan if value is None else value)
+                if len(rows["row_table"]) == start:
+                    continue
+                indptr.append(len(rows["row_table"]))
+                tables["table_city"].append(city)
+                tables["table_year"].append(int(doc.get("year", 0)))
+                tables["table_page"].append(page_num)
+                tables["table_section"].append(section_title)
+                tables["table_title"].append(table.get("title", ""))
+
+        arrays: dict[str, np.ndarray] = {
+            "table_indptr": np.array(indptr, dtype=np.int64),
+            "table_city": np.array(tables["table_city"], dtype=np.int32),
+            "table_year": np.array(tables["table_year"], dtype=np.int32),
+            "table_page": np.array(tables["table_page"], dtype=np.int32),
+            "table_section": np.array(tables["table_section"], dtype=str),
+            "table_title": np.array(tables["table_title"], dtype=str),
+            "row_table": np.array(rows["row_table"], dtype=np.int32),
+            "row_idx": np.array(rows["row_idx"], dtype=np.int32),
+            "row_name": np.array(rows["row_name"], dtype=str),
+            "current": np.array(rows["current"], dtype=np.float64),
+            "previous": np.array(rows["previous"], dtype=np.float64),
+            "current_text": np.array(rows["current_text"], dtype=str),
+            "previous_text": np.array(rows["previous_text"], dtype=str),
+        }
+        for prefix, texts in (("name", rows["row_name"]), ("title", tables["table_title"])):
+            vocab, index_indptr, postings = _postings(texts)
+            arrays[f"{prefix}_vocab"] = vocab
+            arrays[f"{prefix}_indptr"] = index_indptr
+            arrays[f"{prefix}_postings"] = postings
+        return cls(list(cities), sources, **arrays)
+
+    @classmethod
+    def from_parsed_files(cls, paths: Iterable[Path]) -> "TableStore":
+        """Flatten parsed tilinpäätös JSON files, recording their fingerprints."""
+        documents = []
+        sources = {}
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                documents.append(json.load(f))
+            sources[str(Path(path).resolve())] = source_fingerprint(path)
+        return cls.from_documents(documents, sources)
+
+    def save(self, path: str | Path) -> None:
+        """Write the store to a single .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            version=np.array(STORE_FORMAT_VERSION),
+            cities=np.array(self.cities, dtype=str),
+            sources=np.array(json.dumps(self.sources, ensure_ascii=False)),
+            **{name: self._arrays[name] for name in _TABLE_ARRAYS + _ROW_ARRAYS + _INDEX_ARRAYS},
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "TableStore":
+        """Read a store written by save()."""
+        with np.load(Path(path), allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != STORE_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported table store version {version} (expected {STORE_FORMAT_VERSION})"
+                )
+            return cls(
+                data["cities"].tolist(),
+                json.loads(str(data["sources"])),
+                **{name: data[name] for name in _TABLE_ARRAYS + _ROW_ARRAYS + _INDEX_ARRAYS},
+            )
+
+    def covers(self, paths: Iterable[Path]) -> bool:
+        """True when the store was built from all of these files and none has changed since."""
+        return all(
+            self.sources.get(str(Path(path).resolve())) == source_fingerprint(path) for path in paths
+        )
+
+    # --- Queries ----------------------------------------------------------
+
+    def scope(self, city: str | None = None, year: int | None = None) -> np.ndarray:
+        """Boolean row mask of one city and/or year (all rows when both are None)."""
+        mask = np.ones(len(self), dtype=bool)
+        if city is not None:
+            code = self.cities.index(city) if city in self.cities else -1
+            mask &= self.row_city == code
+        if year is not None:
+            mask &= self.row_year == year
+        return mask
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        city: str | None = None,
+        year: int | None = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Keyword search over row names and table titles.
+
+        Each query keyword adds ROW_NAME_WEIGHT when it occurs in the row
+        name and TABLE_TITLE_WEIGHT when it occurs in the table title.
+
+        Returns:
+            Up to limit (row, score) pairs, best first, ties in row order
+        """
+        in_scope = self.scope(city, year) if city is not None or year is not None else None
+        rows: list[np.ndarray] = []
+        weights: list[np.ndarray] = []
+        for keyword in tokenize(query):
+            named = self._names.lookup(keyword)
+            tables = self._titles.lookup(keyword)
+            # Row ranges of the matching tables, concatenated
+            starts = self.table_indptr[tables]
+            lengths = self.table_indptr[tables + 1] - starts
+            titled = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+            for found, weight in ((named, ROW_NAME_WEIGHT), (titled, TABLE_TITLE_WEIGHT)):
+                if in_scope is not None:
+                    found = found[in_scope[found]]
+                rows.append(found)
+                weights.append(np.full(len(found), weight))
+        if not rows:
+            return []
+
+        matched, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights), minlength=len(matched)).astype(np.int64)
+        order = np.lexsort((matched, -scores))[:limit]
+        return list(zip(matched[order].tolist(), scores[order].tolist()))
+
+    def where(
+        self,
+        column: str = "current",
+        low: float | None = None,
+        high: float | None = None,
+        rows: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Rows whose value in column lies in [low, high] (NaN never matches).
+
+        Args:
+            column: "current" or "previous"
+            low, high: Inclusive bounds (None: unbounded)
+            rows: Boolean mask or row ids to restrict to (e.g. scope())
+        """
+        if column not in VALUE_COLUMNS:
+            raise ValueError(f"Unknown value column {column!r} (expected one of {VALUE_COLUMNS})")
+        values = getattr(self, column)
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        if rows is not None:
+            restrict = np.zeros(len(self), dtype=bool)
+            restrict[rows] = True
+            mask &= restrict
+        return np.flatnonzero(mask)
+
+    def record(self, row: int) -> dict[str, Any]:
+        """One row with its table metadata as a dict."""
+        table = int(self.row_table[row])
+        current, previous = (float(getattr(self, name)[row]) for name in VALUE_COLUMNS)
+        return {
+            "city": self.cities[int(self.table_city[table])],
+            "year": int(self.table_year[table]),
+            "page": int(self.table_page[table]),
+            "section": str(self.table_section[table]),
+            "table_title": str(self.table_title[table]),
+            "row_name": str(self.row_name[row]),
+            "row_idx": int(self.row_idx[row]),
+            "current_text": str(self.current_text[row]),
+            "previous_text": str(self.previous_text[row]),
+            "current": None if np.isnan(current) else current,
+            "previous": None if np.isnan(previous) else previous,
+        }
+
+
+def source_fingerprint(path: Path) -> dict[str, int]:
+    """Size and mtime of a parsed JSON file a store was built from."""
+    stat = Path(path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
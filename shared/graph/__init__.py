@@ -0,0 +1,18 @@
+"""Structural legal graph storage and traversal."""
+from .csr import CsrAdjacency, CsrGraph
+from .khop import KHopCache
+from .pagerank import TransitionMatrix, global_pagerank
+from .similarity import SimilarityTable
+from .snapshot import load_graph, load_snapshot, write_snapshot
+
+__all__ = [
+    "CsrAdjacency",
+    "CsrGraph",
+    "KHopCache",
+    "SimilarityTable",
+    "TransitionMatrix",
+    "global_pagerank",
+    "load_graph",
+    "load_snapshot",
+    "write_snapshot",
+]
@@ -0,0 +1,367 @@
+"""
+Compact CSR representation of the structural legal graph.
+
+GraphContextBuilder used to hold the graph as dicts of edge dicts, find
+section siblings by scanning every node and run its BFS on a list with
+``pop(0)``. CsrGraph interns every id to an int (graph nodes first, in
+nodes.jsonl order, then edge endpoints that are not nodes: section ids,
+``external:`` targets, wildcards) and stores adjacency as NumPy arrays:
+
+- ``forward[edge_type]`` / ``reverse[edge_type]``: CSR (indptr, neighbour,
+  edge id) per edge type
+- ``expand``: outgoing non-hierarchical edges of all types in edges.jsonl
+  order, which is the order the expansion BFS follows them
+- ``section_indptr`` / ``section_members``: precomputed section -> moment
+  index, so siblings are a slice instead of an O(N) scan
+- ``vertex_kind``: what each vertex is (graph node, law root, external
+  target, definition placeholder, other endpoint), classified once from
+  its id so callers branch on a code instead of id prefixes
+
+``bfs`` is the v8.1 expansion BFS over ints with a deque; it returns the
+same neighbours, edges, hops and paths in the same order as the dict
+implementation it replaces. ``neighbors`` answers from the materialized
+k-hop lists (shared.graph.khop) when the graph has them, and ``similar_to``
+from the precomputed SIMILAR_TO neighbours (shared.graph.similarity).
+``pagerank`` holds the global PageRank prior (shared.graph.pagerank) of a
+graph loaded from a snapshot.
+
+Node and edge columns only need indexing, so a snapshot can back them with
+memory-mapped arrays and lazily decoded strings.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .khop import KHopCache
+    from .similarity import SimilarityTable
+
+
+EDGE_TYPES = ("HAS_SECTION", "HAS_MOMENT", "REFERS_TO", "EXCEPTS", "DEFINES")
+HIERARCHY_EDGE_TYPES = frozenset({"HAS_SECTION", "HAS_MOMENT"})
+
+# Vertex kinds in CsrGraph.vertex_kind
+VERTEX_NODE = 0  # node in nodes.jsonl
+VERTEX_LAW = 1  # law: root of a law
+VERTEX_EXTERNAL = 2  # external: law outside the graph
+VERTEX_DEFINITION = 3  # definition: placeholder
+VERTEX_OTHER = 4  # section ids and other endpoints that are not nodes
+VERTEX_PREFIXES = (("law:", VERTEX_LAW), ("external:", VERTEX_EXTERNAL), ("definition:", VERTEX_DEFINITION))
+
+# (vertex, edge id, hop distance, path of vertices from the start node)
+Neighbor = tuple[int, int, int, tuple[int, ...]]
+
+
+@dataclass(frozen=True)
+class CsrAdjacency:
+    """Row v holds neighbours[indptr[v]:indptr[v + 1]] and the ids of the edges leading there."""
+    indptr: np.ndarray
+    neighbours: np.ndarray
+    edge_ids: np.ndarray
+
+    @classmethod
+    def build(cls, n_vertices: int, rows: np.ndarray, cols: np.ndarray, edge_ids: np.ndarray) -> "CsrAdjacency":
+        # Stable sort keeps edges.jsonl order within each row
+        order = np.argsort(rows, kind="stable")
+        counts = np.bincount(rows, minlength=n_vertices)
+        indptr = np.zeros(n_vertices + 1, dtype=np.int32)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(
+            indptr=indptr,
+            neighbours=cols[order].astype(np.int32),
+            edge_ids=edge_ids[order].astype(np.int32),
+        )
+
+    def row(self, vertex: int) -> tuple[list[int], list[int]]:
+        lo, hi = self.indptr[vertex], self.indptr[vertex + 1]
+        return self.neighbours[lo:hi].tolist(), self.edge_ids[lo:hi].tolist()
+
+
+def classify_vertices(ids: Sequence[str], n_nodes: int) -> np.ndarray:
+    """Vertex kind (VERTEX_*) of every vertex; the first n_nodes are graph nodes."""
+    kinds = np.full(len(ids), VERTEX_OTHER, dtype=np.uint8)
+    kinds[:n_nodes] = VERTEX_NODE
+    for v in range(n_nodes, len(ids)):
+        for prefix, kind in VERTEX_PREFIXES:
+            if ids[v].startswith(prefix):
+                kinds[v] = kind
+                break
+    return kinds
+
+
+class CsrGraph:
+    """Integer-indexed structural legal graph."""
+
+    def __init__(self, nodes: list[dict[str, Any]], edges: list[dict[str, Any]]) -> None:
+        self.n_nodes = len(nodes)
+        self.ids: list[str] = [node["node_id"] for node in nodes]
+        self.index: dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        # Node attributes as columns; law keys and titles are shared strings
+        self.node_type: list[str] = [node.get("node_type", "") for node in nodes]
+        self.law_key: list[str] = [node.get("law_key", "") for node in nodes]
+        self.section_num: list[int | None] = [node.get("section_num") for node in nodes]
+        self.moment: list[int | str | None] = [node.get("moment") for node in nodes]
+        self.section_title: list[str] = [node.get("section_title", "") for node in nodes]
+        self.text: list[str] = [node.get("text", "") for node in nodes]
+
+        self.edge_types: list[str] = list(EDGE_TYPES)
+        type_codes = {edge_type: code for code, edge_type in enumerate(self.edge_types)}
+        n_edges = len(edges)
+        self.edge_src = np.empty(n_edges, dtype=np.int32)
+        self.edge_dst = np.empty(n_edges, dtype=np.int32)
+        self.edge_type = np.empty(n_edges, dtype=np.uint8)
+        self.edge_context: list[str] = []
+        for e, edge in enumerate(edges):
+            self.edge_src[e] = self._intern(edge["source"])
+            self.edge_dst[e] = self._intern(edge["target"])
+            code = type_codes.get(edge["edge_type"])
+            if code is None:
+                code = type_codes[edge["edge_type"]] = len(self.edge_types)
+                self.edge_types.append(edge["edge_type"])
+            self.edge_type[e] = code
+            self.edge_context.append(edge.get("context", ""))
+
+        self._build_adjacency()
+        self._build_section_index()
+        self.vertex_kind = classify_vertices(self.ids, self.n_nodes)
+        self.khop: KHopCache | None = None
+        self.similar: SimilarityTable | None = None
+        self.pagerank: np.ndarray | None = None
+
+    @classmethod
+    def restore(cls, **state: Any) -> "CsrGraph":
+        """Rebuild from stored columns and arrays (see shared.graph.snapshot)."""
+        graph = cls.__new__(cls)
+        graph.__dict__.update(state)
+        return graph
+
+    @classmethod
+    def from_jsonl(cls, nodes_path: Path, edges_path: Path) -> "CsrGraph":
+        """Load graph/nodes.jsonl and graph/edges.jsonl."""
+        return cls(list(_read_jsonl(nodes_path)), list(_read_jsonl(edges_path)))
+
+    def _intern(self, vertex_id: str) -> int:
+        vertex = self.index.get(vertex_id)
+        if vertex is None:
+            vertex = self.index[vertex_id] = len(self.ids)
+            self.ids.append(vertex_id)
+        return vertex
+
+    def _build_adjacency(self) -> None:
+        n = self.n_vertices
+        edge_ids = np.arange(len(self.edge_src), dtype=np.int32)
+        self.forward: dict[str, CsrAdjacency] = {}
+        self.reverse: dict[str, CsrAdjacency] = {}
+        for code, edge_type in enumerate(self.edge_types):
+            mask = self.edge_type == code
+            src, dst, ids = self.edge_src[mask], self.edge_dst[mask], edge_ids[mask]
+            self.forward[edge_type] = CsrAdjacency.build(n, src, dst, ids)
+            self.reverse[edge_type] = CsrAdjacency.build(n, dst, src, ids)
+
+        hierarchy = [self.edge_types.index(t) for t in HIERARCHY_EDGE_TYPES]
+        mask = ~np.isin(self.edge_type, hierarchy)
+        self.expand = CsrAdjacency.build(n, self.edge_src[mask], self.edge_dst[mask], edge_ids[mask])
+
+    def _build_section_index(self) -> None:
+        groups: dict[tuple[str, int], list[int]] = {}
+        self.node_section = np.full(self.n_nodes, -1, dtype=np.int32)
+        for i in range(self.n_nodes):
+            if self.section_num[i] is None:
+                continue
+            members = groups.setdefault((self.law_key[i], self.section_num[i]), [])
+            members.append(i)
+
+        self.section_indptr = np.zeros(len(groups) + 1, dtype=np.int32)
+        self.section_members = np.empty(sum(len(m) for m in groups.values()), dtype=np.int32)
+        pos = 0
+        for group, members in enumerate(groups.values()):
+            self.section_members[pos:pos + len(members)] = members
+            self.node_section[members] = group
+            pos += len(members)
+            self.section_indptr[group + 1] = pos
+
+    @property
+    def n_vertices(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edge_src)
+
+    def is_node(self, vertex: int) -> bool:
+        return 0 <= vertex < self.n_nodes
+
+    def node(self, vertex: int) -> dict[str, Any]:
+        """Node record as it appears in nodes.jsonl."""
+        return {
+            "node_id": self.ids[vertex],
+            "node_type": self.node_type[vertex],
+            "law_key": self.law_key[vertex],
+            "section_num": self.section_num[vertex],
+            "moment": self.moment[vertex],
+            "section_title": self.section_title[vertex],
+            "text": self.text[vertex],
+        }
+
+    def node_view(self) -> "NodeView":
+        """Read-only node_id -> node record mapping."""
+        return NodeView(self)
+
+    def edge(self, edge_id: int) -> dict[str, Any]:
+        """Edge record as it appears in edges.jsonl."""
+        return {
+            "source": self.ids[self.edge_src[edge_id]],
+            "target": self.ids[self.edge_dst[edge_id]],
+            "edge_type": self.edge_types[self.edge_type[edge_id]],
+            "context": self.edge_context[edge_id],
+        }
+
+    def section_siblings(self, vertex: int) -> list[int]:
+        """Moment nodes with the same law_key and section_num, in node order."""
+        if not self.is_node(vertex):
+            return []
+        group = self.node_section[vertex]
+        if group < 0:
+            return []
+        return self.section_members[self.section_indptr[group]:self.section_indptr[group + 1]].tolist()
+
+    def neighbors(self, start: int, max_hops: int, use_cache: bool = True) -> list[Neighbor]:
+        """Expansion candidates of start: k-hop cache lookup when available, else bfs."""
+        khop = self.khop
+        if use_cache and khop is not None and khop.max_hops == max_hops and self.is_node(start):
+            return khop.lookup(start)
+        return self.bfs(start, max_hops)
+
+    def similar_to(self, start: int, min_score: float = -1.0) -> list[tuple[int, float]]:
+        """Semantic nearest neighbours (vertex, cosine) of node start; [] without a table."""
+        if self.similar is None or not self.is_node(start):
+            return []
+        return self.similar.lookup(start, min_score)
+
+    def bfs(self, start: int, max_hops: int) -> list[Neighbor]:
+        """
+        Expansion BFS from start and its section siblings.
+
+        Follows outgoing non-hierarchical edges and incoming EXCEPTS edges,
+        each vertex is reported once at its first (shortest) hop.
+        """
+        siblings = self.section_siblings(start) or [start]
+        visited = set(siblings)
+        neighbors: list[Neighbor] = []
+        queue: deque[tuple[int, int, tuple[int, ...]]] = deque(
+            (sibling, 0, (start,)) for sibling in siblings
+        )
+
+        while queue:
+            current, hop, path = queue.popleft()
+            if hop >= max_hops:
+                continue
+
+            for vertex, edge_id in self._expansion_row(current):
+                if vertex in visited:
+                    continue
+                visited.add(vertex)
+                new_path = path + (vertex,)
+                neighbors.append((vertex, edge_id, hop + 1, new_path))
+                queue.append((vertex, hop + 1, new_path))
+
+        return neighbors
+
+    def multi_source_bfs(self, starts: Sequence[int], max_hops: int) -> list[list[Neighbor]]:
+        """
+        Expansion BFS for several starts in one level-by-level pass.
+
+        Result i equals bfs(starts[i], max_hops). Starts with the same seed
+        set (moments of one section) share a single traversal, and each
+        vertex's adjacency row is read once per call.
+        """
+        groups: dict[tuple[int, ...], list[int]] = {}
+        for i, start in enumerate(starts):
+            seeds = tuple(self.section_siblings(start) or [start])
+            groups.setdefault(seeds, []).append(i)
+
+        visited = [set(seeds) for seeds in groups]
+        found: list[list[Neighbor]] = [[] for _ in groups]
+        # (group, vertex, path without the start vertex)
+        frontier = [(g, seed, ()) for g, seeds in enumerate(groups) for seed in seeds]
+        rows: dict[int, list[tuple[int, int]]] = {}
+
+        for hop in range(1, max_hops + 1):
+            next_frontier = []
+            for g, current, tail in frontier:
+                row = rows.get(current)
+                if row is None:
+                    row = rows[current] = self._expansion_row(current)
+                for vertex, edge_id in row:
+                    if vertex in visited[g]:
+                        continue
+                    visited[g].add(vertex)
+                    new_tail = tail + (vertex,)
+                    found[g].append((vertex, edge_id, hop, new_tail))
+                    next_frontier.append((g, vertex, new_tail))
+            frontier = next_frontier
+
+        results: list[list[Neighbor]] = [[] for _ in starts]
+        for g, members in enumerate(groups.values()):
+            for i in members:
+                start = starts[i]
+                results[i] = [(vertex, edge_id, hop, (start, *tail)) for vertex, edge_id, hop, tail in found[g]]
+        return results
+
+    def neighbors_multi(self, starts: Sequence[int], max_hops: int, use_cache: bool = True) -> list[list[Neighbor]]:
+        """neighbors() for several starts; cache misses share one multi_source_bfs."""
+        results: list[list[Neighbor] | None] = [None] * len(starts)
+        khop = self.khop
+        if use_cache and khop is not None and khop.max_hops == max_hops:
+            for i, start in enumerate(starts):
+                if self.is_node(start):
+                    results[i] = khop.lookup(start)
+        missing = [i for i, found in enumerate(results) if found is None]
+        if missing:
+            for i, found in zip(missing, self.multi_source_bfs([starts[i] for i in missing], max_hops)):
+                results[i] = found
+        return results  # type: ignore[return-value]
+
+    def _expansion_row(self, vertex: int) -> list[tuple[int, int]]:
+        """(neighbour, edge id) pairs the expansion follows from vertex, in BFS order."""
+        targets, edge_ids = self.expand.row(vertex)
+        excepts = self.reverse.get("EXCEPTS")
+        if excepts is not None:
+            sources, except_ids = excepts.row(vertex)
+            targets += sources
+            edge_ids += except_ids
+        return list(zip(targets, edge_ids))
+
+
+class NodeView(Mapping[str, dict[str, Any]]):
+    """Dict-like access to graph nodes; records are built on lookup."""
+
+    def __init__(self, graph: CsrGraph) -> None:
+        self.graph = graph
+
+    def __getitem__(self, node_id: str) -> dict[str, Any]:
+        vertex = self.graph.index.get(node_id)
+        if vertex is None or not self.graph.is_node(vertex):
+            raise KeyError(node_id)
+        return self.graph.node(vertex)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.graph.ids[:self.graph.n_nodes])
+
+    def __len__(self) -> int:
+        return self.graph.n_nodes
+
+
+def _read_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,92 @@
+"""
+Materialized k-hop expansion lists.
+
+The graph has about 2.6k moment nodes, but expand_context used to re-run
+the sibling-aware BFS for every hit of every query. KHopCache runs it once
+per node at snapshot build time and stores the ordered candidates (vertex,
+edge id, hop, path) as flat arrays:
+
+- ``indptr``: node -> candidate range
+- ``vertex`` / ``edge_id`` / ``hop``: one entry per candidate, in BFS order
+- ``path_indptr`` / ``path``: each candidate's path without the start node
+
+CsrGraph.neighbors answers from the cache when its max_hops matches, so
+query-time expansion is a slice plus the query-dependent scoring in
+GraphContextBuilder.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .csr import CsrGraph, Neighbor
+
+
+# Hop limit the snapshot is built for (GraphContextBuilder.MAX_HOPS)
+KHOP_MAX_HOPS = 2
+
+# Array fields, as stored in the snapshot under "khop.<name>"
+KHOP_ARRAYS = ("indptr", "vertex", "edge_id", "hop", "path_indptr", "path")
+
+
+@dataclass(frozen=True)
+class KHopCache:
+    """Precomputed expansion BFS results for every graph node."""
+    max_hops: int
+    indptr: np.ndarray
+    vertex: np.ndarray
+    edge_id: np.ndarray
+    hop: np.ndarray
+    path_indptr: np.ndarray
+    path: np.ndarray
+
+    @classmethod
+    def build(cls, graph: "CsrGraph", max_hops: int = KHOP_MAX_HOPS) -> "KHopCache":
+        vertices: list[int] = []
+        edge_ids: list[int] = []
+        hops: list[int] = []
+        path_lengths: list[int] = []
+        paths: list[int] = []
+        indptr = np.zeros(graph.n_nodes + 1, dtype=np.int32)
+
+        for start in range(graph.n_nodes):
+            for vertex, edge_id, hop, path in graph.bfs(start, max_hops):
+                vertices.append(vertex)
+                edge_ids.append(edge_id)
+                hops.append(hop)
+                path_lengths.append(len(path) - 1)
+                paths.extend(path[1:])
+            indptr[start + 1] = len(vertices)
+
+        path_indptr = np.zeros(len(vertices) + 1, dtype=np.int32)
+        np.cumsum(path_lengths, out=path_indptr[1:])
+        return cls(
+            max_hops=max_hops,
+            indptr=indptr,
+            vertex=np.array(vertices, dtype=np.int32),
+            edge_id=np.array(edge_ids, dtype=np.int32),
+            hop=np.array(hops, dtype=np.uint8),
+            path_indptr=path_indptr,
+            path=np.array(paths, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.vertex)
+
+    def lookup(self, start: int) -> list["Neighbor"]:
+        """Candidates of node start, as CsrGraph.bfs would return them."""
+        lo, hi = int(self.indptr[start]), int(self.indptr[start + 1])
+        vertices = self.vertex[lo:hi].tolist()
+        edge_ids = self.edge_id[lo:hi].tolist()
+        hops = self.hop[lo:hi].tolist()
+        bounds = self.path_indptr[lo:hi + 1].tolist()
+        base = bounds[0]
+        tails = self.path[base:bounds[-1]].tolist()
+        return [
+            (vertices[i], edge_ids[i], hops[i], (start, *tails[bounds[i] - base:bounds[i + 1] - base]))
+            for i in range(hi - lo)
+        ]
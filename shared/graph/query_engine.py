@@ -0,0 +1,304 @@
+"""
+Indexed lookups over the structural legal graph for debugging and services.
+
+graph_debug.py used to turn every edge into a dict, rebuild forward and
+reverse adjacency dicts on each invocation and scan all nodes to find a
+section. GraphQueryEngine answers the same questions from indexes over a
+CsrGraph (snapshot-backed or parsed from JSONL):
+
+- ``(law_key, chapter, section)`` -> moments, with the chapter and the
+  section label ("5", "5a") taken from the node id; CsrGraph's section
+  groups are keyed on ``(law_key, section_num)`` only and would merge
+  same-numbered sections of different chapters
+- edge type -> edge ids, and per-type counts (one ``np.bincount``)
+- ``external:`` target -> referring edges, through the reverse adjacency
+- all-type forward / reverse CSR adjacency for neighbourhood, path and
+  "who references X" queries
+
+Secondary indexes are built on first use, each in one pass over NumPy
+columns, so a CLI call only pays for the indexes it needs. The engine can
+wrap a graph that is already loaded (e.g. GraphContextBuilder.graph in the
+query service) instead of loading a second copy.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from .csr import VERTEX_EXTERNAL, CsrAdjacency, CsrGraph
+from .snapshot import load_graph
+
+
+# Edge types that count as references in referrers()
+REFERENCE_EDGE_TYPES = ("REFERS_TO", "EXCEPTS")
+
+# Chapter segment of a node id, e.g. "26l" in "624/2006:fin@20250561:26l:1:1"
+_CHAPTER_SEGMENT = re.compile(r"^(\d+[a-z]?)l$")
+
+# (law_key, chapter or None for laws without chapters, section label)
+SectionKey = tuple[str, Optional[str], str]
+
+# (vertex, edge id, hop distance, True when the edge was followed forwards)
+Reached = tuple[int, int, int, bool]
+
+
+def split_section_id(node_id: str, section_num: int) -> tuple[str | None, str]:
+    """
+    (chapter, section label) of a moment node id.
+
+    "1339/1997:fin@20151752:2l:5a:1" -> ("2", "5a") and
+    "410/2015:fin@20230780:1:1" -> (None, "1"). Ids without a section
+    segment fall back to str(section_num).
+    """
+    parts = node_id.split(":")
+    if len(parts) < 3:
+        return None, str(section_num)
+    match = _CHAPTER_SEGMENT.match(parts[-3])
+    return (match.group(1) if match else None), parts[-2]
+
+
+class GraphQueryEngine:
+    """Indexed read-only queries over a CsrGraph."""
+
+    def __init__(self, graph: CsrGraph) -> None:
+        self.graph = graph
+        self._sections: dict[SectionKey, list[int]] | None = None
+        self._edges_by_type: dict[str, np.ndarray] | None = None
+        self._external: list[int] | None = None
+        self._out: CsrAdjacency | None = None
+        self._in: CsrAdjacency | None = None
+
+    @classmethod
+    def load(cls, graph_dir: Path) -> "GraphQueryEngine":
+        """Engine over graph_dir (binary snapshot when current, else JSONL)."""
+        return cls(load_graph(graph_dir))
+
+    # Indexes
+
+    def _section_index(self) -> dict[SectionKey, list[int]]:
+        if self._sections is None:
+            graph = self.graph
+            sections: dict[SectionKey, list[int]] = {}
+            for v in graph.section_members.tolist():
+                chapter, label = split_section_id(graph.ids[v], graph.section_num[v])
+                sections.setdefault((graph.law_key[v], chapter, label), []).append(v)
+            self._sections = sections
+        return self._sections
+
+    def _edge_type_index(self) -> dict[str, np.ndarray]:
+        if self._edges_by_type is None:
+            graph = self.graph
+            order = np.argsort(graph.edge_type, kind="stable")
+            bounds = np.searchsorted(graph.edge_type[order], np.arange(len(graph.edge_types) + 1))
+            self._edges_by_type = {
+                edge_type: order[bounds[code]:bounds[code + 1]]
+                for code, edge_type in enumerate(graph.edge_types)
+            }
+        return self._edges_by_type
+
+    def _adjacency(self) -> tuple[CsrAdjacency, CsrAdjacency]:
+        if self._out is None or self._in is None:
+            graph = self.graph
+            edge_ids = np.arange(graph.n_edges, dtype=np.int32)
+            self._out = CsrAdjacency.build(graph.n_vertices, graph.edge_src, graph.edge_dst, edge_ids)
+            self._in = CsrAdjacency.build(graph.n_vertices, graph.edge_dst, graph.edge_src, edge_ids)
+        return self._out, self._in
+
+    # Lookups
+
+    def vertex(self, vertex_id: str) -> int | None:
+        return self.graph.index.get(vertex_id)
+
+    def laws(self) -> list[str]:
+        """law_key of every law with moments, sorted."""
+        return sorted({law_key for law_key, _, _ in self._section_index()})
+
+    def sections(
+        self,
+        section_num: int,
+        law: str | None = None,
+        chapter: str | None = None,
+    ) -> list[tuple[SectionKey, list[int]]]:
+        """
+        Sections numbered section_num and their moments in node order.
+
+        "5 §" and "5 a §" both have section_num 5 and are separate sections,
+        as are the 5 §s of different chapters.
+
+        Args:
+            section_num: Section number
+            law: Substring of the law_key (None: every law)
+            chapter: Chapter, e.g. "2" or "5a" (None: every chapter)
+        """
+        graph = self.graph
+        found = [
+            (key, members) for key, members in self._section_index().items()
+            if graph.section_num[members[0]] == section_num
+            and (law is None or law in key[0])
+            and (chapter is None or key[1] == chapter)
+        ]
+        return sorted(found, key=lambda item: (item[0][0], item[1][0]))
+
+    def section(self, section_num: int, law: str | None = None, chapter: str | None = None) -> list[int]:
+        """Moments of every section matched by sections(), in node order."""
+        return sorted(v for _, members in self.sections(section_num, law, chapter) for v in members)
+
+    def find(self, fragment: str, limit: int = 10) -> list[str]:
+        """Up to limit node ids containing fragment (for "did you mean")."""
+        graph = self.graph
+        return [node_id for node_id in graph.ids[:graph.n_nodes] if fragment in node_id][:limit]
+
+    def edges(self, edge_type: str) -> list[int]:
+        """Ids of edges of edge_type, in edges.jsonl order."""
+        found = self._edge_type_index().get(edge_type)
+        return [] if found is None else found.tolist()
+
+    def edge_type_counts(self) -> dict[str, int]:
+        counts = np.bincount(self.graph.edge_type, minlength=len(self.graph.edge_types))
+        return {edge_type: int(count) for edge_type, count in zip(self.graph.edge_types, counts)}
+
+    def external_targets(self) -> list[tuple[int, int]]:
+        """(vertex, referring edge count) of every external: target, most referenced first."""
+        if self._external is None:
+            self._external = np.flatnonzero(self.graph.vertex_kind == VERTEX_EXTERNAL).tolist()
+        _, incoming = self._adjacency()
+        counts = [(v, int(incoming.indptr[v + 1] - incoming.indptr[v])) for v in self._external]
+        return sorted(counts, key=lambda item: (-item[1], item[0]))
+
+    def referrers(
+        self,
+        targets: int | Iterable[int],
+        edge_types: Iterable[str] | None = REFERENCE_EDGE_TYPES,
+    ) -> list[int]:
+        """
+        Edges pointing at the target vertices ("who references X").
+
+        Args:
+            targets: A vertex, or several (e.g. the moments of a section)
+            edge_types: Edge types to report (None: all)
+
+        Returns:
+            Edge ids, per target in the given order, then in edges.jsonl order
+        """
+        _, incoming = self._adjacency()
+        vertices = [targets] if isinstance(targets, int) else list(targets)
+        allowed = None if edge_types is None else self._type_codes(edge_types)
+        found: list[int] = []
+        for vertex in vertices:
+            _, edge_ids = incoming.row(vertex)
+            if allowed is not None:
+                edge_ids = [e for e in edge_ids if self.graph.edge_type[e] in allowed]
+            found.extend(edge_ids)
+        return found
+
+    def neighborhood(
+        self,
+        start: int,
+        hops: int = 1,
+        edge_types: Iterable[str] | None = None,
+        incoming: bool = True,
+    ) -> list[Reached]:
+        """
+        Vertices within hops of start, following edges in both directions.
+
+        Each vertex is reported once, at its first hop, with the edge that
+        reached it. Within a hop, outgoing edges come before incoming ones.
+
+        Args:
+            start: Start vertex
+            hops: Hop limit
+            edge_types: Edge types to follow (None: all, hierarchy included)
+            incoming: Also follow edges backwards
+        """
+        out_adj, in_adj = self._adjacency()
+        allowed = None if edge_types is None else self._type_codes(edge_types)
+        visited = {start}
+        reached: list[Reached] = []
+        frontier = [start]
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for current in frontier:
+                steps = [(v, e, True) for v, e in zip(*out_adj.row(current))]
+                if incoming:
+                    steps += [(v, e, False) for v, e in zip(*in_adj.row(current))]
+                for vertex, edge_id, forward in steps:
+                    if vertex in visited or (allowed is not None and self.graph.edge_type[edge_id] not in allowed):
+                        continue
+                    visited.add(vertex)
+                    reached.append((vertex, edge_id, hop, forward))
+                    next_frontier.append(vertex)
+            frontier = next_frontier
+        return reached
+
+    def path(
+        self,
+        source: int,
+        target: int,
+        max_hops: int = 4,
+        edge_types: Iterable[str] | None = None,
+        directed: bool = True,
+    ) -> list[Reached] | None:
+        """
+        Shortest path from source to target as (vertex, edge id, hop, forward) steps.
+
+        Returns [] when source == target and None when target is not within
+        max_hops. With directed=False edges are also followed backwards.
+        """
+        if source == target:
+            return []
+        out_adj, in_adj = self._adjacency()
+        allowed = None if edge_types is None else self._type_codes(edge_types)
+        parent: dict[int, tuple[int, int, bool]] = {source: (-1, -1, True)}
+        queue: deque[tuple[int, int]] = deque([(source, 0)])
+        while queue:
+            current, hop = queue.popleft()
+            if hop >= max_hops:
+                continue
+            steps = [(v, e, True) for v, e in zip(*out_adj.row(current))]
+            if not directed:
+                steps += [(v, e, False) for v, e in zip(*in_adj.row(current))]
+            for vertex, edge_id, forward in steps:
+                if vertex in parent or (allowed is not None and self.graph.edge_type[edge_id] not in allowed):
+                    continue
+                parent[vertex] = (current, edge_id, forward)
+                if vertex == target:
+                    return self._unwind(parent, target)
+                queue.append((vertex, hop + 1))
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        """Node, vertex and edge counts, edges per type and moments per law."""
+        graph = self.graph
+        sections = self._section_index()
+        moments: dict[str, int] = {}
+        for (law_key, _, _), members in sections.items():
+            moments[law_key] = moments.get(law_key, 0) + len(members)
+        return {
+            "nodes": graph.n_nodes,
+            "vertices": graph.n_vertices,
+            "edges": graph.n_edges,
+            "edge_types": self.edge_type_counts(),
+            "sections": len(sections),
+            "external_targets": len(self.external_targets()),
+            "moments_per_law": dict(sorted(moments.items())),
+        }
+
+    def _type_codes(self, edge_types: Iterable[str]) -> set[int]:
+        codes = {edge_type: code for code, edge_type in enumerate(self.graph.edge_types)}
+        return {codes[t] for t in edge_types if t in codes}
+
+    @staticmethod
+    def _unwind(parent: dict[int, tuple[int, int, bool]], target: int) -> list[Reached]:
+        steps: list[tuple[int, int, bool]] = []
+        vertex = target
+        while parent[vertex][0] != -1:
+            previous, edge_id, forward = parent[vertex]
+            steps.append((vertex, edge_id, forward))
+            vertex = previous
+        steps.reverse()
+        return [(vertex, edge_id, hop, forward) for hop, (vertex, edge_id, forward) in enumerate(steps, 1)]
@@ -0,0 +1,127 @@
+"""
+Precomputed semantic nearest neighbours (SIMILAR_TO) between moments.
+
+Explicit references are the only edges of the structural graph, so
+"related provisions" used to need a fresh vector query per hit. The graph
+build computes the exact top-k cosine neighbours of every moment across all
+laws from the stored embeddings (DenseLawIndex), one row block at a time:
+each block is one matrix product against the whole corpus plus
+argpartition, so memory stays at block_size x N scores.
+
+SimilarityTable keeps the result as two flat (n_nodes * k) arrays in node
+order, padded with -1 / 0.0 for nodes without an embedding:
+
+- ``vertex``: neighbour vertex, best first
+- ``score``: its cosine similarity
+
+They are stored in the graph snapshot under "similar.<name>", so semantic
+neighbours are a slice at query time, with no embedding work.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .csr import CsrGraph
+
+
+# Neighbours stored per moment
+SIMILAR_K = 10
+
+# Rows per matrix product in exact_top_k
+SIMILAR_BLOCK_SIZE = 1024
+
+# Array fields, as stored in the snapshot under "similar.<name>"
+SIMILAR_ARRAYS = ("vertex", "score")
+
+# Padding for nodes without an embedding (or fewer than k other nodes)
+NO_NEIGHBOR = -1
+
+
+def exact_top_k(
+    embeddings: np.ndarray,
+    k: int,
+    block_size: int = SIMILAR_BLOCK_SIZE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k cosine neighbours of every row among the other rows.
+
+    Args:
+        embeddings: (N, D) L2-normalized rows
+        k: Neighbours per row (capped at N - 1)
+        block_size: Rows per matrix product
+
+    Returns:
+        (indices, scores), both (N, k): best first, ties by row index
+    """
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n = matrix.shape[0]
+    k = max(0, min(k, n - 1))
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+
+    for start in range(0, n, block_size):
+        block = matrix[start:start + block_size] @ matrix.T
+        rows = np.arange(block.shape[0])
+        block[rows, start + rows] = -np.inf  # not its own neighbour
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        for i, row in enumerate(candidates):
+            values = block[i, row]
+            top = row[np.lexsort((row, -values))]
+            indices[start + i] = top
+            scores[start + i] = block[i, top]
+    return indices, scores
+
+
+@dataclass(frozen=True)
+class SimilarityTable:
+    """Top-k semantic neighbours of every graph node."""
+    k: int
+    vertex: np.ndarray
+    score: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        graph: "CsrGraph",
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        k: int = SIMILAR_K,
+        block_size: int = SIMILAR_BLOCK_SIZE,
+    ) -> "SimilarityTable":
+        """
+        Neighbours among the graph nodes that have an embedding.
+
+        Args:
+            graph: Graph whose nodes get neighbours
+            ids: node_id of each embedding row (rows of other ids are ignored)
+            embeddings: (len(ids), D) L2-normalized rows
+        """
+        rows = [(row, graph.index[node_id]) for row, node_id in enumerate(ids)
+                if node_id in graph.index and graph.is_node(graph.index[node_id])]
+        row_vertices = np.array([v for _, v in rows], dtype=np.int32)
+        matrix = np.asarray(embeddings, dtype=np.float32)[[row for row, _ in rows]]
+
+        indices, scores = exact_top_k(matrix, k, block_size)
+        vertex = np.full((graph.n_nodes, k), NO_NEIGHBOR, dtype=np.int32)
+        score = np.zeros((graph.n_nodes, k), dtype=np.float32)
+        found = indices.shape[1]
+        vertex[row_vertices, :found] = row_vertices[indices]
+        score[row_vertices, :found] = scores
+        return cls(k=k, vertex=vertex.ravel(), score=score.ravel())
+
+    def __len__(self) -> int:
+        return len(self.vertex) // self.k if self.k else 0
+
+    def lookup(self, start: int, min_score: float = -1.0) -> list[tuple[int, float]]:
+        """(vertex, cosine) neighbours of node start, best first."""
+        lo = start * self.k
+        vertices = self.vertex[lo:lo + self.k].tolist()
+        scores = self.score[lo:lo + self.k].tolist()
+        return [(v, s) for v, s in zip(vertices, scores) if v != NO_NEIGHBOR and s >= min_score]
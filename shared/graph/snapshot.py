@@ -0,0 +1,319 @@
+"""
+Versioned binary snapshot of the structural legal graph.
+
+Parsing nodes.jsonl and edges.jsonl with json.loads at every process start
+and keeping every moment text in memory is most of the graph's start-up
+cost. ``write_snapshot`` stores a CsrGraph next to the JSONL files:
+
+    graph/snapshot/
+        manifest.json  format version, counts, array index, source fingerprint
+        arrays.bin     every NumPy array (CSR adjacency, edge and node columns,
+                       materialized k-hop expansion lists, global PageRank,
+                       SIMILAR_TO neighbours when the graph has them)
+        strings.bin    UTF-8 string table: vertex ids first (vertex i is
+                       string i), then node types, law keys, titles, moments
+                       and edge contexts, each stored once
+        texts.bin      moment texts; text_offsets in arrays.bin
+
+Moments are stored as strings, as in the law JSONL files.
+
+``load_snapshot`` memory-maps the three .bin files. Arrays are views into
+the mapping, and strings and texts are decoded only when accessed; only the
+vertex id table is decoded up front (it backs the id -> vertex dict).
+
+``load_graph`` prefers a snapshot whose source fingerprint (size and mtime
+of the JSONL files) matches and falls back to parsing the JSONL otherwise.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from .csr import CsrAdjacency, CsrGraph
+from .khop import KHOP_ARRAYS, KHOP_MAX_HOPS, KHopCache
+from .pagerank import global_pagerank
+from .similarity import SIMILAR_ARRAYS, SimilarityTable
+
+
+SNAPSHOT_FORMAT = "kuntalaki-graph-snapshot"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIRNAME = "snapshot"
+SOURCE_FILES = ("nodes.jsonl", "edges.jsonl")
+
+# Code for a missing string / section number in the coded columns
+NONE_CODE = -1
+ARRAY_ALIGN = 8
+
+
+class StringTable(Sequence[str]):
+    """Strings stored back to back in a UTF-8 blob, decoded on access."""
+
+    def __init__(self, blob: Any, offsets: np.ndarray) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:  # type: ignore[override]
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+
+class CodedColumn(Sequence[Any]):
+    """Per-node column of string-table codes (NONE_CODE for None)."""
+
+    def __init__(self, codes: np.ndarray, strings: StringTable) -> None:
+        self.codes = codes
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str | None:  # type: ignore[override]
+        code = int(self.codes[i])
+        return None if code == NONE_CODE else self.strings[code]
+
+
+class IntColumn(Sequence[Any]):
+    """Per-node int column (NONE_CODE for None)."""
+
+    def __init__(self, values: np.ndarray) -> None:
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> int | None:  # type: ignore[override]
+        value = int(self.values[i])
+        return None if value == NONE_CODE else value
+
+
+def snapshot_dir(graph_dir: Path) -> Path:
+    return graph_dir / SNAPSHOT_DIRNAME
+
+
+def source_fingerprint(graph_dir: Path) -> dict[str, dict[str, int]]:
+    """Size and mtime of the JSONL files a snapshot was built from."""
+    fingerprint = {}
+    for name in SOURCE_FILES:
+        stat = (graph_dir / name).stat()
+        fingerprint[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return fingerprint
+
+
+class _Interner:
+    def __init__(self, initial: Sequence[str]) -> None:
+        self.strings = list(initial)
+        self.codes = {s: i for i, s in enumerate(self.strings)}
+
+    def code(self, value: Any) -> int:
+        if value is None:
+            return NONE_CODE
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def column(self, values: Sequence[Any]) -> np.ndarray:
+        return np.array([self.code(v) for v in values], dtype=np.int32)
+
+
+def _pack_strings(strings: Sequence[str]) -> tuple[bytes, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def write_snapshot(graph: CsrGraph, graph_dir: Path, khop_max_hops: int | None = KHOP_MAX_HOPS) -> Path:
+    """
+    Write graph to graph_dir/snapshot; the JSONL files must already be written.
+
+    khop_max_hops: hop limit of the materialized expansion lists (None: none stored)
+    """
+    out_dir = snapshot_dir(graph_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Written again last: a snapshot without a manifest is never loaded
+    (out_dir / "manifest.json").unlink(missing_ok=True)
+    n = graph.n_nodes
+
+    interner = _Interner(graph.ids)
+    arrays: dict[str, np.ndarray] = {
+        "node_type": interner.column([graph.node_type[i] for i in range(n)]),
+        "law_key": interner.column([graph.law_key[i] for i in range(n)]),
+        "section_title": interner.column([graph.section_title[i] for i in range(n)]),
+        "moment": interner.column([graph.moment[i] for i in range(n)]),
+        "section_num": np.array(
+            [NONE_CODE if graph.section_num[i] is None else graph.section_num[i] for i in range(n)],
+            dtype=np.int32,
+        ),
+        "edge_src": graph.edge_src,
+        "edge_dst": graph.edge_dst,
+        "edge_type": graph.edge_type,
+        "edge_context": interner.column([graph.edge_context[e] for e in range(graph.n_edges)]),
+        "node_section": graph.node_section,
+        "section_indptr": graph.section_indptr,
+        "section_members": graph.section_members,
+        "vertex_kind": graph.vertex_kind,
+    }
+    adjacency = {"expand": graph.expand}
+    adjacency.update({f"forward.{t}": adj for t, adj in graph.forward.items()})
+    adjacency.update({f"reverse.{t}": adj for t, adj in graph.reverse.items()})
+    for name, adj in adjacency.items():
+        arrays[f"{name}.indptr"] = adj.indptr
+        arrays[f"{name}.neighbours"] = adj.neighbours
+        arrays[f"{name}.edge_ids"] = adj.edge_ids
+
+    khop = graph.khop
+    if khop_max_hops is not None and (khop is None or khop.max_hops != khop_max_hops):
+        khop = KHopCache.build(graph, khop_max_hops)
+    if khop_max_hops is not None:
+        for name in KHOP_ARRAYS:
+            arrays[f"khop.{name}"] = getattr(khop, name)
+    arrays["pagerank"] = graph.pagerank if graph.pagerank is not None else global_pagerank(graph)
+    if graph.similar is not None:
+        for name in SIMILAR_ARRAYS:
+            arrays[f"similar.{name}"] = getattr(graph.similar, name)
+
+    string_blob, arrays["string_offsets"] = _pack_strings(interner.strings)
+    text_blob, arrays["text_offsets"] = _pack_strings([graph.text[i] for i in range(n)])
+
+    index: dict[str, dict[str, Any]] = {}
+    with open(out_dir / "arrays.bin", "wb") as f:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            f.write(b"\0" * (-f.tell() % ARRAY_ALIGN))
+            index[name] = {"dtype": array.dtype.str, "offset": f.tell(), "length": len(array)}
+            f.write(array.tobytes())
+    (out_dir / "strings.bin").write_bytes(string_blob)
+    (out_dir / "texts.bin").write_bytes(text_blob)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "n_nodes": n,
+        "n_vertices": graph.n_vertices,
+        "n_edges": graph.n_edges,
+        "edge_types": graph.edge_types,
+        "khop_max_hops": khop_max_hops,
+        "similar_k": graph.similar.k if graph.similar is not None else None,
+        "sources": source_fingerprint(graph_dir),
+        "arrays": index,
+    }
+    with open(out_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return out_dir
+
+
+def read_manifest(graph_dir: Path) -> dict[str, Any] | None:
+    """Snapshot manifest, or None when there is no usable snapshot."""
+    path = snapshot_dir(graph_dir) / "manifest.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        return None
+    return manifest
+
+
+def _map_file(path: Path) -> Any:
+    if path.stat().st_size == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_snapshot(graph_dir: Path) -> CsrGraph:
+    """Memory-map graph_dir/snapshot into a CsrGraph."""
+    manifest = read_manifest(graph_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No graph snapshot (format v{SNAPSHOT_VERSION}) in {snapshot_dir(graph_dir)}")
+
+    out_dir = snapshot_dir(graph_dir)
+    buffers = {name: _map_file(out_dir / f"{name}.bin") for name in ("arrays", "strings", "texts")}
+    arrays = {
+        name: np.frombuffer(buffers["arrays"], dtype=np.dtype(spec["dtype"]), count=spec["length"], offset=spec["offset"])
+        for name, spec in manifest["arrays"].items()
+    }
+
+    strings = StringTable(buffers["strings"], arrays["string_offsets"])
+    n_vertices = manifest["n_vertices"]
+    ids = [strings[v] for v in range(n_vertices)]
+
+    def adjacency(name: str) -> CsrAdjacency:
+        return CsrAdjacency(
+            indptr=arrays[f"{name}.indptr"],
+            neighbours=arrays[f"{name}.neighbours"],
+            edge_ids=arrays[f"{name}.edge_ids"],
+        )
+
+    khop = None
+    if manifest.get("khop_max_hops") is not None:
+        khop = KHopCache(
+            max_hops=manifest["khop_max_hops"],
+            **{name: arrays[f"khop.{name}"] for name in KHOP_ARRAYS},
+        )
+
+    similar = None
+    if manifest.get("similar_k") is not None:
+        similar = SimilarityTable(
+            k=manifest["similar_k"],
+            **{name: arrays[f"similar.{name}"] for name in SIMILAR_ARRAYS},
+        )
+
+    edge_types = manifest["edge_types"]
+    return CsrGraph.restore(
+        n_nodes=manifest["n_nodes"],
+        ids=ids,
+        index={vertex_id: v for v, vertex_id in enumerate(ids)},
+        node_type=CodedColumn(arrays["node_type"], strings),
+        law_key=CodedColumn(arrays["law_key"], strings),
+        section_num=IntColumn(arrays["section_num"]),
+        moment=CodedColumn(arrays["moment"], strings),
+        section_title=CodedColumn(arrays["section_title"], strings),
+        text=StringTable(buffers["texts"], arrays["text_offsets"]),
+        edge_types=list(edge_types),
+        edge_src=arrays["edge_src"],
+        edge_dst=arrays["edge_dst"],
+        edge_type=arrays["edge_type"],
+        edge_context=CodedColumn(arrays["edge_context"], strings),
+        forward={t: adjacency(f"forward.{t}") for t in edge_types},
+        reverse={t: adjacency(f"reverse.{t}") for t in edge_types},
+        expand=adjacency("expand"),
+        node_section=arrays["node_section"],
+        section_indptr=arrays["section_indptr"],
+        section_members=arrays["section_members"],
+        vertex_kind=arrays["vertex_kind"],
+        khop=khop,
+        similar=similar,
+        pagerank=arrays.get("pagerank"),
+        _buffers=buffers,
+    )
+
+
+def load_graph(graph_dir: Path) -> CsrGraph:
+    """
+    Load the graph from its snapshot when it is current, else from JSONL.
+
+    Raises FileNotFoundError when the JSONL files are missing.
+    """
+    nodes_path, edges_path = (graph_dir / name for name in SOURCE_FILES)
+    if not nodes_path.exists() or not edges_path.exists():
+        raise FileNotFoundError(
+            "Graph files not found. Run build_structural_legal_graph.py first."
+        )
+
+    manifest = read_manifest(graph_dir)
+    if manifest is not None:
+        if manifest.get("sources") == source_fingerprint(graph_dir):
+            return load_snapshot(graph_dir)
+        print("Warning: graph snapshot is older than nodes.jsonl/edges.jsonl, loading JSONL")
+    return CsrGraph.from_jsonl(nodes_path, edges_path)
@@ -1,5 +1,14 @@
 """Query rules and routing for multi-law retrieval."""
-from .law_router import route_query, calculate_k_per_law
-
-__all__ = ["route_query", "calculate_k_per_law"]
+from .law_router import CompiledLawRouter, calculate_k_per_law, get_router, route_query
+from .query_context import QueryContext, register_signal_family
+from .term_automaton import TermAutomaton
 
+__all__ = [
+    "CompiledLawRouter",
+    "QueryContext",
+    "TermAutomaton",
+    "calculate_k_per_law",
+    "get_router",
+    "register_signal_family",
+    "route_query",
+]
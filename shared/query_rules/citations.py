@@ -0,0 +1,112 @@
+"""
+Explicit section citations in queries.
+
+Recognizes references such as "KPL 3:1", "410/2015 110 §",
+"kuntalaki 118 § 3 mom" and "OYL 13 luvun 2 § 1 momentti". The law comes
+from the router's explicit references (abbreviations, law names, Finlex
+ids); chapter, section and moment from the citation patterns below.
+
+Whatever is left after removing the law reference, the citation and filler
+words ("§", "mom", "luku", ...) is returned as free text. A citation with
+no free text can be looked up directly (see
+shared/retrieval/citation_index.py) instead of going through vector search.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    from .law_router import _EXPLICIT_LAW_TERMS, get_router
+    from .query_context import _CHAPTER_SECTION_RE, _SECTION_RE, QueryContext
+except ImportError:  # run as a script
+    from law_router import _EXPLICIT_LAW_TERMS, get_router
+    from query_context import _CHAPTER_SECTION_RE, _SECTION_RE, QueryContext
+
+
+# "3 luvun 1 §", "7 a luku 2 §"
+_CHAPTER_TEXT_RE = re.compile(r"\b(\d+)\s?([a-z])?\s+luvu?n?\s+(\d+)\s?([a-z])?\s*§")
+# "3 mom", "3. momentti", "2 momentin"
+_MOMENT_RE = re.compile(r"\b(\d+)\s*\.?\s*mom(?:entti|entin|entissa)?\b\.?")
+_FINLEX_ID_RE = re.compile(r"\b\d+/\d{4}\b")
+_WORD_RE = re.compile(r"[^\W_]+|§")
+
+_FILLER_WORDS = frozenset({
+    "§", "n", "mom", "momentti", "momentin", "momentissa",
+    "luku", "luvun", "pykälä", "pykälän", "laki", "lain",
+})
+_LAW_WORDS = tuple(term for terms, _ in _EXPLICIT_LAW_TERMS for term in terms if " " not in term)
+_LAW_PHRASES = tuple(term for terms, _ in _EXPLICIT_LAW_TERMS for term in terms if " " in term)
+
+
+@dataclass(frozen=True)
+class Citation:
+    """One explicit section reference parsed from a query."""
+    law_key: Optional[str]
+    chapter: Optional[str]  # "3", "7a"
+    section: str            # "1", "110a"
+    moment: Optional[str]
+    free_text: str = ""     # query words outside the citation
+
+    @property
+    def is_exact(self) -> bool:
+        """Law and section known and nothing else asked."""
+        return self.law_key is not None and not self.free_text
+
+
+def _mask(text: str, pattern: re.Pattern) -> tuple[str, list[re.Match]]:
+    """Blank out pattern matches so later patterns cannot re-match them."""
+    matches = list(pattern.finditer(text))
+    for m in matches:
+        text = text[:m.start()] + " " * (m.end() - m.start()) + text[m.end():]
+    return text, matches
+
+
+def _join(number: str, suffix: Optional[str]) -> str:
+    return number + (suffix or "")
+
+
+def parse_citation(query: str | QueryContext) -> Optional[Citation]:
+    """
+    Parse a single explicit section citation.
+
+    Returns None unless the query cites exactly one section (at most one
+    chapter and one moment). More than one referenced law leaves law_key
+    unset.
+    """
+    ctx = QueryContext.of(query)
+    if not ctx.section_citations and not ctx.chapter_citations:
+        return None
+
+    text, _ = _mask(ctx.normalized, _FINLEX_ID_RE)
+    text, chapter_text = _mask(text, _CHAPTER_TEXT_RE)
+    text, chapter_colon = _mask(text, _CHAPTER_SECTION_RE)
+    text, sections = _mask(text, _SECTION_RE)
+    text, moments = _mask(text, _MOMENT_RE)
+
+    refs = (
+        [(_join(m.group(1), m.group(2)), _join(m.group(3), m.group(4))) for m in chapter_text]
+        + [(m.group(1), m.group(2)) for m in chapter_colon]
+        + [(None, _join(m.group(1) or m.group(3), m.group(2) or m.group(4))) for m in sections]
+    )
+    if len(refs) != 1 or len(moments) > 1:
+        return None
+    chapter, section = refs[0]
+
+    for phrase in _LAW_PHRASES:
+        text = text.replace(phrase, " ")
+    free_words = [
+        w for w in _WORD_RE.findall(text)
+        if w not in _FILLER_WORDS and not any(term in w for term in _LAW_WORDS)
+    ]
+
+    explicit_laws = get_router().scan_context(ctx).explicit_laws
+    return Citation(
+        law_key=explicit_laws[0] if len(explicit_laws) == 1 else None,
+        chapter=chapter,
+        section=section,
+        moment=moments[0].group(1) if moments else None,
+        free_text=" ".join(free_words),
+    )
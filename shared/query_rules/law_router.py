@@ -3,21 +3,36 @@ Deterministic law router for multi-law retrieval.
 
 Routes queries to appropriate law indices based on keyword matching.
 No LLM dependency - pure rule-based routing.
+
+Keyword tables (defaults merged with cross_refs.json), explicit law
+references and municipal anchors are compiled once into a single
+TermAutomaton; one pass over the lowercased query yields per-law keyword
+counts, the explicit reference and the anchor flag. cross_refs.json is
+reloaded when its mtime changes.
 """
 import json
-import re
+import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
+try:
+    from .query_context import QueryContext
+    from .term_automaton import TermAutomaton
+except ImportError:  # run as a script
+    from query_context import QueryContext
+    from term_automaton import TermAutomaton
+
 
 # Load router keywords from cross_refs.json
 _CROSS_REFS_PATH = Path(__file__).parent.parent / "cross_refs.json"
 
 
-def _load_router_keywords() -> dict[str, list[str]]:
+def _load_router_keywords(path: Path = _CROSS_REFS_PATH) -> dict[str, list[str]]:
     """Load router keywords from cross_refs.json."""
-    if _CROSS_REFS_PATH.exists():
-        with open(_CROSS_REFS_PATH, encoding="utf-8") as f:
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
             data = json.load(f)
             return data.get("router_keywords", {})
     return {}
@@ -29,6 +44,26 @@ _MUNICIPAL_STRONG_ANCHORS = [
     "tarkastuslautakunta", "kunnanjohtaja", "kunnanvaltuusto", "kuntalain",
 ]
 
+# Explicit law references, in priority order (first match wins)
+_EXPLICIT_LAW_TERMS: list[tuple[tuple[str, ...], str]] = [
+    (("kpa", "kirjanpitoasetus"), "kirjanpitoasetus_1339_1997"),
+    (("kpl", "kirjanpitolaki"), "kirjanpitolaki_1336_1997"),
+    (("oyl", "osakeyhtiölaki"), "osakeyhtiolaki_624_2006"),
+    (("kuntalaki", "kuntl"), "kuntalaki_410_2015"),
+    (("tilintarkastuslaki", "ttl"), "tilintarkastuslaki_1141_2015"),
+    (("hankintalaki", "julkisista hankinnoista"), "hankintalaki_1397_2016"),
+]
+
+# Finlex IDs are checked after the abbreviations
+_FINLEX_IDS: dict[str, str] = {
+    "410/2015": "kuntalaki_410_2015",
+    "1336/1997": "kirjanpitolaki_1336_1997",
+    "1339/1997": "kirjanpitoasetus_1339_1997",
+    "1141/2015": "tilintarkastuslaki_1141_2015",
+    "1397/2016": "hankintalaki_1397_2016",
+    "624/2006": "osakeyhtiolaki_624_2006",
+}
+
 # Default keywords if cross_refs.json not available
 _DEFAULT_KEYWORDS: dict[str, list[str]] = {
     "kuntalaki_410_2015": [
@@ -61,18 +96,137 @@ _DEFAULT_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+@dataclass(frozen=True)
+class RouteScan:
+    """Everything route_query needs from the query text."""
+    law_hits: dict[str, int]  # law_key -> number of its keywords present
+    explicit_law: Optional[str]
+    has_municipal: bool
+    explicit_laws: tuple[str, ...] = ()  # every referenced law, priority order
+
+
+class CompiledLawRouter:
+    """
+    Keyword tables and reference patterns compiled into one automaton.
+
+    Call refresh() (get_router() does) to pick up edits to cross_refs.json;
+    it only re-reads the file when its mtime changed.
+    """
+
+    def __init__(self, cross_refs_path: Path = _CROSS_REFS_PATH) -> None:
+        self.cross_refs_path = Path(cross_refs_path)
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._compile()
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.cross_refs_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _compile(self) -> None:
+        mtime = self._stat_mtime()
+        loaded = _load_router_keywords(self.cross_refs_path)
+        if loaded:
+            # Merge with defaults, loaded takes precedence
+            keywords = _DEFAULT_KEYWORDS.copy()
+            keywords.update(loaded)
+        else:
+            keywords = _DEFAULT_KEYWORDS
+
+        # term -> labels; a term may serve several roles (e.g. "kuntalaki")
+        labels: dict[str, list[tuple[str, object]]] = {}
+        for law_key, kw_list in keywords.items():
+            for kw in kw_list:
+                labels.setdefault(kw, []).append(("law", law_key))
+        for priority, (terms, law_key) in enumerate(_EXPLICIT_LAW_TERMS):
+            for term in terms:
+                labels.setdefault(term, []).append(("explicit", (priority, law_key)))
+        for priority, (finlex_id, law_key) in enumerate(_FINLEX_IDS.items(), len(_EXPLICIT_LAW_TERMS)):
+            labels.setdefault(finlex_id, []).append(("explicit", (priority, law_key)))
+        for anchor in _MUNICIPAL_STRONG_ANCHORS:
+            labels.setdefault(anchor, []).append(("anchor", None))
+
+        # Swap in all compiled state at once so concurrent scans stay consistent
+        self._state = (keywords, TermAutomaton(labels), list(labels.values()))
+        self._mtime = mtime
+
+    def refresh(self) -> bool:
+        """Recompile if cross_refs.json changed on disk; return True if reloaded."""
+        if self._stat_mtime() == self._mtime:
+            return False
+        with self._lock:
+            if self._stat_mtime() == self._mtime:
+                return False
+            self._compile()
+            return True
+
+    @property
+    def keywords(self) -> dict[str, list[str]]:
+        """Merged router keywords (law_key -> keywords)."""
+        return self._state[0]
+
+    def scan(self, query: str) -> RouteScan:
+        """Match all keywords, explicit references and anchors in one pass."""
+        return self.scan_normalized(query.lower())
+
+    def scan_context(self, context: QueryContext) -> RouteScan:
+        """scan() computed once per QueryContext."""
+        state = self._state
+        return context.memo(("route_scan", id(state)), lambda: self._scan(state, context.normalized))
+
+    def scan_normalized(self, query_lower: str) -> RouteScan:
+        """scan() for already lowercased text."""
+        return self._scan(self._state, query_lower)
+
+    @staticmethod
+    def _scan(state: tuple, query_lower: str) -> RouteScan:
+        _, automaton, term_labels = state
+        law_hits: dict[str, int] = {}
+        explicit: set[tuple[int, str]] = set()
+        has_municipal = False
+
+        for term_id in automaton.find(query_lower):
+            for kind, value in term_labels[term_id]:
+                if kind == "law":
+                    law_hits[value] = law_hits.get(value, 0) + 1
+                elif kind == "explicit":
+                    explicit.add(value)
+                else:
+                    has_municipal = True
+
+        explicit_laws = tuple(dict.fromkeys(law_key for _, law_key in sorted(explicit)))
+        return RouteScan(
+            law_hits=law_hits,
+            explicit_law=explicit_laws[0] if explicit_laws else None,
+            has_municipal=has_municipal,
+            explicit_laws=explicit_laws,
+        )
+
+
+_ROUTER: Optional[CompiledLawRouter] = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_router() -> CompiledLawRouter:
+    """Process-wide compiled router, reloaded when cross_refs.json changes."""
+    global _ROUTER
+    if _ROUTER is None:
+        with _ROUTER_LOCK:
+            if _ROUTER is None:
+                _ROUTER = CompiledLawRouter()
+                return _ROUTER
+    _ROUTER.refresh()
+    return _ROUTER
+
+
 def _get_router_keywords() -> dict[str, list[str]]:
     """Get router keywords, preferring cross_refs.json."""
-    loaded = _load_router_keywords()
-    if loaded:
-        # Merge with defaults, loaded takes precedence
-        merged = _DEFAULT_KEYWORDS.copy()
-        merged.update(loaded)
-        return merged
-    return _DEFAULT_KEYWORDS
+    return get_router().keywords
 
 
-def _extract_explicit_law_reference(query: str) -> Optional[str]:
+def _extract_explicit_law_reference(query: str | QueryContext) -> Optional[str]:
     """
     Extract explicit law reference from query.
     
@@ -81,46 +235,16 @@ def _extract_explicit_law_reference(query: str) -> Optional[str]:
         "Kuntalaki 110 §" -> "kuntalaki_410_2015"
         "410/2015" -> "kuntalaki_410_2015"
     """
-    query_lower = query.lower()
-    
-    # Check for law abbreviations
-    if "kpa" in query_lower or "kirjanpitoasetus" in query_lower:
-        return "kirjanpitoasetus_1339_1997"
-    if "kpl" in query_lower or "kirjanpitolaki" in query_lower:
-        return "kirjanpitolaki_1336_1997"
-    if "oyl" in query_lower or "osakeyhtiölaki" in query_lower:
-        return "osakeyhtiolaki_624_2006"
-    if "kuntalaki" in query_lower or "kuntl" in query_lower:
-        return "kuntalaki_410_2015"
-    if "tilintarkastuslaki" in query_lower or "ttl" in query_lower:
-        return "tilintarkastuslaki_1141_2015"
-    if "hankintalaki" in query_lower or "julkisista hankinnoista" in query_lower:
-        return "hankintalaki_1397_2016"
-    
-    # Check for Finlex ID patterns
-    finlex_patterns = {
-        r"410/2015": "kuntalaki_410_2015",
-        r"1336/1997": "kirjanpitolaki_1336_1997",
-        r"1339/1997": "kirjanpitoasetus_1339_1997",
-        r"1141/2015": "tilintarkastuslaki_1141_2015",
-        r"1397/2016": "hankintalaki_1397_2016",
-        r"624/2006": "osakeyhtiolaki_624_2006",
-    }
-    for pattern, law_key in finlex_patterns.items():
-        if re.search(pattern, query):
-            return law_key
-    
-    return None
+    return get_router().scan_context(QueryContext.of(query)).explicit_law
 
 
-def _has_municipal_anchor(query: str) -> bool:
+def _has_municipal_anchor(query: str | QueryContext) -> bool:
     """Check if query contains strong municipal anchors."""
-    query_lower = query.lower()
-    return any(anchor in query_lower for anchor in _MUNICIPAL_STRONG_ANCHORS)
+    return get_router().scan_context(QueryContext.of(query)).has_municipal
 
 
 def route_query(
-    query: str,
+    query: str | QueryContext,
     available_laws: Optional[list[str]] = None,
     default_law: str = "kuntalaki_410_2015",
     min_laws: int = 2,
@@ -129,7 +253,7 @@ def route_query(
     Route a query to appropriate law indices (v8.1: hardened municipal routing).
     
     Args:
-        query: User query string
+        query: User query string (or its QueryContext)
         available_laws: List of law_keys that are indexed. If None, uses all.
         default_law: Default law to use if no keywords match
         min_laws: Minimum number of laws to return (v7: always at least 2)
@@ -137,25 +261,25 @@ def route_query(
     Returns:
         Dictionary of law_key -> weight (weights sum to 1.0)
     """
+    router = get_router()
+    keywords = router.keywords
     if available_laws is None:
-        available_laws = list(_get_router_keywords().keys())
+        available_laws = list(keywords.keys())
     
-    # Check for explicit law reference first
-    explicit_law = _extract_explicit_law_reference(query)
+    # One pass: keyword counts, explicit law reference, municipal anchors
+    context = QueryContext.of(query)
+    scan = router.scan_context(context)
+    explicit_law = scan.explicit_law
     
     # v8.1: Check for strong municipal anchors
-    has_municipal = _has_municipal_anchor(query)
+    has_municipal = scan.has_municipal
     
     # Count keyword matches for each law
-    query_lower = query.lower()
-    keywords = _get_router_keywords()
-    
     scores: dict[str, int] = {}
-    for law_key, kw_list in keywords.items():
+    for law_key in keywords:
         if law_key not in available_laws:
             continue
-        score = sum(1 for kw in kw_list if kw in query_lower)
-        scores[law_key] = score
+        scores[law_key] = scan.law_hits.get(law_key, 0)
     
     # v8.1: Strong boost for Kuntalaki when municipal anchors present
     if has_municipal and "kuntalaki_410_2015" in available_laws:
@@ -0,0 +1,219 @@
+"""
+Per-query text analysis shared by every retrieval stage.
+
+Router, query boost, abstain checks, pair-guards, law boosts and graph
+expansion triggers all used to lowercase the query and run their own
+substring scans. QueryContext does the text processing once:
+
+- normalized (lowercased) text, token set, bigrams
+- section citations ("110 §", "§ 110 a", "3:1") and four-digit years
+- matches for every registered signal family, found in one automaton pass
+
+Stages register their keyword lists with ``register_signal_family`` at
+import time and read ``ctx.signals(name)``. Results that depend on a stage's
+own compiled tables (router scan, boost plan) are computed at most once per
+query through ``ctx.memo``.
+
+Every stage still accepts a plain string; ``QueryContext.of`` wraps it.
+Set $KUNTALAKI_TRACE_QUERY_CONTEXT=1 (or call set_tracing(True)) to
+accumulate time spent building contexts and memoized stage results;
+``trace_summary`` reports it.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional, TypeVar
+
+from .term_automaton import TermAutomaton
+
+
+T = TypeVar("T")
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_YEAR_RE = re.compile(r"\b(\d{4})\b")
+# "110 §", "110 a §", "§ 110", "§110a"
+_SECTION_RE = re.compile(r"\b(\d+)\s?([a-z])?\s*§|§\s*(\d+)\s?([a-z])?\b")
+# Chapter:section, e.g. "KPL 3:1"
+_CHAPTER_SECTION_RE = re.compile(r"\b(\d+)\s*:\s*(\d+[a-z]?)\b")
+
+
+# ---------------------------------------------------------------------------
+# Signal families
+# ---------------------------------------------------------------------------
+
+_FAMILIES: dict[str, tuple[str, ...]] = {}
+_FAMILY_LOCK = threading.Lock()
+_COMPILED: Optional[tuple[TermAutomaton, list[list[tuple[str, str]]]]] = None
+
+
+def register_signal_family(name: str, terms: Iterable[str]) -> None:
+    """
+    Register a keyword list matched (as lowercase substrings) for every query.
+
+    Re-registering the same terms is a no-op; registering different terms
+    under an existing name raises ValueError.
+    """
+    global _COMPILED
+    terms = tuple(dict.fromkeys(terms))
+    with _FAMILY_LOCK:
+        existing = _FAMILIES.get(name)
+        if existing is not None:
+            if existing != terms:
+                raise ValueError(f"Signal family {name!r} already registered with different terms")
+            return
+        _FAMILIES[name] = terms
+        _COMPILED = None
+
+
+def signal_families() -> dict[str, tuple[str, ...]]:
+    """Registered families (name -> terms)."""
+    return dict(_FAMILIES)
+
+
+def _compiled_families() -> tuple[TermAutomaton, list[list[tuple[str, str]]]]:
+    global _COMPILED
+    compiled = _COMPILED
+    if compiled is None:
+        with _FAMILY_LOCK:
+            if _COMPILED is None:
+                labels: dict[str, list[tuple[str, str]]] = {}
+                for name, terms in _FAMILIES.items():
+                    for term in terms:
+                        labels.setdefault(term, []).append((name, term))
+                _COMPILED = (TermAutomaton(labels), list(labels.values()))
+            compiled = _COMPILED
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# Tracing
+# ---------------------------------------------------------------------------
+
+_TRACING = bool(os.environ.get("KUNTALAKI_TRACE_QUERY_CONTEXT"))
+_TRACE_LOCK = threading.Lock()
+_TRACE: dict[str, Any] = {"contexts": 0, "build_ms": 0.0, "memo_ms": {}}
+
+
+def set_tracing(enabled: bool) -> None:
+    """Turn context timing on or off."""
+    global _TRACING
+    _TRACING = enabled
+
+
+def reset_trace() -> None:
+    with _TRACE_LOCK:
+        _TRACE.update(contexts=0, build_ms=0.0, memo_ms={})
+
+
+def trace_summary() -> dict[str, Any]:
+    """Totals since the last reset: contexts built, build time, per-memo time."""
+    with _TRACE_LOCK:
+        contexts = _TRACE["contexts"]
+        return {
+            "contexts": contexts,
+            "build_ms": _TRACE["build_ms"],
+            "build_us_per_query": _TRACE["build_ms"] * 1000 / contexts if contexts else 0.0,
+            "memo_ms": dict(_TRACE["memo_ms"]),
+        }
+
+
+def format_trace_summary() -> str:
+    summary = trace_summary()
+    lines = [
+        f"QueryContext: {summary['contexts']} contexts, {summary['build_ms']:.2f} ms "
+        f"({summary['build_us_per_query']:.1f} us/query)"
+    ]
+    for key, ms in sorted(summary["memo_ms"].items()):
+        lines.append(f"  {key}: {ms:.2f} ms")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# QueryContext
+# ---------------------------------------------------------------------------
+
+class QueryContext:
+    """Text features of one query, computed once and shared across stages."""
+
+    __slots__ = (
+        "text", "normalized", "words", "tokens", "bigrams", "terms",
+        "section_citations", "chapter_citations", "years", "_signals", "_memo",
+    )
+
+    def __init__(self, text: str) -> None:
+        start = time.perf_counter() if _TRACING else 0.0
+
+        self.text = text
+        self.normalized = text.lower()
+
+        self.words: tuple[str, ...] = tuple(_PUNCT_RE.sub(" ", self.normalized).split())
+        self.tokens: frozenset[str] = frozenset(self.words)
+        self.bigrams: frozenset[str] = frozenset(
+            f"{a} {b}" for a, b in zip(self.words, self.words[1:])
+        )
+        # Token and bigram set used for anchor overlap
+        self.terms: frozenset[str] = self.tokens | self.bigrams
+
+        self.section_citations: tuple[str, ...] = tuple(
+            (m.group(1) or m.group(3)) + (m.group(2) or m.group(4) or "")
+            for m in _SECTION_RE.finditer(self.normalized)
+        )
+        self.chapter_citations: tuple[tuple[str, str], ...] = tuple(
+            (m.group(1), m.group(2)) for m in _CHAPTER_SECTION_RE.finditer(self.normalized)
+        )
+        self.years: tuple[int, ...] = tuple(int(y) for y in _YEAR_RE.findall(self.normalized))
+
+        automaton, labels = _compiled_families()
+        signals: dict[str, set[str]] = {}
+        for term_id in automaton.find(self.normalized):
+            for family, term in labels[term_id]:
+                signals.setdefault(family, set()).add(term)
+        self._signals = {family: frozenset(terms) for family, terms in signals.items()}
+        self._memo: dict[Hashable, Any] = {}
+
+        if _TRACING:
+            elapsed = (time.perf_counter() - start) * 1000
+            with _TRACE_LOCK:
+                _TRACE["contexts"] += 1
+                _TRACE["build_ms"] += elapsed
+
+    @classmethod
+    def of(cls, query: "str | QueryContext | None") -> "QueryContext":
+        """Return query itself if it already is a context, else build one."""
+        if isinstance(query, QueryContext):
+            return query
+        return cls(query or "")
+
+    def __repr__(self) -> str:
+        return f"QueryContext({self.text!r})"
+
+    def signals(self, family: str) -> frozenset[str]:
+        """Terms of a registered family that occur in the query."""
+        if family not in _FAMILIES:
+            raise KeyError(f"Unknown signal family {family!r}")
+        return self._signals.get(family, frozenset())
+
+    def has_signal(self, family: str) -> bool:
+        return bool(self.signals(family))
+
+    def memo(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Compute a stage result once per query."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        if _TRACING:
+            start = time.perf_counter()
+            value = factory()
+            elapsed = (time.perf_counter() - start) * 1000
+            name = key[0] if isinstance(key, tuple) else key
+            with _TRACE_LOCK:
+                _TRACE["memo_ms"][name] = _TRACE["memo_ms"].get(name, 0.0) + elapsed
+        else:
+            value = factory()
+        self._memo[key] = value
+        return value
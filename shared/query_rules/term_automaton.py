@@ -0,0 +1,87 @@
+"""
+Aho-Corasick automaton for multi-keyword substring matching.
+
+Routing and boost rules check dozens of keywords against the same query with
+``kw in query_lower``. TermAutomaton compiles a keyword list once and finds
+every keyword occurring in a text in a single left-to-right pass, including
+overlapping keywords ("kunnan" inside "kunnanhallitus").
+
+Matching is plain substring matching on the text as given; callers lowercase
+both keywords and text, exactly like the ``in`` checks it replaces.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable, Iterator
+
+
+class TermAutomaton:
+    """Compiled keyword set; ``find`` returns the ids of keywords present in a text."""
+
+    __slots__ = ("terms", "_goto", "_fail", "_out")
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        """
+        Args:
+            terms: Keywords; a keyword's id is its position in this sequence.
+                Duplicates keep separate ids. Empty keywords are never reported.
+        """
+        self.terms: list[str] = list(terms)
+        self._goto: list[dict[str, int]] = [{}]
+        self._out: list[tuple[int, ...]] = [()]
+
+        for term_id, term in enumerate(self.terms):
+            if not term:
+                continue
+            state = 0
+            for ch in term:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (term_id,)
+
+        # Breadth-first failure links; outputs are merged along the fail chain
+        # so a match step never has to walk it again.
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield (end_index, term_id) for every occurrence, overlapping included."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for term_id in out[state]:
+                yield i + 1, term_id
+
+    def find(self, text: str) -> set[int]:
+        """Ids of all keywords occurring in text (same as ``{i for i, t in enumerate(terms) if t in text}``)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,27 @@
+"""Retrieval backends and helpers for multi-law search."""
+from .bucket_encoder import BucketedCorpusEncoder
+from .batch_query import encode_queries, fetch_law_results, fetch_law_results_batch
+from .corpus_cache import corpus_encoder, sync_collection
+from .dense_index import DenseCollection, DenseLawIndex
+from .embedding_cache import CachedQueryEncoder, QueryEmbeddingCache, load_query_encoder
+from .fanout import fan_out, merge_ranked
+from .micro_batch import MicroBatchEncoder
+from .pipeline import RetrievalPipeline
+
+__all__ = [
+    "BucketedCorpusEncoder",
+    "CachedQueryEncoder",
+    "DenseCollection",
+    "DenseLawIndex",
+    "MicroBatchEncoder",
+    "QueryEmbeddingCache",
+    "RetrievalPipeline",
+    "corpus_encoder",
+    "encode_queries",
+    "fan_out",
+    "fetch_law_results",
+    "fetch_law_results_batch",
+    "load_query_encoder",
+    "merge_ranked",
+    "sync_collection",
+]
@@ -0,0 +1,132 @@
+"""
+Batched encoding and per-law fetching for multi-question retrieval.
+
+The eval runners used to encode one question at a time and issue one
+collection.query per (question, law). These helpers encode a whole question
+set in length-bucketed batches and query each law collection once with all
+query embeddings that routed to it (Chroma and DenseCollection both accept a
+list). Each collection is asked for the largest k any row needs and the
+rows are sliced back to their own k, so the per-row postprocessing
+(router bonus, pair guards, diversity) runs on the same hits as the
+single-question path.
+
+The per-law queries run concurrently (see fanout.py). With a timeout, a law
+that does not answer in time is left out of the rows and a warning printed.
+
+Per-law fetch results are Chroma-shaped single-row dicts::
+
+    {"ids": [...], "documents": [...], "metadatas": [...], "distances": [...]}
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, Sequence
+
+from .fanout import DEFAULT_LAW_TIMEOUT_S, fan_out
+
+
+ENCODE_BATCH_SIZE = 32
+FETCH_INCLUDE = ["documents", "metadatas", "distances"]
+
+
+def encode_queries(
+    model: Any,
+    queries: Sequence[str],
+    batch_size: int = ENCODE_BATCH_SIZE,
+) -> list[list[float]]:
+    """
+    Encode queries in length-bucketed batches.
+
+    Queries are deduplicated and sorted by length so each batch pads to a
+    similar length; embeddings are returned in the original order.
+
+    Args:
+        model: SentenceTransformer (or anything with the same encode())
+        queries: Query strings
+        batch_size: Queries per encode call
+
+    Returns:
+        One normalized embedding (list of floats) per query
+    """
+    unique = list(dict.fromkeys(queries))
+    unique.sort(key=len)
+
+    vectors: dict[str, list[float]] = {}
+    for start in range(0, len(unique), batch_size):
+        batch = unique[start:start + batch_size]
+        encoded = model.encode(batch, normalize_embeddings=True, batch_size=batch_size)
+        for text, vector in zip(batch, encoded):
+            vectors[text] = vector.tolist()
+
+    return [vectors[q] for q in queries]
+
+
+def fetch_law_results(
+    indices: dict[str, Any],
+    embedding: list[float],
+    k_per_law: dict[str, int],
+    timeout_s: float | None = DEFAULT_LAW_TIMEOUT_S,
+) -> dict[str, dict[str, list]]:
+    """Query every routed law concurrently for a single embedding."""
+    return fetch_law_results_batch(indices, [embedding], [k_per_law], timeout_s=timeout_s)[0]
+
+
+def fetch_law_results_batch(
+    indices: dict[str, Any],
+    embeddings: Sequence[list[float]],
+    k_per_law_rows: Sequence[dict[str, int]],
+    timeout_s: float | None = None,
+) -> list[dict[str, dict[str, list]]]:
+    """
+    Query each law collection once for every row routed to it.
+
+    Args:
+        indices: law_key -> collection (chromadb.Collection or DenseCollection)
+        embeddings: One query embedding per row
+        k_per_law_rows: One calculate_k_per_law() result per row
+        timeout_s: Per-law timeout; None waits for every law
+
+    Returns:
+        One dict per row: law_key -> single-row Chroma-shaped result,
+        in the row's k_per_law order
+    """
+    rows_by_law: dict[str, list[int]] = {}
+    for row, k_per_law in enumerate(k_per_law_rows):
+        for law_key, k in k_per_law.items():
+            if law_key in indices and k > 0:
+                rows_by_law.setdefault(law_key, []).append(row)
+
+    tasks = {
+        law_key: partial(
+            indices[law_key].query,
+            query_embeddings=[embeddings[row] for row in rows],
+            n_results=max(k_per_law_rows[row][law_key] for row in rows),
+            include=FETCH_INCLUDE,
+        )
+        for law_key, rows in rows_by_law.items()
+    }
+    outcome = fan_out(tasks, timeout_s)
+    outcome.raise_failed()
+    for law_key in outcome.timed_out:
+        print(f"Warning: {law_key} query timed out after {timeout_s}s, skipped")
+
+    fetched: dict[tuple[int, str], dict[str, list]] = {}
+    for law_key, results in outcome.results.items():
+        for i, row in enumerate(rows_by_law[law_key]):
+            k = k_per_law_rows[row][law_key]
+            fetched[(row, law_key)] = {
+                "ids": results["ids"][i][:k],
+                "documents": results["documents"][i][:k],
+                "metadatas": results["metadatas"][i][:k],
+                "distances": results["distances"][i][:k],
+            }
+
+    return [
+        {
+            law_key: fetched[(row, law_key)]
+            for law_key in k_per_law
+            if (row, law_key) in fetched
+        }
+        for row, k_per_law in enumerate(k_per_law_rows)
+    ]
@@ -0,0 +1,139 @@
+"""
+Length-bucketed corpus encoding shared by many small index builds.
+
+build_document_index.py encodes one statement's nodes per run in fixed
+batches of 64. A typical statement has only a few hundred indexable nodes
+of very uneven length (table rows vs. paragraphs), so every batch is padded
+to its longest text and the model sees many small, ragged calls.
+BucketedCorpusEncoder is fed texts of many bundles as they are produced
+(e.g. by a process pool). It buffers them and, once ``flush_texts`` texts
+are waiting, encodes the cache misses of the whole buffer at once:
+
+- cached texts (corpus cache, see corpus_cache.py) and duplicates across
+  bundles are encoded once or not at all
+- misses are sorted by length and cut into batches whose padded size
+  (batch length x longest text, in characters) stays under
+  ``max_batch_chars``, at most ``max_batch`` texts each: short rows go in
+  large batches, long paragraphs in small ones
+- vectors go into the corpus cache, so a following ``sync_collection``
+  of each bundle finds all of them there and encodes nothing
+
+``submit`` and ``flush`` return the keys whose texts are all encoded, in
+submission order, so the caller can write those indexes while later
+bundles are still being produced.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Hashable, Sequence
+
+import numpy as np
+
+from .embedding_cache import CachedQueryEncoder
+
+
+DEFAULT_MAX_BATCH = 64
+# Padded characters per model call (~64 texts of 250 characters)
+DEFAULT_MAX_BATCH_CHARS = 16_000
+DEFAULT_FLUSH_TEXTS = 2048
+
+
+def length_batches(texts: Sequence[str], max_batch: int, max_batch_chars: int) -> list[list[int]]:
+    """
+    Indices of texts grouped into length-sorted batches.
+
+    A batch ends when adding the next (longer or equal) text would exceed
+    max_batch texts or max_batch_chars padded characters; a single text
+    longer than max_batch_chars gets a batch of its own.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches: list[list[int]] = []
+    current: list[int] = []
+    for i in order:
+        padded = (len(current) + 1) * max(len(texts[i]), 1)
+        if current and (len(current) >= max_batch or padded > max_batch_chars):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class BucketedCorpusEncoder:
+    """Buffers texts of many keys and encodes their cache misses in length buckets."""
+
+    def __init__(
+        self,
+        encoder: CachedQueryEncoder,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_batch_chars: int = DEFAULT_MAX_BATCH_CHARS,
+        flush_texts: int = DEFAULT_FLUSH_TEXTS,
+        normalize_embeddings: bool = True,
+    ) -> None:
+        """
+        Args:
+            encoder: Corpus encoder (see corpus_encoder); misses go to encoder.model
+            max_batch: Texts per model call at most
+            max_batch_chars: Padded characters per model call at most
+            flush_texts: Encode once this many texts are buffered
+            normalize_embeddings: Passed to the model and part of the cache key
+        """
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.max_batch_chars = max_batch_chars
+        self.flush_texts = flush_texts
+        self.normalize_embeddings = normalize_embeddings
+        self._pending: list[tuple[Hashable, list[str]]] = []
+        self._buffered = 0
+        self.texts = 0
+        self.encoded = 0
+        self.batches = 0
+        self.encode_s = 0.0
+
+    def submit(self, key: Hashable, texts: Sequence[str]) -> list[Hashable]:
+        """Queue the texts of key; returns the keys completed by this call (maybe none)."""
+        self._pending.append((key, list(texts)))
+        self._buffered += len(texts)
+        self.texts += len(texts)
+        if self._buffered >= self.flush_texts:
+            return self.flush()
+        return []
+
+    def flush(self) -> list[Hashable]:
+        """Encode everything buffered; returns the keys completed, in submission order."""
+        pending, self._pending, self._buffered = self._pending, [], 0
+        texts = list(dict.fromkeys(t for _, key_texts in pending for t in key_texts))
+        cache = self.encoder.cache
+        model_name = self.encoder.model_name
+        found = cache.get_many(model_name, self.normalize_embeddings, texts)
+        missing = [t for t in texts if t not in found]
+
+        if missing:
+            start = time.perf_counter()
+            for batch in length_batches(missing, self.max_batch, self.max_batch_chars):
+                batch_texts = [missing[i] for i in batch]
+                vectors = self.encoder.model.encode(
+                    batch_texts,
+                    normalize_embeddings=self.normalize_embeddings,
+                    batch_size=len(batch_texts),
+                )
+                cache.put_many(
+                    model_name,
+                    self.normalize_embeddings,
+                    {t: np.asarray(v, dtype=np.float32) for t, v in zip(batch_texts, vectors)},
+                )
+                self.batches += 1
+            self.encoded += len(missing)
+            self.encode_s += time.perf_counter() - start
+        return [key for key, _ in pending]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "texts": self.texts,
+            "encoded": self.encoded,
+            "batches": self.batches,
+            "encode_s": round(self.encode_s, 3),
+            "texts_per_s": round(self.encoded / self.encode_s, 1) if self.encode_s else None,
+        }
@@ -0,0 +1,145 @@
+"""
+Direct lookup for explicit section citations.
+
+"KPL 3:1", "410/2015 110 §" or "kuntalaki 118 § 3 mom" name the exact
+moment(s) the user wants; encoding such a query and running a vector search
+over every law only to rediscover that node costs ~100 ms. CitationIndex maps
+(law_key, chapter, section_id, moment) to the moment records from the
+analysis-layer JSONL files and answers those queries in microseconds.
+
+``lookup_citation`` returns hits shaped like multi-law retrieval hits
+(score 1.0, ``"citation": True``), or None whenever the vector path is still
+needed:
+
+- the query has free text besides the citation
+- the law is not named, or several laws are
+- the section is not found, or exists in several chapters and no chapter
+  was given
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from ..query_rules.citations import Citation, parse_citation
+from ..query_rules.query_context import QueryContext
+from .embedding_cache import PROJECT_ROOT
+
+
+# Fields copied from the JSONL records into hits
+_HIT_FIELDS = ("section_num", "section_id", "moment", "section_title", "node_id")
+
+
+def default_jsonl_paths(project_root: Path = PROJECT_ROOT) -> dict[str, list[Path]]:
+    """Moment JSONL files per router law_key."""
+    paths = {"kuntalaki_410_2015": [project_root / "analysis_layer" / "json" / "kuntalaki_410-2015.jsonl"]}
+    laws_dir = project_root / "laws"
+    if laws_dir.exists():
+        for law_dir in sorted(laws_dir.iterdir()):
+            files = sorted((law_dir / "analysis_layer" / "json").glob("*.jsonl"))
+            if files:
+                paths[law_dir.name] = files
+    return paths
+
+
+def _chapter_key(chapter: str) -> str:
+    """ "7 a luku" -> "7a" """
+    return chapter.lower().replace("luku", "").replace(" ", "")
+
+
+class CitationIndex:
+    """In-memory (law_key, chapter, section_id, moment) -> moment record index."""
+
+    def __init__(self, records_by_law: dict[str, Iterable[dict]]) -> None:
+        self._moments: dict[tuple[str, str, str], list[dict]] = defaultdict(list)
+        self._chapters: dict[tuple[str, str], list[str]] = defaultdict(list)
+
+        for law_key, records in records_by_law.items():
+            for record in records:
+                chapter = _chapter_key(record.get("chapter", ""))
+                section = str(record["section_id"]).lower()
+                hit = {field: record.get(field, "") for field in _HIT_FIELDS}
+                hit.update(law_key=law_key, text=record.get("text", ""), anchors=record.get("anchors", []))
+                self._moments[(law_key, chapter, section)].append(hit)
+                if chapter not in self._chapters[(law_key, section)]:
+                    self._chapters[(law_key, section)].append(chapter)
+
+        for hits in self._moments.values():
+            hits.sort(key=lambda h: int(h["moment"]) if str(h["moment"]).isdigit() else 0)
+
+    @classmethod
+    def from_jsonl(cls, paths: Optional[dict[str, list[Path]]] = None) -> "CitationIndex":
+        """Load from moment JSONL files (default: all indexed laws)."""
+        records_by_law: dict[str, list[dict]] = {}
+        for law_key, files in (paths or default_jsonl_paths()).items():
+            records = []
+            for path in files:
+                if not path.exists():
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    records.extend(json.loads(line) for line in f if line.strip())
+            records_by_law[law_key] = records
+        return cls(records_by_law)
+
+    def __len__(self) -> int:
+        return sum(len(hits) for hits in self._moments.values())
+
+    def resolve(self, citation: Citation) -> Optional[list[dict]]:
+        """
+        Moment records for a citation: one moment, or every moment of the
+        section when no moment is given. None if it does not resolve uniquely.
+        """
+        if citation.law_key is None:
+            return None
+
+        section = citation.section.lower()
+        if citation.chapter is not None:
+            chapter = citation.chapter.lower()
+        else:
+            chapters = self._chapters.get((citation.law_key, section), [])
+            if len(chapters) != 1:
+                return None
+            chapter = chapters[0]
+
+        hits = self._moments.get((citation.law_key, chapter, section))
+        if not hits:
+            return None
+        if citation.moment is not None:
+            hits = [h for h in hits if h["moment"] == citation.moment]
+            if not hits:
+                return None
+        return [dict(h, score=1.0, citation=True) for h in hits]
+
+
+def lookup_citation(
+    query: str | QueryContext,
+    index: CitationIndex,
+) -> tuple[Optional[list[dict]], float]:
+    """
+    Fast path for exact citations.
+
+    Returns (hits, latency_ms); hits is None if the query needs vector search.
+    """
+    start_time = time.time()
+    citation = parse_citation(query)
+    hits = index.resolve(citation) if citation is not None and citation.is_exact else None
+    return hits, (time.time() - start_time) * 1000
+
+
+_INDEX: Optional[CitationIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_citation_index() -> CitationIndex:
+    """Process-wide index over all laws, loaded on first use."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = CitationIndex.from_jsonl()
+    return _INDEX
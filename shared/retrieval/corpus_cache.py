@@ -0,0 +1,136 @@
+"""
+Content-addressed corpus embeddings and incremental collection sync.
+
+Index builders used to delete their Chroma collection and re-encode every
+document even when a new Finlex version only changed a few moments. Here
+document vectors are stored by sha256 of (model id, normalization, exact
+document text) in a separate on-disk cache (same store as the query cache,
+without size-based eviction), and ``sync_collection`` brings a collection
+in line with the current records:
+
+- ids no longer present are deleted
+- new ids, changed texts and changed metadata are upserted
+- only texts missing from the cache are encoded
+
+An unchanged corpus never loads the model; an amendment re-encodes only the
+moments whose text changed.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Sequence, TypedDict
+
+from .embedding_cache import (
+    DEFAULT_MODEL_NAME,
+    PROJECT_ROOT,
+    CachedQueryEncoder,
+    QueryEmbeddingCache,
+)
+
+
+DEFAULT_CORPUS_CACHE_PATH = Path(
+    os.environ.get("KUNTALAKI_CORPUS_CACHE", PROJECT_ROOT / ".cache" / "corpus_embeddings.sqlite")
+)
+# Corpus vectors are content-addressed, not recency-driven; only cap runaway growth
+CORPUS_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+# Chroma rejects very large add/upsert batches
+UPSERT_BATCH_SIZE = 1000
+
+
+class SyncStats(TypedDict):
+    added: int
+    updated: int
+    deleted: int
+    unchanged: int
+    encoded: int
+
+
+def corpus_encoder(model_name: str = DEFAULT_MODEL_NAME, model: Any = None) -> CachedQueryEncoder:
+    """Encoder backed by the corpus cache; the model is loaded on the first miss only."""
+    cache = QueryEmbeddingCache(DEFAULT_CORPUS_CACHE_PATH, max_bytes=CORPUS_CACHE_MAX_BYTES)
+    return CachedQueryEncoder(model_name, cache, model=model)
+
+
+def sync_collection(
+    collection: Any,
+    ids: Sequence[str],
+    documents: Sequence[str],
+    metadatas: Sequence[dict[str, Any]],
+    encoder: CachedQueryEncoder,
+    batch_size: int = 32,
+) -> SyncStats:
+    """
+    Make a collection contain exactly the given records.
+
+    Args:
+        collection: chromadb.Collection (anything with get/delete/upsert)
+        ids: Record ids (node_id)
+        documents: Text to embed per record
+        metadatas: Chroma-ready metadata per record (no None / list values)
+        encoder: Corpus encoder (see corpus_encoder)
+        batch_size: Encode batch size for cache misses
+
+    Returns:
+        Counts of added / updated / deleted / unchanged records and
+        number of texts actually encoded
+    """
+    if not (len(ids) == len(documents) == len(metadatas)):
+        raise ValueError("ids, documents and metadatas must have equal length")
+    if len(set(ids)) != len(ids):
+        raise ValueError("ids must be unique")
+
+    existing = collection.get(include=["documents", "metadatas"])
+    current = {
+        doc_id: (doc, meta)
+        for doc_id, doc, meta in zip(existing["ids"], existing["documents"], existing["metadatas"])
+    }
+
+    wanted = set(ids)
+    removed = [doc_id for doc_id in current if doc_id not in wanted]
+
+    changed: list[int] = []
+    added = 0
+    for i, doc_id in enumerate(ids):
+        if doc_id not in current:
+            changed.append(i)
+            added += 1
+        elif current[doc_id] != (documents[i], metadatas[i]):
+            changed.append(i)
+
+    for start in range(0, len(removed), UPSERT_BATCH_SIZE):
+        collection.delete(ids=removed[start:start + UPSERT_BATCH_SIZE])
+
+    misses_before = encoder.cache.misses
+    if changed:
+        embeddings = encoder.encode(
+            [documents[i] for i in changed],
+            normalize_embeddings=True,
+            batch_size=batch_size,
+        ).tolist()
+        for start in range(0, len(changed), UPSERT_BATCH_SIZE):
+            chunk = changed[start:start + UPSERT_BATCH_SIZE]
+            collection.upsert(
+                ids=[ids[i] for i in chunk],
+                documents=[documents[i] for i in chunk],
+                embeddings=embeddings[start:start + len(chunk)],
+                metadatas=[metadatas[i] for i in chunk],
+            )
+
+    return {
+        "added": added,
+        "updated": len(changed) - added,
+        "deleted": len(removed),
+        "unchanged": len(ids) - len(changed),
+        "encoded": encoder.cache.misses - misses_before,
+    }
+
+
+def format_sync_stats(stats: SyncStats) -> str:
+    """One-line summary for builder output."""
+    return (
+        f"added {stats['added']}, updated {stats['updated']}, deleted {stats['deleted']}, "
+        f"unchanged {stats['unchanged']} (encoded {stats['encoded']})"
+    )
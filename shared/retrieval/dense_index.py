@@ -0,0 +1,339 @@
+"""
+Exact dense search over all law moments in one matrix.
+
+The whole multi-law corpus (about 2648 moments x 1024 dims, ~10 MB float32)
+fits comfortably in memory, so per-law HNSW collections are not needed for
+speed. DenseLawIndex keeps every embedding in one contiguous float32 matrix
+with rows grouped by law_key; a per-law top-k is one matrix-vector product
+over the law's row block plus argpartition.
+
+DenseCollection is a read-only view of one law that answers
+``query(query_embeddings=..., n_results=..., include=...)`` and ``count()``
+in the same shape as chromadb.Collection, so the dict returned by
+``DenseLawIndex.as_indices()`` drops into existing ``multi_law_query``
+code (route_query + calculate_k_per_law) unchanged. Metadata filters
+(``where``) support Chroma's equality and comparison operators ($eq, $ne,
+$gt, $gte, $lt, $lte, $in, $nin) combined with $and / $or; rows that do
+not match are masked out before the top-k.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+
+INDEX_FORMAT_VERSION = 1
+
+_CHROMA_INCLUDE = ("documents", "metadatas", "distances", "embeddings")
+
+_WHERE_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+
+def matches_where(metadata: dict[str, Any], where: dict[str, Any]) -> bool:
+    """
+    Whether one metadata dict satisfies a Chroma ``where`` filter.
+
+    Raises:
+        ValueError: Unsupported operator or malformed filter
+    """
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            if not isinstance(condition, list):
+                raise ValueError(f"{key} expects a list of filters")
+            results = (matches_where(metadata, clause) for clause in condition)
+            if not (all(results) if key == "$and" else any(results)):
+                return False
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, operand in condition.items():
+            if operator not in _WHERE_OPERATORS:
+                raise ValueError(f"Unsupported where operator: {operator}")
+            try:
+                if not _WHERE_OPERATORS[operator](value, operand):
+                    return False
+            except TypeError:
+                # Chroma compares only like types; a mismatch never matches
+                return False
+    return True
+
+
+class DenseLawIndex:
+    """All law moments in one float32 matrix, rows grouped by law_key."""
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        law_keys: Iterable[str],
+        ids: Iterable[str],
+        documents: Iterable[str],
+        metadatas: Iterable[dict[str, Any]],
+    ) -> None:
+        """
+        Args:
+            embeddings: (N, D) matrix; rows are L2-normalized if they are not already
+            law_keys: law_key of each row
+            ids: Collection id of each row
+            documents: Document text of each row
+            metadatas: Metadata dict of each row
+        """
+        law_keys = list(law_keys)
+        ids = list(ids)
+        documents = list(documents)
+        metadatas = list(metadatas)
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(law_keys):
+            raise ValueError(
+                f"embeddings shape {matrix.shape} does not match {len(law_keys)} rows"
+            )
+        if not (len(ids) == len(documents) == len(metadatas) == len(law_keys)):
+            raise ValueError("law_keys, ids, documents and metadatas must have equal length")
+
+        # Group rows by law (stable, so within-law order is preserved)
+        law_order: list[str] = list(dict.fromkeys(law_keys))
+        code_of = {law_key: i for i, law_key in enumerate(law_order)}
+        codes = np.fromiter((code_of[k] for k in law_keys), dtype=np.int32, count=len(law_keys))
+        order = np.argsort(codes, kind="stable")
+
+        matrix = matrix[order]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # bge-m3 vectors are already unit length; keep them bit-identical
+        if not np.allclose(norms, 1.0, atol=1e-5):
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        self.embeddings: np.ndarray = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.law_codes: np.ndarray = codes[order]
+        self.laws: list[str] = law_order
+        self.ids: list[str] = [ids[i] for i in order]
+        self.documents: list[str] = [documents[i] for i in order]
+        self.metadatas: list[dict[str, Any]] = [metadatas[i] for i in order]
+
+        # Row block [start, end) of each law
+        bounds = np.searchsorted(self.law_codes, np.arange(len(law_order) + 1))
+        self.law_slices: dict[str, slice] = {
+            law_key: slice(int(bounds[i]), int(bounds[i + 1]))
+            for i, law_key in enumerate(law_order)
+        }
+
+    @property
+    def dim(self) -> int:
+        return int(self.embeddings.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    # --- Construction -----------------------------------------------------
+
+    @classmethod
+    def from_collections(cls, indices: dict[str, Any]) -> "DenseLawIndex":
+        """Build from a dict of law_key -> chromadb.Collection (see load_indices)."""
+        matrices: list[np.ndarray] = []
+        law_keys: list[str] = []
+        ids: list[str] = []
+        documents: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+
+        for law_key, collection in indices.items():
+            data = collection.get(include=["embeddings", "documents", "metadatas"])
+            if not data["ids"]:
+                continue
+            matrices.append(np.asarray(data["embeddings"], dtype=np.float32))
+            law_keys.extend([law_key] * len(data["ids"]))
+            ids.extend(data["ids"])
+            documents.extend(data["documents"])
+            metadatas.extend(data["metadatas"])
+
+        if not matrices:
+            raise ValueError("No embeddings found in the given collections")
+
+        return cls(np.vstack(matrices), law_keys, ids, documents, metadatas)
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to a single .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            version=np.array(INDEX_FORMAT_VERSION),
+            embeddings=self.embeddings,
+            law_codes=self.law_codes,
+            laws=np.array(self.laws),
+            ids=np.array(self.ids),
+            documents=np.array(self.documents),
+            metadatas=np.array(json.dumps(self.metadatas, ensure_ascii=False)),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "DenseLawIndex":
+        """Read an index written by save()."""
+        with np.load(Path(path), allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != INDEX_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported dense index version {version} (expected {INDEX_FORMAT_VERSION})"
+                )
+            laws = data["laws"].tolist()
+            law_keys = [laws[c] for c in data["law_codes"].tolist()]
+            return cls(
+                data["embeddings"],
+                law_keys,
+                data["ids"].tolist(),
+                data["documents"].tolist(),
+                json.loads(str(data["metadatas"])),
+            )
+
+    # --- Search -----------------------------------------------------------
+
+    def search(
+        self,
+        query_embeddings: np.ndarray | list,
+        k_per_law: dict[str, int],
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Per-law top-k for one or more queries with a single matrix product.
+
+        Args:
+            query_embeddings: (D,) or (M, D) query vectors
+            k_per_law: law_key -> k (as from calculate_k_per_law)
+
+        Returns:
+            law_key -> Chroma-shaped result dict (one row per query)
+        """
+        queries = self._as_query_matrix(query_embeddings)
+        scores = queries @ self.embeddings.T
+        return {
+            law_key: self._top_k(scores[:, self.law_slices[law_key]], self.law_slices[law_key].start, k)
+            for law_key, k in k_per_law.items()
+            if law_key in self.law_slices
+        }
+
+    def query_law(
+        self,
+        law_key: str,
+        query_embeddings: np.ndarray | list,
+        n_results: int = 10,
+        include: Iterable[str] = ("documents", "metadatas", "distances"),
+        where: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Top-k within one law, in chromadb.Collection.query result shape."""
+        if law_key not in self.law_slices:
+            raise KeyError(law_key)
+        block = self.law_slices[law_key]
+        queries = self._as_query_matrix(query_embeddings)
+        scores = queries @ self.embeddings[block].T
+        if where:
+            mask = np.fromiter(
+                (matches_where(meta, where) for meta in self.metadatas[block]),
+                dtype=bool, count=block.stop - block.start,
+            )
+            # Filtered rows sink below every match and k never reaches them
+            scores[:, ~mask] = -np.inf
+            n_results = min(n_results, int(mask.sum()))
+        return self._top_k(scores, block.start, n_results, include)
+
+    def _as_query_matrix(self, query_embeddings: np.ndarray | list) -> np.ndarray:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Query dim {queries.shape[1]} does not match index dim {self.dim}")
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        if np.allclose(norms, 1.0, atol=1e-5):
+            return queries
+        norms[norms == 0] = 1.0
+        return queries / norms
+
+    def _top_k(
+        self,
+        scores: np.ndarray,
+        offset: int,
+        k: int,
+        include: Iterable[str] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        """Select the k best columns of each score row and format like Chroma."""
+        include = set(include)
+        unknown = include - set(_CHROMA_INCLUDE)
+        if unknown:
+            raise ValueError(f"Unsupported include fields: {sorted(unknown)}")
+
+        n = scores.shape[1]
+        k = max(0, min(k, n))
+        result: dict[str, Any] = {"ids": []}
+        for field in _CHROMA_INCLUDE:
+            if field in include:
+                result[field] = []
+
+        for row in scores:
+            if k == 0:
+                top = np.empty(0, dtype=np.int64)
+            else:
+                if k < n:
+                    candidates = np.argpartition(-row, k - 1)[:k]
+                else:
+                    candidates = np.arange(n)
+                # Descending score, ties by row order
+                top = candidates[np.lexsort((candidates, -row[candidates]))]
+
+            rows = (top + offset).tolist()
+            result["ids"].append([self.ids[r] for r in rows])
+            if "documents" in include:
+                result["documents"].append([self.documents[r] for r in rows])
+            if "metadatas" in include:
+                result["metadatas"].append([self.metadatas[r] for r in rows])
+            if "distances" in include:
+                result["distances"].append((1.0 - row[top]).astype(float).tolist())
+            if "embeddings" in include:
+                result["embeddings"].append(self.embeddings[rows].tolist())
+
+        return result
+
+    # --- Chroma-compatible views -----------------------------------------
+
+    def collection(self, law_key: str) -> "DenseCollection":
+        """Return a chromadb.Collection-like view of one law."""
+        if law_key not in self.law_slices:
+            raise KeyError(law_key)
+        return DenseCollection(self, law_key)
+
+    def as_indices(self) -> dict[str, "DenseCollection"]:
+        """Drop-in replacement for the dict returned by load_indices()."""
+        return {law_key: DenseCollection(self, law_key) for law_key in self.laws}
+
+
+class DenseCollection:
+    """Read-only view of one law in a DenseLawIndex, duck-typing chromadb.Collection."""
+
+    def __init__(self, index: DenseLawIndex, law_key: str) -> None:
+        self.index = index
+        self.law_key = law_key
+        self.name = law_key
+
+    def count(self) -> int:
+        block = self.index.law_slices[self.law_key]
+        return block.stop - block.start
+
+    def query(
+        self,
+        query_embeddings: np.ndarray | list,
+        n_results: int = 10,
+        where: dict[str, Any] | None = None,
+        include: Iterable[str] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        return self.index.query_law(self.law_key, query_embeddings, n_results, include, where)
@@ -0,0 +1,271 @@
+"""
+Persistent query-embedding cache.
+
+Eval runs, stability runs and autofill scripts encode the same question
+strings over and over. QueryEmbeddingCache stores query vectors in a small
+sqlite database keyed by (model name, normalization, exact query text), with
+LRU eviction by total vector bytes and hit/miss counters.
+
+CachedQueryEncoder wraps it behind the ``SentenceTransformer.encode``
+signature and only loads the model on the first cache miss, so a fully
+cached run never loads bge-m3 at all.
+
+The cache location defaults to ``.cache/query_embeddings.sqlite`` in the
+project root and can be overridden with $KUNTALAKI_EMBED_CACHE.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_CACHE_PATH = Path(
+    os.environ.get("KUNTALAKI_EMBED_CACHE", PROJECT_ROOT / ".cache" / "query_embeddings.sqlite")
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MODEL_NAME = "BAAI/bge-m3"
+
+# Store vectors as float32 by default so cached results are bit-identical to
+# a fresh encode; float16 halves the size at ~1e-3 relative error.
+SUPPORTED_DTYPES = ("float32", "float16")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    normalize INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used ON query_embeddings(last_used);
+"""
+
+
+def cache_key(model_name: str, normalize: bool, text: str) -> str:
+    """Stable key for one (model, normalization, text) triple."""
+    raw = f"{model_name}\x00{int(normalize)}\x00{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """Disk-backed query vector cache with LRU eviction by size."""
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        dtype: str = "float32",
+    ) -> None:
+        """
+        Args:
+            path: sqlite file (":memory:" for a process-local cache)
+            max_bytes: Evict least recently used vectors above this total size
+            dtype: Storage dtype, "float32" or "float16"
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}, expected one of {SUPPORTED_DTYPES}")
+
+        self.path = path if str(path) == ":memory:" else Path(path)
+        self.max_bytes = max_bytes
+        self.dtype = dtype
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if isinstance(self.path, Path):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, model_name: str, normalize: bool, texts: Sequence[str]) -> dict[str, np.ndarray]:
+        """Return cached vectors (as float32) for the texts that are present."""
+        keys = {cache_key(model_name, normalize, t): t for t in dict.fromkeys(texts)}
+        found: dict[str, np.ndarray] = {}
+        if not keys:
+            return found
+
+        with self._lock:
+            key_list = list(keys)
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM query_embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[keys[key]] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE query_embeddings SET last_used = ? WHERE key = ?",
+                    [(now, cache_key(model_name, normalize, t)) for t in found],
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for t in texts if t in found)
+            self.misses += sum(1 for t in texts if t not in found)
+        return found
+
+    def put_many(self, model_name: str, normalize: bool, vectors: dict[str, np.ndarray]) -> None:
+        """Store vectors and evict the least recently used ones if over budget."""
+        if not vectors:
+            return
+        now = time.time()
+        rows = []
+        for text, vector in vectors.items():
+            blob = np.asarray(vector, dtype=self.dtype).tobytes()
+            rows.append((
+                cache_key(model_name, normalize, text), model_name, int(normalize), text,
+                self.dtype, int(np.asarray(vector).shape[-1]), blob, len(blob), now,
+            ))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_embeddings "
+                "(key, model, normalize, text, dtype, dim, vector, nbytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM query_embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_free = total - self.max_bytes
+        doomed: list[str] = []
+        for key, nbytes in self._conn.execute(
+            "SELECT key, nbytes FROM query_embeddings ORDER BY last_used ASC, rowid ASC"
+        ):
+            doomed.append(key)
+            to_free -= nbytes
+            if to_free <= 0:
+                break
+        self._conn.executemany("DELETE FROM query_embeddings WHERE key = ?", [(k,) for k in doomed])
+        self.evictions += len(doomed)
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM query_embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Delete every cached vector."""
+        with self._lock:
+            self._conn.execute("DELETE FROM query_embeddings")
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedQueryEncoder:
+    """SentenceTransformer.encode look-alike backed by QueryEmbeddingCache.
+
+    The model is created on the first cache miss only.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        cache: QueryEmbeddingCache | None = None,
+        model: Any = None,
+    ) -> None:
+        """
+        Args:
+            model_name: SentenceTransformer model id (part of the cache key)
+            cache: Cache instance (default: shared on-disk cache)
+            model: Already loaded model to use on misses (skips lazy loading)
+        """
+        self.model_name = model_name
+        self.cache = cache if cache is not None else QueryEmbeddingCache()
+        self._model = model
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        """The underlying SentenceTransformer, loaded on first access."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    def encode(
+        self,
+        sentences: str | Sequence[str],
+        normalize_embeddings: bool = False,
+        batch_size: int = 32,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """Encode like SentenceTransformer.encode, serving repeats from the cache."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        found = self.cache.get_many(self.model_name, normalize_embeddings, texts)
+        missing = [t for t in dict.fromkeys(texts) if t not in found]
+        if missing:
+            encoded = self.model.encode(
+                missing,
+                normalize_embeddings=normalize_embeddings,
+                batch_size=batch_size,
+                **kwargs,
+            )
+            new_vectors = {t: np.asarray(v, dtype=np.float32) for t, v in zip(missing, encoded)}
+            self.cache.put_many(self.model_name, normalize_embeddings, new_vectors)
+            found.update(new_vectors)
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        matrix = np.stack([found[t] for t in texts]).astype(np.float32, copy=False)
+        return matrix[0] if single else matrix
+
+
+def load_query_encoder(model_name: str = DEFAULT_MODEL_NAME) -> Any:
+    """
+    Return the encoder query scripts should use.
+
+    A CachedQueryEncoder on the shared cache, or a plain SentenceTransformer
+    when $KUNTALAKI_EMBED_CACHE_DISABLE is set (e.g. for timing cold encodes).
+    """
+    if os.environ.get("KUNTALAKI_EMBED_CACHE_DISABLE"):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+    return CachedQueryEncoder(model_name)
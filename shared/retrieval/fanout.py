@@ -0,0 +1,135 @@
+"""
+Concurrent fan-out over law and document collections.
+
+multi_law_query used to query the routed collections one after another, so
+its latency was the sum of every per-law search. ``fan_out`` submits all
+searches to a shared thread pool at once and waits for each until its own
+deadline: latency approaches the slowest single collection, and a
+collection that exceeds its timeout (or raises) is left out of the answer
+instead of stalling it. Chroma's HNSW search and numpy's matmul both release
+the GIL, so threads overlap the actual search work.
+
+``merge_ranked`` merges per-law hit lists that are already sorted by score
+with a k-way heap merge. Ties keep input order, so the result is the same as
+a stable global sort of the concatenated lists.
+
+Tasks run on the shared pool must not call fan_out themselves with more than
+one task (single tasks run inline) or the pool could exhaust its workers.
+The per-task timeout defaults to $KUNTALAKI_LAW_TIMEOUT_S (5 s).
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Generic, Hashable, Iterable, Mapping, Optional, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("KUNTALAKI_FANOUT_WORKERS", "8"))
+DEFAULT_LAW_TIMEOUT_S = float(os.environ.get("KUNTALAKI_LAW_TIMEOUT_S", "5.0"))
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="law-fanout"
+                )
+    return _EXECUTOR
+
+
+@dataclass
+class FanOutResult(Generic[K]):
+    """Results of the tasks that finished in time, plus what did not."""
+    results: dict[K, Any] = field(default_factory=dict)
+    timed_out: list[K] = field(default_factory=list)
+    failed: dict[K, BaseException] = field(default_factory=dict)
+    latency_ms: dict[K, float] = field(default_factory=dict)
+
+    def raise_failed(self) -> None:
+        """Re-raise the first task exception, if any."""
+        for error in self.failed.values():
+            raise error
+
+
+def _timed(task: Callable[[], Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    value = task()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def fan_out(
+    tasks: Mapping[K, Callable[[], Any]],
+    timeout_s: float | Mapping[K, float] | None = DEFAULT_LAW_TIMEOUT_S,
+) -> FanOutResult[K]:
+    """
+    Run tasks concurrently, each with its own timeout.
+
+    Args:
+        tasks: key -> zero-argument callable (e.g. one collection search)
+        timeout_s: Seconds per task from submission, a per-key mapping
+            (keys missing from it wait without limit), or None for no limit
+
+    Returns:
+        FanOutResult; results keep the order of tasks. Tasks still running at
+        their deadline are abandoned (listed in timed_out); exceptions are
+        collected in failed.
+    """
+    outcome: FanOutResult[K] = FanOutResult()
+
+    def deadline_of(key: K) -> Optional[float]:
+        if isinstance(timeout_s, Mapping):
+            return timeout_s.get(key)
+        return timeout_s
+
+    if len(tasks) == 1:
+        # Nothing to overlap; skip the pool round trip
+        (key, task), = tasks.items()
+        if deadline_of(key) is None:
+            try:
+                outcome.results[key], outcome.latency_ms[key] = _timed(task)
+            except Exception as e:
+                outcome.failed[key] = e
+            return outcome
+
+    start = time.perf_counter()
+    executor = _executor()
+    futures = {key: executor.submit(_timed, task) for key, task in tasks.items()}
+
+    finished: dict[K, Any] = {}
+    for key, future in futures.items():
+        limit = deadline_of(key)
+        remaining = None if limit is None else max(0.0, start + limit - time.perf_counter())
+        try:
+            finished[key], outcome.latency_ms[key] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            outcome.timed_out.append(key)
+        except Exception as e:
+            outcome.failed[key] = e
+
+    outcome.results = {key: finished[key] for key in tasks if key in finished}
+    return outcome
+
+
+def merge_ranked(
+    ranked: Iterable[Iterable[dict]],
+    limit: Optional[int] = None,
+    score_key: str = "score",
+) -> list[dict]:
+    """k-way merge of hit lists each sorted by descending score."""
+    merged = heapq.merge(*ranked, key=lambda hit: -hit[score_key])
+    return list(islice(merged, limit))
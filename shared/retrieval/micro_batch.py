@@ -0,0 +1,222 @@
+"""
+Micro-batching encoder for concurrent query encoding.
+
+In the query server every request used to run its own single-item
+``model.encode``; on CPU-only hosts bge-m3 spends most of such a call on
+per-call overhead. MicroBatchEncoder puts requests on a queue. A worker
+thread takes the first waiting request and waits for more until the window
+(default 3 ms) has passed or max_batch texts are queued. It then encodes the
+whole batch in one call and resolves each caller's future.
+
+Identical texts that are queued or being encoded share one future
+(single-flight), so a burst of the same question is encoded once.
+
+``stats()`` reports request/batch counters and histograms of batch size,
+queueing delay (enqueue to batch start) and encode time for tuning the window
+against throughput.
+
+The class mimics ``SentenceTransformer.encode``, so it can be used as the
+model of a CachedQueryEncoder: cache hits are answered immediately and only
+misses go through the batching window.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Sequence
+
+import numpy as np
+
+
+DEFAULT_WINDOW_MS = 3.0
+DEFAULT_MAX_BATCH = 32
+
+BATCH_SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64)
+DELAY_MS_BOUNDS = (0.5, 1, 2, 3, 5, 10, 20, 50, 100)
+ENCODE_MS_BOUNDS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket i counts values <= bounds[i], the last one the rest."""
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class _Pending:
+    __slots__ = ("text", "normalize", "future", "enqueued_at")
+
+    def __init__(self, text: str, normalize: bool) -> None:
+        self.text = text
+        self.normalize = normalize
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatchEncoder:
+    """Coalesces concurrent encode calls into batched model calls."""
+
+    def __init__(
+        self,
+        model: Any,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> None:
+        """
+        Args:
+            model: SentenceTransformer (or anything with the same encode())
+            window_ms: How long the first queued request waits for company
+            max_batch: Texts per model call; a full batch is encoded at once
+        """
+        self.model = model
+        self.window_s = window_ms / 1000
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._queue: deque[_Pending] = deque()
+        self._inflight: dict[tuple[str, bool], _Pending] = {}
+        self._closed = False
+
+        self.requests = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.batch_sizes = Histogram(BATCH_SIZE_BOUNDS)
+        self.queue_delay_ms = Histogram(DELAY_MS_BOUNDS)
+        self.encode_ms = Histogram(ENCODE_MS_BOUNDS)
+
+        self._worker = threading.Thread(target=self._run, name="micro-batch-encoder", daemon=True)
+        self._worker.start()
+
+    def encode(
+        self,
+        sentences: str | Sequence[str],
+        normalize_embeddings: bool = False,
+        batch_size: int = DEFAULT_MAX_BATCH,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """Encode like SentenceTransformer.encode; blocks until the batch containing the texts is done."""
+        if kwargs:
+            # Options the scheduler does not group by go straight to the model
+            return self.model.encode(
+                sentences, normalize_embeddings=normalize_embeddings, batch_size=batch_size, **kwargs
+            )
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        futures = [self.submit(text, normalize_embeddings) for text in texts]
+        vectors = [future.result() for future in futures]
+
+        if single:
+            return vectors[0]
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+
+    def submit(self, text: str, normalize_embeddings: bool = False) -> Future:
+        """Queue one text; the future resolves to its vector."""
+        key = (text, normalize_embeddings)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatchEncoder is closed")
+            self.requests += 1
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.deduplicated += 1
+                return pending.future
+            pending = _Pending(text, normalize_embeddings)
+            self._inflight[key] = pending
+            self._queue.append(pending)
+            self._cond.notify()
+        return pending.future
+
+    def _next_batch(self) -> list[_Pending]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            deadline = self._queue[0].enqueued_at + self.window_s
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            started = time.perf_counter()
+            for pending in batch:
+                self.queue_delay_ms.observe((started - pending.enqueued_at) * 1000)
+
+            for normalize in (False, True):
+                group = [p for p in batch if p.normalize == normalize]
+                if group:
+                    self._encode_group(group, normalize)
+
+            with self._cond:
+                self.batches += 1
+                self.batch_sizes.observe(len(batch))
+                self.encode_ms.observe((time.perf_counter() - started) * 1000)
+                for pending in batch:
+                    self._inflight.pop((pending.text, pending.normalize), None)
+
+    def _encode_group(self, group: list[_Pending], normalize: bool) -> None:
+        try:
+            vectors = self.model.encode(
+                [p.text for p in group], normalize_embeddings=normalize, batch_size=len(group)
+            )
+        except Exception as e:
+            for pending in group:
+                pending.future.set_exception(e)
+            return
+        for pending, vector in zip(group, vectors):
+            pending.future.set_result(np.asarray(vector))
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and histograms since start."""
+        with self._cond:
+            return {
+                "window_ms": self.window_s * 1000,
+                "max_batch": self.max_batch,
+                "requests": self.requests,
+                "deduplicated": self.deduplicated,
+                "batches": self.batches,
+                "queued": len(self._queue),
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_delay_ms": self.queue_delay_ms.snapshot(),
+                "encode_ms": self.encode_ms.snapshot(),
+            }
+
+    def close(self) -> None:
+        """Encode what is queued, then stop the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
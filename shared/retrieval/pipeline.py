@@ -0,0 +1,101 @@
+"""
+Encode-once retrieval pipeline.
+
+Law search, document search and law-to-document mapping each used to call
+``model.encode`` on their own, so one question paid for two or three encodes
+of the same text plus one more per law hit. RetrievalPipeline encodes the
+question once and hands the vector to every stage; derived texts (e.g. one
+query per law hit for document mapping) go through ``encode_batch`` as a
+single encode call.
+
+Stages are callables taking the query vector. ``run`` executes them
+concurrently through fan_out and reports encode and stage timings.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping, Sequence
+
+from .batch_query import ENCODE_BATCH_SIZE
+from .fanout import fan_out
+
+
+Stage = Callable[[list[float]], Any]
+
+
+@dataclass
+class PipelineResult:
+    """Query vector and per-stage outputs for one question."""
+    embedding: list[float]
+    results: dict[str, Any]
+    encode_ms: float
+    stage_ms: dict[str, float] = field(default_factory=dict)
+    failed: dict[str, BaseException] = field(default_factory=dict)
+
+    def raise_failed(self) -> None:
+        """Re-raise the first stage exception, if any."""
+        for error in self.failed.values():
+            raise error
+
+
+class RetrievalPipeline:
+    """Runs retrieval stages on one shared query vector."""
+
+    def __init__(self, model: Any, batch_size: int = ENCODE_BATCH_SIZE) -> None:
+        self.model = model
+        self.batch_size = batch_size
+        self.encode_calls = 0
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.encode_calls += 1
+        vectors = self.model.encode(texts, normalize_embeddings=True, batch_size=self.batch_size)
+        return [vector.tolist() for vector in vectors]
+
+    def encode(self, query: str) -> list[float]:
+        """Encode one question."""
+        return self._encode([query])[0]
+
+    def encode_batch(self, texts: Sequence[str]) -> list[list[float]]:
+        """Encode derived texts in a single call (duplicates encoded once)."""
+        if not texts:
+            return []
+        unique = list(dict.fromkeys(texts))
+        vectors = dict(zip(unique, self._encode(unique)))
+        return [vectors[text] for text in texts]
+
+    def run(
+        self,
+        query: str,
+        stages: Mapping[str, Stage],
+        embedding: list[float] | None = None,
+        timeout_s: float | None = None,
+    ) -> PipelineResult:
+        """
+        Encode query (unless embedding is given) and run every stage on it.
+
+        Stages run concurrently; a stage that raises is reported in
+        ``failed`` and missing from ``results``.
+        """
+        start = time.perf_counter()
+        if embedding is None:
+            embedding = self.encode(query)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        outcome = fan_out(
+            {name: (lambda stage=stage: stage(embedding)) for name, stage in stages.items()},
+            timeout_s,
+        )
+        for name in outcome.timed_out:
+            print(f"Warning: stage {name} timed out after {timeout_s}s, skipped")
+        return PipelineResult(
+            embedding=embedding,
+            results=outcome.results,
+            encode_ms=encode_ms,
+            stage_ms=outcome.latency_ms,
+            failed=outcome.failed,
+        )
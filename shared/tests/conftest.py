@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the shared/ tests.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+
+class FakeEncoder:
+    """
+    Stand-in for SentenceTransformer that records each encode call.
+
+    A text encodes to [len(text) * scale, 1, 2, ...] (dim values) with
+    scale 1 when normalized and 2 otherwise, so tests can tell texts and
+    the normalize flag apart. delay_s makes every call take a while.
+    """
+
+    def __init__(self, dim: int = 2, delay_s: float = 0.0) -> None:
+        self.dim = dim
+        self.delay_s = delay_s
+        self.calls: list[list[str]] = []
+
+    @property
+    def encoded(self) -> list[str]:
+        """Every text encoded so far, in call order."""
+        return [text for call in self.calls for text in call]
+
+    def encode(self, texts, normalize_embeddings=False, batch_size=32, **kwargs):
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        self.calls.append(list(texts))
+        scale = 1.0 if normalize_embeddings else 2.0
+        return np.array(
+            [[len(t) * scale] + [float(i) for i in range(1, self.dim)] for t in texts],
+            dtype=np.float32,
+        )
+
+
+@pytest.fixture
+def fake_model() -> FakeEncoder:
+    """A fresh FakeEncoder (dim 2, no delay)."""
+    return FakeEncoder()
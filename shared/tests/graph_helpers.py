@@ -0,0 +1,13 @@
+"""
+Node and edge records for the small hand-built graphs in the graph tests.
+"""
+
+
+def moment(node_id: str, section: int, law_key: str = "fi:1/2000") -> dict:
+    """A MOMENT node; its moment number is the last character of node_id."""
+    return {"node_id": node_id, "node_type": "MOMENT", "law_key": law_key, "section_num": section,
+            "moment": node_id[-1], "section_title": "", "text": node_id}
+
+
+def edge(source: str, target: str, edge_type: str = "REFERS_TO") -> dict:
+    return {"source": source, "target": target, "edge_type": edge_type, "context": ""}
@@ -0,0 +1,68 @@
+"""
+Tests for batched multi-question retrieval helpers.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval import DenseLawIndex, encode_queries, fetch_law_results, fetch_law_results_batch
+
+
+class HashEncoder:
+    """Deterministic stand-in for SentenceTransformer.encode."""
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts, normalize_embeddings=True, batch_size=32):
+        self.calls.append(list(texts))
+        rows = [np.random.default_rng(abs(hash(t)) % 2**32).normal(size=8) for t in texts]
+        matrix = np.array(rows, dtype=np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def test_encode_queries_dedups_and_keeps_order() -> None:
+    encoder = HashEncoder()
+    queries = ["pitkä kysymys kunnan taloudesta", "lyhyt", "lyhyt", "keskipitkä kysymys"]
+
+    embeddings = encode_queries(encoder, queries, batch_size=2)
+
+    assert len(embeddings) == 4
+    assert embeddings[1] == embeddings[2]
+    # Unique queries only, shortest first
+    assert [t for call in encoder.calls for t in call] == sorted(set(queries), key=len)
+    single = encoder.encode([queries[0]])[0].tolist()
+    assert np.allclose(embeddings[0], single)
+
+
+def test_batch_fetch_matches_single_fetch() -> None:
+    rng = np.random.default_rng(3)
+    law_keys = ["kuntalaki_410_2015"] * 15 + ["kirjanpitolaki_1336_1997"] * 15
+    index = DenseLawIndex(
+        rng.normal(size=(30, 8)),
+        law_keys,
+        [f"id-{i}" for i in range(30)],
+        [f"doc {i}" for i in range(30)],
+        [{"row": i} for i in range(30)],
+    )
+    indices = index.as_indices()
+    embeddings = rng.normal(size=(5, 8)).tolist()
+    plans = [
+        {"kuntalaki_410_2015": 2 + i, "kirjanpitolaki_1336_1997": 6 - i, "missing_law": 2}
+        for i in range(5)
+    ]
+
+    batched = fetch_law_results_batch(indices, embeddings, plans)
+
+    for embedding, plan, row in zip(embeddings, plans, batched):
+        single = fetch_law_results(indices, embedding, plan)
+        assert list(row) == list(single) == ["kuntalaki_410_2015", "kirjanpitolaki_1336_1997"]
+        for law_key, result in row.items():
+            assert result["ids"] == single[law_key]["ids"]
+            assert len(result["ids"]) == plan[law_key]
+            # Matrix-matrix vs matrix-vector products may differ in the last ulp
+            assert np.allclose(result["distances"], single[law_key]["distances"], atol=1e-6)
@@ -0,0 +1,42 @@
+"""
+Tests for length-bucketed corpus encoding across bundles.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval import CachedQueryEncoder, QueryEmbeddingCache
+from shared.retrieval.bucket_encoder import BucketedCorpusEncoder, length_batches
+
+
+def test_length_batches() -> None:
+    texts = ["x" * n for n in (50, 5, 10, 5, 200, 12)]
+
+    assert length_batches(texts, max_batch=2, max_batch_chars=10_000) == [[1, 3], [2, 5], [0, 4]]
+    # Padded size (count x longest) stays under the budget; the long text is alone
+    assert length_batches(texts, max_batch=10, max_batch_chars=100) == [[1, 3, 2, 5], [0], [4]]
+    assert length_batches([], 4, 100) == []
+
+
+def test_buffers_bundles_and_encodes_misses_once(tmp_path: Path, fake_model) -> None:
+    model = fake_model
+    cache = QueryEmbeddingCache(tmp_path / "corpus.sqlite")
+    encoder = CachedQueryEncoder("test-model", cache, model=model)
+    encoder.encode(["cached row"], normalize_embeddings=True)
+    model.calls.clear()
+
+    bucketed = BucketedCorpusEncoder(encoder, max_batch=2, max_batch_chars=1000, flush_texts=5)
+    assert bucketed.submit("a", ["paragraph text", "row", "cached row"]) == []
+    assert bucketed.submit("b", ["row", "another paragraph"]) == ["a", "b"]
+    assert model.calls == [["row", "paragraph text"], ["another paragraph"]]
+
+    assert bucketed.submit("c", ["row"]) == []
+    assert bucketed.flush() == ["c"]
+    assert len(model.calls) == 2
+    assert bucketed.stats()["encoded"] == 3
+
+    # Later per-bundle syncs find every vector in the cache
+    encoder.encode(["paragraph text", "another paragraph"], normalize_embeddings=True)
+    assert len(model.calls) == 2
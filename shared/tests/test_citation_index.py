@@ -0,0 +1,61 @@
+"""
+Tests for citation parsing and the direct citation lookup.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.query_rules.citations import parse_citation
+from shared.retrieval.citation_index import CitationIndex, lookup_citation
+
+
+@pytest.fixture(scope="module")
+def index() -> CitationIndex:
+    index = CitationIndex.from_jsonl()
+    if not len(index):
+        pytest.skip("Moment JSONL files not found")
+    return index
+
+
+def test_parse_citation_forms() -> None:
+    kpl = parse_citation("KPL 3:1")
+    assert (kpl.law_key, kpl.chapter, kpl.section, kpl.moment) == ("kirjanpitolaki_1336_1997", "3", "1", None)
+    assert kpl.is_exact
+
+    kunta = parse_citation("kuntalaki 118 § 3 mom")
+    assert (kunta.law_key, kunta.chapter, kunta.section, kunta.moment) == ("kuntalaki_410_2015", None, "118", "3")
+
+    assert parse_citation("410/2015 110 §").law_key == "kuntalaki_410_2015"
+    assert parse_citation("OYL 13 luvun 2 § 1 momentti").chapter == "13"
+    assert parse_citation("kuntalaki 62 a §").section == "62a"
+
+
+def test_parse_citation_partial() -> None:
+    assert parse_citation("kunnan tase") is None
+    assert parse_citation("kuntalaki 118 § ja KPL 3:1") is None
+
+    with_text = parse_citation("Mitä kuntalaki 118 § sanoo arviointimenettelystä?")
+    assert with_text.free_text == "mitä sanoo arviointimenettelystä"
+    assert not with_text.is_exact
+    assert parse_citation("118 §").law_key is None
+
+
+def test_lookup_resolves_moments(index: CitationIndex) -> None:
+    hits, _ = lookup_citation("kuntalaki 118 § 3 mom", index)
+    assert [h["node_id"] for h in hits] == ["410/2015:fin@20230780:118:3"]
+    assert hits[0]["score"] == 1.0 and hits[0]["citation"]
+
+    hits, _ = lookup_citation("KPL 3:1", index)
+    assert [h["moment"] for h in hits] == [str(i) for i in range(1, len(hits) + 1)]
+    assert {h["law_key"] for h in hits} == {"kirjanpitolaki_1336_1997"}
+
+
+def test_lookup_falls_back(index: CitationIndex) -> None:
+    # Section 1 exists in several TTL chapters
+    assert lookup_citation("TTL 1 §", index)[0] is None
+    assert lookup_citation("kuntalaki 118 § 99 mom", index)[0] is None
+    assert lookup_citation("kuntalaki 118 § arviointimenettely", index)[0] is None
@@ -0,0 +1,94 @@
+"""
+Tests for incremental collection sync over the corpus embedding cache.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval import CachedQueryEncoder, QueryEmbeddingCache, sync_collection
+
+
+class FakeCollection:
+    """Minimal in-memory chromadb.Collection (get/delete/upsert)."""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, tuple[str, dict, list[float]]] = {}
+
+    def get(self, include=None):
+        ids = list(self.rows)
+        return {
+            "ids": ids,
+            "documents": [self.rows[i][0] for i in ids],
+            "metadatas": [self.rows[i][1] for i in ids],
+        }
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        for doc_id, doc, emb, meta in zip(ids, documents, embeddings, metadatas):
+            self.rows[doc_id] = (doc, meta, emb)
+
+
+def _encoder(path: Path, model=None) -> CachedQueryEncoder:
+    return CachedQueryEncoder("test-model", QueryEmbeddingCache(path), model=model)
+
+
+def test_only_changed_texts_are_encoded(tmp_path: Path, fake_model) -> None:
+    collection = FakeCollection()
+    model = fake_model
+    encoder = _encoder(tmp_path / "c.sqlite", model)
+
+    first = sync_collection(
+        collection,
+        ["a", "b", "c"],
+        ["1 § 1 mom", "2 § 1 mom", "3 § 1 mom"],
+        [{"v": 1}, {"v": 1}, {"v": 1}],
+        encoder,
+    )
+    assert first == {"added": 3, "updated": 0, "deleted": 0, "unchanged": 0, "encoded": 3}
+
+    # Amendment: b text changes, c metadata changes, a unchanged, d new
+    model.calls.clear()
+    second = sync_collection(
+        collection,
+        ["a", "b", "c", "d"],
+        ["1 § 1 mom", "2 § 1 mom (muutettu)", "3 § 1 mom", "4 § 1 mom"],
+        [{"v": 1}, {"v": 1}, {"v": 2}, {"v": 1}],
+        encoder,
+    )
+
+    assert model.encoded == ["2 § 1 mom (muutettu)", "4 § 1 mom"]
+    assert second == {"added": 1, "updated": 2, "deleted": 0, "unchanged": 1, "encoded": 2}
+    assert collection.rows["c"][1] == {"v": 2}
+
+
+def test_removed_ids_are_deleted(tmp_path: Path, fake_model) -> None:
+    collection = FakeCollection()
+    encoder = _encoder(tmp_path / "c.sqlite", fake_model)
+    sync_collection(collection, ["a", "b"], ["x" * 10, "y" * 10], [{}, {}], encoder)
+
+    stats = sync_collection(collection, ["a"], ["x" * 10], [{}], encoder)
+
+    assert set(collection.rows) == {"a"}
+    assert stats["deleted"] == 1
+
+
+def test_rebuild_from_cache_does_not_load_model(tmp_path: Path, fake_model) -> None:
+    path = tmp_path / "c.sqlite"
+    ids = ["a", "b"]
+    docs = ["kunnan talousarvio", "tilinpäätös"]
+    metas = [{"law_key": "kuntalaki_410_2015"}] * 2
+    sync_collection(FakeCollection(), ids, docs, metas, _encoder(path, fake_model))
+
+    # Fresh, empty collection (e.g. --rebuild): vectors come from the cache
+    collection = FakeCollection()
+    encoder = _encoder(path)
+    stats = sync_collection(collection, ids, docs, metas, encoder)
+
+    assert stats["added"] == 2 and stats["encoded"] == 0
+    assert not encoder.model_loaded
+    assert len(collection.rows) == 2
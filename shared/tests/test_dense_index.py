@@ -0,0 +1,100 @@
+"""
+Tests for the single-matrix dense law index.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval import DenseLawIndex
+
+
+@pytest.fixture
+def dense_index() -> DenseLawIndex:
+    """Small random index with interleaved law rows."""
+    rng = np.random.default_rng(0)
+    n, dim = 60, 16
+    law_keys = [("kuntalaki_410_2015", "kirjanpitolaki_1336_1997", "hankintalaki_1397_2016")[i % 3] for i in range(n)]
+    return DenseLawIndex(
+        rng.normal(size=(n, dim)),
+        law_keys,
+        [f"id-{i}" for i in range(n)],
+        [f"doc {i}" for i in range(n)],
+        [{"law_key": law_keys[i], "row": i} for i in range(n)],
+    )
+
+
+def _brute_force(index: DenseLawIndex, query: np.ndarray, law_key: str, k: int) -> list[str]:
+    q = query / np.linalg.norm(query)
+    block = index.law_slices[law_key]
+    scores = index.embeddings[block] @ q
+    order = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+    return [index.ids[block.start + i] for i in order]
+
+
+def test_per_law_top_k_matches_brute_force(dense_index: DenseLawIndex) -> None:
+    """query() on each law view returns the exact top-k in score order."""
+    rng = np.random.default_rng(1)
+    indices = dense_index.as_indices()
+    for _ in range(10):
+        query = rng.normal(size=dense_index.dim)
+        for law_key, collection in indices.items():
+            result = collection.query(query_embeddings=[query.tolist()], n_results=5)
+            assert result["ids"][0] == _brute_force(dense_index, query, law_key, 5)
+            distances = result["distances"][0]
+            assert distances == sorted(distances)
+            assert all(m["law_key"] == law_key for m in result["metadatas"][0])
+
+
+def test_search_matches_per_law_query(dense_index: DenseLawIndex) -> None:
+    """One-product search() gives the same rows as separate per-law queries."""
+    rng = np.random.default_rng(2)
+    queries = rng.normal(size=(4, dense_index.dim))
+    k_per_law = {"kuntalaki_410_2015": 3, "hankintalaki_1397_2016": 7, "missing_law": 2}
+
+    batched = dense_index.search(queries, k_per_law)
+
+    assert set(batched) == {"kuntalaki_410_2015", "hankintalaki_1397_2016"}
+    for law_key, result in batched.items():
+        single = dense_index.query_law(law_key, queries, k_per_law[law_key])
+        assert result["ids"] == single["ids"]
+
+
+def test_k_larger_than_law_returns_all_rows(dense_index: DenseLawIndex) -> None:
+    collection = dense_index.collection("kuntalaki_410_2015")
+    result = collection.query(query_embeddings=[[1.0] * dense_index.dim], n_results=1000)
+    assert len(result["ids"][0]) == collection.count() == 20
+
+
+def test_where_filters_rows_before_top_k(dense_index: DenseLawIndex) -> None:
+    """where keeps only matching rows; the top-k is exact within them."""
+    collection = dense_index.collection("kuntalaki_410_2015")
+    query = [[1.0] * dense_index.dim]
+    everything = collection.query(query_embeddings=query, n_results=20)["ids"][0]
+
+    even = collection.query(query_embeddings=query, n_results=4, where={"row": {"$in": [0, 6, 12, 18, 24]}})
+    assert even["ids"][0] == [i for i in everything if int(i.split("-")[1]) in (0, 6, 12, 18, 24)][:4]
+    assert collection.query(query_embeddings=query, n_results=5, where={"row": 3})["ids"] == [["id-3"]]
+    combined = collection.query(
+        query_embeddings=query, n_results=20,
+        where={"$and": [{"row": {"$gte": 30}}, {"$or": [{"row": {"$lt": 36}}, {"row": 57}]}]},
+    )
+    assert sorted(combined["ids"][0]) == ["id-30", "id-33", "id-57"]
+    assert collection.query(query_embeddings=query, n_results=5, where={"row": -1})["ids"] == [[]]
+    with pytest.raises(ValueError):
+        collection.query(query_embeddings=query, n_results=5, where={"row": {"$like": 1}})
+
+
+def test_save_load_round_trip(dense_index: DenseLawIndex, tmp_path: Path) -> None:
+    path = tmp_path / "dense.npz"
+    dense_index.save(path)
+    loaded = DenseLawIndex.load(path)
+
+    assert loaded.laws == dense_index.laws
+    assert loaded.ids == dense_index.ids
+    assert loaded.metadatas == dense_index.metadatas
+    np.testing.assert_array_equal(loaded.embeddings, dense_index.embeddings)
@@ -0,0 +1,115 @@
+"""
+Tests for the multi-city document index registry.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.documents.registry import DocumentIndexRegistry, discover_bundles, parse_scope
+from shared.retrieval.dense_index import DenseLawIndex
+
+
+def _write_bundle(data_dir: Path, city: str, year: int, vectors: list[list[float]]) -> Path:
+    """Write a bundle whose snapshot holds one node per vector."""
+    index_dir = data_dir / city / str(year) / "embeddings"
+    ids = [f"{city}:{year}:PARA:{i}" for i in range(len(vectors))]
+    DenseLawIndex(
+        np.array(vectors), [f"{city}_{year}"] * len(ids), ids, ids,
+        [{"city": city, "year": year} for _ in ids],
+    ).save(index_dir / "dense_index.npz")
+    return index_dir / "dense_index.npz"
+
+
+def _registry(tmp_path: Path, **kwargs) -> DocumentIndexRegistry:
+    _write_bundle(tmp_path, "lapua", 2023, [[1.0, 0.0], [0.6, 0.8]])
+    _write_bundle(tmp_path, "lapua", 2022, [[0.8, 0.6]])
+    _write_bundle(tmp_path, "seinajoki", 2023, [[0.0, 1.0]])
+    (tmp_path / "seinajoki" / "2022" / "parsed").mkdir(parents=True)  # no index yet
+    return DocumentIndexRegistry.discover(tmp_path, **kwargs)
+
+
+def test_discovery_and_scopes(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+
+    assert len(discover_bundles(tmp_path)) == 4
+    assert registry.keys() == [("lapua", 2022), ("lapua", 2023), ("seinajoki", 2023)]
+    assert registry.resolve([parse_scope("lapua")]) == [("lapua", 2022), ("lapua", 2023)]
+    assert registry.resolve([parse_scope("*:2023"), parse_scope("lapua:2023")]) == [
+        ("lapua", 2023), ("seinajoki", 2023),
+    ]
+    with pytest.raises(KeyError):
+        registry.resolve([("seinajoki", 2022)])
+    assert registry.stats()["open"] == []  # nothing is opened by discovery
+
+
+def test_scoped_query_merges_bundles(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+
+    collection = registry.collection([parse_scope("lapua")])
+    results = collection.query(query_embeddings=[[1.0, 0.0], [0.0, 1.0]], n_results=2)
+    assert results["ids"] == [
+        ["lapua:2023:PARA:0", "lapua:2022:PARA:0"],
+        ["lapua:2023:PARA:1", "lapua:2022:PARA:0"],
+    ]
+    assert np.allclose(results["distances"][0], [0.0, 0.2])
+    assert results["metadatas"][1][1] == {"city": "lapua", "year": 2022}
+    assert collection.count() == 3
+    assert registry.collection().query(query_embeddings=[0.0, 1.0], n_results=1)["ids"] == [["seinajoki:2023:PARA:0"]]
+
+
+def test_where_filter_on_snapshot_bundles(tmp_path: Path) -> None:
+    registry = _registry(tmp_path)
+
+    results = registry.collection().query(query_embeddings=[[1.0, 0.0]], n_results=3, where={"year": 2023})
+    assert results["ids"] == [["lapua:2023:PARA:0", "lapua:2023:PARA:1", "seinajoki:2023:PARA:0"]]
+
+
+def test_lru_eviction_keeps_memory_budget(tmp_path: Path) -> None:
+    size = _write_bundle(tmp_path, "a", 2023, [[1.0, 0.0]]).stat().st_size
+    _write_bundle(tmp_path, "b", 2023, [[0.0, 1.0]])
+    _write_bundle(tmp_path, "c", 2023, [[0.6, 0.8]])
+    registry = DocumentIndexRegistry.discover(tmp_path, max_resident_bytes=2 * size)
+
+    registry.get("a", 2023)
+    registry.get("b", 2023)
+    registry.get("a", 2023)  # b is now least recently used
+    registry.get("c", 2023)
+    stats = registry.stats()
+    assert stats["open"] == ["a:2023", "c:2023"]
+    assert (stats["hits"], stats["opens"], stats["evictions"]) == (1, 3, 1)
+    assert stats["resident_bytes"] <= 2 * size
+
+    # A scope larger than the budget still covers every bundle
+    results = registry.collection().query(query_embeddings=[0.0, 1.0], n_results=3)
+    assert results["ids"][0][0] == "b:2023:PARA:0"
+    assert len(registry.stats()["open"]) == 2
+
+
+class _Client:
+    """Stands in for a Chroma client over a snapshot that does not fit the budget."""
+
+    opened: list[Path] = []
+
+    def __init__(self, index_dir: Path) -> None:
+        self.opened.append(index_dir)
+        self.index = DenseLawIndex.load(index_dir / "dense_index.npz")
+
+    def get_collection(self, name: str):
+        return self.index.collection(name)
+
+
+def test_oversized_snapshot_is_served_by_client(tmp_path: Path) -> None:
+    _write_bundle(tmp_path, "a", 2023, [[1.0, 0.0]])
+    _write_bundle(tmp_path, "b", 2023, [[0.0, 1.0]])
+    registry = DocumentIndexRegistry.discover(tmp_path, max_clients=1, max_resident_bytes=0, client_factory=_Client)
+
+    assert registry.get("a", 2023).count() == 1
+    registry.get("b", 2023)
+    stats = registry.stats()
+    assert (stats["open"], stats["open_clients"], stats["resident_bytes"]) == (["b:2023"], 1, 0)
+    assert [p.parent.parent.name for p in _Client.opened] == ["a", "b"]
@@ -0,0 +1,75 @@
+"""
+Tests for the persistent query-embedding cache.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval import CachedQueryEncoder, QueryEmbeddingCache
+
+
+def test_repeated_queries_hit_cache(tmp_path: Path, fake_model) -> None:
+    model = fake_model
+    encoder = CachedQueryEncoder("test-model", QueryEmbeddingCache(tmp_path / "q.sqlite"), model=model)
+
+    first = encoder.encode(["kunnan talousarvio", "tilinpäätös"], normalize_embeddings=True)
+    second = encoder.encode(["tilinpäätös", "kunnan talousarvio", "tilinpäätös"], normalize_embeddings=True)
+
+    assert model.encoded == ["kunnan talousarvio", "tilinpäätös"]
+    np.testing.assert_array_equal(second[1], first[0])
+    np.testing.assert_array_equal(second[0], second[2])
+    stats = encoder.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 2)
+
+
+def test_key_includes_model_and_normalization(tmp_path: Path, fake_model) -> None:
+    cache = QueryEmbeddingCache(tmp_path / "q.sqlite")
+    model = fake_model
+    CachedQueryEncoder("model-a", cache, model=model).encode(["sama"], normalize_embeddings=True)
+    CachedQueryEncoder("model-a", cache, model=model).encode(["sama"], normalize_embeddings=False)
+    CachedQueryEncoder("model-b", cache, model=model).encode(["sama"], normalize_embeddings=True)
+
+    assert model.encoded == ["sama", "sama", "sama"]
+
+
+def test_cache_hit_does_not_load_model(tmp_path: Path, fake_model) -> None:
+    path = tmp_path / "q.sqlite"
+    CachedQueryEncoder("test-model", QueryEmbeddingCache(path), model=fake_model).encode(
+        "kunnan tilinpäätös", normalize_embeddings=True
+    )
+
+    # New process-equivalent: fresh cache handle, no model supplied
+    encoder = CachedQueryEncoder("test-model", QueryEmbeddingCache(path))
+    vector = encoder.encode("kunnan tilinpäätös", normalize_embeddings=True)
+
+    assert vector.shape == (fake_model.dim,)
+    assert not encoder.model_loaded
+
+
+def test_lru_eviction_by_size(tmp_path: Path, fake_model) -> None:
+    # Each float32 vector of dim 2 is 8 bytes; room for three
+    cache = QueryEmbeddingCache(tmp_path / "q.sqlite", max_bytes=24)
+    encoder = CachedQueryEncoder("test-model", cache, model=fake_model)
+
+    encoder.encode(["a", "b", "c"])
+    encoder.encode(["a"])  # refresh "a"
+    encoder.encode(["d"])  # evicts least recently used ("b")
+
+    assert set(cache.get_many("test-model", False, ["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 24
+
+
+def test_float16_storage(tmp_path: Path) -> None:
+    cache = QueryEmbeddingCache(tmp_path / "q.sqlite", dtype="float16")
+    cache.put_many("m", True, {"x": np.array([0.1, 0.2, 0.3], dtype=np.float32)})
+
+    vector = cache.get_many("m", True, ["x"])["x"]
+
+    assert vector.dtype == np.float32
+    assert cache.stats()["bytes"] == 6
+    np.testing.assert_allclose(vector, [0.1, 0.2, 0.3], rtol=1e-3)
@@ -0,0 +1,89 @@
+"""
+Tests for the concurrent per-law fan-out and the k-way hit merge.
+"""
+
+import random
+import sys
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval.batch_query import fetch_law_results_batch
+from shared.retrieval.fanout import fan_out, merge_ranked
+
+
+class SlowCollection:
+    """Chroma-shaped collection that sleeps before answering."""
+
+    def __init__(self, name: str, delay_s: float = 0.0) -> None:
+        self.name = name
+        self.delay_s = delay_s
+
+    def query(self, query_embeddings, n_results, include):
+        time.sleep(self.delay_s)
+        rows = len(query_embeddings)
+        return {
+            "ids": [[f"{self.name}-{i}" for i in range(n_results)]] * rows,
+            "documents": [[f"doc {i}" for i in range(n_results)]] * rows,
+            "metadatas": [[{"node_id": f"{self.name}-{i}"} for i in range(n_results)]] * rows,
+            "distances": [[0.1 * i for i in range(n_results)]] * rows,
+        }
+
+
+def test_fan_out_runs_tasks_concurrently() -> None:
+    # Each task blocks until all three are running at the same time
+    barrier = threading.Barrier(3, timeout=2)
+
+    def task(key: str) -> str:
+        barrier.wait()
+        return key
+
+    outcome = fan_out({key: partial(task, key) for key in ("a", "b", "c")}, timeout_s=5)
+
+    assert list(outcome.results) == ["a", "b", "c"]
+    assert not outcome.timed_out and not outcome.failed
+
+
+def test_fan_out_timeout_and_failure() -> None:
+    def boom():
+        raise RuntimeError("broken collection")
+
+    start = time.perf_counter()
+    outcome = fan_out(
+        {"fast": lambda: 1, "slow": lambda: time.sleep(1.0), "broken": boom},
+        timeout_s={"slow": 0.1},
+    )
+
+    assert time.perf_counter() - start < 0.8
+    assert outcome.results == {"fast": 1}
+    assert outcome.timed_out == ["slow"]
+    assert isinstance(outcome.failed["broken"], RuntimeError)
+    with pytest.raises(RuntimeError):
+        outcome.raise_failed()
+
+
+def test_fetch_skips_law_that_times_out() -> None:
+    indices = {"fast": SlowCollection("fast"), "slow": SlowCollection("slow", delay_s=1.0)}
+
+    rows = fetch_law_results_batch(indices, [[0.0]], [{"slow": 2, "fast": 3}], timeout_s=0.2)
+
+    assert list(rows[0]) == ["fast"]
+    assert rows[0]["fast"]["ids"] == ["fast-0", "fast-1", "fast-2"]
+
+
+def test_merge_ranked_matches_stable_sort() -> None:
+    rng = random.Random(7)
+    lists = []
+    for law in range(5):
+        scores = sorted((round(rng.random(), 2) for _ in range(rng.randint(0, 8))), reverse=True)
+        lists.append([{"law": law, "rank": i, "score": s} for i, s in enumerate(scores)])
+
+    expected = sorted((h for hits in lists for h in hits), key=lambda h: h["score"], reverse=True)
+
+    assert merge_ranked(lists) == expected
+    assert merge_ranked(lists, 4) == expected[:4]
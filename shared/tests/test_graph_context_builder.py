@@ -0,0 +1,90 @@
+"""
+Tests for graph-guided context expansion over a small hand-built graph.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import scripts.graph_context_builder as graph_context_builder
+from scripts.graph_context_builder import GraphContextBuilder
+from shared.graph.csr import CsrGraph
+from shared.tests.graph_helpers import edge, moment
+
+
+def _builder(monkeypatch: pytest.MonkeyPatch, nodes: list[dict], edges: list[dict]) -> GraphContextBuilder:
+    graph = CsrGraph(nodes, edges)
+    monkeypatch.setattr(graph_context_builder, "load_graph", lambda graph_dir: graph)
+    return GraphContextBuilder(use_similar=False)
+
+
+def _support(expanded: dict) -> list[str]:
+    return [sn["node_id"] for sn in expanded["supporting_nodes"]]
+
+
+def test_ppr_is_seeded_by_all_hits(monkeypatch: pytest.MonkeyPatch) -> None:
+    # a:3:1 is referenced by both hits, a:4:1 only by the first
+    nodes = [moment("a:1:1", 1), moment("a:2:1", 2), moment("a:3:1", 3), moment("a:4:1", 4)]
+    edges = [edge("a:1:1", "a:4:1"), edge("a:1:1", "a:3:1"), edge("a:2:1", "a:3:1")]
+    builder = _builder(monkeypatch, nodes, edges)
+    hits = [{"node_id": "a:1:1", "score": 0.8}, {"node_id": "a:2:1", "score": 0.8}]
+
+    relevance = builder._ppr_relevance(["a:1:1", "a:2:1"], [0.8, 0.8])
+    index = builder.graph.index
+    assert relevance[index["a:3:1"]] > relevance[index["a:4:1"]]
+
+    first = builder.expand_multiple(hits, top_k=2)[0]
+    assert _support(first) == ["a:3:1", "a:4:1"]
+    assert first["supporting_nodes"][0]["score"] == pytest.approx(0.8)
+    assert first["supporting_nodes"][1]["score"] < 0.8
+
+    # A weaker second hit pulls less mass towards the shared node
+    weak = builder._ppr_relevance(["a:1:1", "a:2:1"], [0.8, 0.1])
+    assert weak[index["a:3:1"]] < relevance[index["a:3:1"]]
+
+
+def _three_hit_builder(monkeypatch: pytest.MonkeyPatch) -> GraphContextBuilder:
+    nodes = [moment(f"a:{section}:1", section) for section in range(1, 10)]
+    edges = [
+        edge("a:1:1", "a:5:1"), edge("a:2:1", "a:5:1"),  # shared by the first two hits
+        edge("a:1:1", "a:2:1"),  # the first hit refers to the second one
+        edge("a:5:1", "a:9:1"),  # reached at hop 2 from both
+        edge("a:6:1", "a:1:1", "EXCEPTS"), edge("a:7:1", "a:3:1", "EXCEPTS"),
+        edge("a:3:1", "a:8:1"),
+    ]
+    return _builder(monkeypatch, nodes, edges)
+
+
+HITS = [
+    {"node_id": "a:1:1", "score": 0.6},
+    {"node_id": "a:2:1", "score": 0.9},
+    {"node_id": "a:3:1", "score": 0.7},
+]
+
+
+def test_expand_multiple_assigns_each_node_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    builder = _three_hit_builder(monkeypatch)
+
+    expanded = builder.expand_multiple(HITS)
+
+    # The best-scoring hit owns a shared node and primaries are never support
+    assert [_support(e) for e in expanded] == [["a:6:1"], ["a:5:1", "a:9:1"], ["a:7:1", "a:8:1"]]
+
+    # The normipolku edge reached from both hits is reported under the first
+    paths = [[(p["from"], p["to"]) for p in e["normipolku"]] for e in expanded]
+    assert [path.count(("a:5:1", "a:9:1")) for path in paths] == [1, 0, 0]
+    assert ("a:1:1", "a:2:1") in paths[0]
+
+
+def test_expand_multiple_shares_one_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    builder = _three_hit_builder(monkeypatch)
+
+    # Each hit keeps its mandatory EXCEPTS node; the rest goes to the best optional node
+    assert [_support(e) for e in builder.expand_multiple(HITS, support_budget=3)] == [
+        ["a:6:1"], ["a:5:1"], ["a:7:1"],
+    ]
+    assert [_support(e) for e in builder.expand_multiple(HITS, support_budget=1)] == [["a:6:1"], [], []]
+    assert [e["primary"] for e in builder.expand_multiple(HITS, top_k=2)] == HITS[:2]
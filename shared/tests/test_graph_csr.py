@@ -0,0 +1,135 @@
+"""
+Tests for the CSR graph and its expansion BFS.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.graph.csr import VERTEX_EXTERNAL, VERTEX_NODE, VERTEX_OTHER, CsrGraph, _read_jsonl
+from shared.tests.graph_helpers import edge, moment
+
+GRAPH_DIR = Path(__file__).parent.parent.parent / "graph"
+
+
+def _reference_neighbors(nodes: list[dict], edges: list[dict], node_id: str, max_hops: int) -> list:
+    """The dict-based v8.1 BFS the CSR graph replaced."""
+    by_id = {n["node_id"]: n for n in nodes}
+    adj: dict[str, list[dict]] = {}
+    rev_adj: dict[str, list[dict]] = {}
+    for edge in edges:
+        adj.setdefault(edge["source"], []).append(edge)
+        rev_adj.setdefault(edge["target"], []).append(edge)
+
+    siblings = []
+    if node_id in by_id:
+        node = by_id[node_id]
+        siblings = [nid for nid, n in by_id.items()
+                    if n["law_key"] == node["law_key"] and n["section_num"] == node["section_num"]]
+    siblings = siblings or [node_id]
+
+    visited = set(siblings)
+    queue = [(sid, 0, [node_id]) for sid in siblings]
+    result = []
+    while queue:
+        current, hop, path = queue.pop(0)
+        if hop >= max_hops:
+            continue
+        steps = [(e["target"], e) for e in adj.get(current, []) if e["edge_type"] not in ("HAS_SECTION", "HAS_MOMENT")]
+        steps += [(e["source"], e) for e in rev_adj.get(current, []) if e["edge_type"] == "EXCEPTS"]
+        for vertex, edge in steps:
+            if vertex not in visited:
+                visited.add(vertex)
+                result.append((vertex, edge, hop + 1, path + [vertex]))
+                queue.append((vertex, hop + 1, path + [vertex]))
+    return result
+
+
+def _csr_neighbors(graph: CsrGraph, node_id: str, max_hops: int) -> list:
+    vertex = graph.index.get(node_id)
+    if vertex is None:
+        return []
+    return [
+        (graph.ids[v], graph.edge(e), hop, [graph.ids[p] for p in path])
+        for v, e, hop, path in graph.neighbors(vertex, max_hops)
+    ]
+
+
+def test_siblings_and_bfs_order() -> None:
+    nodes = [moment("a:1:1", 1), moment("a:1:2", 1), moment("a:2:1", 2), moment("a:3:1", 3)]
+    edges = [
+        edge("section:a:1", "a:1:1", "HAS_MOMENT"),
+        edge("a:1:2", "a:2:1"),
+        edge("a:2:1", "external:kpl"),
+        edge("a:3:1", "a:1:1", "EXCEPTS"),
+        edge("a:2:1", "a:3:1", "DEFINES"),
+    ]
+    graph = CsrGraph(nodes, edges)
+
+    assert [graph.ids[v] for v in graph.section_siblings(graph.index["a:1:2"])] == ["a:1:1", "a:1:2"]
+    assert graph.section_siblings(graph.index["external:kpl"]) == []
+    assert [graph.vertex_kind[graph.index[v]] for v in ("a:1:2", "section:a:1", "external:kpl")] == [
+        VERTEX_NODE, VERTEX_OTHER, VERTEX_EXTERNAL,
+    ]
+
+    found = [(nid, edge["edge_type"], hop, path) for nid, edge, hop, path in _csr_neighbors(graph, "a:1:2", 2)]
+    assert found == [
+        ("a:3:1", "EXCEPTS", 1, ["a:1:2", "a:3:1"]),
+        ("a:2:1", "REFERS_TO", 1, ["a:1:2", "a:2:1"]),
+        ("external:kpl", "REFERS_TO", 2, ["a:1:2", "a:2:1", "external:kpl"]),
+    ]
+    assert _csr_neighbors(graph, "a:1:2", 1) == _reference_neighbors(nodes, edges, "a:1:2", 1)
+    assert _csr_neighbors(graph, "missing", 2) == []
+
+
+@pytest.mark.skipif(not (GRAPH_DIR / "edges.jsonl").exists(), reason="graph not built")
+def test_matches_dict_bfs_on_built_graph() -> None:
+    nodes = list(_read_jsonl(GRAPH_DIR / "nodes.jsonl"))
+    edges = list(_read_jsonl(GRAPH_DIR / "edges.jsonl"))
+    graph = CsrGraph(nodes, edges)
+
+    sample = [n["node_id"] for n in nodes[::25]] + [e["target"] for e in edges[::200]]
+    for node_id in sample:
+        assert _csr_neighbors(graph, node_id, 2) == _reference_neighbors(nodes, edges, node_id, 2), node_id
+
+
+def test_multi_source_bfs_matches_single_source() -> None:
+    nodes = [moment("a:1:1", 1), moment("a:1:2", 1), moment("a:2:1", 2), moment("a:3:1", 3)]
+    edges = [
+        edge("a:1:2", "a:2:1"),
+        edge("a:2:1", "external:kpl"),
+        edge("a:3:1", "a:1:1", "EXCEPTS"),
+        edge("a:2:1", "a:3:1", "DEFINES"),
+    ]
+    graph = CsrGraph(nodes, edges)
+    starts = [graph.index[n] for n in ("a:1:1", "a:2:1", "a:1:2", "external:kpl", "a:1:1")]
+
+    assert graph.multi_source_bfs(starts, 2) == [graph.bfs(s, 2) for s in starts]
+    assert graph.neighbors_multi(starts, 1) == [graph.neighbors(s, 1) for s in starts]
+    assert graph.multi_source_bfs([], 2) == []
+
+
+@pytest.mark.skipif(not (GRAPH_DIR / "edges.jsonl").exists(), reason="graph not built")
+def test_built_graph_has_no_wildcard_targets() -> None:
+    nodes = {n["node_id"]: n for n in _read_jsonl(GRAPH_DIR / "nodes.jsonl")}
+    edges = list(_read_jsonl(GRAPH_DIR / "edges.jsonl"))
+    law_roots = {e["source"] for e in edges if e["edge_type"] == "HAS_SECTION"}
+    indexed_law_ids = {root.rsplit(":", 1)[-1] for root in law_roots}
+
+    cross_law = 0
+    for edge in edges:
+        if edge["edge_type"] not in ("REFERS_TO", "EXCEPTS"):
+            continue
+        target = edge["target"]
+        if target.startswith("external:"):
+            # Placeholders only remain for laws outside the graph
+            assert target.split(":", 1)[1] not in indexed_law_ids, edge
+        elif target.startswith("law:"):
+            assert target in law_roots, edge
+        else:
+            assert target in nodes, edge
+            cross_law += nodes[target]["law_key"] != nodes[edge["source"]]["law_key"]
+    assert cross_law > 0
@@ -0,0 +1,49 @@
+"""
+Consistency tests for the materialized k-hop expansion lists.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.graph.csr import CsrGraph
+from shared.graph.khop import KHopCache
+from shared.graph.snapshot import load_snapshot, write_snapshot
+from shared.tests.graph_helpers import edge, moment
+
+GRAPH_DIR = Path(__file__).parent.parent.parent / "graph"
+
+
+def test_lookup_matches_bfs_and_respects_hops() -> None:
+    nodes = [moment("a:1:1", 1), moment("a:2:1", 2), moment("a:3:1", 3)]
+    edges = [
+        edge("a:1:1", "a:2:1"),
+        edge("a:2:1", "a:3:1"),
+        edge("a:3:1", "a:1:*:x", "EXCEPTS"),
+    ]
+    graph = CsrGraph(nodes, edges)
+    graph.khop = KHopCache.build(graph, max_hops=2)
+
+    for v in range(graph.n_nodes):
+        assert graph.neighbors(v, 2) == graph.bfs(v, 2)
+    # Other hop limits and non-node vertices bypass the cache
+    assert graph.neighbors(0, 1) == graph.bfs(0, 1)
+    assert graph.neighbors(graph.index["a:1:*:x"], 2) == graph.bfs(graph.index["a:1:*:x"], 2)
+    assert [hop for _, _, hop, _ in graph.neighbors(0, 2)] == [1, 2]
+
+
+@pytest.mark.skipif(not (GRAPH_DIR / "edges.jsonl").exists(), reason="graph not built")
+def test_snapshot_khop_matches_live_bfs(tmp_path: Path) -> None:
+    for name in ("nodes.jsonl", "edges.jsonl"):
+        shutil.copy2(GRAPH_DIR / name, tmp_path / name)
+    write_snapshot(CsrGraph.from_jsonl(tmp_path / "nodes.jsonl", tmp_path / "edges.jsonl"), tmp_path)
+
+    graph = load_snapshot(tmp_path)
+
+    assert graph.khop is not None and graph.khop.max_hops == 2
+    for v in range(graph.n_nodes):
+        assert graph.khop.lookup(v) == graph.bfs(v, 2), graph.ids[v]
@@ -0,0 +1,77 @@
+"""
+Tests for the PageRank scoring of expansion candidates.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.graph.csr import CsrGraph
+from shared.graph.pagerank import PAGERANK_EDGE_WEIGHTS, TransitionMatrix, global_pagerank
+from shared.graph.snapshot import load_snapshot, write_snapshot
+from shared.tests.graph_helpers import edge, moment
+
+
+def _graph() -> CsrGraph:
+    nodes = [moment("a:1:1", 1), moment("a:1:2", 1), moment("a:2:1", 2), moment("a:3:1", 3)]
+    edges = [
+        edge("section:a:1", "a:1:1", "HAS_MOMENT"),
+        edge("a:1:2", "a:2:1"),
+        edge("a:1:2", "a:3:1", "DEFINES"),
+        edge("a:2:1", "external:kpl"),
+        edge("a:3:1", "a:1:1", "EXCEPTS"),
+        edge("a:2:1", "a:3:1", "DEFINES"),
+    ]
+    return CsrGraph(nodes, edges)
+
+
+def _dense_pagerank(graph: CsrGraph, restart: np.ndarray, damping: float, iterations: int) -> np.ndarray:
+    """Power iteration on the dense column-stochastic matrix of the walk."""
+    n = graph.n_vertices
+    weights = np.zeros((n, n))  # weights[dst, src]
+    for e in range(graph.n_edges):
+        edge = graph.edge(e)
+        w = PAGERANK_EDGE_WEIGHTS.get(edge["edge_type"], 0.0)
+        src, dst = graph.index[edge["source"]], graph.index[edge["target"]]
+        weights[dst, src] += w
+        if edge["edge_type"] == "EXCEPTS":
+            weights[src, dst] += w
+    out = weights.sum(axis=0)
+    dangling = out == 0
+    matrix = weights / np.where(dangling, 1.0, out)
+
+    x = restart
+    for _ in range(iterations):
+        x = damping * (matrix @ x + x[dangling].sum() * restart) + (1 - damping) * restart
+    return x
+
+
+def test_matches_dense_power_iteration() -> None:
+    graph = _graph()
+    transition = TransitionMatrix.build(graph)
+    restarts = np.zeros((graph.n_vertices, 2))
+    restarts[graph.index["a:1:2"], 0] = 1.0
+    restarts[[graph.index["a:2:1"], graph.index["a:3:1"]], 1] = 0.5
+
+    ranks = transition.pagerank(restarts, damping=0.85, iterations=12)
+
+    for j in range(2):
+        expected = _dense_pagerank(graph, restarts[:, j], 0.85, 12)
+        assert np.allclose(ranks[:, j], expected)
+        assert np.allclose(transition.pagerank(restarts[:, j], 0.85, 12), expected)
+    assert np.allclose(ranks.sum(axis=0), 1.0)
+
+
+def test_global_prior_is_stored_in_snapshot(tmp_path: Path) -> None:
+    graph = _graph()
+    prior = global_pagerank(graph)
+    assert np.isclose(prior.sum(), 1.0)
+    assert prior[graph.index["section:a:1"]] == 0.0  # hierarchy edges are not walked
+
+    for name in ("nodes.jsonl", "edges.jsonl"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    write_snapshot(graph, tmp_path, khop_max_hops=None)
+    assert np.array_equal(load_snapshot(tmp_path).pagerank, prior)
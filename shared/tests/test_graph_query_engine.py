@@ -0,0 +1,96 @@
+"""
+Tests for the indexed graph query engine.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.graph.csr import CsrGraph
+from shared.graph.query_engine import GraphQueryEngine, split_section_id
+from shared.tests.graph_helpers import edge, moment
+
+
+def _engine() -> GraphQueryEngine:
+    nodes = [
+        moment("a:1:1", 1), moment("a:1:2", 1), moment("a:2:1", 2),
+        moment("b:1:1", 1, "fi:2/2000"),
+    ]
+    edges = [
+        edge("law:a", "section:a:1", "HAS_SECTION"),
+        edge("section:a:1", "a:1:1", "HAS_MOMENT"),
+        edge("a:2:1", "a:1:2"),
+        edge("b:1:1", "a:1:1", "EXCEPTS"),
+        edge("a:2:1", "external:99/2000"),
+        edge("a:1:2", "external:99/2000"),
+        edge("b:1:1", "external:5/1990", "DEFINES"),
+    ]
+    return GraphQueryEngine(CsrGraph(nodes, edges))
+
+
+def _ids(engine: GraphQueryEngine, vertices: list[int]) -> list[str]:
+    return [engine.graph.ids[v] for v in vertices]
+
+
+def test_section_and_type_indexes() -> None:
+    engine = _engine()
+
+    assert engine.laws() == ["fi:1/2000", "fi:2/2000"]
+    assert _ids(engine, engine.section(1)) == ["a:1:1", "a:1:2", "b:1:1"]
+    assert _ids(engine, engine.section(1, "1/2000")) == ["a:1:1", "a:1:2"]
+    assert engine.section(3) == []
+
+    assert engine.edges("REFERS_TO") == [2, 4, 5]
+    assert engine.edges("SIMILAR_TO") == []
+    assert engine.edge_type_counts()["HAS_MOMENT"] == 1
+    assert [(engine.graph.ids[v], n) for v, n in engine.external_targets()] == [
+        ("external:99/2000", 2), ("external:5/1990", 1),
+    ]
+    assert engine.stats()["moments_per_law"] == {"fi:1/2000": 3, "fi:2/2000": 1}
+
+
+def test_sections_are_split_by_chapter_and_label() -> None:
+    law = "fi:3/2000"
+    nodes = [
+        moment("c:fin@1:1l:5:1", 5, law), moment("c:fin@1:1l:5:2", 5, law),
+        moment("c:fin@1:2l:5:1", 5, law), moment("c:fin@1:2l:5a:1", 5, law),
+        moment("d:fin@1:5:1", 5, "fi:4/2000"),
+    ]
+    engine = GraphQueryEngine(CsrGraph(nodes, []))
+
+    assert split_section_id("c:fin@1:2l:5a:1", 5) == ("2", "5a")
+    assert split_section_id("d:fin@1:5:1", 5) == (None, "5")
+    assert [(key, _ids(engine, members)) for key, members in engine.sections(5, "3/2000")] == [
+        ((law, "1", "5"), ["c:fin@1:1l:5:1", "c:fin@1:1l:5:2"]),
+        ((law, "2", "5"), ["c:fin@1:2l:5:1"]),
+        ((law, "2", "5a"), ["c:fin@1:2l:5a:1"]),
+    ]
+    assert _ids(engine, engine.section(5, chapter="2")) == ["c:fin@1:2l:5:1", "c:fin@1:2l:5a:1"]
+    assert _ids(engine, engine.section(5, "4/2000")) == ["d:fin@1:5:1"]
+    assert engine.stats()["sections"] == 4
+
+
+def test_referrers_neighborhood_and_path() -> None:
+    engine = _engine()
+    index = engine.graph.index
+
+    assert engine.referrers(engine.section(1, "1/2000")) == [3, 2]
+    assert engine.referrers(index["a:1:1"], edge_types=None) == [1, 3]
+    assert engine.referrers(index["external:5/1990"]) == []
+
+    reached = [(engine.graph.ids[v], e, hop, forward) for v, e, hop, forward in engine.neighborhood(index["a:1:2"], 2)]
+    assert reached == [
+        ("external:99/2000", 5, 1, True),
+        ("a:2:1", 2, 1, False),
+    ]
+    assert [v for v, _, _, _ in engine.neighborhood(index["a:1:2"], 1, incoming=False)] == [index["external:99/2000"]]
+
+    assert engine.path(index["a:2:1"], index["a:1:2"]) == [(index["a:1:2"], 2, 1, True)]
+    assert engine.path(index["a:1:1"], index["external:5/1990"]) is None
+    assert engine.path(index["a:1:1"], index["external:5/1990"], directed=False) == [
+        (index["b:1:1"], 3, 1, False),
+        (index["external:5/1990"], 6, 2, True),
+    ]
+    assert engine.path(index["a:1:2"], index["b:1:1"], directed=False) is None
+    assert engine.path(index["a:1:1"], index["a:1:1"]) == []
@@ -0,0 +1,54 @@
+"""
+Tests for the precomputed SIMILAR_TO neighbour table.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.graph.csr import CsrGraph
+from shared.graph.similarity import SimilarityTable, exact_top_k
+from shared.graph.snapshot import load_snapshot, write_snapshot
+from shared.tests.graph_helpers import edge, moment
+
+
+def _unit_rows(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rows = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_blocked_top_k_matches_brute_force() -> None:
+    embeddings = _unit_rows(37, 8)
+    scores = embeddings @ embeddings.T
+    np.fill_diagonal(scores, -np.inf)
+    expected = np.argsort(-scores, axis=1, kind="stable")[:, :5]
+
+    indices, top_scores = exact_top_k(embeddings, 5, block_size=10)
+
+    assert indices.tolist() == expected.tolist()
+    assert np.allclose(top_scores, np.take_along_axis(scores, expected, axis=1))
+    assert exact_top_k(embeddings[:1], 5)[0].shape == (1, 0)
+
+
+def test_table_maps_rows_to_graph_nodes(tmp_path: Path) -> None:
+    nodes = [moment("a:1:1", 1), moment("a:2:1", 2), moment("a:3:1", 3)]
+    graph = CsrGraph(nodes, [edge("a:1:1", "external:kpl")])
+    # Rows in another order, one unknown id, a:2:1 without an embedding
+    ids = ["a:3:1", "b:9:9", "a:1:1"]
+    embeddings = np.array([[1.0, 0.0], [0.0, 1.0], [0.8, 0.6]], dtype=np.float32)
+
+    graph.similar = SimilarityTable.build(graph, ids, embeddings, k=2)
+
+    assert graph.similar_to(graph.index["a:1:1"]) == [(graph.index["a:3:1"], 0.800000011920929)]
+    assert graph.similar_to(graph.index["a:2:1"]) == []
+    assert graph.similar_to(graph.index["a:1:1"], min_score=0.9) == []
+    assert graph.similar_to(graph.index["external:kpl"]) == []
+
+    for name in ("nodes.jsonl", "edges.jsonl"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    write_snapshot(graph, tmp_path, khop_max_hops=None)
+    loaded = load_snapshot(tmp_path)
+    assert [loaded.similar_to(v) for v in range(3)] == [graph.similar_to(v) for v in range(3)]
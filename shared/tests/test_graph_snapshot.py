@@ -0,0 +1,84 @@
+"""
+Tests for the binary graph snapshot and its JSONL fallback.
+"""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.graph.csr import CsrGraph
+from shared.graph.snapshot import StringTable, load_graph, load_snapshot, write_snapshot
+
+GRAPH_DIR = Path(__file__).parent.parent.parent / "graph"
+
+
+def _write_jsonl(graph_dir: Path, nodes: list[dict], edges: list[dict]) -> None:
+    for name, records in (("nodes.jsonl", nodes), ("edges.jsonl", edges)):
+        with open(graph_dir / name, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _small_graph(graph_dir: Path) -> CsrGraph:
+    nodes = [
+        {"node_id": "a:1:1", "node_type": "MOMENT", "law_key": "fi:1/2000", "section_num": 1,
+         "moment": "1", "section_title": "Määritelmät", "text": "Tässä laissa tarkoitetaan..."},
+        {"node_id": "a:2:1", "node_type": "MOMENT", "law_key": "fi:1/2000", "section_num": None,
+         "moment": None, "section_title": "", "text": ""},
+    ]
+    edges = [
+        {"source": "a:2:1", "target": "a:1:1", "edge_type": "DEFINES", "context": "tarkoitetaan"},
+        {"source": "a:1:1", "target": "external:kpl", "edge_type": "REFERS_TO", "context": "kirjanpitolain"},
+    ]
+    _write_jsonl(graph_dir, nodes, edges)
+    return CsrGraph(nodes, edges)
+
+
+def test_snapshot_round_trip(tmp_path: Path) -> None:
+    graph = _small_graph(tmp_path)
+    write_snapshot(graph, tmp_path)
+
+    loaded = load_graph(tmp_path)
+
+    assert isinstance(loaded.text, StringTable)
+    assert loaded.ids == graph.ids
+    assert [loaded.node(v) for v in range(2)] == [graph.node(v) for v in range(2)]
+    assert [loaded.edge(e) for e in range(2)] == [graph.edge(e) for e in range(2)]
+    assert loaded.neighbors(0, 2) == graph.neighbors(0, 2)
+    assert loaded.vertex_kind.tolist() == graph.vertex_kind.tolist()
+
+
+def test_stale_or_missing_snapshot_falls_back_to_jsonl(tmp_path: Path, capsys) -> None:
+    graph = _small_graph(tmp_path)
+    assert isinstance(load_graph(tmp_path).text, list)
+
+    write_snapshot(graph, tmp_path)
+    with open(tmp_path / "edges.jsonl", "a", encoding="utf-8") as f:
+        f.write("\n")
+
+    assert isinstance(load_graph(tmp_path).text, list)
+    assert "older" in capsys.readouterr().out
+
+    with pytest.raises(FileNotFoundError):
+        load_graph(tmp_path / "missing")
+
+
+@pytest.mark.skipif(not (GRAPH_DIR / "edges.jsonl").exists(), reason="graph not built")
+def test_snapshot_matches_built_graph(tmp_path: Path) -> None:
+    for name in ("nodes.jsonl", "edges.jsonl"):
+        shutil.copy2(GRAPH_DIR / name, tmp_path / name)
+    graph = CsrGraph.from_jsonl(tmp_path / "nodes.jsonl", tmp_path / "edges.jsonl")
+    write_snapshot(graph, tmp_path)
+
+    loaded = load_snapshot(tmp_path)
+
+    for v in range(0, graph.n_nodes, 7):
+        assert loaded.node(v) == graph.node(v)
+        assert loaded.neighbors(v, 2) == graph.neighbors(v, 2)
+    for e in range(0, graph.n_edges, 11):
+        assert loaded.edge(e) == graph.edge(e)
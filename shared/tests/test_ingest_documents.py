@@ -0,0 +1,60 @@
+"""
+Tests for the bulk document ingest across repeated runs.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+import docs_layer.scripts.ingest_documents as ingest_documents
+from shared.retrieval import CachedQueryEncoder, QueryEmbeddingCache
+
+
+def _write_statement(path: Path, city: str, year: int, paragraph: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    section = {"title": "Johdanto", "level": 1, "paragraphs": [paragraph], "tables": [], "subsections": []}
+    data = {"city": city, "year": year, "title": f"Tilinpäätös {year}", "pages": [{"page_num": 1, "sections": [section]}]}
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _ingest(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, fake_model) -> dict[str, dict]:
+    monkeypatch.setattr(
+        ingest_documents, "corpus_encoder",
+        lambda model_name: CachedQueryEncoder(model_name, QueryEmbeddingCache(tmp_path / "cache"), model=fake_model),
+    )
+    monkeypatch.setattr(sys, "argv", [
+        "ingest_documents.py", "--input", str(tmp_path / "in"), "--data", str(tmp_path / "data"),
+        "--workers", "1", "--no-table-store",
+    ])
+    ingest_documents.main()
+    return ingest_documents.load_manifest(tmp_path / "data" / ingest_documents.MANIFEST_NAME)
+
+
+def test_later_input_for_an_ingested_bundle(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, fake_model) -> None:
+    parsed = tmp_path / "data" / "lapua" / "2023" / "parsed"
+    first = _write_statement(tmp_path / "in" / "tilinpaatos_2023.json", "lapua", 2023,
+                             "Tilikauden alijäämä oli 1,2 miljoonaa euroa.")
+    assert list(_ingest(monkeypatch, tmp_path, fake_model)) == [str(first.resolve())]
+
+    # A second statement for lapua:2023 while the first is still an input is rejected
+    corrected = _write_statement(tmp_path / "in" / "tilinpaatos_2023_korjattu.json", "lapua", 2023,
+                                 "Tilikauden alijäämä oli 1,3 miljoonaa euroa.")
+    assert list(_ingest(monkeypatch, tmp_path, fake_model)) == [str(first.resolve())]
+    assert sorted(p.name for p in parsed.iterdir()) == ["tilinpaatos_2023.json"]
+
+    # Once the first input is gone the corrected one replaces it
+    first.unlink()
+    manifest = _ingest(monkeypatch, tmp_path, fake_model)
+    assert list(manifest) == [str(corrected.resolve())]
+    assert sorted(p.name for p in parsed.iterdir()) == ["tilinpaatos_2023_korjattu.json"]
+
+    # Nothing left to do
+    assert _ingest(monkeypatch, tmp_path, fake_model) == manifest
@@ -0,0 +1,67 @@
+"""
+Tests for the compiled law router and its keyword automaton.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.query_rules.law_router import CompiledLawRouter, route_query
+from shared.query_rules.term_automaton import TermAutomaton
+
+
+def test_automaton_matches_substring_semantics() -> None:
+    terms = ["kunta", "kunnan", "kunnanhallitus", "hallitus", "tase", "tase-erittelyt", "yhtiö"]
+    automaton = TermAutomaton(terms)
+
+    for text in ["kunnanhallituksen päätös", "tase-erittelyt ja konsernitase", "osakeyhtiön hallitus", ""]:
+        expected = {i for i, t in enumerate(terms) if t in text}
+        assert automaton.find(text) == expected, text
+
+
+def test_automaton_reports_overlapping_occurrences() -> None:
+    automaton = TermAutomaton(["kunnan", "nan", "an"])
+
+    matches = sorted(automaton.iter_matches("kunnan"))
+
+    assert matches == [(6, 0), (6, 1), (6, 2)]
+
+
+def test_scan_counts_explicit_reference_and_anchor() -> None:
+    router = CompiledLawRouter()
+
+    scan = router.scan("KPL ja KPA: kunnan tase-erittelyt")
+
+    # kpa outranks kpl in the explicit-reference priority order
+    assert scan.explicit_law == "kirjanpitoasetus_1339_1997"
+    assert scan.has_municipal
+    assert scan.law_hits["kirjanpitoasetus_1339_1997"] == 2  # erittely, tase-erittelyt
+    assert router.scan("410/2015 110 §").explicit_law == "kuntalaki_410_2015"
+
+
+def test_route_query_explicit_reference() -> None:
+    weights = route_query("KPL 3:1 liitetiedot")
+
+    assert weights["kirjanpitolaki_1336_1997"] == 0.8
+    assert abs(sum(weights.values()) - 1.0) < 1e-9
+
+
+def test_reload_on_mtime_change(tmp_path: Path) -> None:
+    path = tmp_path / "cross_refs.json"
+    path.write_text(json.dumps({"router_keywords": {"hankintalaki_1397_2016": ["hankinta"]}}), encoding="utf-8")
+    router = CompiledLawRouter(path)
+    assert "hankintalaki_1397_2016" not in router.scan("puitejärjestely").law_hits
+
+    path.write_text(
+        json.dumps({"router_keywords": {"hankintalaki_1397_2016": ["hankinta", "puitejärjestely"]}}),
+        encoding="utf-8",
+    )
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert router.refresh()
+    assert not router.refresh()
+    assert router.scan("puitejärjestely").law_hits == {"hankintalaki_1397_2016": 1}
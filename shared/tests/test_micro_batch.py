@@ -0,0 +1,94 @@
+"""
+Tests for the micro-batching query encoder.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval.micro_batch import Histogram, MicroBatchEncoder
+
+
+def _encode_concurrently(encoder: MicroBatchEncoder, texts: list[str]) -> list[np.ndarray]:
+    results: list = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def worker(i: int) -> None:
+        start.wait()
+        results[i] = encoder.encode(texts[i], normalize_embeddings=True)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_requests_share_batches(fake_model) -> None:
+    model = fake_model
+    model.delay_s = 0.02
+    encoder = MicroBatchEncoder(model, window_ms=50, max_batch=8)
+    texts = [f"kysymys {i}" + "x" * i for i in range(8)]
+
+    results = _encode_concurrently(encoder, texts)
+    encoder.close()
+
+    assert [r[0] for r in results] == [float(len(t)) for t in texts]
+    assert len(model.calls) < len(texts)
+    stats = encoder.stats()
+    assert stats["requests"] == 8
+    assert stats["batch_size"]["count"] == stats["batches"] == len(model.calls)
+    assert stats["queue_delay_ms"]["count"] == 8
+
+
+def test_identical_inflight_queries_are_encoded_once(fake_model) -> None:
+    model = fake_model
+    model.delay_s = 0.02
+    encoder = MicroBatchEncoder(model, window_ms=50)
+
+    results = _encode_concurrently(encoder, ["kunnan tase"] * 6)
+    encoder.close()
+
+    assert sum(len(batch) for batch in model.calls) == 1
+    assert all(np.array_equal(r, results[0]) for r in results)
+    assert encoder.stats()["deduplicated"] == 5
+
+
+def test_batch_encode_keeps_order_and_normalize_flag(fake_model) -> None:
+    model = fake_model
+    encoder = MicroBatchEncoder(model, window_ms=1)
+
+    plain = encoder.encode(["a", "bbb"])
+    normalized = encoder.encode("bbb", normalize_embeddings=True)
+    encoder.close()
+
+    assert plain.tolist() == [[2.0, 1.0], [6.0, 1.0]]
+    assert normalized.tolist() == [3.0, 1.0]
+
+
+def test_model_errors_reach_callers() -> None:
+    class Broken:
+        def encode(self, texts, **kwargs):
+            raise RuntimeError("out of memory")
+
+    encoder = MicroBatchEncoder(Broken(), window_ms=1)
+    with pytest.raises(RuntimeError):
+        encoder.encode("kunnan tase")
+    encoder.close()
+
+
+def test_histogram_buckets() -> None:
+    histogram = Histogram((1, 4))
+    for value in (1, 2, 4, 9):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["buckets"] == {"<=1": 1, "<=4": 2, ">4": 1}
+    assert snapshot["count"] == 4 and snapshot["max"] == 9
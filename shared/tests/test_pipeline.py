@@ -0,0 +1,58 @@
+"""
+Tests for the encode-once retrieval pipeline.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.retrieval.pipeline import RetrievalPipeline
+
+
+def test_stages_share_one_encode(fake_model) -> None:
+    model = fake_model
+    pipeline = RetrievalPipeline(model)
+
+    run = pipeline.run("kunnan tase", {
+        "law": lambda vector: ("law", vector),
+        "doc": lambda vector: ("doc", vector),
+    })
+
+    assert model.calls == [["kunnan tase"]]
+    assert run.results == {"law": ("law", [11.0, 1.0]), "doc": ("doc", [11.0, 1.0])}
+    assert set(run.stage_ms) == {"law", "doc"}
+
+
+def test_precomputed_embedding_skips_encode(fake_model) -> None:
+    model = fake_model
+
+    run = RetrievalPipeline(model).run("q", {"law": len}, embedding=[0.0, 1.0, 2.0])
+
+    assert model.calls == []
+    assert run.results == {"law": 3}
+
+
+def test_encode_batch_is_one_call(fake_model) -> None:
+    model = fake_model
+    pipeline = RetrievalPipeline(model)
+
+    vectors = pipeline.encode_batch(["tase", "liitetiedot", "tase"])
+
+    assert model.calls == [["tase", "liitetiedot"]]
+    assert vectors[0] == vectors[2] == [4.0, 1.0]
+    assert pipeline.encode_batch([]) == []
+    assert pipeline.encode_calls == 1
+
+
+def test_failed_stage_is_reported(fake_model) -> None:
+    def broken(vector):
+        raise RuntimeError("index missing")
+
+    run = RetrievalPipeline(fake_model).run("q", {"ok": len, "broken": broken})
+
+    assert run.results == {"ok": 2}
+    with pytest.raises(RuntimeError):
+        run.raise_failed()
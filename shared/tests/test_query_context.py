@@ -0,0 +1,79 @@
+"""
+Tests for the shared per-query context.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.query_rules import query_context
+from shared.query_rules.law_router import route_query
+from shared.query_rules.query_context import QueryContext, register_signal_family
+
+
+register_signal_family("test_municipal", ["kunnan", "kunta", "kunnan tilinpäätös"])
+register_signal_family("test_finance", ["tase", "tilinpäätös"])
+
+
+def test_text_features() -> None:
+    ctx = QueryContext("Kuntalaki 118 § 3 mom ja KPL 3:1, vuosi 2025?")
+
+    assert ctx.normalized == "kuntalaki 118 § 3 mom ja kpl 3:1, vuosi 2025?"
+    assert {"kuntalaki", "118", "kpl", "2025"} <= ctx.tokens
+    assert "vuosi 2025" in ctx.bigrams
+    assert ctx.terms == ctx.tokens | ctx.bigrams
+    assert ctx.section_citations == ("118",)
+    assert ctx.chapter_citations == (("3", "1"),)
+    assert ctx.years == (2025,)
+    assert QueryContext("§ 110 a ja 62b §").section_citations == ("110a", "62b")
+
+
+def test_signal_families_match_substrings() -> None:
+    ctx = QueryContext("Kunnan tilinpäätös ja tase")
+
+    assert ctx.signals("test_municipal") == {"kunnan", "kunnan tilinpäätös"}
+    assert ctx.signals("test_finance") == {"tase", "tilinpäätös"}
+    assert not QueryContext("osakeyhtiö").has_signal("test_municipal")
+    with pytest.raises(KeyError):
+        ctx.signals("no_such_family")
+
+
+def test_register_conflicting_family_raises() -> None:
+    register_signal_family("test_municipal", ["kunnan", "kunta", "kunnan tilinpäätös"])
+    with pytest.raises(ValueError):
+        register_signal_family("test_municipal", ["kunta"])
+
+
+def test_memo_computes_once() -> None:
+    ctx = QueryContext("kunnan talousarvio")
+    calls = []
+
+    for _ in range(3):
+        ctx.memo("stage", lambda: calls.append(1) or len(calls))
+
+    assert calls == [1]
+
+
+def test_route_query_accepts_context() -> None:
+    query = "tilinpäätöksen liitetiedot ja tase"
+    ctx = QueryContext(query)
+
+    assert route_query(ctx) == route_query(query)
+    assert QueryContext.of(ctx) is ctx
+
+
+def test_tracing_counts_contexts() -> None:
+    query_context.reset_trace()
+    query_context.set_tracing(True)
+    try:
+        ctx = QueryContext("kunnan tase")
+        route_query(ctx)
+    finally:
+        query_context.set_tracing(False)
+
+    summary = query_context.trace_summary()
+    assert summary["contexts"] == 1
+    assert "route_scan" in summary["memo_ms"]
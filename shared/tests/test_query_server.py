@@ -0,0 +1,90 @@
+"""
+Tests for the resident query service and its HTTP client.
+"""
+
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from scripts.query_client import QueryClient, QueryServerError
+from scripts.query_server import QueryService, make_handler
+from shared.retrieval import DenseLawIndex, QueryEmbeddingCache
+
+LAWS = ("kuntalaki_410_2015", "kirjanpitolaki_1336_1997")
+
+
+def _dense_index() -> DenseLawIndex:
+    rows = [(law_key, section) for law_key in LAWS for section in range(1, 4)]
+    return DenseLawIndex(
+        [[1.0, float(section)] for _, section in rows],
+        [law_key for law_key, _ in rows],
+        [f"{law_key}:{section}" for law_key, section in rows],
+        [f"{law_key} {section} §" for law_key, section in rows],
+        [{"law_key": law_key, "section_num": section, "node_id": f"{law_key}:{section}"} for law_key, section in rows],
+    )
+
+
+@pytest.fixture
+def server(tmp_path: Path, fake_model):
+    """A QueryService on an ephemeral port; yields (client, service)."""
+    service = QueryService(
+        doc_data_dir=tmp_path / "docs",
+        dense_index=_dense_index(),
+        model=fake_model,
+        embedding_cache=QueryEmbeddingCache(tmp_path / "cache"),
+    )
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield QueryClient(f"http://127.0.0.1:{httpd.server_address[1]}"), service
+    httpd.shutdown()
+    httpd.server_close()
+    service.batcher.close()
+
+
+def test_health_reports_the_loaded_laws(server) -> None:
+    client, _ = server
+
+    health = client.health()
+
+    assert health["status"] == "ok"
+    assert health["backend"] == "dense"
+    assert client.laws() == sorted(LAWS)
+    assert health["doc_bundles"] == []
+
+
+def test_multi_law_query_is_encoded_once(server, fake_model) -> None:
+    client, service = server
+    query = "kunnan talousarvion alijäämä"
+
+    hits = client.multi_law_query(query, total_k=4, min_score=-1.0)
+    assert fake_model.encoded.count(query) == 1
+    assert 0 < len(hits) <= 4
+    assert {hit["law_key"] for hit in hits} <= set(LAWS)
+    assert all(hit["node_id"] == f"{hit['law_key']}:{hit['section_num']}" for hit in hits)
+
+    # The repeat is served from the query-embedding cache
+    assert client.multi_law_query(query, total_k=4, min_score=-1.0) == hits
+    assert fake_model.encoded.count(query) == 1
+    assert service.request_count == 2
+
+
+def test_client_raises_on_errors(server) -> None:
+    client, service = server
+
+    with pytest.raises(QueryServerError, match="Unknown endpoint: /v2/health"):
+        QueryClient(f"{client.base_url}/v2").health()
+    with pytest.raises(QueryServerError, match="Missing 'query'"):
+        client.multi_law_query("  ")
+    assert service.request_count == 0
+
+    with pytest.raises(QueryServerError, match="not reachable"):
+        QueryClient("http://127.0.0.1:9", timeout=1.0).health()
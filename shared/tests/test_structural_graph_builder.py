@@ -0,0 +1,189 @@
+"""
+Tests for reference parsing and resolution in the structural legal graph builder.
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import scripts.build_structural_legal_graph as graph_builder
+from scripts.build_structural_legal_graph import (
+    build_law_index,
+    build_node_index,
+    build_section_index,
+    parse_moments,
+    parse_section_references,
+    parse_texts,
+    process_moment,
+    resolve_section_reference,
+)
+
+# A law whose section numbering restarts in every chapter (like osakeyhtiölaki)
+CHAPTERED = "9/2000"
+
+
+def _moment(law_id: str, chapter: int, section: int, moment: int, text: str = "") -> dict:
+    return {
+        "law_id": law_id,
+        "law_key": f"fi:act:{law_id}",
+        "node_id": f"{law_id}:fin@1:{chapter}l:{section}:{moment}",
+        "chapter": f"{chapter} luku",
+        "section_id": str(section),
+        "section_num": section,
+        "section_title": "",
+        "moment": str(moment),
+        "text": text,
+    }
+
+
+def _corpus() -> list[dict]:
+    return [
+        _moment(CHAPTERED, 1, 5, 1), _moment(CHAPTERED, 1, 5, 2), _moment(CHAPTERED, 1, 6, 1),
+        _moment(CHAPTERED, 2, 5, 1), _moment(CHAPTERED, 2, 6, 1),
+    ]
+
+
+def _targets(source: dict, moments: list[dict], unresolved: Counter | None = None) -> list[tuple[str, str]]:
+    corpus = moments + [source]
+    _, edges = process_moment(
+        source, build_node_index(corpus), build_section_index(corpus), build_law_index(corpus), unresolved,
+    )
+    return [(edge["target"], edge["edge_type"]) for edge in edges]
+
+
+def test_section_without_chapter_resolves_in_the_own_chapter() -> None:
+    moments = _corpus()
+    node_index, section_index = build_node_index(moments), build_section_index(moments)
+
+    assert sorted(section_index[(CHAPTERED, "5")]) == ["1", "2"]
+    assert resolve_section_reference(CHAPTERED, 5, None, None, "2", node_index, section_index) == (
+        [f"{CHAPTERED}:fin@1:2l:5:1"], None,
+    )
+    assert resolve_section_reference(CHAPTERED, 5, None, "1", "2", node_index, section_index) == (
+        [f"{CHAPTERED}:fin@1:1l:5:1", f"{CHAPTERED}:fin@1:1l:5:2"], None,
+    )
+    # Another law's reference has no chapter of its own to fall back to
+    assert resolve_section_reference(CHAPTERED, 5, None, None, None, node_index, section_index) == (
+        [], "ambiguous_chapter",
+    )
+
+    source = _moment(CHAPTERED, 2, 7, 1, "Mitä 5 §:ssä säädetään, koskee myös tätä pykälää.")
+    assert _targets(source, moments) == [(f"{CHAPTERED}:fin@1:2l:5:1", "REFERS_TO")]
+
+
+def test_moment_and_section_references_become_concrete_edges() -> None:
+    # Formerly the placeholders '9/2000:*:5:2' and '9/2000:fin@1:6:*'
+    source = _moment(CHAPTERED, 1, 7, 1, "Sen estämättä, mitä 5 § 2 momentti säätää, sovelletaan 6 §:ää.")
+
+    assert _targets(source, _corpus()) == [
+        (f"{CHAPTERED}:fin@1:1l:5:2", "EXCEPTS"),
+        (f"{CHAPTERED}:fin@1:1l:6:1", "EXCEPTS"),
+    ]
+
+
+def test_unresolved_references_are_counted_by_reason() -> None:
+    source = _moment(
+        CHAPTERED, 1, 7, 1,
+        "Tässä tarkoitettu 99 §, 3 luvun 5 §, 5 § 7 momentti ja vaalilain 93 § eivät ole tässä laissa.",
+    )
+    unresolved: Counter[str] = Counter()
+
+    edges = _targets(source, _corpus(), unresolved)
+
+    assert unresolved == {"section_missing": 1, "chapter_missing": 1, "moment_missing": 1, "other_law": 1}
+    assert edges == [(f"definition:{source['node_id']}", "DEFINES")]
+
+
+def _laws() -> list[dict]:
+    return [
+        _moment("1336/1997", 1, 1, 1), _moment("1336/1997", 3, 1, 1),  # kirjanpitolaki
+        _moment("624/2006", 1, 1, 1), _moment("624/2006", 1, 5, 1),  # osakeyhtiölaki
+    ]
+
+
+def test_reference_into_another_indexed_law() -> None:
+    source = _moment("410/2015", 13, 113, 1, "Tilinpäätöksessä noudatetaan kirjanpitolain (1336/1997) 3 luvun 1 §:ää.")
+
+    # The section edge links the law, so the mention is not repeated
+    assert _targets(source, _laws()) == [("1336/1997:fin@1:3l:1:1", "REFERS_TO")]
+
+
+def test_named_law_without_section_points_to_the_law_root() -> None:
+    source = _moment("410/2015", 13, 113, 1, "Kunnan kirjanpitoon sovelletaan kirjanpitolakia.")
+    in_chapter = _moment("410/2015", 13, 113, 2, "Lisäksi noudatetaan kirjanpitolain 3 luvun säännöksiä.")
+
+    assert _targets(source, _laws()) == [("law:fi:act:1336/1997", "REFERS_TO")]
+    assert _targets(in_chapter, _laws()) == [("1336/1997:fin@1:3l:1:1", "REFERS_TO")]
+
+
+def test_compound_law_name_is_not_osakeyhtiolaki() -> None:
+    mention = _moment("410/2015", 1, 9, 1, "Yhtiöön sovelletaan asunto-osakeyhtiölakia.")
+    section = _moment("410/2015", 1, 9, 2, "Asunto-osakeyhtiölain 5 §:ssä tarkoitettu yhtiökokous.")
+    unresolved: Counter[str] = Counter()
+
+    assert _targets(mention, _laws()) == []
+    # Not osakeyhtiölaki 5 §, and not 5 § of the referring law either
+    assert _targets(section, _laws() + [_moment("410/2015", 1, 5, 1)], unresolved) == []
+    assert unresolved == {"other_law": 1}
+
+
+def test_unindexed_law_stays_external() -> None:
+    source = _moment("410/2015", 1, 9, 1, "Vaaleista säädetään vaalilaissa (714/1998) ja vaalilain (714/1998) 93 §:ssä.")
+    unresolved: Counter[str] = Counter()
+
+    assert _targets(source, _laws(), unresolved) == [("external:714/1998", "REFERS_TO")]
+    assert unresolved == {"other_law": 1}
+
+
+# (text, (section, moment) pairs found by the v8.1 four-pattern parser)
+BASELINE_REFERENCES = [
+    ("Valtuusto päättää 14 §:ssä tarkoitetuista asioista.", {(14, None)}),
+    ("Edellä 110 §:n 3 momentissa tarkoitettu alijäämä on katettava.", {(110, 3)}),
+    ("Mitä 2 luvun 5 §:ssä ja 7 §:ssä säädetään, sovelletaan myös.", {(5, None), (7, None)}),
+    ("Sen estämättä, mitä 14 § 2 momentti säätää.", {(14, 2)}),
+    ("Kirjanpitovelvollisen on noudatettava 8 a luvun 3 §:ää.", {(3, None)}),
+    ("Tarkastuslautakunnan on 121 §:n 1 momentin mukaisesti arvioitava 62 ja 63 §.", {(63, None), (121, 1)}),
+    ("Katso 5 §:ää ja 5 § 1 momentissa sekä 3 §:n säännöksiä.", {(3, None), (5, 1)}),
+    ("Tässä pykälässä ei viitata mihinkään.", set()),
+]
+
+
+def test_tokenizer_matches_the_baseline_parser() -> None:
+    for text, expected in BASELINE_REFERENCES:
+        assert {(r["section_num"], r["moment_num"]) for r in parse_section_references(text)} == expected, text
+
+    # Same sections as the baseline, which merged the chapters into one reference
+    references = parse_section_references("Jollei 16 luvun 10 §:stä tai 17 luvun 10 §:stä muuta johdu, sovelletaan 10 § 2 mom.")
+    assert [(r["chapter"], r["section_num"], r["moment_num"]) for r in references] == [
+        (None, 10, 2), ("16", 10, None), ("17", 10, None),
+    ]
+    assert parse_section_references("8 a luvun 3 §:ää")[0]["chapter"] == "8a"
+
+
+def test_reference_cache_misses_on_new_text_or_parser_version(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    cache_path = tmp_path / "graph_references.jsonl"
+    moments = [{"text": text} for text, _ in BASELINE_REFERENCES]
+    moments.append({"text": moments[0]["text"]})  # parsed once
+
+    parsed, count = parse_moments(moments, 1, cache_path)
+    assert count == len(BASELINE_REFERENCES)
+    assert parse_moments(moments, 1, cache_path) == (parsed, 0)
+
+    moments[1] = {"text": "Muutettu viittaus 15 §:ään."}
+    changed, count = parse_moments(moments, 1, cache_path)
+    assert count == 1
+    assert [r["section_num"] for r in changed[1]["references"]] == [15]
+
+    monkeypatch.setattr(graph_builder, "PARSER_VERSION", graph_builder.PARSER_VERSION + 1)
+    assert parse_moments(moments, 1, cache_path)[1] == len(BASELINE_REFERENCES)
+
+
+def test_parallel_parse_matches_serial(monkeypatch: pytest.MonkeyPatch) -> None:
+    texts = [text for text, _ in BASELINE_REFERENCES] * 3
+    monkeypatch.setattr(graph_builder, "PARALLEL_MIN_TEXTS", 1)
+
+    assert parse_texts(texts, 2) == parse_texts(texts, 1)
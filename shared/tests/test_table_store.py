@@ -0,0 +1,101 @@
+"""
+Tests for the columnar financial table store.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.documents.table_store import TableStore, parse_numeric
+
+
+def _table(title: str, rows: list[list[str]]) -> dict:
+    return {"title": title, "rows": [{"cells": cells} for cells in rows]}
+
+
+def _document(city: str, year: int) -> dict:
+    return {
+        "city": city,
+        "year": year,
+        "pages": [
+            {"page_num": 3, "sections": [{
+                "title": "Tuloslaskelma",
+                "tables": [_table("Tuloslaskelma", [
+                    ["Tuloslaskelma"],
+                    ["Toimintatuotot", "12 500", "11 900"],
+                    ["Toimintakate", "-45 222 212", "-43 000 000"],
+                ])],
+                "subsections": [{"title": "Rahoitus", "tables": [_table("Rahoituslaskelma", [
+                    ["Lainakanta", "1,5", "n/a"],
+                ])]}],
+            }]},
+            {"page_num": 4, "sections": [{"title": "Tase", "tables": [_table("Tase", [["Otsikko"]])]}]},
+        ],
+    }
+
+
+def _store() -> TableStore:
+    return TableStore.from_documents([_document("Lapua", 2023), _document("Seinäjoki", 2022)])
+
+
+def test_flattens_documents() -> None:
+    store = _store()
+
+    assert store.cities == ["Lapua", "Seinäjoki"]
+    assert (len(store), store.n_tables) == (6, 4)  # header rows and the empty table are skipped
+    assert store.record(1) == {
+        "city": "Lapua", "year": 2023, "page": 3, "section": "Tuloslaskelma", "table_title": "Tuloslaskelma",
+        "row_name": "Toimintakate", "row_idx": 2, "current_text": "-45 222 212", "previous_text": "-43 000 000",
+        "current": -45222212.0, "previous": -43000000.0,
+    }
+    assert store.record(2)["section"] == "Rahoitus"
+    assert store.record(2)["previous"] is None
+
+
+def test_search_scores_and_scope() -> None:
+    store = _store()
+
+    # "kate" is a substring of the "toimintakate" token; the title adds one point per keyword
+    assert store.search("toimintakate tuloslaskelma") == [(1, 3), (4, 3), (0, 1), (3, 1)]
+    assert store.search("kate", limit=1) == [(1, 2)]
+    assert store.search("kate", city="Seinäjoki") == [(4, 2)]
+    assert store.search("kate", city="Seinäjoki", year=2023) == []
+    assert store.search("kate", city="Helsinki") == []
+    assert store.search("") == []
+
+
+def test_where_filters_values() -> None:
+    store = _store()
+
+    assert store.where("current", low=0).tolist() == [0, 2, 3, 5]
+    assert store.where("previous", high=0).tolist() == [1, 4]
+    assert store.where("previous").tolist() == [0, 1, 3, 4]  # NaN never matches
+    assert store.where("current", low=0, rows=store.scope(year=2022)).tolist() == [3, 5]
+    assert store.where("current", rows=np.array([1, 2])).tolist() == [1, 2]
+
+
+def test_save_load_and_covers(tmp_path: Path) -> None:
+    path = tmp_path / "tilinpaatos_2023.json"
+    path.write_text(json.dumps(_document("Lapua", 2023)), encoding="utf-8")
+    store = TableStore.from_parsed_files([path])
+    store.save(tmp_path / "store.npz")
+
+    loaded = TableStore.load(tmp_path / "store.npz")
+    assert loaded.covers([path])
+    assert loaded.search("kate") == store.search("kate")
+    assert [loaded.record(i) for i in range(len(loaded))] == [store.record(i) for i in range(len(store))]
+
+    path.write_text(json.dumps(_document("Lapuan kaupunki", 2023)), encoding="utf-8")
+    assert not loaded.covers([path])
+
+
+def test_parse_numeric() -> None:
+    assert parse_numeric("-45 222 212") == -45222212
+    assert parse_numeric("1 234,5") == 1234.5
+    assert parse_numeric("− 12") == -12
+    assert parse_numeric("") is None
+    assert parse_numeric("n/a") is None